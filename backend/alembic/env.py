@@ -14,7 +14,8 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # Импортируем настройки и модели
 from src.core.config import settings
-from src.core.database import Base
+from src.core.database import sync_url
+from src.database import Base
 
 # Импортируем все модели, чтобы они были зарегистрированы
 from src.models import material, user, workflow, certificate
@@ -41,19 +42,9 @@ target_metadata = Base.metadata
 
 def get_database_url():
     """
-    Получение URL базы данных из настроек
+    Получение URL базы данных из настроек (для синхронного драйвера)
     """
-    url = settings.DATABASE_URL
-
-    # Преобразуем URL для синхронного драйвера
-    if url.startswith("sqlite:///"):
-        return url
-    elif url.startswith("postgresql://"):
-        return url
-    elif url.startswith("postgresql+asyncpg://"):
-        return url.replace("postgresql+asyncpg://", "postgresql://")
-    else:
-        return url
+    return sync_url(settings.DATABASE_URL)
 
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,27 @@
+"""Add version column to materials
+
+Revision ID: 7c2e9a4f1b63
+Revises: 3bfebccbdb52
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a4f1b63'
+down_revision = '3bfebccbdb52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'materials',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('materials', 'version')
@@ -0,0 +1,98 @@
+"""Move material reservations from metadata JSON to a ledger table
+
+Revision ID: a41d6e0c9b27
+Revises: 7c2e9a4f1b63
+Create Date: 2026-10-19 10:15:00.000000
+
+"""
+from datetime import datetime
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d6e0c9b27'
+down_revision = '7c2e9a4f1b63'
+branch_labels = None
+depends_on = None
+
+
+def _load(value):
+    if value is None or isinstance(value, dict):
+        return value or {}
+    return json.loads(value)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reservations',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('material_id', sa.Integer(), sa.ForeignKey('materials.id'), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('purpose', sa.String(length=200), nullable=False),
+        sa.Column('reserved_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('reserved_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_reservations_id', 'reservations', ['id'])
+    op.create_index('ix_reservations_material_reserved_at', 'reservations', ['material_id', 'reserved_at'])
+    op.create_index('ix_reservations_purpose_reserved_at', 'reservations', ['purpose', 'reserved_at'])
+    op.create_index('ix_reservations_reserved_at', 'reservations', ['reserved_at'])
+    op.add_column(
+        'materials',
+        sa.Column('reserved_quantity', sa.Float(), nullable=False, server_default='0')
+    )
+
+    # Переносим накопленные в metadata резервирования в журнал
+    bind = op.get_bind()
+    materials = sa.table(
+        'materials',
+        sa.column('id', sa.Integer),
+        sa.column('material_metadata', sa.JSON),
+        sa.column('reserved_quantity', sa.Float),
+    )
+    reservations = sa.table(
+        'reservations',
+        sa.column('material_id', sa.Integer),
+        sa.column('quantity', sa.Float),
+        sa.column('purpose', sa.String),
+        sa.column('reserved_by', sa.Integer),
+        sa.column('reserved_at', sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(materials.c.id, materials.c.material_metadata)
+        .where(materials.c.material_metadata.isnot(None))
+    ).all()
+    for material_id, raw in rows:
+        metadata = _load(raw)
+        entries = metadata.pop('reservations', None)
+        if not entries:
+            continue
+        bind.execute(reservations.insert(), [
+            {
+                'material_id': material_id,
+                'quantity': float(entry['quantity']),
+                'purpose': entry.get('purpose') or '',
+                'reserved_by': int(entry['reserved_by']),
+                'reserved_at': datetime.fromisoformat(entry['reserved_at']),
+            }
+            for entry in entries
+        ])
+        bind.execute(
+            materials.update()
+            .where(materials.c.id == material_id)
+            .values(
+                material_metadata=metadata,
+                reserved_quantity=sum(float(entry['quantity']) for entry in entries),
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('materials', 'reserved_quantity')
+    op.drop_index('ix_reservations_reserved_at', table_name='reservations')
+    op.drop_index('ix_reservations_purpose_reserved_at', table_name='reservations')
+    op.drop_index('ix_reservations_material_reserved_at', table_name='reservations')
+    op.drop_index('ix_reservations_id', table_name='reservations')
+    op.drop_table('reservations')
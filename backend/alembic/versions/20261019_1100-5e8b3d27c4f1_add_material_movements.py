@@ -0,0 +1,93 @@
+"""Move material location history from metadata JSON to a movements table
+
+Revision ID: 5e8b3d27c4f1
+Revises: a41d6e0c9b27
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from datetime import datetime
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b3d27c4f1'
+down_revision = 'a41d6e0c9b27'
+branch_labels = None
+depends_on = None
+
+
+def _load(value):
+    if value is None or isinstance(value, dict):
+        return value or {}
+    return json.loads(value)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'material_movements',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('material_id', sa.Integer(), sa.ForeignKey('materials.id'), nullable=False),
+        sa.Column('from_location', sa.String(length=200), nullable=True),
+        sa.Column('to_location', sa.String(length=200), nullable=False),
+        sa.Column('moved_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('moved_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_material_movements_id', 'material_movements', ['id'])
+    op.create_index('ix_material_movements_material_moved_at', 'material_movements', ['material_id', 'moved_at'])
+    op.create_index('ix_material_movements_to_location_moved_at', 'material_movements', ['to_location', 'moved_at'])
+    op.create_index('ix_materials_location', 'materials', ['location'])
+
+    # В metadata хранились только покинутые места: запись i означает
+    # переезд из entries[i] в entries[i + 1] (последний — в текущее место)
+    bind = op.get_bind()
+    materials = sa.table(
+        'materials',
+        sa.column('id', sa.Integer),
+        sa.column('location', sa.String),
+        sa.column('material_metadata', sa.JSON),
+    )
+    movements = sa.table(
+        'material_movements',
+        sa.column('material_id', sa.Integer),
+        sa.column('from_location', sa.String),
+        sa.column('to_location', sa.String),
+        sa.column('moved_by', sa.Integer),
+        sa.column('moved_at', sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(materials.c.id, materials.c.location, materials.c.material_metadata)
+        .where(materials.c.material_metadata.isnot(None))
+    ).all()
+    for material_id, location, raw in rows:
+        metadata = _load(raw)
+        entries = metadata.pop('location_history', None)
+        if not entries:
+            continue
+        targets = [entry['location'] for entry in entries[1:]] + [location]
+        bind.execute(movements.insert(), [
+            {
+                'material_id': material_id,
+                'from_location': entry['location'],
+                'to_location': target,
+                'moved_by': int(entry['moved_by']),
+                'moved_at': datetime.fromisoformat(entry['moved_at']),
+            }
+            for entry, target in zip(entries, targets)
+            if target is not None
+        ])
+        bind.execute(
+            materials.update()
+            .where(materials.c.id == material_id)
+            .values(material_metadata=metadata)
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_materials_location', table_name='materials')
+    op.drop_index('ix_material_movements_to_location_moved_at', table_name='material_movements')
+    op.drop_index('ix_material_movements_material_moved_at', table_name='material_movements')
+    op.drop_index('ix_material_movements_id', table_name='material_movements')
+    op.drop_table('material_movements')
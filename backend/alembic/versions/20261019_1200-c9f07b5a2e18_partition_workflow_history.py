@@ -0,0 +1,117 @@
+"""Workflow history: composite index, archive index, PostgreSQL partitioning
+
+Revision ID: c9f07b5a2e18
+Revises: 5e8b3d27c4f1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f07b5a2e18'
+down_revision = '5e8b3d27c4f1'
+branch_labels = None
+depends_on = None
+
+# Сколько месяцев вперед создать секции сразу; дальше их ведет
+# scripts/archive_history.py
+MONTHS_AHEAD = 3
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_postgresql() -> None:
+    """Пересоздание workflow_states как таблицы, секционированной по changed_at"""
+    bind = op.get_bind()
+    op.execute("UPDATE workflow_states SET changed_at = now() WHERE changed_at IS NULL")
+    op.execute("ALTER TABLE workflow_states RENAME TO workflow_states_unpartitioned")
+    op.execute(
+        "CREATE TABLE workflow_states (LIKE workflow_states_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (changed_at)"
+    )
+    op.execute("ALTER TABLE workflow_states ALTER COLUMN changed_at SET NOT NULL")
+
+    first = bind.execute(sa.text("SELECT min(changed_at) FROM workflow_states_unpartitioned")).scalar()
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        following = _next_month(month)
+        op.execute(
+            f"CREATE TABLE workflow_states_p{month:%Y%m} PARTITION OF workflow_states "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE workflow_states_default PARTITION OF workflow_states DEFAULT")
+
+    op.execute("INSERT INTO workflow_states SELECT * FROM workflow_states_unpartitioned")
+    # Последовательность id принадлежала старой таблице и удалилась бы вместе с ней
+    op.execute("ALTER SEQUENCE workflow_states_id_seq OWNED BY workflow_states.id")
+    op.execute("DROP TABLE workflow_states_unpartitioned")
+
+    # Ключ секционированной таблицы обязан включать ключ секционирования
+    op.create_primary_key('workflow_states_pkey', 'workflow_states', ['id', 'changed_at'])
+    op.create_index('ix_workflow_states_id', 'workflow_states', ['id'])
+    op.create_foreign_key(
+        'workflow_states_material_id_fkey', 'workflow_states', 'materials', ['material_id'], ['id']
+    )
+    op.create_foreign_key(
+        'workflow_states_changed_by_fkey', 'workflow_states', 'users', ['changed_by'], ['id']
+    )
+
+
+def _unpartition_postgresql() -> None:
+    op.execute("ALTER TABLE workflow_states RENAME TO workflow_states_partitioned")
+    op.execute("CREATE TABLE workflow_states (LIKE workflow_states_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO workflow_states SELECT * FROM workflow_states_partitioned")
+    op.execute("ALTER SEQUENCE workflow_states_id_seq OWNED BY workflow_states.id")
+    op.execute("DROP TABLE workflow_states_partitioned CASCADE")
+    op.create_primary_key('workflow_states_pkey', 'workflow_states', ['id'])
+    op.create_index('ix_workflow_states_id', 'workflow_states', ['id'])
+    op.create_foreign_key(
+        'workflow_states_material_id_fkey', 'workflow_states', 'materials', ['material_id'], ['id']
+    )
+    op.create_foreign_key(
+        'workflow_states_changed_by_fkey', 'workflow_states', 'users', ['changed_by'], ['id']
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _partition_postgresql()
+
+    op.create_index(
+        'ix_workflow_states_material_changed_at', 'workflow_states', ['material_id', 'changed_at']
+    )
+
+    op.create_table(
+        'workflow_history_archives',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('material_id', sa.Integer(), sa.ForeignKey('materials.id'), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False),
+        sa.Column('length', sa.Integer(), nullable=False),
+        sa.Column('states_count', sa.Integer(), nullable=False),
+        sa.Column('first_changed_at', sa.DateTime(timezone=True)),
+        sa.Column('last_changed_at', sa.DateTime(timezone=True)),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_workflow_history_archives_id', 'workflow_history_archives', ['id'])
+    op.create_index('ix_workflow_history_archives_material_id', 'workflow_history_archives', ['material_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflow_history_archives_material_id', table_name='workflow_history_archives')
+    op.drop_index('ix_workflow_history_archives_id', table_name='workflow_history_archives')
+    op.drop_table('workflow_history_archives')
+    op.drop_index('ix_workflow_states_material_changed_at', table_name='workflow_states')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _unpartition_postgresql()
@@ -0,0 +1,46 @@
+"""Hash-chained workflow history and daily Merkle checkpoints
+
+Revision ID: e2a6f4d81c30
+Revises: c9f07b5a2e18
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6f4d81c30'
+down_revision = 'c9f07b5a2e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Существующая история остается неподписанной; подписать ее можно
+    # командой scripts/audit_history.py seal
+    op.add_column('workflow_states', sa.Column('prev_hash', sa.String(length=64), nullable=True))
+    op.add_column('workflow_states', sa.Column('row_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_workflow_states_changed_at', 'workflow_states', ['changed_at'])
+    op.add_column(
+        'workflow_history_archives', sa.Column('last_row_hash', sa.String(length=64), nullable=True)
+    )
+
+    op.create_table(
+        'workflow_checkpoints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False, unique=True),
+        sa.Column('root_hash', sa.String(length=64), nullable=False),
+        sa.Column('leaf_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_workflow_checkpoints_id', 'workflow_checkpoints', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflow_checkpoints_id', table_name='workflow_checkpoints')
+    op.drop_table('workflow_checkpoints')
+    op.drop_column('workflow_history_archives', 'last_row_hash')
+    op.drop_index('ix_workflow_states_changed_at', table_name='workflow_states')
+    op.drop_column('workflow_states', 'row_hash')
+    op.drop_column('workflow_states', 'prev_hash')
@@ -0,0 +1,69 @@
+"""Content-addressed document store and resumable uploads
+
+Revision ID: b7d2c94e5a13
+Revises: e2a6f4d81c30
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2c94e5a13'
+down_revision = 'e2a6f4d81c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stored_blobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('sha256', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_stored_blobs_id', 'stored_blobs', ['id'])
+
+    op.create_table(
+        'material_documents',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('material_id', sa.Integer(), sa.ForeignKey('materials.id'), nullable=False),
+        sa.Column('blob_id', sa.Integer(), sa.ForeignKey('stored_blobs.id'), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('uploaded_by', sa.String(length=255), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_material_documents_id', 'material_documents', ['id'])
+    op.create_index(
+        'ix_material_documents_material_uploaded_at', 'material_documents', ['material_id', 'uploaded_at']
+    )
+    op.create_index('ix_material_documents_blob_id', 'material_documents', ['blob_id'])
+
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', sa.String(length=32), primary_key=True),
+        sa.Column('material_id', sa.Integer(), sa.ForeignKey('materials.id'), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('created_by', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_sessions')
+    op.drop_index('ix_material_documents_blob_id', table_name='material_documents')
+    op.drop_index('ix_material_documents_material_uploaded_at', table_name='material_documents')
+    op.drop_index('ix_material_documents_id', table_name='material_documents')
+    op.drop_table('material_documents')
+    op.drop_index('ix_stored_blobs_id', table_name='stored_blobs')
+    op.drop_table('stored_blobs')
@@ -0,0 +1,41 @@
+"""Add indexed barcode column to materials
+
+Revision ID: 4d91c6e2b8a7
+Revises: b7d2c94e5a13
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.core.barcodes import material_barcode
+
+
+# revision identifiers, used by Alembic.
+revision = '4d91c6e2b8a7'
+down_revision = 'b7d2c94e5a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('materials', sa.Column('barcode', sa.String(length=32), nullable=True))
+
+    # Коды существующих материалов по их номерам
+    materials = sa.table('materials', sa.column('id', sa.Integer), sa.column('barcode', sa.String))
+    connection = op.get_bind()
+    ids = connection.execute(sa.select(materials.c.id)).scalars().all()
+    if ids:
+        connection.execute(
+            materials.update()
+            .where(materials.c.id == sa.bindparam('material_id'))
+            .values(barcode=sa.bindparam('code')),
+            [{'material_id': material_id, 'code': material_barcode(material_id)} for material_id in ids],
+        )
+
+    op.create_index('ix_materials_barcode', 'materials', ['barcode'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_materials_barcode', table_name='materials')
+    op.drop_column('materials', 'barcode')
@@ -0,0 +1,63 @@
+"""Material code column and hi-lo code sequences
+
+Revision ID: 8f3a5c1d7e24
+Revises: 4d91c6e2b8a7
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3a5c1d7e24'
+down_revision = '4d91c6e2b8a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('materials', sa.Column('material_code', sa.String(length=50), nullable=True))
+
+    # Код хранился в метаданных; при повторах колонку получает первый материал
+    materials = sa.table(
+        'materials',
+        sa.column('id', sa.Integer),
+        sa.column('material_code', sa.String),
+        sa.column('material_metadata', sa.JSON),
+    )
+    connection = op.get_bind()
+    seen = set()
+    updates = []
+    for material_id, metadata in connection.execute(
+        sa.select(materials.c.id, materials.c.material_metadata).order_by(materials.c.id)
+    ):
+        code = (metadata or {}).get('material_code')
+        if code and code not in seen:
+            seen.add(code)
+            updates.append({'material_id': material_id, 'code': code})
+    if updates:
+        connection.execute(
+            materials.update()
+            .where(materials.c.id == sa.bindparam('material_id'))
+            .values(material_code=sa.bindparam('code')),
+            updates,
+        )
+    op.create_index('ix_materials_material_code', 'materials', ['material_code'], unique=True)
+
+    op.create_table(
+        'code_sequences',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('prefix', sa.String(length=20), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('next_value', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('prefix', 'year', name='uq_code_sequences_prefix_year'),
+    )
+    op.create_index('ix_code_sequences_id', 'code_sequences', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_code_sequences_id', table_name='code_sequences')
+    op.drop_table('code_sequences')
+    op.drop_index('ix_materials_material_code', table_name='materials')
+    op.drop_column('materials', 'material_code')
@@ -0,0 +1,28 @@
+"""Certificate expiry index and sweeper flags
+
+Revision ID: a6e0d3f95b12
+Revises: 8f3a5c1d7e24
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e0d3f95b12'
+down_revision = '8f3a5c1d7e24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('certificates', sa.Column('expiry_warned_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('certificates', sa.Column('expired_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_certificates_valid_until', 'certificates', ['valid_until'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_certificates_valid_until', table_name='certificates')
+    op.drop_column('certificates', 'expired_at')
+    op.drop_column('certificates', 'expiry_warned_at')
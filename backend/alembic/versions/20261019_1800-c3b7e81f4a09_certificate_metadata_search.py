@@ -0,0 +1,54 @@
+"""Certificate metadata search: GIN index on PostgreSQL, term table on SQLite
+
+Revision ID: c3b7e81f4a09
+Revises: a6e0d3f95b12
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.models.certificate import POSTGRESQL_SEARCH_INDEX, SQLITE_SEARCH_BACKFILL, SQLITE_SEARCH_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3b7e81f4a09'
+down_revision = 'a6e0d3f95b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'certificate_search_terms',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'certificate_id', sa.Integer(), sa.ForeignKey('certificates.id', ondelete='CASCADE'), nullable=False
+        ),
+        sa.Column('field', sa.String(length=50), nullable=False),
+        sa.Column('term', sa.String(length=500), nullable=False),
+    )
+    op.create_index(
+        'ix_certificate_search_terms_field_term', 'certificate_search_terms', ['field', 'term', 'certificate_id']
+    )
+    op.create_index('ix_certificate_search_terms_certificate_id', 'certificate_search_terms', ['certificate_id'])
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(POSTGRESQL_SEARCH_INDEX)
+    elif dialect == 'sqlite':
+        for trigger in SQLITE_SEARCH_TRIGGERS:
+            op.execute(trigger)
+        op.execute(SQLITE_SEARCH_BACKFILL)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_certificates_metadata_gin')
+    elif dialect == 'sqlite':
+        for name in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS certificates_search_terms_{name}')
+    op.drop_index('ix_certificate_search_terms_certificate_id', table_name='certificate_search_terms')
+    op.drop_index('ix_certificate_search_terms_field_term', table_name='certificate_search_terms')
+    op.drop_table('certificate_search_terms')
@@ -0,0 +1,57 @@
+"""Incremental supplier scorecards
+
+Revision ID: 5e2f8b4c7a31
+Revises: c3b7e81f4a09
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.services.supplier_service import rebuild_scores
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2f8b4c7a31'
+down_revision = 'c3b7e81f4a09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'supplier_scores',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('supplier_key', sa.String(length=200), nullable=False, unique=True),
+        sa.Column('supplier', sa.String(length=200), nullable=False),
+        sa.Column('materials_received', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('accepted', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rejected', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('acceptance_rate', sa.Float(), nullable=True),
+        sa.Column('lead_time_hours', sa.Float(), nullable=True),
+        sa.Column('last_received_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_decision_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_supplier_scores_id', 'supplier_scores', ['id'])
+
+    op.create_table(
+        'supplier_test_stats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('supplier_key', sa.String(length=200), nullable=False),
+        sa.Column('test_type', sa.String(length=50), nullable=False),
+        sa.Column('tests', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failures', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failure_rate', sa.Float(), nullable=True),
+        sa.UniqueConstraint('supplier_key', 'test_type', name='uq_supplier_test_stats_supplier_test_type'),
+    )
+    op.create_index('ix_supplier_test_stats_id', 'supplier_test_stats', ['id'])
+
+    # Начальные значения — по уже накопленной истории
+    rebuild_scores(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index('ix_supplier_test_stats_id', table_name='supplier_test_stats')
+    op.drop_table('supplier_test_stats')
+    op.drop_index('ix_supplier_scores_id', table_name='supplier_scores')
+    op.drop_table('supplier_scores')
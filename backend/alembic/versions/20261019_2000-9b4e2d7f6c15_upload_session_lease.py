@@ -0,0 +1,26 @@
+"""Write lease for chunked uploads
+
+Revision ID: 9b4e2d7f6c15
+Revises: 5e2f8b4c7a31
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2d7f6c15'
+down_revision = '5e2f8b4c7a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_sessions', sa.Column('lease_token', sa.String(length=32), nullable=True))
+    op.add_column('upload_sessions', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'lease_expires_at')
+    op.drop_column('upload_sessions', 'lease_token')
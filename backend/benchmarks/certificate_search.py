@@ -0,0 +1,125 @@
+"""
+Поиск сертификатов по метаданным
+
+Пример:
+    python -m benchmarks.certificate_search --certificates 100000 --repeat 50
+
+Заполняет SQLite-базу во временном каталоге сертификатами за несколько лет
+(стандарты, ключевые слова, проекты) и сравнивает:
+
+    scan    загрузка всех метаданных и фильтрация в Python
+    index   CertificateService.search по таблице certificate_search_terms
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.models import Certificate, Material, User, UserRole
+from src.services.certificate_service import CertificateService
+
+STANDARDS = [f"ГОСТ {number}-{year}" for number, year in (
+    (19281, 2014), (8732, 78), (380, 2005), (1050, 2013), (14637, 89), (27772, 2015), (5632, 2014),
+)] + [f"ТУ 14-1-{i:04d}-2010" for i in range(200)]
+KEYWORDS = ["сталь", "лист", "труба", "пруток", "швеллер", "уголок", "арматура", "09Г2С", "12Х18Н10Т", "Ст3"]
+TARGET = "ГОСТ 19281-2014"
+
+
+async def populate(session: AsyncSession, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    user = User(username="bench", full_name="Bench", email="bench@example.com",
+                password_hash="x", role=UserRole.QUALITY_CONTROL)
+    session.add(user)
+    await session.flush()
+    material = Material(batch_number="BENCH-1", material_type="steel", quantity=1.0, unit="kg",
+                        supplier="ООО МеталлСервис", created_by=user.id)
+    session.add(material)
+    await session.flush()
+
+    started = datetime(2019, 1, 1)
+    batch = []
+    for i in range(count):
+        batch.append({
+            "certificate_number": f"CERT-{i:07d}",
+            "material_id": material.id,
+            "issued_by": user.id,
+            "issued_date": started + timedelta(hours=i),
+            "certificate_metadata": {
+                "keywords": rng.sample(KEYWORDS, 3),
+                "standards": rng.sample(STANDARDS, 2),
+                "project": f"Проект {rng.randrange(500)}",
+            },
+        })
+        if len(batch) == 5000:
+            await session.execute(insert(Certificate), batch)
+            batch = []
+    if batch:
+        await session.execute(insert(Certificate), batch)
+    await session.commit()
+
+
+async def scan(session: AsyncSession) -> List[int]:
+    rows = await session.execute(select(Certificate.id, Certificate.certificate_metadata))
+    return [id_ for id_, metadata in rows if TARGET in (metadata or {}).get("standards", [])]
+
+
+async def index(session: AsyncSession) -> List[int]:
+    return [c.id for c in await CertificateService(session).search(standard=TARGET, limit=100000)]
+
+
+async def timeit(func, session: AsyncSession, repeat: int):
+    result = await func(session)
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        await func(session)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), sorted(result)
+
+
+async def main(args) -> int:
+    with tempfile.TemporaryDirectory(prefix="certificate-search-") as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            started = time.perf_counter()
+            await populate(session, args.certificates, args.seed)
+            print(f"{args.certificates} certificates inserted in {time.perf_counter() - started:.1f} s")
+
+            scan_ms, expected = await timeit(scan, session, args.repeat)
+            index_ms, found = await timeit(index, session, args.repeat)
+        await engine.dispose()
+
+    assert found == expected
+    print(f"'{TARGET}': {len(found)} certificates, median of {args.repeat} runs")
+    print(f"{'path':<8} {'ms':>10}")
+    print(f"{'scan':<8} {scan_ms:>10.2f}")
+    print(f"{'index':<8} {index_ms:>10.2f}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Certificate metadata search: scan vs inverted index")
+    parser.add_argument("--certificates", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
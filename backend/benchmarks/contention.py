@@ -0,0 +1,138 @@
+"""
+Бенчмарк конкурентного резервирования одного материала
+
+Пример:
+    python -m benchmarks.contention --reservers 64 --reservations 20
+
+Каждый резервирующий работает в своей сессии и списывает по --amount
+с одной партии. В конце проверяется, что ни одно обновление не потеряно:
+остаток, журнал резервирований, reserved_quantity и история workflow
+согласуются с числом успешных операций.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.core.exceptions import BusinessLogicException, ConflictException
+from src.core.metrics import reservation_conflicts
+from src.models import Material, MaterialStatus, Reservation, User, UserRole
+from src.models.workflow import WorkflowState
+from src.services.material_service import MaterialService
+
+
+async def prepare(session_factory, quantity: float) -> tuple:
+    """Пользователь и одобренная партия с заданным количеством"""
+    async with session_factory() as session:
+        user = User(
+            username="contention",
+            full_name="Contention benchmark",
+            email="contention@example.com",
+            password_hash="x",
+            role=UserRole.PRODUCTION,
+        )
+        session.add(user)
+        await session.flush()
+        material = Material(
+            batch_number=f"CONTENTION-{time.time_ns()}",
+            material_type="steel",
+            grade="09Г2С",
+            quantity=quantity,
+            unit="kg",
+            supplier="benchmark",
+            status=MaterialStatus.APPROVED.value,
+            created_by=user.id,
+        )
+        session.add(material)
+        await session.commit()
+        return user.id, material.id
+
+
+async def main(args) -> int:
+    engine = create_async_engine(args.database_url, connect_args=(
+        {"timeout": 30} if args.database_url.startswith("sqlite") else {}
+    ))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    initial = args.amount * args.reservers * args.reservations * args.stock_ratio
+    user_id, material_id = await prepare(session_factory, initial)
+
+    succeeded = rejected = exhausted = 0
+    before = {outcome: reservation_conflicts.get(outcome=outcome) for outcome in ("retried", "exhausted")}
+
+    async def reserver():
+        nonlocal succeeded, rejected, exhausted
+        for _ in range(args.reservations):
+            async with session_factory() as session:
+                try:
+                    await MaterialService(session).reserve_material(
+                        material_id, args.amount, user_id, purpose="contention"
+                    )
+                    succeeded += 1
+                except BusinessLogicException:
+                    # Остаток исчерпан или партия уже выдана
+                    rejected += 1
+                except ConflictException:
+                    exhausted += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reserver() for _ in range(args.reservers)))
+    elapsed = time.perf_counter() - started
+
+    async with session_factory() as session:
+        material = await session.get(Material, material_id)
+        states = await session.scalar(
+            select(func.count()).select_from(WorkflowState).where(WorkflowState.material_id == material_id)
+        )
+        reservations = await session.scalar(
+            select(func.count()).select_from(Reservation).where(Reservation.material_id == material_id)
+        )
+    await engine.dispose()
+
+    expected = initial - succeeded * args.amount
+    retries = reservation_conflicts.get(outcome="retried") - before["retried"]
+
+    print(f"reservers={args.reservers} attempts={args.reservers * args.reservations}")
+    print(f"succeeded={succeeded} rejected={rejected} exhausted={exhausted} retries={retries}")
+    print(f"throughput={succeeded / elapsed:.1f} reservations/s in {elapsed:.2f}s")
+    print(f"quantity={material.quantity:g} expected={expected:g} version={material.version}")
+
+    problems: List[str] = []
+    if abs(material.quantity - expected) > 1e-6:
+        problems.append(f"lost updates: quantity {material.quantity} != {expected}")
+    if material.quantity < 0:
+        problems.append(f"oversold: quantity {material.quantity}")
+    if reservations != succeeded:
+        problems.append(f"reservation ledger {reservations} != {succeeded}")
+    if abs(material.reserved_quantity - succeeded * args.amount) > 1e-6:
+        problems.append(f"reserved_quantity {material.reserved_quantity} != {succeeded * args.amount}")
+    if states != succeeded:
+        problems.append(f"workflow states {states} != {succeeded}")
+    for line in problems:
+        print(f"FAIL {line}")
+    return 1 if problems else 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Concurrent reservation benchmark")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./contention.db")
+    parser.add_argument("--reservers", type=int, default=32, help="Concurrent sessions")
+    parser.add_argument("--reservations", type=int, default=20, help="Reservations per session")
+    parser.add_argument("--amount", type=float, default=1.0)
+    parser.add_argument("--stock-ratio", type=float, default=0.75,
+                        help="Initial stock relative to total demand (<1 exercises the insufficient-quantity path)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
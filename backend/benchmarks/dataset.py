@@ -0,0 +1,101 @@
+"""
+Генерация воспроизводимых наборов данных для бенчмарков
+
+Материалы, история, испытания и сертификаты загружаются быстрым путем
+scripts/seed_extended_db.py; здесь добавляются только пользователи по ролям
+и сводка, нужная сценариям.
+"""
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from scripts.seed_extended_db import seed_materials
+from src.core.database import Base
+from src.core.security import get_password_hash
+from src.models import User, UserRole
+
+USERS_PER_ROLE = 5
+
+
+@dataclass
+class DatasetInfo:
+    """Сводка по сгенерированному набору данных"""
+    materials: int = 0
+    test_results: int = 0
+    workflow_states: int = 0
+    certificates: int = 0
+    seconds: float = 0.0
+    ids_by_status: Dict[str, List[int]] = field(default_factory=dict)
+    user_ids_by_role: Dict[str, List[int]] = field(default_factory=dict)
+
+
+async def _ensure_users(conn, rng: random.Random) -> Dict[str, List[int]]:
+    existing = (await conn.execute(select(User.id, User.role))).all()
+    by_role: Dict[str, List[int]] = {}
+    for user_id, role in existing:
+        by_role.setdefault(UserRole(role).value, []).append(user_id)
+
+    password_hash = get_password_hash("benchmark")
+    rows = []
+    for role in UserRole:
+        for i in range(USERS_PER_ROLE - len(by_role.get(role.value, []))):
+            name = f"bench_{role.value}_{i}_{rng.randint(0, 10**9)}"
+            rows.append({
+                "username": name[:50],
+                "full_name": name,
+                "email": f"{name}@bench.local",
+                "password_hash": password_hash,
+                "role": role,
+            })
+    if rows:
+        await conn.execute(insert(User), rows)
+        return await _ensure_users(conn, rng)
+    return by_role
+
+
+async def generate_dataset(
+        engine: AsyncEngine,
+        materials: int,
+        seed: int = 42,
+        batch_size: int = 50_000,
+        history_days: int = 730,
+        create_schema: bool = True,
+) -> DatasetInfo:
+    """
+    Заполнение базы набором из `materials` материалов с испытаниями и историей
+
+    Один и тот же seed дает одинаковый набор данных.
+    """
+    if create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async with engine.begin() as conn:
+        user_ids_by_role = await _ensure_users(conn, random.Random(seed))
+
+    stats = await seed_materials(
+        engine,
+        materials,
+        seed=seed,
+        batch_size=batch_size,
+        history_days=history_days,
+        now=datetime(2026, 1, 1),
+        collect_ids=True,
+    )
+    return DatasetInfo(
+        materials=stats.materials,
+        test_results=stats.test_results,
+        workflow_states=stats.workflow_states,
+        certificates=stats.certificates,
+        seconds=stats.seconds,
+        ids_by_status=stats.ids_by_status,
+        user_ids_by_role=user_ids_by_role,
+    )
@@ -0,0 +1,133 @@
+"""
+Сравнение профилей производительности SQLite
+
+Пример:
+    python -m benchmarks.db_profiles --materials 20000 --readers 8 --writers 2 --seconds 10
+
+Для каждого профиля создается свежая файловая база с одинаковым набором
+данных, затем читатели листают список материалов, а писатели перемещают
+материалы по складу. Печатается пропускная способность чтения и записи.
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from src.core.database import apply_sqlite_pragmas, sqlite_pragmas
+from src.services.material_service import MaterialService
+
+from benchmarks.dataset import generate_dataset
+
+# Профиль: пул соединений и PRAGMA на соединение
+PROFILES = {
+    # Как было до профиля: соединение на запрос, настройки SQLite по умолчанию
+    "baseline": {"pool": False, "pragmas": {}},
+    # WAL без ослабления надежности фиксации
+    "wal-full": {"pool": True, "pragmas": {**sqlite_pragmas(), "synchronous": "FULL"}},
+    # Профиль из настроек приложения (по умолчанию WAL + synchronous=NORMAL)
+    "tuned": {"pool": True, "pragmas": sqlite_pragmas()},
+}
+
+LOCATIONS = [f"{row}-{rack:02d}" for row in "ABCDEF" for rack in range(1, 21)]
+
+
+def _engine(path: Path, profile: Dict, connections: int):
+    url = f"sqlite+aiosqlite:///{path}"
+    if profile["pool"]:
+        engine = create_async_engine(
+            url, poolclass=AsyncAdaptedQueuePool, pool_size=connections, max_overflow=0
+        )
+    else:
+        engine = create_async_engine(url, poolclass=NullPool)
+    apply_sqlite_pragmas(engine, profile["pragmas"])
+    return engine
+
+
+async def run_profile(name: str, template: Path, workdir: Path, args) -> Dict:
+    path = workdir / f"{name}.db"
+    shutil.copy(template, path)
+    engine = _engine(path, PROFILES[name], args.readers + args.writers)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    rng = random.Random(args.seed)
+    deadline = time.perf_counter() + args.seconds
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            async with session_factory() as session:
+                try:
+                    await MaterialService(session).get_materials(
+                        skip=rng.randrange(0, max(1, args.materials - 50)), limit=50
+                    )
+                    counts["reads"] += 1
+                except Exception:
+                    counts["errors"] += 1
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            async with session_factory() as session:
+                try:
+                    await MaterialService(session).assign_to_location(
+                        rng.randint(1, args.materials), rng.choice(LOCATIONS), 1
+                    )
+                    counts["writes"] += 1
+                except Exception:
+                    counts["errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[reader() for _ in range(args.readers)], *[writer() for _ in range(args.writers)])
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "profile": name,
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "errors": counts["errors"],
+    }
+
+
+async def main(args) -> int:
+    workdir = Path(tempfile.mkdtemp(prefix="db-profiles-"))
+    try:
+        template = workdir / "template.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{template}")
+        await generate_dataset(engine, args.materials, seed=args.seed)
+        await engine.dispose()
+
+        names = args.profiles.split(",") if args.profiles else list(PROFILES)
+        results: List[Dict] = []
+        for name in names:
+            results.append(await run_profile(name, template, workdir, args))
+
+        print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>7}")
+        for row in results:
+            print(f"{row['profile']:<10} {row['reads_per_s']:>10} {row['writes_per_s']:>10} {row['errors']:>7}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare SQLite performance profiles")
+    parser.add_argument("--materials", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration per profile")
+    parser.add_argument("--profiles", help=f"Comma-separated subset of: {', '.join(PROFILES)}")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
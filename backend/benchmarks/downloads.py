@@ -0,0 +1,160 @@
+"""
+Пропускная способность отдачи файлов при конкурентных скачиваниях
+
+Пример:
+    python -m benchmarks.downloads --files 8 --size-mb 20 --concurrency 16 --requests 64
+
+Поднимает uvicorn на локальном порту со стеком middleware приложения
+(src.main.app: CORS, счетчик запросов, метрики, профилирование) и скачивает
+файлы через httpx. С --bare маршруты отдаются голым Starlette — разница
+показывает цену middleware:
+
+    buffered   файл целиком читается в память и отдается как bytes
+    starlette  стандартный FileResponse (блоки по 64 KiB)
+    range      RangeFileResponse (блоки DOWNLOAD_CHUNK_SIZE, ETag по содержимому)
+    range-1mb  RangeFileResponse, случайные диапазоны по 1 MiB (просмотрщик PDF)
+
+Пиковый RSS монотонно растет, поэтому buffered выполняется последним.
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+from src.core.file_serving import RangeFileResponse
+
+MODES = ("starlette", "range", "range-1mb", "buffered")
+
+
+def build_app(directory: Path, bare: bool = False):
+    etags = {path.name: path.name for path in directory.iterdir()}
+
+    async def buffered(request):
+        path = directory / request.path_params["name"]
+        return Response(path.read_bytes(), media_type="application/pdf")
+
+    async def starlette_file(request):
+        return FileResponse(directory / request.path_params["name"], media_type="application/pdf")
+
+    async def range_file(request):
+        name = request.path_params["name"]
+        return RangeFileResponse(str(directory / name), etag=etags[name], media_type="application/pdf")
+
+    routes = [
+        Route("/buffered/{name}", buffered),
+        Route("/starlette/{name}", starlette_file),
+        Route("/range/{name}", range_file),
+    ]
+    if bare:
+        return Starlette(routes=routes)
+
+    # Маршруты бенчмарка впереди маршрутов приложения; lifespan (БД) не запускается
+    from src.main import app
+    app.router.routes[:0] = routes
+    return app
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss в KiB на Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_mode(client: httpx.AsyncClient, mode: str, names: List[str], size: int, args) -> Dict:
+    rng = random.Random(args.seed)
+    queue = list(range(args.requests))
+    transferred = 0
+
+    async def worker():
+        nonlocal transferred
+        while queue:
+            queue.pop()
+            name = rng.choice(names)
+            if mode == "range-1mb":
+                start = rng.randrange(0, size - 1024 * 1024)
+                url, headers, expected = (f"/range/{name}",
+                                          {"Range": f"bytes={start}-{start + 1024 * 1024 - 1}"}, 206)
+            else:
+                url, headers, expected = f"/{mode}/{name}", {}, 200
+            # Клиент в том же процессе: тело не накапливается, чтобы RSS отражал сервер
+            async with client.stream("GET", url, headers=headers) as response:
+                assert response.status_code == expected
+                async for chunk in response.aiter_raw():
+                    transferred += len(chunk)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "requests_per_s": round(args.requests / elapsed, 1),
+        "mb_per_s": round(transferred / elapsed / 1024 / 1024, 1),
+        "max_rss_mb": round(_max_rss_mb(), 1),
+    }
+
+
+async def main(args) -> int:
+    with tempfile.TemporaryDirectory(prefix="downloads-") as tmp:
+        directory = Path(tmp)
+        size = args.size_mb * 1024 * 1024
+        names = []
+        for i in range(args.files):
+            name = f"cert-{i:03d}.pdf"
+            (directory / name).write_bytes(os.urandom(size))
+            names.append(name)
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(build_app(directory, args.bare), port=port,
+                                                log_level="warning", lifespan="off"))
+        serve = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+
+        results = []
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            modes = args.modes.split(",") if args.modes else MODES
+            for mode in modes:
+                results.append(await run_mode(client, mode, names, size, args))
+
+        server.should_exit = True
+        await serve
+
+    stack = "bare Starlette" if args.bare else "application middleware"
+    print(f"{args.requests} downloads of {args.size_mb} MiB files, concurrency {args.concurrency}, {stack}")
+    print(f"{'mode':<10} {'req/s':>8} {'MiB/s':>8} {'max RSS MiB':>12}")
+    for row in results:
+        print(f"{row['mode']:<10} {row['requests_per_s']:>8} {row['mb_per_s']:>8} {row['max_rss_mb']:>12}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Concurrent file download throughput")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bare", action="store_true", help="Serve without the application middleware stack")
+    parser.add_argument("--modes", help=f"Comma-separated subset of: {', '.join(MODES)}")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
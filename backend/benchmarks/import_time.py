@@ -0,0 +1,122 @@
+"""
+Время холодного импорта приложения
+
+Пример:
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+
+Каждый прогон — новый интерпретатор с ``-X importtime``, импортирующий
+src.main. Печатается медиана времени импорта, медиана отношения к импорту
+самого FastAPI в том же прогоне, доля роутеров (src.api.v1.*) и самые
+медленные модули. Код возврата 1,
+если медиана превышает бюджет или при старте загружен какой-либо модуль
+из HEAVY_MODULES (см. src/core/lazy.py).
+
+Абсолютное время зависит от машины и ее загрузки, поэтому в тестах
+проверяется отношение к FastAPI (DEFAULT_BUDGET_RATIO): оно показывает,
+во сколько раз приложение дороже фреймворка, и от скорости машины почти
+не зависит.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Бюджет холодного старта по умолчанию, мс
+DEFAULT_BUDGET_MS = 1500.0
+
+# Бюджет отношения времени импорта приложения к импорту fastapi
+DEFAULT_BUDGET_RATIO = 2.5
+
+# Пакет роутеров: их импорт (вместе с сервисами, которые они подтягивают) — отдельная строка отчета
+ROUTERS_PACKAGE = "src.api.v1"
+
+_PROBE = (
+    "import json, src.main\n"
+    "from src.core.lazy import HEAVY_MODULES, is_loaded\n"
+    "print(json.dumps([name for name in HEAVY_MODULES if is_loaded(name)]))\n"
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Время импорта модулей (self и cumulative, мкс) из вывода -X importtime"""
+    modules: Dict[str, Dict[str, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {"self": int(self_us), "cumulative": int(cumulative_us)}
+    return modules
+
+
+def measure(module: str = "src.main") -> Dict:
+    """Один холодный импорт в отдельном процессе"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.replace("src.main", module, 1)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = parse_importtime(result.stderr)
+    ms = modules[module]["cumulative"] / 1000
+    framework_ms = modules["fastapi"]["cumulative"] / 1000 if "fastapi" in modules else None
+    # Только модули роутеров верхнего уровня: их cumulative уже включает вложенные импорты
+    routers_ms = sum(
+        times["cumulative"] for name, times in modules.items()
+        if name.startswith(ROUTERS_PACKAGE + ".") and "." not in name[len(ROUTERS_PACKAGE) + 1:]
+    ) / 1000
+    return {
+        "ms": ms,
+        "routers_ms": routers_ms,
+        "ratio": ms / framework_ms if framework_ms else None,
+        "modules": modules,
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(args) -> int:
+    runs = [measure(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(run["ms"] for run in runs)
+    heavy_loaded = sorted({name for run in runs for name in run["heavy_loaded"]})
+
+    print(f"import {args.module}: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(run['ms'] for run in runs):.0f}, max {max(run['ms'] for run in runs):.0f}), "
+          f"budget {args.budget_ms:.0f} ms")
+    ratios = [run["ratio"] for run in runs if run["ratio"] is not None]
+    median_ratio = statistics.median(ratios) if ratios else None
+    if median_ratio is not None:
+        print(f"relative to import fastapi: median {median_ratio:.2f}x, budget {args.budget_ratio:.2f}x")
+    print(f"routers ({ROUTERS_PACKAGE}.*): median {statistics.median(run['routers_ms'] for run in runs):.0f} ms")
+    slowest = sorted(runs[-1]["modules"].items(), key=lambda item: item[1]["self"], reverse=True)
+    print(f"{'module':<50} {'self ms':>8} {'cumul ms':>9}")
+    for name, times in slowest[:args.top]:
+        print(f"{name:<50} {times['self'] / 1000:>8.1f} {times['cumulative'] / 1000:>9.1f}")
+
+    code = 0
+    if heavy_loaded:
+        print(f"FAIL: heavy modules loaded at startup: {', '.join(heavy_loaded)}")
+        code = 1
+    if median_ms > args.budget_ms:
+        print(f"FAIL: cold import exceeds budget by {median_ms - args.budget_ms:.0f} ms")
+        code = 1
+    if median_ratio is not None and median_ratio > args.budget_ratio:
+        print(f"FAIL: cold import is {median_ratio:.2f}x of fastapi, budget {args.budget_ratio:.2f}x")
+        code = 1
+    return code
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the application")
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--budget-ratio", type=float, default=DEFAULT_BUDGET_RATIO,
+                        help="Budget relative to the import of fastapi in the same run")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to print")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,206 @@
+"""
+Запуск бенчмарков
+
+Пример:
+    python -m benchmarks.run --materials 10000 --operations 500 --concurrency 8 \
+        --output reports/bench.json --baseline reports/baseline.json --max-regression 0.2
+
+Код возврата 1, если хотя бы один сценарий медленнее базового отчета
+сильнее допустимого порога.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import get_db
+from src.models import Material, User, UserRole
+
+from benchmarks.dataset import DatasetInfo, generate_dataset
+from benchmarks.scenarios import REJECTIONS, SCENARIOS, ScenarioContext
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(ctx: ScenarioContext, name: str, operations: int, concurrency: int) -> Dict:
+    """Выполнение operations операций сценария с заданной конкурентностью"""
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    rejected = 0
+    remaining = operations
+
+    async def worker():
+        nonlocal remaining, errors, rejected
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await scenario(ctx)
+            except LookupError:
+                # Пул подходящих материалов исчерпан
+                return
+            except REJECTIONS:
+                # Ожидаемый отказ (конфликт, нет остатка) — не выполненная операция
+                rejected += 1
+                continue
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "operations": len(latencies),
+        "errors": errors,
+        "rejected": rejected,
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+    }
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Список регрессий относительно базового отчета"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous.get("operations"):
+            continue
+        if current["throughput"] < previous["throughput"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {current['throughput']} < {previous['throughput']} ops/s"
+            )
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']} > {previous['p95_ms']} ms"
+            )
+    return regressions
+
+
+async def load_dataset_info(session_factory) -> DatasetInfo:
+    """Сведения об уже существующем наборе данных (режим --reuse)"""
+    info = DatasetInfo()
+    async with session_factory() as session:
+        for material_id, status in (await session.execute(select(Material.id, Material.status))).all():
+            info.ids_by_status.setdefault(status, []).append(material_id)
+            info.materials += 1
+        for user_id, role in (await session.execute(select(User.id, User.role))).all():
+            info.user_ids_by_role.setdefault(UserRole(role).value, []).append(user_id)
+    return info
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'scenario':<12} {'ops':>7} {'err':>5} {'rej':>5} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report["scenarios"].items():
+        print(f"{name:<12} {row['operations']:>7} {row['errors']:>5} {row.get('rejected', 0):>5} "
+              f"{row['throughput']:>10} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+
+
+async def main(args) -> int:
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    if args.reuse:
+        dataset = await load_dataset_info(session_factory)
+        print(f"Reusing dataset: {dataset.materials} materials")
+    else:
+        dataset = await generate_dataset(engine, args.materials, seed=args.seed, batch_size=args.batch_size)
+        print(f"Generated {dataset.materials} materials, {dataset.test_results} test results, "
+              f"{dataset.workflow_states} workflow states in {dataset.seconds:.1f}s")
+
+    # HTTP-сценарии работают с той же базой, что и сервисные
+    from src.main import app
+
+    async def benchmark_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = benchmark_db
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "database_url": args.database_url,
+            "materials": dataset.materials,
+            "seed": args.seed,
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": {},
+    }
+
+    scenario_names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        ctx = ScenarioContext(session_factory, client, dataset, random.Random(args.seed))
+        for name in scenario_names:
+            report["scenarios"][name] = await run_scenario(ctx, name, args.operations, args.concurrency)
+
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+
+    print_report(report)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(report, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Material inspection benchmarks")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db")
+    parser.add_argument("--materials", type=int, default=10_000, help="Dataset size (10k-5M)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--reuse", action="store_true", help="Use the existing dataset in the database")
+    parser.add_argument("--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--operations", type=int, default=500, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write JSON report here")
+    parser.add_argument("--baseline", help="Compare with a previous JSON report")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative slowdown before failing (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,166 @@
+"""
+Сценарии нагрузки
+
+Каждый сценарий — корутина, выполняющая одну операцию. Операции над БД идут
+через MaterialService (как в API), HTTP-сценарии — через ASGI-приложение
+в том же процессе, без сети. Ожидаемые отказы (REJECTIONS: конфликт,
+недостаточный остаток) сценарий пробрасывает, харнесс считает их отдельно
+от выполненных операций.
+"""
+import csv
+import io
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Tuple, Type
+
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from scripts.seed_extended_db import GRADES, SUPPLIERS
+from src.core.exceptions import BusinessLogicException, ConflictException
+from src.models import Material, MaterialStatus, MaterialType, UserRole
+from src.schemas.material import MaterialCreate
+from src.services.material_service import MaterialService
+
+from benchmarks.dataset import DatasetInfo
+
+
+@dataclass
+class ScenarioContext:
+    """Все, что нужно сценарию для выполнения операции"""
+    session_factory: async_sessionmaker
+    client: AsyncClient
+    dataset: DatasetInfo
+    rng: random.Random
+    page_size: int = 50
+    export_limit: int = 10_000
+
+    def user(self, role: UserRole) -> int:
+        return self.rng.choice(self.dataset.user_ids_by_role[role.value])
+
+    def take_material(self, status: MaterialStatus) -> int:
+        """Материал в нужном статусе; забирается из пула, чтобы не повторяться"""
+        pool = self.dataset.ids_by_status.get(status.value) or []
+        if not pool:
+            raise LookupError(f"No materials left in status {status.value}")
+        return pool.pop(self.rng.randrange(len(pool)))
+
+    def any_material(self, status: MaterialStatus) -> int:
+        return self.rng.choice(self.dataset.ids_by_status[status.value])
+
+
+Scenario = Callable[[ScenarioContext], Awaitable[None]]
+
+# Отказы, которые сервис возвращает по бизнес-правилам под нагрузкой
+REJECTIONS: Tuple[Type[Exception], ...] = (BusinessLogicException, ConflictException)
+
+
+async def receive(ctx: ScenarioContext) -> None:
+    """Приемка новой партии"""
+    code = f"RCV-{ctx.rng.getrandbits(48):012x}"
+    data = MaterialCreate(
+        material_code=code,
+        material_type=ctx.rng.choice(list(MaterialType)),
+        name="Лист стальной горячекатаный",
+        grade=ctx.rng.choice(GRADES),
+        supplier=ctx.rng.choice(SUPPLIERS)["name"],
+        quantity=round(ctx.rng.uniform(10, 5000), 2),
+    )
+    async with ctx.session_factory() as session:
+        material = await MaterialService(session).create_material(
+            data, user_id=ctx.user(UserRole.WAREHOUSE_KEEPER)
+        )
+    ctx.dataset.ids_by_status.setdefault(MaterialStatus.RECEIVED.value, []).append(material.id)
+
+
+async def list_materials(ctx: ScenarioContext) -> None:
+    """Страница списка материалов"""
+    pages = max(1, min(ctx.dataset.materials // ctx.page_size, 200))
+    async with ctx.session_factory() as session:
+        await MaterialService(session).get_materials(
+            skip=ctx.rng.randrange(pages) * ctx.page_size,
+            limit=ctx.page_size,
+        )
+
+
+async def search_materials(ctx: ScenarioContext) -> None:
+    """Поиск по марке/номеру партии"""
+    async with ctx.session_factory() as session:
+        await MaterialService(session).get_materials(
+            search=ctx.rng.choice(GRADES),
+            limit=ctx.page_size,
+        )
+
+
+async def transition(ctx: ScenarioContext) -> None:
+    """Перевод принятого материала на испытания"""
+    material_id = ctx.take_material(MaterialStatus.RECEIVED)
+    async with ctx.session_factory() as session:
+        await MaterialService(session).change_material_status(
+            material_id,
+            MaterialStatus.TESTING,
+            user_id=ctx.user(UserRole.QUALITY_CONTROL),
+            user_role=UserRole.QUALITY_CONTROL,
+        )
+    ctx.dataset.ids_by_status.setdefault(MaterialStatus.TESTING.value, []).append(material_id)
+
+
+async def reserve(ctx: ScenarioContext) -> None:
+    """Резервирование небольшого количества одобренного материала"""
+    material_id = ctx.any_material(MaterialStatus.APPROVED)
+    async with ctx.session_factory() as session:
+        try:
+            await MaterialService(session).reserve_material(
+                material_id,
+                quantity=0.01,
+                user_id=ctx.user(UserRole.PRODUCTION),
+                purpose="benchmark",
+            )
+        except BusinessLogicException:
+            # Партия закончилась: больше ее не выбираем, отказ учитывает харнесс
+            pool = ctx.dataset.ids_by_status[MaterialStatus.APPROVED.value]
+            if material_id in pool:
+                pool.remove(material_id)
+            raise
+
+
+async def export_materials(ctx: ScenarioContext) -> None:
+    """Выгрузка одобренных материалов в CSV потоком"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    async with ctx.session_factory() as session:
+        result = await session.stream(
+            select(Material.batch_number, Material.material_type, Material.grade,
+                   Material.quantity, Material.unit, Material.supplier, Material.location)
+            .where(Material.status == MaterialStatus.APPROVED.value)
+            .order_by(Material.id)
+            .limit(ctx.export_limit)
+            .execution_options(yield_per=1000)
+        )
+        async for partition in result.partitions():
+            writer.writerows(partition)
+
+
+async def api_list(ctx: ScenarioContext) -> None:
+    """GET /api/v1/materials/ через ASGI"""
+    response = await ctx.client.get("/api/v1/materials/", params={"limit": ctx.page_size})
+    response.raise_for_status()
+
+
+async def api_health(ctx: ScenarioContext) -> None:
+    """GET /health — накладные расходы middleware"""
+    response = await ctx.client.get("/health")
+    response.raise_for_status()
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "receive": receive,
+    "list": list_materials,
+    "search": search_materials,
+    "transition": transition,
+    "reserve": reserve,
+    "export": export_materials,
+    "api_list": api_list,
+    "api_health": api_health,
+}
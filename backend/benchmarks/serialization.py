@@ -0,0 +1,111 @@
+"""
+Стоимость сериализации списка ответа
+
+Пример:
+    python -m benchmarks.serialization --items 1000 --repeat 200
+
+Сравниваются пути кодирования списка из --items записей журнала
+резервирований (ORM-объекты и те же данные словарями):
+
+    fastapi-default  проверка response_model, jsonable_encoder, stdlib json
+    type-adapter     закешированный TypeAdapter с from_attributes, JSON в pydantic-core
+    trusted-stdlib   доверенные словари через jsonable_encoder и stdlib json
+    trusted-orjson   доверенные словари сразу в orjson (trusted_response)
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.core.serialization import trusted_response, type_adapter, validated_json
+from src.models import Reservation
+from src.schemas.material import ReservationResponse
+
+SCHEMA = List[ReservationResponse]
+
+
+def make_reservations(count: int) -> List[Reservation]:
+    started = datetime(2026, 1, 1, 8, 0)
+    return [
+        Reservation(
+            id=i + 1,
+            material_id=i % 97 + 1,
+            quantity=float(i % 50 + 1),
+            purpose=f"Заказ производства №{i:05d}",
+            reserved_by=i % 13 + 1,
+            reserved_at=started + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def fastapi_default(objects) -> bytes:
+    # Как FastAPI обрабатывает возвращенные ORM-объекты при response_model
+    validated = type_adapter(SCHEMA).validate_python(objects, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def type_adapter_path(objects) -> bytes:
+    return validated_json(SCHEMA, objects)
+
+
+def trusted_stdlib(rows) -> bytes:
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def trusted_orjson(rows) -> bytes:
+    return trusted_response(rows).body
+
+
+def timeit(func: Callable, data, repeat: int) -> Dict:
+    func(data)  # прогрев и построение валидатора
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(data)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": statistics.median(timings), "bytes": len(body)}
+
+
+def main(args) -> int:
+    objects = make_reservations(args.items)
+    rows = [
+        {column.name: getattr(obj, column.name) for column in Reservation.__table__.columns}
+        for obj in objects
+    ]
+    # Все пути должны давать один и тот же документ
+    assert json.loads(type_adapter_path(objects)) == json.loads(fastapi_default(objects))
+    assert json.loads(trusted_orjson(rows)) == json.loads(trusted_stdlib(rows))
+
+    results = {
+        "fastapi-default": timeit(fastapi_default, objects, args.repeat),
+        "type-adapter": timeit(type_adapter_path, objects, args.repeat),
+        "trusted-stdlib": timeit(trusted_stdlib, rows, args.repeat),
+        "trusted-orjson": timeit(trusted_orjson, rows, args.repeat),
+    }
+    baseline = results["fastapi-default"]["median_ms"]
+    print(f"{args.items} items, median of {args.repeat} runs")
+    print(f"{'path':<16} {'ms':>8} {'speedup':>8} {'bytes':>8}")
+    for name, row in results.items():
+        print(f"{name:<16} {row['median_ms']:>8.2f} {baseline / row['median_ms']:>7.1f}x {row['bytes']:>8}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
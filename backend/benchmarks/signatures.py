@@ -0,0 +1,92 @@
+"""
+Пакетная проверка подписей сертификатов
+
+Пример:
+    python -m benchmarks.signatures --certificates 20000 --workers 4
+
+Подписывает синтетические сертификаты ключом во временном каталоге и
+проверяет их подписи:
+
+    inline   verify_digests в текущем процессе, без пула
+    pool     CertificateSigner.verify в пуле из --workers процессов
+    cached   повторная проверка тех же сертификатов (кеш результатов)
+
+Время включает вычисление хэшей содержимого. Печатает проверки в секунду.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.signature_service import CertificateSigner, certificate_digest, verify_digests
+
+
+def certificates(count: int) -> List[dict]:
+    issued = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "certificate_number": f"CERT-{i:07d}",
+            "material_id": i // 3 + 1,
+            "certificate_type": "quality",
+            "issued_date": issued + timedelta(minutes=i),
+            "valid_until": issued + timedelta(days=365, minutes=i),
+            "issued_by": 1,
+            "summary": "Материал соответствует требованиям ГОСТ 19281-2014",
+            "conclusions": "Годен к применению",
+            "recommendations": None,
+            "certificate_metadata": {"standards": ["ГОСТ 19281-2014"], "heat": f"П-{i}"},
+        }
+        for i in range(count)
+    ]
+
+
+async def main(args) -> int:
+    rows = certificates(args.certificates)
+    with tempfile.TemporaryDirectory(prefix="signatures-") as tmp:
+        signer = CertificateSigner(key_path=f"{tmp}/signing.pem", workers=args.workers, chunk_size=args.chunk_size)
+        try:
+            started = time.perf_counter()
+            signatures = await signer.sign([certificate_digest(row) for row in rows])
+            sign_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            raw = [(certificate_digest(row), signer._decode(signature)) for row, signature in zip(rows, signatures)]
+            assert all(verify_digests(raw, signer._public_key))
+            inline_seconds = time.perf_counter() - started
+
+            timings = {}
+            for name in ("pool", "cached"):
+                started = time.perf_counter()
+                results = await signer.verify([
+                    (certificate_digest(row), signature) for row, signature in zip(rows, signatures)
+                ])
+                timings[name] = time.perf_counter() - started
+                assert all(results)
+        finally:
+            signer.shutdown()
+
+    print(f"{args.certificates} certificates, {args.workers} workers, chunks of {args.chunk_size}")
+    print(f"signed in {sign_seconds:.2f} s ({args.certificates / sign_seconds:,.0f}/s)")
+    print(f"{'path':<8} {'s':>8} {'verifications/s':>16}")
+    for name, seconds in (("inline", inline_seconds), *timings.items()):
+        print(f"{name:<8} {seconds:>8.3f} {args.certificates / seconds:>16,.0f}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Certificate signature verification throughput")
+    parser.add_argument("--certificates", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,50 @@
+"""
+Архивация истории workflow закрытых материалов
+
+Создает месячные секции workflow_states наперед (PostgreSQL) и переносит
+историю давно закрытых материалов в сжатые файлы архива. Рассчитан на
+регулярный запуск (cron, systemd timer).
+
+Пример:
+    python scripts/archive_history.py --older-than-days 365 --batch-size 1000
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.database import AsyncSessionLocal, close_db
+from src.services.history_service import HistoryService
+
+
+async def main(args) -> None:
+    async with AsyncSessionLocal() as session:
+        service = HistoryService(session)
+
+        partitions = await service.ensure_partitions(months_ahead=args.months_ahead)
+        if partitions:
+            print(f"Partitions ensured: {', '.join(partitions)}")
+
+        stats = await service.archive_closed_materials(
+            older_than_days=args.older_than_days,
+            batch_size=args.batch_size,
+            archive_path=args.archive_path,
+        )
+        print(f"Archived {stats.states} states of {stats.materials} materials "
+              f"into {stats.files} files ({stats.bytes / 1024:.1f} KiB)")
+    await close_db()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive workflow history of closed materials")
+    parser.add_argument("--older-than-days", type=int, help="Defaults to HISTORY_ARCHIVE_AFTER_DAYS")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Materials per archive file")
+    parser.add_argument("--archive-path", help="Defaults to HISTORY_ARCHIVE_PATH")
+    parser.add_argument("--months-ahead", type=int, help="Defaults to HISTORY_PARTITION_MONTHS_AHEAD")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,55 @@
+"""
+Аудит целостности истории workflow
+
+Команды:
+    checkpoint  — контрольные точки (корни Меркла) за завершенные дни
+    verify      — полная проверка цепочек и контрольных точек
+    seal        — подпись истории, записанной до введения цепочек
+
+Пример:
+    python scripts/audit_history.py checkpoint
+    python scripts/audit_history.py verify --workers 8
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.database import AsyncSessionLocal, close_db
+from src.services.audit_service import AuditService
+
+
+async def main(args) -> int:
+    code = 0
+    async with AsyncSessionLocal() as session:
+        service = AuditService(session)
+        if args.command == "checkpoint":
+            created = await service.create_checkpoints()
+            print(f"Created {len(created)} checkpoints")
+        elif args.command == "seal":
+            print(f"Sealed {await service.seal_legacy()} records")
+        else:
+            report = await service.verify_all(workers=args.workers)
+            print(f"Verified {report.records} records, {report.archived_records} archived, "
+                  f"{report.checkpoints} checkpoints in {report.seconds:.1f}s")
+            for material_id, record_id, reason in report.problems[:args.limit]:
+                print(f"  material {material_id}, record {record_id}: {reason}")
+            for day, reason in report.checkpoint_problems[:args.limit]:
+                print(f"  checkpoint {day}: {reason}")
+            code = 0 if report.ok else 1
+    await close_db()
+    return code
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Workflow history integrity audit")
+    parser.add_argument("command", choices=("checkpoint", "verify", "seal"))
+    parser.add_argument("--workers", type=int, help="Processes for verification (default: all cores)")
+    parser.add_argument("--limit", type=int, default=50, help="Problems to print")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,200 @@
+"""
+Быстрая пакетная запись для скриптов заполнения БД
+
+Строки передаются колонками (имя колонки -> список значений), без ORM-объектов.
+Для PostgreSQL (asyncpg) используется COPY, для SQLite — executemany
+драйвера с заранее преобразованными значениями, для остальных — Core insert.
+"""
+import json
+import random
+from contextlib import asynccontextmanager
+from datetime import timezone
+from enum import Enum as PyEnum
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, Enum, JSON, Table, insert, select, func, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.models.user import User, UserRole
+
+
+def _by_identity(values, convert) -> list:
+    # Колонки собираются из небольших пулов объектов: преобразуем каждый
+    # уникальный объект один раз, а проход по строкам делаем в C-циклах
+    keys = list(map(id, values))
+    unique = dict(zip(keys, values))
+    converted = {key: convert(value) for key, value in unique.items()}
+    return list(map(converted.__getitem__, keys))
+
+
+def _json_column(values) -> list:
+    return _by_identity(values, lambda v: None if v is None else json.dumps(v, ensure_ascii=False))
+
+
+# SQLAlchemy хранит DateTime в SQLite строкой "YYYY-MM-DD HH:MM:SS.ffffff";
+# для дат с точностью до секунды эту строку собирает сама SQLite
+SQLITE_DATETIME_FROM_EPOCH = "datetime(?, 'unixepoch') || '.000000'"
+
+
+def _whole_seconds(values) -> bool:
+    """Массив дат numpy с точностью не выше секунды"""
+    return (isinstance(values, np.ndarray) and values.dtype.kind == "M"
+            and np.datetime_data(values.dtype)[0] in ("Y", "M", "W", "D", "h", "m", "s"))
+
+
+def _sqlite_datetime_column(values) -> list:
+    if isinstance(values, np.ndarray):
+        text_values = np.datetime_as_string(values, unit="us").astype("U26")
+        text_values.view(np.uint32).reshape(-1, 26)[:, 10] = ord(" ")
+        return text_values.tolist()
+    return [None if v is None else v.isoformat(" ", "microseconds") for v in values]
+
+
+def _aware_datetime_column(values) -> list:
+    if isinstance(values, np.ndarray):
+        values = values.astype("datetime64[us]").tolist()
+    return [None if v is None or v.tzinfo else v.replace(tzinfo=timezone.utc) for v in values]
+
+
+def _enum_column(values) -> list:
+    # SQLAlchemy хранит Python enum по имени члена
+    return _by_identity(values, lambda v: v.name if isinstance(v, PyEnum) else v)
+
+
+class BulkWriter:
+    """Пакетная запись строк с учетом диалекта БД"""
+
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.driver = conn.dialect.driver
+
+    @property
+    def uses_copy(self) -> bool:
+        return self.dialect == "postgresql" and self.driver == "asyncpg"
+
+    @property
+    def uses_raw_executemany(self) -> bool:
+        return self.dialect == "sqlite"
+
+    def _convert(self, table: Table, columns: Dict[str, list]) -> Tuple[Dict[str, list], Dict[str, str]]:
+        """Значения в формате драйвера и выражения-плейсхолдеры для SQLite"""
+        raw = self.uses_copy or self.uses_raw_executemany
+
+        converted, placeholders = {}, {}
+        for name, values in columns.items():
+            column_type = table.c[name].type
+            placeholders[name] = "?"
+            if raw and isinstance(column_type, DateTime):
+                if self.uses_copy:
+                    values = _aware_datetime_column(values)
+                elif _whole_seconds(values):
+                    # Целые числа передаются в драйвер дешевле строк
+                    values = values.astype("datetime64[s]").astype(np.int64).tolist()
+                    placeholders[name] = SQLITE_DATETIME_FROM_EPOCH
+                else:
+                    values = _sqlite_datetime_column(values)
+            elif isinstance(values, np.ndarray):
+                values = values.tolist()
+
+            if raw and isinstance(column_type, Enum):
+                values = _enum_column(values)
+            elif raw and isinstance(column_type, JSON):
+                values = _json_column(values)
+            converted[name] = values
+        return converted, placeholders
+
+    async def write(self, table: Table, columns: Dict[str, list]) -> int:
+        """Запись строк; возвращает количество записанных строк"""
+        names = list(columns)
+        if not names or not len(columns[names[0]]):
+            return 0
+
+        columns, placeholders = self._convert(table, columns)
+        rows = list(zip(*(columns[name] for name in names)))
+
+        if self.uses_copy:
+            raw = await self.conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                table.name, records=rows, columns=names
+            )
+        elif self.uses_raw_executemany:
+            await self.conn.exec_driver_sql(
+                f"INSERT INTO {table.name} ({', '.join(names)}) "
+                f"VALUES ({', '.join(placeholders[name] for name in names)})",
+                rows,
+            )
+        else:
+            await self.conn.execute(insert(table), [dict(zip(names, row)) for row in rows])
+        return len(rows)
+
+    @asynccontextmanager
+    async def loading(self):
+        """
+        Режим массовой загрузки на время блока
+
+        Вызывающий код фиксирует пакеты через conn.commit(); остаток фиксируется
+        на выходе (или откатывается при ошибке). Настройки SQLite меняются только
+        вне транзакции, а соединение вернется в пул, поэтому прежние значения
+        восстанавливаются после фиксации.
+        """
+        pragmas = {}
+        if self.dialect == "sqlite":
+            pragmas = {"synchronous": "OFF", "journal_mode": "MEMORY", "cache_size": "-200000"}
+        previous = {}
+        for name, value in pragmas.items():
+            previous[name] = (await self.conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            await self.conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        try:
+            yield self
+        except BaseException:
+            await self.conn.rollback()
+            raise
+        else:
+            await self.conn.commit()
+        finally:
+            for name, value in previous.items():
+                await self.conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+            if previous:
+                await self.conn.commit()
+
+    async def next_id(self, table: Table) -> int:
+        """Начало диапазона идентификаторов для новых строк"""
+        return ((await self.conn.scalar(select(func.max(table.c.id)))) or 0) + 1
+
+    async def sync_sequences(self, tables: Sequence[Table]) -> None:
+        """После вставки явных id сдвигаем последовательности PostgreSQL"""
+        if self.dialect != "postgresql":
+            return
+        for table in tables:
+            await self.conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            ))
+
+
+class UserPools:
+    """Идентификаторы пользователей, заранее разложенные по ролям"""
+
+    def __init__(self, by_role: Dict[UserRole, List[int]]):
+        self.by_role = by_role
+        self.all = [user_id for ids in by_role.values() for user_id in ids]
+
+    @classmethod
+    async def load(cls, conn: AsyncConnection) -> "UserPools":
+        by_role: Dict[UserRole, List[int]] = {}
+        for user_id, role in (await conn.execute(select(User.id, User.role))).all():
+            by_role.setdefault(UserRole(role), []).append(user_id)
+        return cls(by_role)
+
+    def pool(self, *roles: UserRole) -> List[int]:
+        """Пользователи указанных ролей (или все, если таких нет)"""
+        ids = [user_id for role in roles for user_id in self.by_role.get(role, [])]
+        return ids or self.all
+
+    def pick(self, rng: random.Random, *roles: UserRole) -> int:
+        return rng.choice(self.pool(*roles))
+
+    def __bool__(self) -> bool:
+        return bool(self.all)
@@ -9,52 +9,22 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 import asyncio
-from sqlalchemy import create_engine
+from src import database
 from src.core.config import settings
-from src.core.database import Base, init_db
-
-# Импортируем все модели
-from src.models import material, user, workflow, certificate
+from src.core.database import init_db, sync_url
 
 
 def create_tables():
     """
-    Создание таблиц в базе данных (синхронно для Alembic)
+    Создание таблиц в базе данных (синхронно, через фасад src.database)
     """
-    # Получаем URL для синхронного подключения
-    db_url = settings.DATABASE_URL
-
-    # Преобразуем асинхронные URL в синхронные
-    if db_url.startswith("postgresql+asyncpg://"):
-        db_url = db_url.replace("postgresql+asyncpg://", "postgresql://")
-    elif db_url.startswith("sqlite+aiosqlite://"):
-        db_url = db_url.replace("sqlite+aiosqlite://", "sqlite://")
-
     print(f"Creating database tables...")
-    print(f"Database URL: {db_url}")
+    print(f"Database URL: {sync_url(settings.DATABASE_URL)}")
 
     try:
-        # Создаем движок
-        if db_url.startswith("sqlite://"):
-            # Для SQLite убираем настройки пула соединений
-            engine = create_engine(db_url, echo=True)
-        else:
-            # Для PostgreSQL с настройками пула
-            engine = create_engine(
-                db_url,
-                echo=True,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True
-            )
-
-        # Создаем все таблицы
-        Base.metadata.create_all(bind=engine)
-
+        database.create_tables()
         print("[SUCCESS] Database tables created successfully!")
-
-        # Закрываем соединение
-        engine.dispose()
+        database.get_sync_engine().dispose()
 
     except Exception as e:
         print(f"[ERROR] Error creating database tables: {e}")
@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 """
 Seed database with test data
+
+Данные пишутся пакетами через Core (scripts/bulk.py). С --scale N базовый
+набор материалов повторяется N раз с новыми номерами партий.
 """
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -11,12 +15,14 @@ import random
 # Добавляем корневую директорию в path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select, func
-from src.core.database import AsyncSessionLocal, engine, Base
+from sqlalchemy import text, select, func, insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from scripts.bulk import BulkWriter, UserPools
+from src.core.barcodes import material_barcode
+from src.core.database import get_engine, Base
 from src.models.material import Material, MaterialStatus, MaterialType
 from src.models.user import User, UserRole
-from src.models.workflow import WorkflowState, WorkflowTemplate
+from src.models.workflow import WorkflowTemplate
 from src.models.certificate import TestResult, TestType, TestCategory
 
 # Временная функция для хеширования паролей
@@ -34,7 +40,117 @@ except ImportError:
         return pwd_context.hash(password)
 
 
-async def create_users(session: AsyncSession):
+MATERIAL_TEMPLATES = [
+    # Листовой прокат
+    {
+        "material_type": MaterialType.STEEL,
+        "grade": "09Г2С",
+        "specification": "ГОСТ 19281-2014, 10х1500х6000",
+        "quantity": 25.0,
+        "unit": "шт",
+        "supplier": "ООО МеталлПоставка",
+        "supplier_certificate": "СК-2024-1234",
+        "status": MaterialStatus.RECEIVED,
+        "location": "Склад А, ряд 1"
+    },
+    {
+        "material_type": MaterialType.STEEL,
+        "grade": "08пс",
+        "specification": "ГОСТ 19904-90, 2х1250х2500",
+        "quantity": 50.0,
+        "unit": "шт",
+        "supplier": "АО СтальТрейд",
+        "supplier_certificate": "СТ-2024-5678",
+        "status": MaterialStatus.TESTING,
+        "location": "Зона ОТК"
+    },
+    # Трубы
+    {
+        "material_type": MaterialType.STEEL,
+        "grade": "Ст3сп",
+        "specification": "ГОСТ 10704-91, 108х4х6000",
+        "quantity": 30.0,
+        "unit": "шт",
+        "supplier": "ООО ТрубПром",
+        "supplier_certificate": "ТП-2024-9012",
+        "status": MaterialStatus.TESTING,
+        "location": "ЦЗЛ"
+    },
+    # Профиль
+    {
+        "material_type": MaterialType.STEEL,
+        "grade": "09Г2С",
+        "specification": "ГОСТ 8509-93, 75х75х6х6000",
+        "quantity": 40.0,
+        "unit": "шт",
+        "supplier": "ООО МеталлПрофиль",
+        "supplier_certificate": "МП-2024-3456",
+        "status": MaterialStatus.APPROVED,
+        "location": "Склад Б, ряд 3"
+    },
+    # Круг
+    {
+        "material_type": MaterialType.ALLOY_STEEL,
+        "grade": "40Х",
+        "specification": "ГОСТ 4543-2016, ф50х3000",
+        "quantity": 20.0,
+        "unit": "шт",
+        "supplier": "ООО СпецСталь",
+        "supplier_certificate": "СС-2024-7890",
+        "status": MaterialStatus.RELEASED,
+        "location": "Цех №2"
+    },
+    # Проволока
+    {
+        "material_type": MaterialType.STEEL,
+        "grade": "Св-08Г2С",
+        "specification": "ГОСТ 2246-70, ф1.2",
+        "quantity": 10.0,
+        "unit": "кг",
+        "supplier": "АО ПроволокаПлюс",
+        "supplier_certificate": "ПП-2024-1122",
+        "status": MaterialStatus.APPROVED,
+        "location": "Склад расходных"
+    }
+]
+
+
+# Результаты испытаний для материалов, прошедших входной контроль
+CHEMICAL_RESULTS = {
+    "C": 0.12,
+    "Mn": 1.45,
+    "Si": 0.55,
+    "P": 0.025,
+    "S": 0.020,
+    "Cr": 0.30,
+    "Ni": 0.30,
+    "Cu": 0.30,
+    "units": {"C": "%", "Mn": "%", "Si": "%", "P": "%", "S": "%"}
+}
+TENSILE_RESULTS = {
+    "yield_strength": 345,
+    "tensile_strength": 490,
+    "elongation": 21,
+    "reduction_area": 65,
+    "units": {
+        "yield_strength": "MPa",
+        "tensile_strength": "MPa",
+        "elongation": "%",
+        "reduction_area": "%"
+    }
+}
+ULTRASONIC_RESULTS = {
+    "defects_found": 0,
+    "max_defect_size": 0,
+    "scanned_area": 100,
+    "units": {
+        "max_defect_size": "mm",
+        "scanned_area": "%"
+    }
+}
+
+
+async def create_users(conn: AsyncConnection) -> UserPools:
     """Создание тестовых пользователей"""
     print("Creating users...")
 
@@ -83,217 +199,108 @@ async def create_users(session: AsyncSession):
         }
     ]
 
-    users = []
-    for user_data in users_data:
-        user = User(**user_data)
-        session.add(user)
-        users.append(user)
-
-    await session.commit()
-    print(f"[OK] Created {len(users)} users")
-    return users
+    await conn.execute(insert(User), users_data)
+    await conn.commit()
+    print(f"[OK] Created {len(users_data)} users")
+    return await UserPools.load(conn)
 
 
-async def create_materials(session: AsyncSession, users: list):
-    """Создание тестовых материалов"""
+async def create_materials(conn: AsyncConnection, users: UserPools, scale: int = 1) -> dict:
+    """Создание тестовых материалов; возвращает колонки созданных строк"""
     print("Creating materials...")
 
-    materials_data = [
-        # Листовой прокат
-        {
-            "batch_number": "MAT-2024-001",
-            "material_type": MaterialType.STEEL,
-            "grade": "09Г2С",
-            "specification": "ГОСТ 19281-2014, 10х1500х6000",
-            "quantity": 25.0,
-            "unit": "шт",
-            "supplier": "ООО МеталлПоставка",
-            "supplier_certificate": "СК-2024-1234",
-            "status": MaterialStatus.RECEIVED,
-            "location": "Склад А, ряд 1",
-            "created_by": users[1].id  # warehouse
-        },
-        {
-            "batch_number": "MAT-2024-002",
-            "material_type": MaterialType.STEEL,
-            "grade": "08пс",
-            "specification": "ГОСТ 19904-90, 2х1250х2500",
-            "quantity": 50.0,
-            "unit": "шт",
-            "supplier": "АО СтальТрейд",
-            "supplier_certificate": "СТ-2024-5678",
-            "status": MaterialStatus.TESTING,
-            "location": "Зона ОТК",
-            "created_by": users[1].id
-        },
-        # Трубы
-        {
-            "batch_number": "MAT-2024-003",
-            "material_type": MaterialType.STEEL,
-            "grade": "Ст3сп",
-            "specification": "ГОСТ 10704-91, 108х4х6000",
-            "quantity": 30.0,
-            "unit": "шт",
-            "supplier": "ООО ТрубПром",
-            "supplier_certificate": "ТП-2024-9012",
-            "status": MaterialStatus.TESTING,
-            "location": "ЦЗЛ",
-            "created_by": users[1].id
-        },
-        # Профиль
-        {
-            "batch_number": "MAT-2024-004",
-            "material_type": MaterialType.STEEL,
-            "grade": "09Г2С",
-            "specification": "ГОСТ 8509-93, 75х75х6х6000",
-            "quantity": 40.0,
-            "unit": "шт",
-            "supplier": "ООО МеталлПрофиль",
-            "supplier_certificate": "МП-2024-3456",
-            "status": MaterialStatus.APPROVED,
-            "location": "Склад Б, ряд 3",
-            "created_by": users[1].id
-        },
-        # Круг
-        {
-            "batch_number": "MAT-2024-005",
-            "material_type": MaterialType.ALLOY_STEEL,
-            "grade": "40Х",
-            "specification": "ГОСТ 4543-2016, ф50х3000",
-            "quantity": 20.0,
-            "unit": "шт",
-            "supplier": "ООО СпецСталь",
-            "supplier_certificate": "СС-2024-7890",
-            "status": MaterialStatus.RELEASED,
-            "location": "Цех №2",
-            "created_by": users[1].id
-        },
-        # Проволока
-        {
-            "batch_number": "MAT-2024-006",
-            "material_type": MaterialType.STEEL,
-            "grade": "Св-08Г2С",
-            "specification": "ГОСТ 2246-70, ф1.2",
-            "quantity": 10.0,
-            "unit": "кг",
-            "supplier": "АО ПроволокаПлюс",
-            "supplier_certificate": "ПП-2024-1122",
-            "status": MaterialStatus.APPROVED,
-            "location": "Склад расходных",
-            "created_by": users[1].id
-        }
-    ]
-
-    materials = []
-    for i, mat_data in enumerate(materials_data):
-        # Добавляем временные метки
-        mat_data["received_date"] = datetime.now() - timedelta(days=random.randint(1, 30))
-        mat_data["created_at"] = mat_data["received_date"]
-
-        # Добавляем метаданные
-        mat_data["material_metadata"] = {
+    writer = BulkWriter(conn)
+    first_id = await writer.next_id(Material.__table__)
+    warehouse = users.pool(UserRole.WAREHOUSE_KEEPER)
+    now = datetime.now()
+
+    columns = {name: [] for name in (
+        "id", "batch_number", "material_type", "grade", "specification", "quantity", "unit",
+        "supplier", "supplier_certificate", "status", "location", "received_date", "created_at",
+        "created_by", "material_metadata", "barcode"
+    )}
+    for i in range(scale * len(MATERIAL_TEMPLATES)):
+        template = MATERIAL_TEMPLATES[i % len(MATERIAL_TEMPLATES)]
+        received_date = now - timedelta(days=random.randint(1, 30))
+
+        columns["id"].append(first_id + i)
+        # Хук after_insert модели при массовой вставке не срабатывает
+        columns["barcode"].append(material_barcode(first_id + i))
+        columns["batch_number"].append(f"MAT-2024-{i + 1:03d}")
+        for name in ("grade", "specification", "quantity", "unit", "supplier",
+                     "supplier_certificate", "location"):
+            columns[name].append(template[name])
+        columns["material_type"].append(template["material_type"].value)
+        columns["status"].append(template["status"].value)
+        columns["received_date"].append(received_date)
+        columns["created_at"].append(received_date)
+        columns["created_by"].append(random.choice(warehouse))
+        columns["material_metadata"].append({
             "invoice_number": f"INV-2024-{1000 + i}",
             "batch_number": f"BATCH-{random.randint(1000, 9999)}",
             "temperature_storage": "15-25°C",
             "humidity_requirements": "<60%"
-        }
+        })
 
-        material = Material(**mat_data)
-        session.add(material)
-        materials.append(material)
+    await writer.write(Material.__table__, columns)
+    await conn.commit()
+    print(f"[OK] Created {len(columns['id'])} materials")
+    return columns
 
-    await session.commit()
-    print(f"[OK] Created {len(materials)} materials")
-    return materials
 
-
-async def create_test_results(session: AsyncSession, materials: list, users: list):
+async def create_test_results(conn: AsyncConnection, materials: dict, users: UserPools) -> int:
     """Создание результатов испытаний"""
     print("Creating test results...")
 
-    test_results = []
-
-    # Для материалов в статусе LAB_TESTING и APPROVED
-    for material in materials:
-        if material.status in [MaterialStatus.TESTING, MaterialStatus.APPROVED, MaterialStatus.RELEASED]:
-            # Химический анализ
-            chem_test = TestResult(
-                material_id=material.id,
-                test_type=TestType.CHEMICAL,
-                test_category=TestCategory.DESTRUCTIVE,
-                tested_by=users[3].id,  # lab_destructive
-                tested_at=material.received_date + timedelta(days=1),
-                pass_fail="PASS",
-                numeric_results={
-                    "C": 0.12,
-                    "Mn": 1.45,
-                    "Si": 0.55,
-                    "P": 0.025,
-                    "S": 0.020,
-                    "Cr": 0.30,
-                    "Ni": 0.30,
-                    "Cu": 0.30,
-                    "units": {"C": "%", "Mn": "%", "Si": "%", "P": "%", "S": "%"}
-                },
-                notes="Химический состав соответствует требованиям"
-            )
-            session.add(chem_test)
-            test_results.append(chem_test)
-
-            # Механические испытания
-            mech_test = TestResult(
-                material_id=material.id,
-                test_type=TestType.TENSILE,
-                test_category=TestCategory.DESTRUCTIVE,
-                tested_by=users[3].id,
-                tested_at=material.received_date + timedelta(days=2),
-                pass_fail="PASS",
-                numeric_results={
-                    "yield_strength": 345,
-                    "tensile_strength": 490,
-                    "elongation": 21,
-                    "reduction_area": 65,
-                    "units": {
-                        "yield_strength": "MPa",
-                        "tensile_strength": "MPa",
-                        "elongation": "%",
-                        "reduction_area": "%"
-                    }
-                },
-                notes="Механические свойства в норме"
-            )
-            session.add(mech_test)
-            test_results.append(mech_test)
-
-            # Ультразвуковой контроль для листов и труб
-            if material.material_type in [MaterialType.STEEL, MaterialType.ALLOY_STEEL]:
-                ut_test = TestResult(
-                    material_id=material.id,
-                    test_type=TestType.ULTRASONIC,
-                    test_category=TestCategory.NON_DESTRUCTIVE,
-                    tested_by=users[4].id,  # lab_nondestructive
-                    tested_at=material.received_date + timedelta(days=1),
-                    pass_fail="PASS",
-                    numeric_results={
-                        "defects_found": 0,
-                        "max_defect_size": 0,
-                        "scanned_area": 100,
-                        "units": {
-                            "max_defect_size": "mm",
-                            "scanned_area": "%"
-                        }
-                    },
-                    notes="Дефекты не обнаружены"
-                )
-                session.add(ut_test)
-                test_results.append(ut_test)
-
-    await session.commit()
-    print(f"[OK] Created {len(test_results)} test results")
-    return test_results
-
-
-async def create_workflow_templates(session: AsyncSession):
+    destructive = users.pool(UserRole.LAB_DESTRUCTIVE)
+    non_destructive = users.pool(UserRole.LAB_NON_DESTRUCTIVE)
+    tested_statuses = {MaterialStatus.TESTING.value, MaterialStatus.APPROVED.value, MaterialStatus.RELEASED.value}
+    ultrasonic_types = {MaterialType.STEEL.value, MaterialType.ALLOY_STEEL.value}
+
+    columns = {name: [] for name in (
+        "material_id", "test_type", "test_category", "tested_by", "tested_at",
+        "pass_fail", "numeric_results", "notes", "attachments"
+    )}
+
+    attachments = []
+
+    def add(material_id, test_type, category, tested_by, tested_at, results, notes):
+        columns["material_id"].append(material_id)
+        columns["test_type"].append(test_type)
+        columns["test_category"].append(category)
+        columns["tested_by"].append(tested_by)
+        columns["tested_at"].append(tested_at)
+        columns["pass_fail"].append("PASS")
+        columns["numeric_results"].append(results)
+        columns["notes"].append(notes)
+        columns["attachments"].append(attachments)
+
+    # Для материалов в статусе TESTING, APPROVED и RELEASED
+    for material_id, status, material_type, received_date in zip(
+            materials["id"], materials["status"], materials["material_type"], materials["received_date"]):
+        if status not in tested_statuses:
+            continue
+
+        add(material_id, TestType.CHEMICAL, TestCategory.DESTRUCTIVE, random.choice(destructive),
+            received_date + timedelta(days=1), CHEMICAL_RESULTS,
+            "Химический состав соответствует требованиям")
+        add(material_id, TestType.TENSILE, TestCategory.DESTRUCTIVE, random.choice(destructive),
+            received_date + timedelta(days=2), TENSILE_RESULTS,
+            "Механические свойства в норме")
+
+        # Ультразвуковой контроль для листов и труб
+        if material_type in ultrasonic_types:
+            add(material_id, TestType.ULTRASONIC, TestCategory.NON_DESTRUCTIVE, random.choice(non_destructive),
+                received_date + timedelta(days=1), ULTRASONIC_RESULTS,
+                "Дефекты не обнаружены")
+
+    written = await BulkWriter(conn).write(TestResult.__table__, columns)
+    await conn.commit()
+    print(f"[OK] Created {written} test results")
+    return written
+
+
+async def create_workflow_templates(conn: AsyncConnection) -> int:
     """Создание шаблонов workflow"""
     print("Creating workflow templates...")
 
@@ -327,35 +334,30 @@ async def create_workflow_templates(session: AsyncSession):
         }
     ]
 
-    templates = []
-    for template_data in templates_data:
-        template = WorkflowTemplate(**template_data)
-        session.add(template)
-        templates.append(template)
+    await conn.execute(insert(WorkflowTemplate), templates_data)
+    await conn.commit()
+    print(f"[OK] Created {len(templates_data)} workflow templates")
+    return len(templates_data)
 
-    await session.commit()
-    print(f"[OK] Created {len(templates)} workflow templates")
-    return templates
 
-
-async def main():
+async def main(scale: int = 1):
     """Основная функция"""
     print("\n" + "=" * 50)
     print("Starting database seeding...")
     print("=" * 50 + "\n")
 
+    engine = get_engine()
     try:
         # Пересоздаем все таблицы
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all)
 
-        async with AsyncSessionLocal() as session:
+        async with engine.connect() as conn:
             # Проверяем, не заполнена ли уже БД
-            result = await session.execute(
+            existing_users = await conn.scalar(
                 select(func.count()).select_from(User)
             )
-            existing_users = result.scalar()
 
             if existing_users > 0:
                 print("[WARNING] Database already contains data!")
@@ -366,29 +368,33 @@ async def main():
 
                 # Очищаем таблицы
                 print("Clearing existing data...")
-                await session.execute(text("DELETE FROM test_results"))
-                await session.execute(text("DELETE FROM certificates"))
-                await session.execute(text("DELETE FROM workflow_states"))
-                await session.execute(text("DELETE FROM materials"))
-                await session.execute(text("DELETE FROM workflow_templates"))
-                await session.execute(text("DELETE FROM users"))
-                await session.commit()
+                await conn.execute(text("DELETE FROM test_results"))
+                await conn.execute(text("DELETE FROM certificates"))
+                await conn.execute(text("DELETE FROM workflow_states"))
+                await conn.execute(text("DELETE FROM materials"))
+                await conn.execute(text("DELETE FROM workflow_templates"))
+                await conn.execute(text("DELETE FROM users"))
+                await conn.commit()
 
             # Создаем данные
-            users = await create_users(session)
-            materials = await create_materials(session, users)
-            test_results = await create_test_results(session, materials, users)
-            templates = await create_workflow_templates(session)
+            users = await create_users(conn)
+            materials = await create_materials(conn, users, scale)
+            test_results = await create_test_results(conn, materials, users)
+            templates = await create_workflow_templates(conn)
+
+            # Идентификаторы материалов выданы явно — сдвигаем последовательности
+            await BulkWriter(conn).sync_sequences([Material.__table__])
+            await conn.commit()
 
             print("\n" + "=" * 50)
             print("[SUCCESS] Database seeding completed successfully!")
             print("=" * 50)
 
             print("\nSummary:")
-            print(f"  • Users: {len(users)}")
-            print(f"  • Materials: {len(materials)}")
-            print(f"  • Test Results: {len(test_results)}")
-            print(f"  • Workflow Templates: {len(templates)}")
+            print(f"  • Users: {len(users.all)}")
+            print(f"  • Materials: {len(materials['id'])}")
+            print(f"  • Test Results: {test_results}")
+            print(f"  • Workflow Templates: {templates}")
 
             print("\nTest credentials:")
             print("  Admin: admin / admin123")
@@ -403,4 +409,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Database seeding script")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="How many times to replicate the base set of materials")
+    args = parser.parse_args()
+    asyncio.run(main(args.scale))
@@ -1,21 +1,36 @@
 #!/usr/bin/env python3
 """
 Расширенный скрипт для заполнения базы данных тестовыми данными
+
+Колонки генерируются векторно (numpy) и пишутся пакетами через scripts/bulk.py,
+без ORM-объектов. Пользователи заранее разложены по ролям, идентификаторы
+выдаются диапазонами, поэтому миллион материалов с историей, испытаниями и
+сертификатами загружается меньше чем за минуту.
+
+Использование:
+    python scripts/seed_extended_db.py --scale 1000000 --seed 42
 """
+import argparse
 import asyncio
+import math
 import random
-from datetime import datetime, timedelta
-from typing import List
 import sys
 import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
 
 # Добавляем путь к проекту
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.core.database import AsyncSessionLocal
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from scripts.bulk import BulkWriter, UserPools
+from src.core.barcodes import material_barcode
 from src.models.material import Material, MaterialStatus, MaterialType
-from src.models.user import User, UserRole
+from src.models.user import UserRole
 from src.models.certificate import TestResult, TestType, TestCategory, Certificate
 from src.models.workflow import WorkflowState
 
@@ -159,54 +174,77 @@ STORAGE_LOCATIONS = [
     "Зона временного хранения", "Открытая площадка - Сектор А"
 ]
 
+# Примечания к партиям по статусам
+NOTES_TEMPLATES = {
+    MaterialStatus.RECEIVED: [
+        "Материал поступил в полном объеме",
+        "Требуется дополнительная проверка документации",
+        "Визуальный осмотр без замечаний",
+        "Упаковка частично повреждена, материал не пострадал"
+    ],
+    MaterialStatus.QUARANTINE: [
+        "Помещен в карантин до получения результатов испытаний",
+        "Карантин по требованию ОТК",
+        "Ожидание результатов входного контроля",
+        "Новый поставщик, требуется полная проверка"
+    ],
+    MaterialStatus.TESTING: [
+        "Образцы переданы в лабораторию",
+        "Проводятся механические испытания",
+        "Химический анализ в процессе",
+        "Ожидание результатов разрушающего контроля"
+    ],
+    MaterialStatus.APPROVED: [
+        "Все испытания пройдены успешно",
+        "Соответствует требованиям ГОСТ",
+        "Одобрено для использования в производстве",
+        "Качество подтверждено, можно выдавать"
+    ],
+    MaterialStatus.RELEASED: [
+        "Выдано в производство по заявке",
+        "Передано в цех №1",
+        "Использовано для заказа №12345",
+        "Частичная выдача, остаток на складе"
+    ],
+    MaterialStatus.REJECTED: [
+        "Не соответствует химическому составу",
+        "Механические свойства ниже требуемых",
+        "Обнаружены критические дефекты",
+        "Возврат поставщику"
+    ]
+}
 
-def generate_random_notes(status: MaterialStatus, trusted_supplier: bool) -> str:
-    """Генерация случайных примечаний в зависимости от статуса"""
-    notes_templates = {
-        MaterialStatus.RECEIVED: [
-            "Материал поступил в полном объеме",
-            "Требуется дополнительная проверка документации",
-            "Визуальный осмотр без замечаний",
-            "Упаковка частично повреждена, материал не пострадал"
-        ],
-        MaterialStatus.QUARANTINE: [
-            "Помещен в карантин до получения результатов испытаний",
-            "Карантин по требованию ОТК",
-            "Ожидание результатов входного контроля",
-            "Новый поставщик, требуется полная проверка"
-        ],
-        MaterialStatus.TESTING: [
-            "Образцы переданы в лабораторию",
-            "Проводятся механические испытания",
-            "Химический анализ в процессе",
-            "Ожидание результатов разрушающего контроля"
-        ],
-        MaterialStatus.APPROVED: [
-            "Все испытания пройдены успешно",
-            "Соответствует требованиям ГОСТ",
-            "Одобрено для использования в производстве",
-            "Качество подтверждено, можно выдавать"
-        ],
-        MaterialStatus.RELEASED: [
-            "Выдано в производство по заявке",
-            "Передано в цех №1",
-            "Использовано для заказа №12345",
-            "Частичная выдача, остаток на складе"
-        ],
-        MaterialStatus.REJECTED: [
-            "Не соответствует химическому составу",
-            "Механические свойства ниже требуемых",
-            "Обнаружены критические дефекты",
-            "Возврат поставщику"
-        ]
-    }
+# Доли статусов в сгенерированном наборе
+STATUS_WEIGHTS = {
+    MaterialStatus.RECEIVED: 0.15,
+    MaterialStatus.QUARANTINE: 0.10,
+    MaterialStatus.TESTING: 0.15,
+    MaterialStatus.APPROVED: 0.35,
+    MaterialStatus.RELEASED: 0.20,
+    MaterialStatus.REJECTED: 0.05
+}
+
+# Приемка идет в начале смен
+SHIFT_HOURS = [8, 9, 10, 11, 13, 14, 15, 16]
+SHIFT_WEIGHTS = [6, 8, 5, 3, 3, 4, 3, 2]
+
+STEEL_TYPES = [MaterialType.STEEL.value, MaterialType.CARBON_STEEL.value, MaterialType.ALLOY_STEEL.value]
+CHEMISTRY_TYPES = STEEL_TYPES + [MaterialType.STAINLESS_STEEL.value]
 
-    base_note = random.choice(notes_templates.get(status, ["Стандартная приемка"]))
+VISUAL_NOTES = [
+    "Поверхность без видимых дефектов",
+    "Обнаружены незначительные царапины, не влияющие на качество",
+    "Геометрические размеры соответствуют заявленным",
+    "Маркировка четкая, соответствует документации"
+]
+VISUAL_REJECT_NOTE = "Обнаружены критические дефекты поверхности. Визуальный контроль выполнен согласно ГОСТ"
+UNTRUSTED_NOTE_SUFFIX = ". Требуется усиленный контроль (новый поставщик)"
 
-    if not trusted_supplier and status in [MaterialStatus.RECEIVED, MaterialStatus.QUARANTINE]:
-        base_note += ". Требуется усиленный контроль (новый поставщик)"
+DEFAULT_SCALE = 150
+DEFAULT_BATCH_SIZE = 50_000
 
-    return base_note
+# Количество вариантов в пулах метаданных и результатов испытаний
+POOL_VARIANTS = 32
 
 
 def generate_special_requirements(mat_type: MaterialType) -> str:
@@ -224,313 +262,63 @@ def generate_special_requirements(mat_type: MaterialType) -> str:
     return requirements.get(mat_type, "Стандартные условия хранения")
 
 
-def generate_status_dates(received_date: datetime, current_status: MaterialStatus) -> dict:
-    """Генерация дат изменения статусов"""
-    dates = {"received": received_date.isoformat()}
-
-    if current_status == MaterialStatus.QUARANTINE:
-        dates["quarantine"] = (received_date + timedelta(hours=random.randint(1, 24))).isoformat()
-    elif current_status == MaterialStatus.TESTING:
-        dates["quarantine"] = (received_date + timedelta(hours=random.randint(1, 24))).isoformat()
-        dates["testing"] = (received_date + timedelta(days=random.randint(1, 3))).isoformat()
-    elif current_status == MaterialStatus.APPROVED:
-        dates["quarantine"] = (received_date + timedelta(hours=random.randint(1, 24))).isoformat()
-        dates["testing"] = (received_date + timedelta(days=random.randint(1, 3))).isoformat()
-        dates["approved"] = (received_date + timedelta(days=random.randint(3, 7))).isoformat()
-    elif current_status == MaterialStatus.RELEASED:
-        dates["quarantine"] = (received_date + timedelta(hours=random.randint(1, 24))).isoformat()
-        dates["testing"] = (received_date + timedelta(days=random.randint(1, 3))).isoformat()
-        dates["approved"] = (received_date + timedelta(days=random.randint(3, 7))).isoformat()
-        dates["released"] = (received_date + timedelta(days=random.randint(7, 30))).isoformat()
-    elif current_status == MaterialStatus.REJECTED:
-        dates["testing"] = (received_date + timedelta(days=random.randint(1, 3))).isoformat()
-        dates["rejected"] = (received_date + timedelta(days=random.randint(3, 5))).isoformat()
-
-    return dates
-
-
-async def create_extended_materials(session: AsyncSession, users: List[User]) -> List[Material]:
-    """Создание расширенного набора материалов"""
-    print("Creating extended materials dataset...")
-
-    materials = []
-    material_counter = 1
-
-    # Создаем материалы для каждого типа
-    for mat_type in MaterialType:
-        material_names = MATERIAL_NAMES.get(mat_type, ["Материал"])
-        dimensions_list = DIMENSIONS.get(mat_type, ["Стандартный"])
-
-        # Создаем по несколько материалов каждого наименования
-        for name in material_names:
-            # Создаем 2-3 варианта каждого материала с разными параметрами
-            for variant in range(random.randint(2, 3)):
-                # Определяем статус материала
-                status_weights = {
-                    MaterialStatus.RECEIVED: 0.15,
-                    MaterialStatus.QUARANTINE: 0.10,
-                    MaterialStatus.TESTING: 0.15,
-                    MaterialStatus.APPROVED: 0.35,
-                    MaterialStatus.RELEASED: 0.20,
-                    MaterialStatus.REJECTED: 0.05
-                }
-                status = random.choices(
-                    list(status_weights.keys()),
-                    weights=list(status_weights.values())
-                )[0]
-
-                # Генерируем дату поступления
-                days_ago = random.randint(0, 180)
-                received_date = datetime.now() - timedelta(days=days_ago)
-
-                # Выбираем поставщика
-                supplier = random.choice(SUPPLIERS)
-
-                # Генерируем код материала
-                year = received_date.year
-                material_code = f"MAT-{year}-{str(material_counter).zfill(5)}"
-                material_counter += 1
-
-                # Создаем материал
-                import time
-                timestamp = int(time.time() * 1000) % 100000  # Последние 5 цифр timestamp
-                material_data = {
-                    "batch_number": f"BATCH-{received_date.strftime('%Y%m%d')}-{timestamp}-{random.randint(1000, 9999)}",
-                    "material_type": mat_type.value,
-                    "grade": random.choice(GRADES) if random.random() > 0.3 else None,
-                    "specification": random.choice(STANDARDS) if random.random() > 0.2 else None,
-                    "quantity": round(random.uniform(10, 5000), 2),
-                    "unit": "кг" if mat_type in [MaterialType.STEEL, MaterialType.CARBON_STEEL, MaterialType.ALLOY_STEEL] else "м" if "труба" in name.lower() else "шт",
-                    "supplier": supplier["name"],
-                    "supplier_certificate": f"СК-{received_date.year}-{random.randint(1000, 9999)}",
-                    "status": status.value,
-                    "location": random.choice(STORAGE_LOCATIONS),
-                    "received_date": received_date,
-                    "created_by": random.choice(users).id,
-                    "notes": generate_random_notes(status, supplier["trusted"]),
-                    "material_metadata": {
-                        "material_code": f"MAT-{year}-{str(material_counter).zfill(5)}",
-                        "dimensions": random.choice(dimensions_list),
-                        "heat_number": f"П-{random.randint(100000, 999999)}" if mat_type in [MaterialType.STEEL, MaterialType.CARBON_STEEL, MaterialType.ALLOY_STEEL] else None,
-                        "invoice_number": f"INV-{received_date.year}-{random.randint(10000, 99999)}",
-                        "supplier_city": supplier["city"],
-                        "trusted_supplier": supplier["trusted"],
-                        "requires_quarantine": not supplier["trusted"] and random.random() > 0.5,
-                        "urgent": random.random() > 0.8,
-                        "temperature_storage": "15-25°C",
-                        "humidity_requirements": "<60%",
-                        "special_requirements": generate_special_requirements(mat_type),
-                        "contract_number": f"К-{received_date.year}-{random.randint(100, 999)}",
-                        "delivery_method": random.choice(["Авто", "Ж/Д", "Авиа", "Самовывоз"]),
-                        "customs_declaration": f"ГТД-{random.randint(1000000, 9999999)}" if random.random() > 0.7 else None
-                    }
-                }
-
-                # Добавляем временные метки для разных статусов
-                if status != MaterialStatus.RECEIVED:
-                    material_data["material_metadata"]["status_dates"] = generate_status_dates(received_date, status)
-
-                material = Material(**material_data)
-                session.add(material)
-                materials.append(material)
-
-    await session.commit()
-    print(f"[OK] Created {len(materials)} materials")
-    return materials
-
-
-async def create_extended_test_results(session: AsyncSession, materials: List[Material], users: List[User]):
-    """Создание расширенных результатов испытаний"""
-    print("Creating extended test results...")
-
-    test_results = []
-    lab_users = [u for u in users if u.role in [UserRole.LAB_DESTRUCTIVE, UserRole.LAB_NON_DESTRUCTIVE, UserRole.QUALITY_CONTROL]]
-
-    for material in materials:
-        # Создаем тесты только для материалов в соответствующих статусах
-        if material.status in [MaterialStatus.TESTING.value, MaterialStatus.APPROVED.value, MaterialStatus.RELEASED.value]:
-            # Химический анализ (для металлов)
-            if material.material_type in [MaterialType.STEEL.value, MaterialType.CARBON_STEEL.value, MaterialType.ALLOY_STEEL.value, MaterialType.STAINLESS_STEEL.value]:
-                chem_results = generate_chemical_composition(material.grade)
-                chem_test = TestResult(
-                    material_id=material.id,
-                    test_type=TestType.CHEMICAL,
-                    test_category=TestCategory.DESTRUCTIVE,
-                    tested_by=random.choice(lab_users).id,
-                    tested_at=material.received_date + timedelta(days=random.randint(1, 3)),
-                    pass_fail="PASS" if material.status != MaterialStatus.REJECTED.value else "FAIL",
-                    numeric_results=chem_results,
-                    notes=f"Химический состав {'соответствует' if material.status != MaterialStatus.REJECTED.value else 'не соответствует'} требованиям"
-                )
-                session.add(chem_test)
-                test_results.append(chem_test)
-
-            # Механические испытания
-            if material.material_type in [MaterialType.STEEL.value, MaterialType.CARBON_STEEL.value, MaterialType.ALLOY_STEEL.value]:
-                mech_results = generate_mechanical_properties(material.material_type)
-                mech_test = TestResult(
-                    material_id=material.id,
-                    test_type=TestType.TENSILE,
-                    test_category=TestCategory.DESTRUCTIVE,
-                    tested_by=random.choice(lab_users).id,
-                    tested_at=material.received_date + timedelta(days=random.randint(2, 4)),
-                    pass_fail="PASS" if material.status != MaterialStatus.REJECTED.value else "FAIL",
-                    numeric_results=mech_results,
-                    notes="Механические свойства проверены"
-                )
-                session.add(mech_test)
-                test_results.append(mech_test)
-
-            # Измерение твердости
-            if random.random() > 0.5:
-                hardness_test = TestResult(
-                    material_id=material.id,
-                    test_type=TestType.HARDNESS,
-                    test_category=TestCategory.NON_DESTRUCTIVE,
-                    tested_by=random.choice(lab_users).id,
-                    tested_at=material.received_date + timedelta(days=random.randint(1, 2)),
-                    pass_fail="PASS",
-                    numeric_results={
-                        "HB": random.randint(150, 350),
-                        "measurement_points": 5,
-                        "average": random.randint(200, 300),
-                        "units": "HB"
-                    },
-                    notes="Измерение твердости по Бринеллю"
-                )
-                session.add(hardness_test)
-                test_results.append(hardness_test)
-
-            # Визуальный контроль
-            visual_test = TestResult(
-                material_id=material.id,
-                test_type=TestType.VISUAL,
-                test_category=TestCategory.NON_DESTRUCTIVE,
-                tested_by=random.choice(lab_users).id,
-                tested_at=material.received_date + timedelta(hours=random.randint(1, 8)),
-                pass_fail="PASS" if material.status != MaterialStatus.REJECTED.value else "FAIL",
-                notes="Визуальный осмотр: " + random.choice([
-                    "Поверхность без видимых дефектов",
-                    "Обнаружены незначительные царапины, не влияющие на качество",
-                    "Геометрические размеры соответствуют заявленным",
-                    "Маркировка четкая, соответствует документации"
-                ]) if material.status != MaterialStatus.REJECTED.value else "Обнаружены критические дефекты поверхности. Визуальный контроль выполнен согласно ГОСТ"
-            )
-            session.add(visual_test)
-            test_results.append(visual_test)
-
-            # Ультразвуковой контроль (для толстых материалов)
-            if material.material_type == MaterialType.STEEL.value and random.random() > 0.6:
-                ut_test = TestResult(
-                    material_id=material.id,
-                    test_type=TestType.ULTRASONIC,
-                    test_category=TestCategory.NON_DESTRUCTIVE,
-                    tested_by=random.choice(lab_users).id,
-                    tested_at=material.received_date + timedelta(days=random.randint(1, 3)),
-                    pass_fail="PASS",
-                    notes="УЗК: Внутренние дефекты не обнаружены. Контроль выполнен на установке УД2-70"
-                )
-                session.add(ut_test)
-                test_results.append(ut_test)
-
-    await session.commit()
-    print(f"[OK] Created {len(test_results)} test results")
-    return test_results
-
-
-async def create_certificates(session: AsyncSession, materials: List[Material], users: List[User]):
-    """Создание сертификатов для одобренных материалов"""
-    print("Creating certificates...")
-
-    certificates = []
-    qc_users = [u for u in users if u.role == UserRole.QUALITY_CONTROL]
-
-    for material in materials:
-        if material.status in [MaterialStatus.APPROVED.value, MaterialStatus.RELEASED.value]:
-            # Получаем название материала из metadata
-            material_name = material.material_metadata.get('material_code', f'Материал {material.batch_number}')
-
-            cert = Certificate(
-                certificate_number=f"CERT-{datetime.now().year}-{random.randint(10000, 99999)}",
-                material_id=material.id,
-                certificate_type="quality",
-                issued_date=material.received_date + timedelta(days=random.randint(3, 7)),
-                valid_until=material.received_date + timedelta(days=365),
-                issued_by=random.choice(qc_users).id,
-                summary=f"Материал {material_name} соответствует требованиям {material.specification or 'технических условий'}",
-                conclusions="Материал пригоден для использования в производстве",
-                recommendations="Соблюдать условия хранения согласно требованиям",
-                certificate_metadata={
-                    "test_protocol_numbers": [f"ПИ-{random.randint(1000, 9999)}" for _ in range(random.randint(1, 3))],
-                    "laboratory": "Центральная заводская лаборатория",
-                    "accreditation": "РОСС RU.0001.21МТ52"
-                }
-            )
-            session.add(cert)
-            certificates.append(cert)
-
-    await session.commit()
-    print(f"[OK] Created {len(certificates)} certificates")
-    return certificates
-
-
-def generate_chemical_composition(grade: str = None) -> dict:
+def generate_chemical_composition(grade: str = None, rnd: random.Random = random) -> dict:
     """Генерация химического состава в зависимости от марки стали"""
     if grade and grade.startswith("09Г2С"):
         return {
-            "C": round(random.uniform(0.09, 0.12), 3),
-            "Mn": round(random.uniform(1.3, 1.7), 3),
-            "Si": round(random.uniform(0.5, 0.8), 3),
-            "P": round(random.uniform(0.01, 0.035), 3),
-            "S": round(random.uniform(0.01, 0.04), 3),
-            "Cr": round(random.uniform(0.0, 0.3), 3),
-            "Ni": round(random.uniform(0.0, 0.3), 3),
-            "Cu": round(random.uniform(0.0, 0.3), 3),
+            "C": round(rnd.uniform(0.09, 0.12), 3),
+            "Mn": round(rnd.uniform(1.3, 1.7), 3),
+            "Si": round(rnd.uniform(0.5, 0.8), 3),
+            "P": round(rnd.uniform(0.01, 0.035), 3),
+            "S": round(rnd.uniform(0.01, 0.04), 3),
+            "Cr": round(rnd.uniform(0.0, 0.3), 3),
+            "Ni": round(rnd.uniform(0.0, 0.3), 3),
+            "Cu": round(rnd.uniform(0.0, 0.3), 3),
             "units": "%"
         }
     elif grade and "Х18Н10" in grade:
         return {
-            "C": round(random.uniform(0.08, 0.12), 3),
-            "Cr": round(random.uniform(17.0, 19.0), 3),
-            "Ni": round(random.uniform(9.0, 11.0), 3),
-            "Mn": round(random.uniform(1.0, 2.0), 3),
-            "Si": round(random.uniform(0.0, 0.8), 3),
-            "P": round(random.uniform(0.01, 0.035), 3),
-            "S": round(random.uniform(0.01, 0.02), 3),
-            "Ti": round(random.uniform(0.4, 0.7), 3) if "Т" in grade else 0,
+            "C": round(rnd.uniform(0.08, 0.12), 3),
+            "Cr": round(rnd.uniform(17.0, 19.0), 3),
+            "Ni": round(rnd.uniform(9.0, 11.0), 3),
+            "Mn": round(rnd.uniform(1.0, 2.0), 3),
+            "Si": round(rnd.uniform(0.0, 0.8), 3),
+            "P": round(rnd.uniform(0.01, 0.035), 3),
+            "S": round(rnd.uniform(0.01, 0.02), 3),
+            "Ti": round(rnd.uniform(0.4, 0.7), 3) if "Т" in grade else 0,
             "units": "%"
         }
     else:
         # Обычная углеродистая сталь
         return {
-            "C": round(random.uniform(0.14, 0.22), 3),
-            "Mn": round(random.uniform(0.4, 0.65), 3),
-            "Si": round(random.uniform(0.15, 0.35), 3),
-            "P": round(random.uniform(0.01, 0.04), 3),
-            "S": round(random.uniform(0.01, 0.05), 3),
-            "Cr": round(random.uniform(0.0, 0.25), 3),
-            "Ni": round(random.uniform(0.0, 0.25), 3),
-            "Cu": round(random.uniform(0.0, 0.25), 3),
+            "C": round(rnd.uniform(0.14, 0.22), 3),
+            "Mn": round(rnd.uniform(0.4, 0.65), 3),
+            "Si": round(rnd.uniform(0.15, 0.35), 3),
+            "P": round(rnd.uniform(0.01, 0.04), 3),
+            "S": round(rnd.uniform(0.01, 0.05), 3),
+            "Cr": round(rnd.uniform(0.0, 0.25), 3),
+            "Ni": round(rnd.uniform(0.0, 0.25), 3),
+            "Cu": round(rnd.uniform(0.0, 0.25), 3),
             "units": "%"
         }
 
 
-def generate_mechanical_properties(mat_type: str) -> dict:
+def generate_mechanical_properties(mat_type: str, rnd: random.Random = random) -> dict:
     """Генерация механических свойств"""
     # Для арматуры и высокопрочных сталей
     if "арматура" in str(mat_type).lower() or mat_type in [MaterialType.ALLOY_STEEL.value, MaterialType.CARBON_STEEL.value]:
         return {
-            "yield_strength": random.randint(400, 600),
-            "tensile_strength": random.randint(500, 700),
-            "elongation": random.randint(14, 25),
+            "yield_strength": rnd.randint(400, 600),
+            "tensile_strength": rnd.randint(500, 700),
+            "elongation": rnd.randint(14, 25),
             "units": {"yield_strength": "МПа", "tensile_strength": "МПа", "elongation": "%"}
         }
     else:
         return {
-            "yield_strength": random.randint(235, 355),
-            "tensile_strength": random.randint(360, 510),
-            "elongation": random.randint(20, 30),
-            "impact_strength": random.randint(27, 40),
+            "yield_strength": rnd.randint(235, 355),
+            "tensile_strength": rnd.randint(360, 510),
+            "elongation": rnd.randint(20, 30),
+            "impact_strength": rnd.randint(27, 40),
             "units": {
                 "yield_strength": "МПа",
                 "tensile_strength": "МПа",
@@ -540,161 +328,456 @@ def generate_mechanical_properties(mat_type: str) -> dict:
         }
 
 
-async def create_workflow_history(session: AsyncSession, materials: List[Material], users: List[User]):
-    """Создание истории workflow для материалов"""
-    print("Creating workflow history...")
-
-    workflow_states = []
-
-    for material in materials:
-        # Создаем историю изменений статуса
-        if material.status != MaterialStatus.RECEIVED.value:
-            # Начальное состояние - получен
-            state = WorkflowState(
-                material_id=material.id,
-                state_name=MaterialStatus.RECEIVED.value,
-                previous_state=None,
-                changed_by=material.created_by,
-                changed_at=material.received_date,
-                reason="Материал поступил на склад",
-                notes="Первичная приемка"
-            )
-            session.add(state)
-            workflow_states.append(state)
-
-            # Промежуточные состояния
-            if material.status in [MaterialStatus.TESTING.value, MaterialStatus.APPROVED.value, MaterialStatus.RELEASED.value]:
-                # Карантин (если требовался)
-                if material.material_metadata.get("requires_quarantine"):
-                    state = WorkflowState(
-                        material_id=material.id,
-                        state_name=MaterialStatus.QUARANTINE.value,
-                        previous_state=MaterialStatus.RECEIVED.value,
-                        changed_by=random.choice(users).id,
-                        changed_at=material.received_date + timedelta(hours=random.randint(1, 24)),
-                        reason="Требуется карантинное хранение",
-                        notes="Новый поставщик"
-                    )
-                    session.add(state)
-                    workflow_states.append(state)
-
-                # Тестирование
-                if material.status != MaterialStatus.QUARANTINE.value:
-                    state = WorkflowState(
-                        material_id=material.id,
-                        state_name=MaterialStatus.TESTING.value,
-                        previous_state=MaterialStatus.QUARANTINE.value if material.material_metadata.get(
-                            "requires_quarantine") else MaterialStatus.RECEIVED.value,
-                        changed_by=random.choice([u for u in users if u.role == UserRole.QUALITY_CONTROL]).id,
-                        changed_at=material.received_date + timedelta(days=random.randint(1, 3)),
-                        reason="Направлен на испытания",
-                        notes="Полный комплекс испытаний"
-                    )
-                    session.add(state)
-                    workflow_states.append(state)
-
-            # Финальное состояние
-            if material.status == MaterialStatus.APPROVED.value:
-                state = WorkflowState(
-                    material_id=material.id,
-                    state_name=MaterialStatus.APPROVED.value,
-                    previous_state=MaterialStatus.TESTING.value,
-                    changed_by=random.choice([u for u in users if u.role == UserRole.QUALITY_CONTROL]).id,
-                    changed_at=material.received_date + timedelta(days=random.randint(3, 7)),
-                    reason="Все испытания пройдены успешно",
-                    notes="Материал соответствует требованиям"
-                )
-                session.add(state)
-                workflow_states.append(state)
-            elif material.status == MaterialStatus.RELEASED.value:
-                # Сначала одобрение
-                state = WorkflowState(
-                    material_id=material.id,
-                    state_name=MaterialStatus.APPROVED.value,
-                    previous_state=MaterialStatus.TESTING.value,
-                    changed_by=random.choice([u for u in users if u.role == UserRole.QUALITY_CONTROL]).id,
-                    changed_at=material.received_date + timedelta(days=random.randint(3, 7)),
-                    reason="Все испытания пройдены успешно",
-                    notes="Материал соответствует требованиям"
-                )
-                session.add(state)
-                workflow_states.append(state)
-
-                # Затем выдача
-                state = WorkflowState(
-                    material_id=material.id,
-                    state_name=MaterialStatus.RELEASED.value,
-                    previous_state=MaterialStatus.APPROVED.value,
-                    changed_by=random.choice(
-                        [u for u in users if u.role in [UserRole.WAREHOUSE_KEEPER, UserRole.PRODUCTION]]).id,
-                    changed_at=material.received_date + timedelta(days=random.randint(7, 30)),
-                    reason="Выдано в производство",
-                    notes=f"Заявка №{random.randint(1000, 9999)}"
-                )
-                session.add(state)
-                workflow_states.append(state)
-            elif material.status == MaterialStatus.REJECTED.value:
-                state = WorkflowState(
-                    material_id=material.id,
-                    state_name=MaterialStatus.REJECTED.value,
-                    previous_state=MaterialStatus.TESTING.value,
-                    changed_by=random.choice([u for u in users if u.role == UserRole.QUALITY_CONTROL]).id,
-                    changed_at=material.received_date + timedelta(days=random.randint(3, 5)),
-                    reason="Не соответствует требованиям",
-                    notes="Возврат поставщику"
-                )
-                session.add(state)
-                workflow_states.append(state)
-
-    await session.commit()
-    print(f"[OK] Created {len(workflow_states)} workflow states")
-    return workflow_states
-
-
-async def main():
-    """Основная функция"""
-    print("=" * 50)
-    print("Extended Database Seeding Script")
-    print("=" * 50)
 
-    async with AsyncSessionLocal() as session:
-        try:
-            # Получаем существующих пользователей
-            from sqlalchemy import select
-            result = await session.execute(select(User))
-            users = result.scalars().all()
+@dataclass
+class SeedStats:
+    """Сводка по загруженным данным"""
+    materials: int = 0
+    test_results: int = 0
+    certificates: int = 0
+    workflow_states: int = 0
+    seconds: float = 0.0
+    ids_by_status: Dict[str, List[int]] = field(default_factory=dict)
+
+
+def _objects(values: list) -> np.ndarray:
+    """Массив объектов для выборки по индексам (None не превращается в строку)"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _repeat(value, n: int) -> np.ndarray:
+    """Колонка из одного значения (в том числе словаря или списка)"""
+    array = np.empty(n, dtype=object)
+    array.fill(value)
+    return array
+
+
+def _probabilities(weights: List[float]) -> np.ndarray:
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+class SeedReference:
+    """
+    Справочные пулы, из которых собираются колонки
+
+    Словари метаданных и результатов испытаний строятся один раз и
+    переиспользуются строками: при записи каждый из них сериализуется однажды.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        rnd = random.Random(seed)
+
+        self.types = [t.value for t in MaterialType]
+        self.type_p = _probabilities([len(MATERIAL_NAMES.get(t, [None])) for t in MaterialType])
+        self.type_values = _objects(self.types)
+        self.units = _objects(["кг" if t in STEEL_TYPES else "шт" for t in self.types])
+
+        self.statuses = [s.value for s in STATUS_WEIGHTS]
+        self.status_p = _probabilities(list(STATUS_WEIGHTS.values()))
+        self.status_values = _objects(self.statuses)
+
+        # Несколько крупных поставщиков дают основную долю поставок
+        self.supplier_names = _objects([s["name"] for s in SUPPLIERS])
+        self.supplier_trusted = np.array([s["trusted"] for s in SUPPLIERS])
+        self.supplier_p = _probabilities([1 / math.pow(rank, 1.1) for rank in range(1, len(SUPPLIERS) + 1)])
+
+        # Последний элемент — пустое значение
+        self.grades = _objects(GRADES + [None])
+        self.standards = _objects(STANDARDS + [None])
+        self.locations = _objects(STORAGE_LOCATIONS)
+        self.shift_p = _probabilities(SHIFT_WEIGHTS)
+
+        # Примечания: (статус, непроверенный поставщик, вариант)
+        self.notes_variants = max(len(v) for v in NOTES_TEMPLATES.values())
+        notes = []
+        for status in STATUS_WEIGHTS:
+            templates = NOTES_TEMPLATES.get(status, ["Стандартная приемка"])
+            for untrusted in (False, True):
+                suffix = UNTRUSTED_NOTE_SUFFIX if untrusted and status in (
+                    MaterialStatus.RECEIVED, MaterialStatus.QUARANTINE) else ""
+                notes += [templates[k % len(templates)] + suffix for k in range(self.notes_variants)]
+        self.notes = _objects(notes)
+
+        # Метаданные: (тип, поставщик, вариант)
+        metadata = []
+        for mat_type in MaterialType:
+            for supplier in SUPPLIERS:
+                for _ in range(POOL_VARIANTS):
+                    metadata.append(self._metadata(rnd, mat_type, supplier))
+        self.metadata = _objects(metadata)
+        self.requires_quarantine = np.array([m["requires_quarantine"] for m in metadata])
+
+        # Результаты испытаний: химия по марке, механика по типу материала
+        self.chemistry = _objects([generate_chemical_composition(grade, rnd)
+                                   for grade in GRADES + [None] for _ in range(POOL_VARIANTS)])
+        self.mechanics = _objects([generate_mechanical_properties(mat_type, rnd)
+                                   for mat_type in self.types for _ in range(POOL_VARIANTS)])
+        self.hardness = _objects([{
+            "HB": rnd.randint(150, 350),
+            "measurement_points": 5,
+            "average": rnd.randint(200, 300),
+            "units": "HB"
+        } for _ in range(POOL_VARIANTS)])
+        self.certificate_metadata = _objects([{
+            "test_protocol_numbers": [f"ПИ-{rnd.randint(1000, 9999)}" for _ in range(rnd.randint(1, 3))],
+            "laboratory": "Центральная заводская лаборатория",
+            "accreditation": "РОСС RU.0001.21МТ52"
+        } for _ in range(POOL_VARIANTS)])
+
+        # Общие пустые значения для колонок с default на стороне Python
+        self.empty_dict = {}
+        self.empty_list = []
+
+    @staticmethod
+    def _metadata(rnd: random.Random, mat_type: MaterialType, supplier: dict) -> dict:
+        return {
+            "dimensions": rnd.choice(DIMENSIONS.get(mat_type, ["Стандартный"])),
+            "heat_number": f"П-{rnd.randint(100000, 999999)}" if mat_type.value in STEEL_TYPES else None,
+            "supplier_city": supplier["city"],
+            "trusted_supplier": supplier["trusted"],
+            "requires_quarantine": not supplier["trusted"] and rnd.random() > 0.5,
+            "urgent": rnd.random() > 0.8,
+            "temperature_storage": "15-25°C",
+            "humidity_requirements": "<60%",
+            "special_requirements": generate_special_requirements(mat_type),
+            "delivery_method": rnd.choice(["Авто", "Ж/Д", "Авиа", "Самовывоз"])
+        }
 
-            if not users:
-                print("[ERROR] No users found. Please run init_db.py first")
-                return
 
-            print(f"[OK] Found {len(users)} users")
+class ChunkGenerator:
+    """Генерация колонок для одного пакета материалов"""
+
+    def __init__(self, ref: SeedReference, users: UserPools, rng: np.random.Generator,
+                 now: datetime, history_days: int):
+        self.ref = ref
+        self.rng = rng
+        self.today = np.datetime64(now.date(), "D")
+        self.history_days = history_days
+
+        self.warehouse = np.array(users.pool(UserRole.WAREHOUSE_KEEPER))
+        self.quality = np.array(users.pool(UserRole.QUALITY_CONTROL))
+        self.lab = np.array(users.pool(UserRole.LAB_DESTRUCTIVE, UserRole.LAB_NON_DESTRUCTIVE,
+                                       UserRole.QUALITY_CONTROL))
+        self.quarantine = np.array(users.pool(UserRole.WAREHOUSE_KEEPER, UserRole.QUALITY_CONTROL))
+        self.release = np.array(users.pool(UserRole.WAREHOUSE_KEEPER, UserRole.PRODUCTION))
+
+    def _pick(self, pool: np.ndarray, n: int) -> np.ndarray:
+        return self.rng.choice(pool, n)
+
+    def _after(self, start: np.ndarray, low: int, high: int, unit: str) -> np.ndarray:
+        return start + self.rng.integers(low, high + 1, len(start)).astype(f"timedelta64[{unit}]")
+
+    def _received_dates(self, n: int) -> np.ndarray:
+        """Дата приемки: рабочие дни, пики в начале смены"""
+        day = self.today - self.rng.integers(0, self.history_days + 1, n).astype("timedelta64[D]")
+        # 1970-01-01 — четверг; субботу и воскресенье переносим на пятницу
+        weekday = (day.astype(np.int64) + 3) % 7
+        day = day - np.maximum(weekday - 4, 0).astype("timedelta64[D]")
+        hour = self.rng.choice(SHIFT_HOURS, n, p=self.ref.shift_p)
+        minute = self.rng.integers(0, 60, n)
+        return day.astype("datetime64[s]") + (hour * 3600 + minute * 60).astype("timedelta64[s]")
+
+    def generate(self, first_ids: Dict[str, int], n: int) -> Dict[str, Dict[str, object]]:
+        """Колонки для materials, workflow_states, test_results и certificates"""
+        ref, rng = self.ref, self.rng
+
+        ids = np.arange(first_ids["materials"], first_ids["materials"] + n)
+        status_idx = rng.choice(len(ref.statuses), n, p=ref.status_p)
+        type_idx = rng.choice(len(ref.types), n, p=ref.type_p)
+        supplier_idx = rng.choice(len(ref.supplier_names), n, p=ref.supplier_p)
+        grade_idx = np.where(rng.random(n) > 0.3, rng.integers(0, len(GRADES), n), len(GRADES))
+        standard_idx = np.where(rng.random(n) > 0.2, rng.integers(0, len(STANDARDS), n), len(STANDARDS))
+        metadata_idx = (type_idx * len(SUPPLIERS) + supplier_idx) * POOL_VARIANTS \
+            + rng.integers(0, POOL_VARIANTS, n)
+        untrusted = ~ref.supplier_trusted[supplier_idx]
+        notes_idx = (status_idx * 2 + untrusted) * ref.notes_variants \
+            + rng.integers(0, ref.notes_variants, n)
+
+        received = self._received_dates(n)
+        year = (received.astype("datetime64[Y]").astype(np.int64) + 1970).tolist()
+        days = np.datetime_as_string(received, unit="D").tolist()
+        id_list = ids.tolist()
+        created_by = self._pick(self.warehouse, n)
+        statuses = ref.status_values[status_idx]
+        batch_numbers = [f"BATCH-{d[:4]}{d[5:7]}{d[8:]}-{i:08d}" for d, i in zip(days, id_list)]
+        specifications = ref.standards[standard_idx]
+
+        materials = {
+            "id": ids,
+            "batch_number": batch_numbers,
+            "material_type": ref.type_values[type_idx],
+            "grade": ref.grades[grade_idx],
+            "specification": specifications,
+            "quantity": np.round(rng.lognormal(5.5, 1.0, n), 2),
+            "unit": ref.units[type_idx],
+            "supplier": ref.supplier_names[supplier_idx],
+            "supplier_certificate": [f"СК-{y}-{r}" for y, r in
+                                     zip(year, rng.integers(1000, 10000, n).tolist())],
+            "material_metadata": ref.metadata[metadata_idx],
+            "status": statuses,
+            "location": ref.locations[rng.integers(0, len(ref.locations), n)],
+            "notes": ref.notes[notes_idx],
+            "received_date": received,
+            "created_at": received,
+            "created_by": created_by,
+            # Хук after_insert модели при COPY не срабатывает
+            "barcode": [material_barcode(i) for i in id_list],
+        }
 
-            # Создаем расширенный набор материалов
-            materials = await create_extended_materials(session, users)
+        def having(*sts: MaterialStatus) -> np.ndarray:
+            return np.isin(statuses, [s.value for s in sts])
+
+        tested = having(MaterialStatus.TESTING, MaterialStatus.APPROVED,
+                        MaterialStatus.RELEASED, MaterialStatus.REJECTED)
+        quarantined = having(MaterialStatus.QUARANTINE) | (tested & ref.requires_quarantine[metadata_idx])
+        approved = having(MaterialStatus.APPROVED, MaterialStatus.RELEASED)
+        released = having(MaterialStatus.RELEASED)
+        rejected = having(MaterialStatus.REJECTED)
+
+        approved_at = self._after(received, 3, 7, "D")
+        steps = [
+            (np.ones(n, dtype=bool), MaterialStatus.RECEIVED, None, received, created_by,
+             "Материал поступил на склад", "Первичная приемка"),
+            (quarantined, MaterialStatus.QUARANTINE, MaterialStatus.RECEIVED.value,
+             self._after(received, 1, 24, "h"), None,
+             "Требуется карантинное хранение", "Новый поставщик"),
+            (tested, MaterialStatus.TESTING,
+             np.where(quarantined, MaterialStatus.QUARANTINE.value, MaterialStatus.RECEIVED.value),
+             self._after(received, 1, 3, "D"), None,
+             "Направлен на испытания", "Полный комплекс испытаний"),
+            (approved, MaterialStatus.APPROVED, MaterialStatus.TESTING.value, approved_at, None,
+             "Все испытания пройдены успешно", "Материал соответствует требованиям"),
+            (released, MaterialStatus.RELEASED, MaterialStatus.APPROVED.value,
+             self._after(received, 7, 30, "D"), None,
+             "Выдано в производство", None),
+            (rejected, MaterialStatus.REJECTED, MaterialStatus.TESTING.value,
+             self._after(received, 3, 5, "D"), None,
+             "Не соответствует требованиям", "Возврат поставщику"),
+        ]
+        changers = {
+            MaterialStatus.QUARANTINE: self.quarantine,
+            MaterialStatus.TESTING: self.quality,
+            MaterialStatus.APPROVED: self.quality,
+            MaterialStatus.RELEASED: self.release,
+            MaterialStatus.REJECTED: self.quality,
+        }
+
+        state_parts = []
+        for mask, state, previous, changed_at, changed_by, reason, notes in steps:
+            k = int(mask.sum())
+            if not k:
+                continue
+            if notes is None:
+                notes = [f"Заявка №{r}" for r in rng.integers(1000, 10000, k).tolist()]
+            state_parts.append({
+                "material_id": ids[mask],
+                "state_name": _repeat(state.value, k),
+                "previous_state": previous[mask] if isinstance(previous, np.ndarray)
+                else _repeat(previous, k),
+                "changed_by": changed_by[mask] if changed_by is not None
+                else self._pick(changers[state], k),
+                "changed_at": changed_at[mask],
+                "reason": _repeat(reason, k),
+                "notes": _objects(notes) if isinstance(notes, list) else _repeat(notes, k),
+                "extra_data": _repeat(ref.empty_dict, k),
+            })
+
+        material_types = ref.type_values[type_idx]
+        result = np.where(rejected, "FAIL", "PASS").astype(object)
+        chemistry = tested & np.isin(material_types, CHEMISTRY_TYPES)
+        steel = tested & np.isin(material_types, STEEL_TYPES)
+        variant = rng.integers(0, POOL_VARIANTS, n)
+        visual_notes = np.where(
+            rejected, VISUAL_REJECT_NOTE,
+            _objects(["Визуальный осмотр: " + note for note in VISUAL_NOTES])[rng.integers(0, len(VISUAL_NOTES), n)]
+        )
+        tests = [
+            (chemistry, TestType.CHEMICAL, TestCategory.DESTRUCTIVE, (1, 3, "D"),
+             ref.chemistry[grade_idx * POOL_VARIANTS + variant], result,
+             np.where(rejected, "Химический состав не соответствует требованиям",
+                      "Химический состав соответствует требованиям")),
+            (steel, TestType.TENSILE, TestCategory.DESTRUCTIVE, (2, 4, "D"),
+             ref.mechanics[type_idx * POOL_VARIANTS + variant], result,
+             "Механические свойства проверены"),
+            (tested & (rng.random(n) > 0.5), TestType.HARDNESS, TestCategory.NON_DESTRUCTIVE, (1, 2, "D"),
+             ref.hardness[variant], "PASS", "Измерение твердости по Бринеллю"),
+            (tested, TestType.VISUAL, TestCategory.NON_DESTRUCTIVE, (1, 8, "h"),
+             None, result, visual_notes),
+            (tested & (material_types == MaterialType.STEEL.value) & (rng.random(n) > 0.6),
+             TestType.ULTRASONIC, TestCategory.NON_DESTRUCTIVE, (1, 3, "D"),
+             None, "PASS", "УЗК: Внутренние дефекты не обнаружены. Контроль выполнен на установке УД2-70"),
+        ]
+
+        test_parts = []
+        for mask, test_type, category, delay, numeric, pass_fail, notes in tests:
+            k = int(mask.sum())
+            if not k:
+                continue
+            test_parts.append({
+                "material_id": ids[mask],
+                "test_type": _repeat(test_type, k),
+                "test_category": _repeat(category, k),
+                "pass_fail": pass_fail[mask] if isinstance(pass_fail, np.ndarray)
+                else _repeat(pass_fail, k),
+                "numeric_results": numeric[mask] if numeric is not None else _repeat(None, k),
+                "notes": notes[mask] if isinstance(notes, np.ndarray) else _repeat(notes, k),
+                "attachments": _repeat(ref.empty_list, k),
+                "tested_by": self._pick(self.lab, k),
+                "tested_at": self._after(received[mask], *delay),
+            })
+
+        k = int(approved.sum())
+        certificate_ids = np.arange(first_ids["certificates"], first_ids["certificates"] + k)
+        issued = approved_at[approved]
+        issued_year = (issued.astype("datetime64[Y]").astype(np.int64) + 1970).tolist()
+        certified_batches = [batch_numbers[i] for i in np.flatnonzero(approved).tolist()]
+        certificates = {
+            "id": certificate_ids,
+            "certificate_number": [f"CERT-{y}-{i:08d}" for y, i in zip(issued_year, certificate_ids.tolist())],
+            "material_id": ids[approved],
+            "certificate_type": _repeat("quality", k),
+            "issued_date": issued,
+            "valid_until": received[approved] + np.timedelta64(365, "D"),
+            "issued_by": self._pick(self.quality, k),
+            "summary": [f"Материал {batch} соответствует требованиям {spec or 'технических условий'}"
+                        for batch, spec in zip(certified_batches, specifications[approved].tolist())],
+            "conclusions": _repeat("Материал пригоден для использования в производстве", k),
+            "recommendations": _repeat("Соблюдать условия хранения согласно требованиям", k),
+            "certificate_metadata": ref.certificate_metadata[rng.integers(0, POOL_VARIANTS, k)],
+            "is_valid": np.ones(k, dtype=bool),
+        }
+
+        return {
+            "materials": materials,
+            "workflow_states": self._with_ids(_concat(state_parts), first_ids["workflow_states"]),
+            "test_results": self._with_ids(_concat(test_parts), first_ids["test_results"]),
+            "certificates": certificates,
+        }
+
+    @staticmethod
+    def _with_ids(columns: Dict[str, np.ndarray], first_id: int) -> Dict[str, np.ndarray]:
+        if not columns:
+            return columns
+        n = len(next(iter(columns.values())))
+        return {"id": np.arange(first_id, first_id + n), **columns}
 
-            # Создаем результаты испытаний
-            test_results = await create_extended_test_results(session, materials, users)
 
-            # Создаем сертификаты
-            certificates = await create_certificates(session, materials, users)
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return {}
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+TABLES = {
+    "materials": Material.__table__,
+    "workflow_states": WorkflowState.__table__,
+    "test_results": TestResult.__table__,
+    "certificates": Certificate.__table__,
+}
 
-            # Создаем историю workflow
-            workflow_states = await create_workflow_history(session, materials, users)
 
-            print("=" * 50)
-            print("Extended seeding completed successfully!")
-            print(f"Total materials created: {len(materials)}")
-            print(f"Total test results: {len(test_results)}")
-            print(f"Total certificates: {len(certificates)}")
-            print(f"Total workflow states: {len(workflow_states)}")
-            print("=" * 50)
+async def seed_materials(
+        engine: AsyncEngine,
+        count: int,
+        seed: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        history_days: int = 180,
+        now: Optional[datetime] = None,
+        collect_ids: bool = False,
+        verbose: bool = False,
+) -> SeedStats:
+    """
+    Загрузка `count` материалов с историей workflow, испытаниями и сертификатами
+
+    Пользователи должны уже существовать. Один и тот же seed при том же
+    batch_size дает одинаковый набор данных.
+    """
+    started = time.perf_counter()
+    stats = SeedStats()
+    ref = SeedReference(seed)
+    rng = np.random.default_rng(seed)
+
+    async with engine.begin() as conn:
+        users = await UserPools.load(conn)
+        if not users:
+            raise ValueError("No users found. Please run init_db.py first")
+        writer = BulkWriter(conn)
+        next_ids = {name: await writer.next_id(table) for name, table in TABLES.items()}
+
+    generator = ChunkGenerator(ref, users, rng, now or datetime.now(), history_days)
+
+    async with engine.connect() as conn:
+        writer = BulkWriter(conn)
+        async with writer.loading():
+            for chunk_start in range(0, count, batch_size):
+                chunk = generator.generate(next_ids, min(batch_size, count - chunk_start))
+
+                for name, table in TABLES.items():
+                    written = await writer.write(table, chunk[name])
+                    next_ids[name] += written
+                    setattr(stats, name, getattr(stats, name) + written)
+                await conn.commit()
+
+                if collect_ids:
+                    materials = chunk["materials"]
+                    for status, material_id in zip(materials["status"].tolist(), materials["id"].tolist()):
+                        stats.ids_by_status.setdefault(status, []).append(material_id)
+                if verbose:
+                    print(f"  ... {stats.materials}/{count} materials ({time.perf_counter() - started:.1f}s)")
+
+    async with engine.begin() as conn:
+        await BulkWriter(conn).sync_sequences(list(TABLES.values()))
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def main(args: argparse.Namespace):
+    """Основная функция"""
+    from src.core.database import get_engine
+
+    engine = get_engine()
+
+    print("=" * 50)
+    print("Extended Database Seeding Script")
+    print("=" * 50)
+
+    try:
+        stats = await seed_materials(
+            engine,
+            args.scale,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            history_days=args.history_days,
+            verbose=args.scale > args.batch_size,
+        )
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        return
+    finally:
+        await engine.dispose()
+
+    print("=" * 50)
+    print(f"Extended seeding completed in {stats.seconds:.1f}s")
+    print(f"Total materials created: {stats.materials}")
+    print(f"Total test results: {stats.test_results}")
+    print(f"Total certificates: {stats.certificates}")
+    print(f"Total workflow states: {stats.workflow_states}")
+    print("=" * 50)
+
 
-        except Exception as e:
-            print(f"[ERROR] {str(e)}")
-            await session.rollback()
-            raise
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extended database seeding script")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="Number of materials to create")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a reproducible dataset")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Materials per insert batch")
+    parser.add_argument("--history-days", type=int, default=180, help="Spread of received dates")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args()))
@@ -4,19 +4,24 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from jose import JWTError, jwt
+from jose import JWTError
 
 from src.core.config import settings
+from src.core.lazy import lazy_module
 from src.core.security import verify_password, get_password_hash
 
+# jose.jwt тянет криптографические бэкенды; загружается при первом токене
+jwt = lazy_module("jose.jwt")
+
 router = APIRouter()
 security = HTTPBearer()
 
 # Временное хранилище пользователей (в памяти)
 users_db = {}
+_test_users_initialized = False
 
 class UserCreate(BaseModel):
     """Модель для создания пользователя"""
@@ -86,9 +91,32 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         raise credentials_exception
     return user
 
+def get_user_from_token(token: str) -> Optional[dict]:
+    """Пользователь по JWT токену (None, если токен недействителен)"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    email = payload.get("sub")
+    return get_user_by_email(email) if email else None
+
+def is_admin_request(request: Request) -> bool:
+    """Запрос выполнен администратором"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    user = get_user_from_token(token)
+    return bool(user and user["is_active"] and user["role"] == "administrator")
+
+def get_users_db() -> dict:
+    """Хранилище пользователей; тестовые пользователи создаются при первом обращении"""
+    if not _test_users_initialized:
+        init_test_users()
+    return users_db
+
 def get_user_by_email(email: str):
     """Получить пользователя по email"""
-    for user_id, user_data in users_db.items():
+    for user_id, user_data in get_users_db().items():
         if user_data["email"] == email:
             return {
                 "id": user_id,
@@ -102,7 +130,7 @@ def get_user_by_email(email: str):
 
 def authenticate_user(email: str, password: str):
     """Аутентификация пользователя"""
-    for user_id, user_data in users_db.items():
+    for user_id, user_data in get_users_db().items():
         if user_data["email"] == email:
             if verify_password(password, user_data["password_hash"]):
                 return {
@@ -133,7 +161,7 @@ async def register(user_data: UserCreate):
         )
     
     # Создаем пользователя
-    user_id = f"user_{len(users_db) + 1}"
+    user_id = f"user_{len(get_users_db()) + 1}"
     password_hash = get_password_hash(user_data.password)
     
     user = {
@@ -258,9 +286,16 @@ def init_test_users():
         }
     ]
     
+    global _test_users_initialized
+    _test_users_initialized = True
+
+    # bcrypt намеренно медленный: одинаковые пароли хешируем один раз
+    hashes = {}
     for user_data in test_users:
         user_id = user_data["id"]
-        password_hash = get_password_hash(user_data["password"])
+        if user_data["password"] not in hashes:
+            hashes[user_data["password"]] = get_password_hash(user_data["password"])
+        password_hash = hashes[user_data["password"]]
         
         user = {
             "email": user_data["email"],
@@ -271,7 +306,4 @@ def init_test_users():
             "created_at": datetime.utcnow()
         }
         
-        users_db[user_id] = user
-
-# Инициализируем тестовых пользователей при загрузке модуля
-init_test_users()
\ No newline at end of file
+        users_db[user_id] = user
\ No newline at end of file
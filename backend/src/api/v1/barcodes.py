@@ -0,0 +1,85 @@
+"""
+API endpoints для штрих-кодов и бирок материалов
+
+Сканер на складе ищет материал по коду с бирки; картинки QR и Code128
+отдаются из кеша с бессрочным кешированием в браузере — код материала
+не меняется.
+"""
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.barcodes import BARCODE_FORMATS
+from src.core.database import get_db
+from src.core.file_serving import IMMUTABLE_CACHE_CONTROL
+from src.core.serialization import validated_response
+from src.schemas.barcode import BarcodeLookup, LabelSheetRequest
+from src.services.barcode_service import BarcodeService
+
+router = APIRouter()
+
+BarcodeFormat = Literal["png", "svg"]
+
+
+async def _image(db: AsyncSession, material_id: int, kind: str, fmt: str, scale: int) -> Response:
+    barcode, content = await BarcodeService(db).get_image(material_id, kind, fmt, scale)
+    return Response(
+        content,
+        media_type=BARCODE_FORMATS[fmt],
+        headers={
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": f'"{kind}-{barcode}-{scale}.{fmt}"',
+        },
+    )
+
+
+@router.get("/materials/barcode/{barcode}", response_model=BarcodeLookup)
+async def find_material_by_barcode(
+    barcode: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Материал по коду со сканера"""
+    return validated_response(BarcodeLookup, await BarcodeService(db).find_by_barcode(barcode))
+
+
+@router.get("/materials/{material_id}/qrcode")
+async def get_material_qrcode(
+    material_id: int,
+    format: BarcodeFormat = "png",
+    scale: int = Query(8, ge=1, le=32),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """QR-код материала"""
+    return await _image(db, material_id, "qr", format, scale)
+
+
+@router.get("/materials/{material_id}/code128")
+async def get_material_code128(
+    material_id: int,
+    format: BarcodeFormat = "png",
+    scale: int = Query(2, ge=1, le=16),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Линейный штрих-код Code128 материала"""
+    return await _image(db, material_id, "code128", format, scale)
+
+
+@router.post("/materials/labels")
+async def print_material_labels(
+    data: LabelSheetRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """PDF-лист бирок для печати (A4, 24 бирки на странице)"""
+    content = await BarcodeService(db).label_sheet(data.material_ids)
+    return Response(
+        content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="labels.pdf"'},
+    )
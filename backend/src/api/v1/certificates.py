@@ -1,8 +1,122 @@
 """Certificates API endpoints"""
-from fastapi import APIRouter
+import mimetypes
+import os
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.exceptions import PermissionDeniedException
+from src.core.file_serving import RangeFileResponse, content_etag, inline_disposition
+from src.core.serialization import validated_response
+from src.schemas.certificate import (
+    CertificateSummary,
+    ExpiringCertificate,
+    SignatureResult,
+    SignCertificatesRequest,
+    VerificationResult,
+    VerifyCertificatesRequest,
+)
+from src.services.certificate_service import CertificateService
+from src.services.signature_service import SignatureService
 
 router = APIRouter()
+# Роли, которым доступна подпись ключом организации
+SIGNING_ROLES = ("quality_control", "administrator")
+# Пути сертификатов под /materials; подключается раньше роутера материалов
+materials_router = APIRouter()
 
 @router.get("/")
 async def get_certificates():
-    return {"message": "Certificates endpoint"}
\ No newline at end of file
+    return {"message": "Certificates endpoint"}
+
+@router.get("/search", response_model=List[CertificateSummary])
+async def search_certificates(
+    keyword: Optional[str] = Query(None, max_length=500),
+    standard: Optional[str] = Query(None, max_length=500),
+    customer: Optional[str] = Query(None, max_length=500),
+    project: Optional[str] = Query(None, max_length=500),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Поиск сертификатов по метаданным, например ?standard=ГОСТ 19281-2014
+
+    Значения сравниваются точно; несколько параметров объединяются через И.
+    """
+    certificates = await CertificateService(db).search(keyword, standard, customer, project, limit=limit)
+    return validated_response(List[CertificateSummary], certificates)
+
+@router.post("/sign", response_model=SignatureResult)
+async def sign_certificates(
+    request: SignCertificatesRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Пакетная подпись сертификатов локальным ключом Ed25519
+
+    Доступно для: QUALITY_CONTROL, ADMINISTRATOR
+    """
+    if current_user["role"] not in SIGNING_ROLES:
+        raise PermissionDeniedException("Only quality control can sign certificates")
+
+    service = SignatureService(db)
+    signed = await service.sign(request.certificate_ids)
+    return validated_response(SignatureResult, {"signed": signed, "key_id": service.signer.key_id})
+
+@router.post("/verify", response_model=VerificationResult)
+async def verify_certificates(
+    request: VerifyCertificatesRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Пакетная проверка подписей для аудита
+
+    Без certificate_ids проверяются все сертификаты. Неизменные сертификаты,
+    проверенные ранее, отвечают из кеша.
+    """
+    report = await SignatureService(db).verify(request.certificate_ids)
+    return validated_response(VerificationResult, {
+        **vars(report),
+        "verifications_per_second": report.checked / report.seconds if report.seconds else 0.0,
+    })
+
+@router.get("/{certificate_id}/{kind}")
+async def get_certificate_file(
+    certificate_id: int,
+    kind: Literal["pdf", "original"],
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Файл сертификата: pdf — выпущенный сертификат, original — сертификат поставщика
+
+    Поддерживает Range для просмотрщика PDF; PDF может быть перевыпущен по
+    тому же пути, поэтому клиент перепроверяет кеш по ETag.
+    """
+    certificate, path = await CertificateService(db).get_file(certificate_id, kind)
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return RangeFileResponse(
+        path,
+        etag=await content_etag(path),
+        media_type=media_type,
+        filename=f"{certificate.certificate_number}-{kind}{os.path.splitext(path)[1]}",
+        content_disposition_type=inline_disposition(media_type),
+    )
+
+
+@materials_router.get("/materials/expiring-certificates", response_model=List[ExpiringCertificate])
+async def get_expiring_certificates(
+    days: int = Query(30, ge=0, le=3650),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Действующие сертификаты, срок которых истекает в ближайшие days дней (по индексу valid_until)"""
+    certificates = await CertificateService(db).get_expiring(days, limit=limit)
+    return validated_response(List[ExpiringCertificate], certificates)
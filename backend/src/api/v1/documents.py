@@ -0,0 +1,183 @@
+"""
+API endpoints для документов материалов
+
+Небольшие файлы загружаются одним multipart-запросом; большие (рентгенограммы)
+— по частям: POST .../uploads открывает загрузку, PATCH /uploads/{id} с
+заголовком Upload-Offset дописывает часть, POST /uploads/{id}/complete
+переносит файл в хранилище. После обрыва клиент узнает принятый размер
+через GET /uploads/{id} и продолжает с него.
+
+Миниатюры и превью изображений и PDF строятся в фоне после загрузки и
+отдаются GET /documents/{id}/preview/{thumb|preview}.
+"""
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, File, Header, Request, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.exceptions import NotFoundException, ValidationException
+from src.core.file_serving import RangeFileResponse, inline_disposition
+from src.core.serialization import validated_response
+from src.schemas.document import DocumentResponse, UploadStart, UploadStatus
+from src.services.document_service import DocumentService, iter_upload_file
+from src.services.preview_service import get_preview_pool
+
+router = APIRouter()
+
+
+def _download(document) -> RangeFileResponse:
+    # Содержимое адресуется хэшем и не меняется: ETag — SHA-256, кеш бессрочный
+    return RangeFileResponse(
+        document.blob.path,
+        etag=document.sha256,
+        media_type=document.content_type,
+        filename=document.name,
+        immutable=True,
+        content_disposition_type=inline_disposition(document.content_type),
+    )
+
+
+@router.get("/materials/{material_id}/documents", response_model=List[DocumentResponse])
+async def get_material_documents(
+    material_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Документы материала"""
+    documents = await DocumentService(db).list_documents(material_id)
+    return validated_response(List[DocumentResponse], documents)
+
+
+@router.post(
+    "/materials/{material_id}/documents",
+    response_model=List[DocumentResponse],
+    status_code=status.HTTP_201_CREATED
+)
+async def upload_material_documents(
+    material_id: int,
+    files: List[UploadFile] = File(default=[]),
+    file: Optional[UploadFile] = File(default=None),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Загрузка одного (file) или нескольких (files) документов"""
+    uploads = files + ([file] if file else [])
+    if not uploads:
+        raise ValidationException("No files uploaded")
+
+    service = DocumentService(db)
+    documents = []
+    for upload in uploads:
+        documents.append(await service.upload_document(
+            material_id, upload.filename, upload.content_type, iter_upload_file(upload),
+            uploaded_by=current_user["email"],
+        ))
+    for document in documents:
+        get_preview_pool().schedule(document.blob.path, document.content_type)
+    return validated_response(List[DocumentResponse], documents, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/materials/{material_id}/documents/{document_id}")
+async def download_material_document(
+    material_id: int,
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Скачивание документа материала"""
+    return _download(await DocumentService(db).get_document(document_id, material_id=material_id))
+
+
+@router.get("/documents/{document_id}")
+async def download_document(
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Скачивание документа"""
+    return _download(await DocumentService(db).get_document(document_id))
+
+
+@router.get("/documents/{document_id}/preview/{variant}")
+async def get_document_preview(
+    document_id: int,
+    variant: Literal["thumb", "preview"],
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Миниатюра (thumb) или превью документа в JPEG; строится сразу, если еще не готово"""
+    document = await DocumentService(db).get_document(document_id)
+    rendered = await get_preview_pool().render(document.blob.path, document.content_type)
+    if variant not in rendered:
+        raise NotFoundException(f"Document {document_id} has no preview")
+    return RangeFileResponse(
+        rendered[variant],
+        etag=f"{document.sha256}-{variant}",
+        media_type="image/jpeg",
+        immutable=True,
+    )
+
+
+@router.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Удаление документа"""
+    await DocumentService(db).delete_document(document_id)
+
+
+@router.post(
+    "/materials/{material_id}/uploads",
+    response_model=UploadStatus,
+    status_code=status.HTTP_201_CREATED
+)
+async def start_upload(
+    material_id: int,
+    data: UploadStart,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Начало загрузки по частям"""
+    upload = await DocumentService(db).start_upload(
+        material_id, data.name, data.content_type, data.size, created_by=current_user["email"]
+    )
+    return validated_response(UploadStatus, upload, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Состояние загрузки: offset — сколько байт уже принято"""
+    return validated_response(UploadStatus, await DocumentService(db).get_upload(upload_id))
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadStatus)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Очередная часть файла в теле запроса, начиная с байта Upload-Offset"""
+    upload = await DocumentService(db).append_chunk(upload_id, upload_offset, request.stream())
+    return validated_response(UploadStatus, upload)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=DocumentResponse)
+async def complete_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Завершение загрузки по частям"""
+    document = await DocumentService(db).complete_upload(upload_id, uploaded_by=current_user["email"])
+    get_preview_pool().schedule(document.blob.path, document.content_type)
+    return validated_response(DocumentResponse, document)
@@ -0,0 +1,39 @@
+"""
+API endpoints для кодов материалов
+
+Подключается раньше роутера материалов: пути /materials/generate-code и
+/materials/check-code/{code} иначе совпали бы с /materials/{material_id}.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.serialization import trusted_response
+from src.schemas.code import CodeCheck, GeneratedCode
+from src.services.code_service import get_code_allocator, get_code_index
+
+router = APIRouter()
+
+
+@router.get("/materials/generate-code", response_model=GeneratedCode)
+async def generate_material_code(
+    prefix: str = Query("MAT", max_length=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Новый код материала вида MAT-2026-0001"""
+    # Коды, уже введенные вручную, генератор пропускает
+    await get_code_index().load(db)
+    return trusted_response({"code": await get_code_allocator().next_code(prefix)})
+
+
+@router.get("/materials/check-code/{code}", response_model=CodeCheck)
+async def check_material_code(
+    code: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Занят ли код материала"""
+    code = code.strip().upper()
+    return trusted_response({"code": code, "exists": await get_code_index().exists(db, code)})
@@ -17,6 +17,7 @@ from src.schemas.material import (
     MaterialStatusChange
 )
 from src.services.material_service import MaterialService
+from src.core.serialization import validated_response
 from src.core.auth import get_current_user
 
 router = APIRouter(prefix="/materials", tags=["materials"])
@@ -53,7 +54,7 @@ async def get_materials(
         search=search,
         user_role=current_user.role if current_user else None
     )
-    return result
+    return validated_response(MaterialListResponse, result)
 
 
 @router.post("/", response_model=MaterialResponse, status_code=status.HTTP_201_CREATED)
@@ -7,6 +7,8 @@ from datetime import datetime
 from uuid import UUID, uuid4
 from pydantic import BaseModel
 
+from src.core.serialization import trusted_response
+
 router = APIRouter()
 
 # Временное хранилище данных (в памяти)
@@ -48,12 +50,13 @@ async def get_materials(
     total = len(materials)
     materials = materials[skip:skip + limit]
 
-    return {
+    # Хранилище содержит только проверенные при записи данные
+    return trusted_response({
         "items": materials,
         "total": total,
         "skip": skip,
         "limit": limit
-    }
+    })
 
 
 @router.get("/{material_id}")
@@ -72,7 +75,7 @@ async def create_material(material: MaterialSimple):
     material_id = str(uuid4())
 
     # Создаем материал
-    material_data = material.dict()
+    material_data = material.model_dump()
     material_data["id"] = material_id
     material_data["created_at"] = datetime.now().isoformat()
 
@@ -0,0 +1,42 @@
+"""
+API endpoints мест хранения и журнала перемещений материалов
+
+Подключается раньше роутера материалов, как и коды материалов: путь
+/materials/locations/{location} не должен попасть в /materials/{material_id}.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.serialization import validated_response
+from src.schemas.material import MaterialAtLocation, MaterialMovementResponse
+from src.services.material_service import MaterialService
+
+router = APIRouter()
+
+
+@router.get("/materials/locations/{location}", response_model=List[MaterialAtLocation])
+async def get_materials_at_location(
+    location: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Материалы, которые сейчас находятся в месте хранения"""
+    materials = await MaterialService(db).get_materials_at_location(location, skip=skip, limit=limit)
+    return validated_response(List[MaterialAtLocation], materials)
+
+
+@router.get("/materials/{material_id}/movements", response_model=List[MaterialMovementResponse])
+async def get_material_movements(
+    material_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """История перемещений материала в хронологическом порядке"""
+    movements = await MaterialService(db).get_location_history(material_id)
+    return validated_response(List[MaterialMovementResponse], movements)
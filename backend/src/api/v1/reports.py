@@ -0,0 +1,50 @@
+"""Test reports API endpoints"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.schemas.report import BulkReportRequest
+from src.services.report_service import ReportAssembler, ReportService
+
+router = APIRouter()
+
+
+def _pdf_response(assembler: ReportAssembler, name: str) -> StreamingResponse:
+    # Длина заранее неизвестна: PDF отдается по мере склейки
+    return StreamingResponse(
+        assembler.stream(),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{name}_{datetime.utcnow():%Y-%m-%d}.pdf"'},
+    )
+
+@router.get("/full-report")
+async def get_full_report(
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    material_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Досье испытаний за период или по партии одним PDF
+
+    Протоколы, вложения, выпущенные сертификаты и сертификаты поставщиков
+    по партиям; в PDF есть закладки на каждый документ.
+    """
+    assembler = await ReportService(db).full_report(date_from, date_to, material_id)
+    return _pdf_response(assembler, "full_test_report")
+
+@router.post("/bulk-report")
+async def create_bulk_report(
+    request: BulkReportRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Сводный PDF по выбранным испытаниям и их сертификатам"""
+    assembler = await ReportService(db).bulk_report(request.test_ids)
+    return _pdf_response(assembler, "bulk_test_report")
@@ -0,0 +1,28 @@
+"""
+API endpoints журнала резервирований материалов
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.serialization import validated_response
+from src.schemas.material import ReservationResponse
+from src.services.material_service import MaterialService
+
+router = APIRouter()
+
+
+@router.get("/materials/{material_id}/reservations", response_model=List[ReservationResponse])
+async def get_material_reservations(
+    material_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """Журнал резервирований материала, новые первыми"""
+    reservations = await MaterialService(db).get_reservations(material_id, skip=skip, limit=limit)
+    return validated_response(List[ReservationResponse], reservations)
@@ -0,0 +1,28 @@
+"""Supplier scorecards API endpoints"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.auth import verify_token
+from src.core.database import get_db
+from src.core.serialization import validated_response
+from src.schemas.supplier import SupplierScorecard
+from src.services.supplier_service import SupplierService
+
+router = APIRouter()
+
+@router.get("/materials/suppliers", response_model=List[SupplierScorecard])
+async def get_suppliers(
+    trusted_only: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Поставщики с показателями качества
+
+    Доля приемок, время до решения и доля неудачных испытаний по видам —
+    скользящие значения по последним решениям; счетчики — за все время.
+    """
+    scorecards = await SupplierService(db).get_scorecards(trusted_only=trusted_only)
+    return validated_response(List[SupplierScorecard], scorecards)
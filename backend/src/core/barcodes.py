@@ -0,0 +1,147 @@
+"""
+Штрих-коды материалов: генерация кода и отрисовка QR / Code128
+
+Код материала детерминирован: префикс MT, номер материала из 9 цифр и
+контрольная цифра по Луну (MT0000001237). Он печатается на бирке как QR и
+как Code128 и хранится в индексированной колонке materials.barcode.
+
+Матрица модулей строится кодировщиками reportlab, картинка — напрямую из
+матрицы: PNG через Pillow, SVG строкой, на листе бирок — векторами PDF.
+"""
+from typing import List
+
+BARCODE_PREFIX = "MT"
+BARCODE_KINDS = ("qr", "code128")
+BARCODE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Высота Code128 в модулях (ширинах узкого штриха)
+CODE128_HEIGHT = 40
+
+# Строка матрицы: True — темный модуль
+Modules = List[List[bool]]
+
+
+def _luhn_digit(digits: str) -> int:
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if i % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+def material_barcode(material_id: int) -> str:
+    """Штрих-код материала по его номеру"""
+    digits = f"{material_id:09d}"
+    return f"{BARCODE_PREFIX}{digits}{_luhn_digit(digits)}"
+
+
+def is_material_barcode(code: str) -> bool:
+    """Проверка формата и контрольной цифры (опечатки ручного ввода)"""
+    digits = code[len(BARCODE_PREFIX):]
+    return (
+        code.startswith(BARCODE_PREFIX)
+        and len(digits) >= 2
+        and digits.isdigit()
+        and _luhn_digit(digits[:-1]) == int(digits[-1])
+    )
+
+
+def barcode_modules(value: str, kind: str) -> Modules:
+    """
+    Матрица модулей кода
+
+    QR — квадратная матрица; Code128 — одна строка, высоту задает отрисовка.
+    """
+    if kind == "qr":
+        from reportlab.graphics.barcode import qrencoder
+
+        qr = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.M)
+        qr.addData(value)
+        qr.make()
+        return [[bool(module) for module in row] for row in qr.modules]
+    if kind == "code128":
+        from reportlab.graphics.barcode.code128 import Code128
+
+        barcode = Code128(value)
+        barcode.validate()
+        barcode.encode()
+        barcode.decompose()
+        # Буква — ширина элемента: A..D штрих, a..d пробел
+        row = []
+        for element in barcode.decomposed:
+            row.extend([element.isupper()] * (ord(element.lower()) - ord("a") + 1))
+        return [row]
+    raise ValueError(f"Unknown barcode kind: {kind}")
+
+
+def _quiet_zone(kind: str) -> int:
+    # Поля по спецификациям: 4 модуля у QR, 10 у Code128
+    return 4 if kind == "qr" else 10
+
+
+def _row_height(modules: Modules) -> int:
+    return CODE128_HEIGHT if len(modules) == 1 else 1
+
+
+def render_png(modules: Modules, kind: str, scale: int = 8) -> bytes:
+    """PNG из матрицы: каждый модуль — квадрат scale x scale пикселей"""
+    import io
+
+    from PIL import Image
+
+    quiet, row_height = _quiet_zone(kind), _row_height(modules)
+    width = len(modules[0]) + 2 * quiet
+    height = len(modules) * row_height + (2 * quiet if kind == "qr" else 0)
+    image = Image.new("1", (width, height), 1)
+    pixels = image.load()
+    top = quiet if kind == "qr" else 0
+    for r, row in enumerate(modules):
+        for c, dark in enumerate(row):
+            if dark:
+                for y in range(row_height):
+                    pixels[quiet + c, top + r * row_height + y] = 0
+    image = image.resize((width * scale, height * scale), Image.NEAREST)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def dark_runs(row: List[bool]):
+    """Отрезки темных модулей строки: (начало, длина)"""
+    start = None
+    for c, dark in enumerate(row + [False]):
+        if dark and start is None:
+            start = c
+        elif not dark and start is not None:
+            yield start, c - start
+            start = None
+
+
+def render_svg(modules: Modules, kind: str, scale: int = 8) -> bytes:
+    """SVG из матрицы: темные отрезки строк одним path"""
+    quiet, row_height = _quiet_zone(kind), _row_height(modules)
+    width = len(modules[0]) + 2 * quiet
+    height = len(modules) * row_height + (2 * quiet if kind == "qr" else 0)
+    top = quiet if kind == "qr" else 0
+    path = "".join(
+        f"M{quiet + start},{top + r * row_height}h{length}v{row_height}h-{length}z"
+        for r, row in enumerate(modules)
+        for start, length in dark_runs(row)
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'width="{width * scale}" height="{height * scale}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill="#fff"/><path d="{path}" fill="#000"/></svg>'
+    ).encode()
+
+
+def render_barcode(value: str, kind: str, fmt: str, scale: int = 8) -> bytes:
+    """Картинка кода в формате png или svg"""
+    if fmt not in BARCODE_FORMATS:
+        raise ValueError(f"Unknown barcode format: {fmt}")
+    modules = barcode_modules(value, kind)
+    return render_png(modules, kind, scale) if fmt == "png" else render_svg(modules, kind, scale)
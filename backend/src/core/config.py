@@ -25,6 +25,56 @@ class Settings(BaseSettings):
     )
     DB_ECHO: bool = Field(default=False, description="Echo SQL queries")
 
+    # Профиль производительности БД: пул соединений
+    DB_POOL_SIZE: int = Field(default=20, description="Persistent connections per process")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Extra connections allowed under load")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a free connection")
+    DB_POOL_RECYCLE: int = Field(
+        default=1800,
+        description="Reconnect connections older than this many seconds (-1 disables)"
+    )
+    DB_POOL_PRE_PING: bool = Field(default=True, description="Check connections before use")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(
+        default=30_000,
+        description="PostgreSQL statement_timeout for application sessions (0 disables)"
+    )
+
+    # Профиль производительности БД: SQLite (пустое значение — значение SQLite по умолчанию)
+    SQLITE_JOURNAL_MODE: str = Field(default="WAL", description="PRAGMA journal_mode")
+    SQLITE_SYNCHRONOUS: str = Field(default="NORMAL", description="PRAGMA synchronous")
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024, description="PRAGMA mmap_size, bytes")
+    SQLITE_CACHE_SIZE_KB: int = Field(default=64 * 1024, description="Page cache per connection, KiB")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(
+        default=5000,
+        description="Wait this long for a locked database instead of failing immediately"
+    )
+    DATABASE_REPLICA_URLS: List[str] = Field(
+        default=[],
+        description="Read replicas for list/report queries (same URL format as DATABASE_URL)"
+    )
+    REPLICA_MAX_LAG_SECONDS: float = Field(
+        default=5.0,
+        description="Replicas lagging behind more than this are skipped for reads"
+    )
+    REPLICA_CHECK_INTERVAL_SECONDS: float = Field(
+        default=2.0,
+        description="How often replica lag is measured"
+    )
+
+    # Инструментирование запросов к БД
+    DB_QUERY_STATS_HEADERS: bool = Field(
+        default=True,
+        description="Add X-DB-Query-Count / X-DB-Rows / X-DB-Time-Ms response headers"
+    )
+    DB_N_PLUS_ONE_THRESHOLD: int = Field(
+        default=5,
+        description="Warn when the same statement runs this many times in one request"
+    )
+    DB_QUERY_BUDGET: Optional[int] = Field(
+        default=None,
+        description="Log requests exceeding this number of queries"
+    )
+
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379", description="Redis connection URL")
 
@@ -62,9 +112,110 @@ class Settings(BaseSettings):
     CERTIFICATES_PATH: str = Field(default="./certificates", description="Path for certificates")
     MAX_UPLOAD_SIZE: int = Field(default=10 * 1024 * 1024, description="Max upload size in bytes (10MB)")
     ALLOWED_EXTENSIONS: List[str] = Field(
-        default=[".pdf", ".jpg", ".jpeg", ".png", ".doc", ".docx", ".xls", ".xlsx"],
+        default=[".pdf", ".jpg", ".jpeg", ".png", ".tif", ".tiff", ".doc", ".docx", ".xls", ".xlsx"],
         description="Allowed file extensions"
     )
+    MAX_CHUNKED_UPLOAD_SIZE: int = Field(
+        default=2 * 1024 * 1024 * 1024,
+        description="Max size of a resumable chunked upload in bytes (radiographic images)"
+    )
+    UPLOAD_CHUNK_SIZE: int = Field(
+        default=1024 * 1024,
+        description="Read/write block size for streaming uploads to disk"
+    )
+    UPLOAD_SESSION_TTL_HOURS: int = Field(
+        default=24,
+        description="Unfinished chunked uploads older than this are purged"
+    )
+    UPLOAD_LEASE_SECONDS: int = Field(
+        default=600,
+        description="How long a request may hold a chunked upload for writing before others can take it over"
+    )
+    DOWNLOAD_CHUNK_SIZE: int = Field(
+        default=256 * 1024,
+        description="Block size for file downloads when the server has no zero-copy send"
+    )
+    PREVIEW_WORKERS: int = Field(
+        default=2,
+        description="Worker processes rendering attachment thumbnails and previews"
+    )
+    PREVIEW_QUALITY: int = Field(
+        default=80,
+        description="JPEG quality of generated thumbnails and previews"
+    )
+    BARCODE_CACHE_PATH: str = Field(default="./barcodes", description="Disk cache of rendered QR/barcode images")
+    BARCODE_MEMORY_CACHE_BYTES: int = Field(
+        default=16 * 1024 * 1024,
+        description="In-memory LRU budget for rendered QR/barcode images"
+    )
+    LABEL_FONT_PATH: str = Field(
+        default="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        description="TrueType font with Cyrillic glyphs for printed labels (Helvetica if missing)"
+    )
+    MAX_LABELS_PER_SHEET_REQUEST: int = Field(
+        default=1000,
+        description="Max materials in one label sheet PDF"
+    )
+    MATERIAL_CODE_BLOCK_SIZE: int = Field(
+        default=50,
+        description="Material codes reserved per database round-trip by each worker"
+    )
+    CERTIFICATE_EXPIRY_WARNING_DAYS: int = Field(
+        default=30,
+        description="Days before valid_until when the expiry sweeper warns about a certificate"
+    )
+    CERTIFICATE_SWEEP_BATCH_SIZE: int = Field(
+        default=500,
+        description="Certificates flagged per expiry sweeper transaction"
+    )
+    CERTIFICATE_SWEEP_MAX_SLEEP_SECONDS: int = Field(
+        default=600,
+        description="Upper bound on the expiry sweeper sleep, so new certificates are picked up"
+    )
+    SIGNING_KEY_PATH: str = Field(
+        default="./keys/certificate_signing.pem",
+        description="Ed25519 private key (PKCS8 PEM) signing certificates; generated if missing"
+    )
+    SIGNATURE_WORKERS: int = Field(
+        default=0,
+        description="Worker processes for batch signing and verification (0 = one per CPU)"
+    )
+    SIGNATURE_CHUNK_SIZE: int = Field(
+        default=500,
+        description="Certificates per process pool task; smaller batches are handled in a thread"
+    )
+    SIGNATURE_CACHE_SIZE: int = Field(
+        default=200_000,
+        description="Cached verification results keyed by certificate content hash and signature"
+    )
+    MAX_SIGN_BATCH: int = Field(
+        default=10_000,
+        description="Max certificates signed in one request"
+    )
+    REPORT_WORKERS: int = Field(
+        default=2,
+        description="Worker processes rendering test protocols and scanned pages for PDF reports"
+    )
+    REPORT_RENDER_AHEAD: int = Field(
+        default=8,
+        description="Report parts rendered ahead of the part being merged (bounds report memory)"
+    )
+    MAX_REPORT_TESTS: int = Field(
+        default=2000,
+        description="Max tests in one PDF report"
+    )
+    SUPPLIER_SCORE_ALPHA: float = Field(
+        default=0.1,
+        description="Weight of the latest lot decision in rolling supplier scores (about the last 1/alpha lots)"
+    )
+    SUPPLIER_TRUST_MIN_DECISIONS: int = Field(
+        default=5,
+        description="Lot decisions needed before a supplier can be trusted for quick approval"
+    )
+    SUPPLIER_TRUST_MIN_ACCEPTANCE: float = Field(
+        default=0.95,
+        description="Rolling acceptance rate a trusted supplier must keep"
+    )
 
     # Роли пользователей
     USER_ROLES: List[str] = Field(
@@ -102,6 +253,53 @@ class Settings(BaseSettings):
         description="Enable workflow notifications"
     )
 
+    # История workflow
+    HISTORY_ARCHIVE_PATH: str = Field(
+        default="./archive/workflow_history",
+        description="Directory for compressed workflow history of closed materials"
+    )
+    HISTORY_ARCHIVE_AFTER_DAYS: int = Field(
+        default=365,
+        description="Closed materials untouched for this many days have their history archived"
+    )
+    HISTORY_PARTITION_MONTHS_AHEAD: int = Field(
+        default=3,
+        description="Monthly workflow_states partitions kept created ahead (PostgreSQL)"
+    )
+
+    # Резервирование материалов
+    RESERVATION_MAX_RETRIES: int = Field(
+        default=20,
+        description="Attempts of the optimistic reservation update before giving up"
+    )
+    RESERVATION_RETRY_BACKOFF_MS: float = Field(
+        default=2.0,
+        description="Base backoff between reservation attempts (grows exponentially, with jitter)"
+    )
+    RESERVATION_RETRY_BACKOFF_MAX_MS: float = Field(
+        default=25.0,
+        description="Upper bound of the backoff between reservation attempts"
+    )
+
+    # Метрики OpenMetrics (/metrics)
+    METRICS_ENABLED: bool = Field(default=True, description="Serve /metrics")
+    METRICS_ALLOWED_NETWORKS: List[str] = Field(
+        default=["127.0.0.1/32", "::1/128"],
+        description="Client networks allowed to scrape /metrics without a token (administrators always can)"
+    )
+
+    # Профилирование запросов
+    PROFILING_ENABLED: bool = Field(default=True, description="Allow on-demand request profiling")
+    PROFILING_RATE_LIMIT: int = Field(default=6, description="Max profiled requests per minute")
+    PROFILING_SAMPLE_RATE: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Share of all requests profiled automatically"
+    )
+    PROFILING_INTERVAL_MS: float = Field(default=5.0, description="Stack sampling interval")
+    PROFILING_OUTPUT_DIR: str = Field(default="./profiles", description="Where collapsed stacks are stored")
+
     # Логирование
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
     LOG_FILE: Optional[str] = Field(default="logs/app.log", description="Log file path")
@@ -1,44 +1,333 @@
 """
 Настройка и инициализация базы данных
+
+Единственный слой доступа к БД: одна метадата (Base) и движки, которые
+создаются при первом обращении, а не при импорте. Синхронный движок
+(get_sync_engine) предназначен для скриптов и Alembic, см. src/database.
+
+Запись и чтение своих изменений идут в основную БД. Методы сервисов,
+помеченные @replica_read, читают с реплик (DATABASE_REPLICA_URLS), если
+отставание реплики не превышает REPLICA_MAX_LAG_SECONDS.
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import asyncio
+import functools
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 from loguru import logger
+from starlette.requests import Request
 
 from src.core.config import settings
 
-# Преобразование DATABASE_URL для async
-if settings.DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-elif settings.DATABASE_URL.startswith("sqlite:///"):
-    DATABASE_URL = settings.DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
-else:
-    DATABASE_URL = settings.DATABASE_URL
-
-
-# Создание асинхронного движка с учетом типа БД
-if DATABASE_URL.startswith("sqlite"):
-    # Для SQLite не используем настройки пула
-    engine = create_async_engine(
-        DATABASE_URL,
-        echo=settings.DB_ECHO,
-        future=True,
-    )
-else:
-    # Для PostgreSQL используем настройки пула
-    engine = create_async_engine(
-        DATABASE_URL,
-        echo=settings.DB_ECHO,
-        future=True,
-        pool_size=20,
-        max_overflow=10,
-        pool_pre_ping=True,
+
+def _async_url(url: str) -> str:
+    """Преобразование URL БД для async-драйвера"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    return url
+
+
+def sync_url(url: str) -> str:
+    """Преобразование URL БД для синхронного драйвера"""
+    if url.startswith("postgresql+asyncpg://"):
+        return url.replace("postgresql+asyncpg://", "postgresql://")
+    if url.startswith("sqlite+aiosqlite://"):
+        return url.replace("sqlite+aiosqlite://", "sqlite://")
+    return url
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """PRAGMA для каждого нового соединения SQLite из настроек профиля"""
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        # Отрицательное значение cache_size — размер в KiB, а не в страницах
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB if settings.SQLITE_CACHE_SIZE_KB else None,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+    return {name: value for name, value in pragmas.items() if value not in (None, "")}
+
+
+def apply_sqlite_pragmas(engine, pragmas: Dict[str, Any]) -> None:
+    """Выполнение PRAGMA при открытии каждого соединения (движок sync или async)"""
+    @event.listens_for(getattr(engine, "sync_engine", engine), "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _pool_options(url: str) -> Dict[str, Any]:
+    """Параметры пула и соединений из профиля производительности"""
+    options: Dict[str, Any] = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
     )
+    if url.startswith("postgresql+asyncpg") and settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    elif url.startswith("postgresql") and settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """Асинхронный движок с настройками профиля производительности"""
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        # База в памяти живет в одном соединении, пул не настраивается
+        return create_async_engine(url, echo=settings.DB_ECHO, future=True)
+
+    options = _pool_options(url)
+    if url.startswith("sqlite"):
+        # aiosqlite по умолчанию открывает соединение на каждый запрос (NullPool);
+        # пул сохраняет соединения вместе с их PRAGMA и прогретым кешем страниц
+        options["poolclass"] = AsyncAdaptedQueuePool
+
+    engine = create_async_engine(url, echo=settings.DB_ECHO, future=True, **options)
+    if url.startswith("sqlite"):
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def _create_sync_engine(url: str) -> Engine:
+    """Синхронный движок с теми же настройками пула и PRAGMA"""
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        return create_engine(url, echo=settings.DB_ECHO)
+
+    options = _pool_options(url)
+    if url.startswith("sqlite"):
+        options["poolclass"] = QueuePool
+        options["connect_args"] = {"check_same_thread": False}
+
+    engine = create_engine(url, echo=settings.DB_ECHO, **options)
+    if url.startswith("sqlite"):
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+DATABASE_URL = _async_url(settings.DATABASE_URL)
+
+# Движки создаются при первом обращении: импорт моделей и сервисов
+# не открывает пулов соединений
+_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+_replica_router: Optional["ReplicaRouter"] = None
+
+
+def get_engine() -> AsyncEngine:
+    """Асинхронный движок основной БД"""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(DATABASE_URL)
+    return _engine
+
+
+def get_sync_engine() -> Engine:
+    """Синхронный движок основной БД для скриптов и Alembic"""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = _create_sync_engine(sync_url(settings.DATABASE_URL))
+    return _sync_engine
+
+
+async def _replication_lag(replica: AsyncEngine) -> float:
+    """Отставание реплики в секундах (0 — реплика догнала основную БД)"""
+    async with replica.connect() as conn:
+        if replica.dialect.name != "postgresql":
+            # У SQLite нет репликации: копия считается актуальной
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+        lag = await conn.scalar(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        ))
+        # NULL — это не реплика (например, основная БД в роли реплики)
+        return float(lag or 0.0)
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения с учетом отставания
+
+    Отставание замеряется фоновой задачей (monitor) и кешируется: выбор
+    реплики выполняется синхронно из Session.get_bind и не ходит в сеть.
+    Реплика без свежего замера или с ошибкой замера не используется.
+    """
+
+    def __init__(self, replicas: List[AsyncEngine], max_lag: float, check_interval: float, probe=_replication_lag):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe = probe
+        self.lags: List[Optional[float]] = [None] * len(replicas)
+        self.checked_at = 0.0
+        self._next = 0
 
-# Создание фабрики сессий
+    async def refresh(self) -> None:
+        """Замер отставания всех реплик"""
+        async def measure(index: int, replica: AsyncEngine) -> None:
+            try:
+                self.lags[index] = await asyncio.wait_for(self.probe(replica), timeout=self.check_interval)
+            except Exception as e:
+                if self.lags[index] is not None:
+                    logger.warning(f"Replica {index} is unavailable: {e}")
+                self.lags[index] = None
+
+        await asyncio.gather(*(measure(i, replica) for i, replica in enumerate(self.replicas)))
+        self.checked_at = time.monotonic()
+
+    async def monitor(self) -> None:
+        """Периодический замер отставания (задача на время жизни приложения)"""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.check_interval)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Следующая по кругу реплика с допустимым отставанием или None"""
+        # Замеры устарели (монитор остановлен) — не доверяем им
+        if time.monotonic() - self.checked_at > self.check_interval * 3:
+            return None
+        healthy = [
+            replica for replica, lag in zip(self.replicas, self.lags)
+            if lag is not None and lag <= self.max_lag
+        ]
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+
+def get_replica_router() -> ReplicaRouter:
+    """Маршрутизатор реплик из DATABASE_REPLICA_URLS"""
+    global _replica_router
+    if _replica_router is None:
+        _replica_router = ReplicaRouter(
+            [_create_engine(_async_url(url)) for url in settings.DATABASE_REPLICA_URLS],
+            max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+            check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
+        )
+    return _replica_router
+
+
+def __getattr__(name: str):
+    # Совместимость с ``from src.core.database import engine``: движок
+    # создается при обращении к имени, а не при импорте модуля
+    if name == "engine":
+        return get_engine()
+    if name == "replica_router":
+        return get_replica_router()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class RoutingSession(Session):
+    """
+    Сессия, отправляющая чтение на реплику
+
+    Чтение идет на реплику, только пока выполняется метод с @replica_read
+    и сессия еще ничего не записала; после записи (и при строгой
+    согласованности) сессия до конца работает с основной БД.
+    Сессия без явной привязки работает с основным движком get_engine().
+    """
+    router: Optional[ReplicaRouter] = None
+
+    def __init__(self, bind=None, **kwargs):
+        if bind is None and not kwargs.get("binds"):
+            bind = get_engine().sync_engine
+        super().__init__(bind=bind, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("replica_reads")
+            and not self.info.get("primary_only")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            replica = (self.router or get_replica_router()).choose()
+            if replica is not None:
+                return replica.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary_after_flush(session, flush_context):
+    session.info["primary_only"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _stick_to_primary_after_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["primary_only"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_uncommitted_writes(session, flush_context):
+    session.info["uncommitted_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_uncommitted_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["uncommitted_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_uncommitted_writes(session):
+    session.info.pop("uncommitted_writes", None)
+
+
+def has_uncommitted_writes(session) -> bool:
+    """
+    Есть ли в текущей транзакции сессии незафиксированные изменения
+
+    Учитываются и ожидающие flush объекты, и уже выполненные flush/DML:
+    откат такой транзакции молча потеряет чужую работу.
+    """
+    session = getattr(session, "sync_session", session)
+    return bool(session.new or session.dirty or session.deleted or session.info.get("uncommitted_writes"))
+
+
+def replica_read(method):
+    """
+    Метод сервиса только читает и может выполняться на реплике
+
+    Сервис должен хранить сессию в self.db.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        info = self.db.info
+        info["replica_reads"] = info.get("replica_reads", 0) + 1
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            info["replica_reads"] -= 1
+    return wrapper
+
+
+# Фабрика сессий; движок привязывает RoutingSession при создании сессии
 AsyncSessionLocal = async_sessionmaker(
-    engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -48,11 +337,16 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 # Dependency для получения сессии БД
-async def get_db():
+async def get_db(request: Request):
     """
     Dependency для получения сессии базы данных
+
+    Заголовок ``X-Consistency: strong`` отключает чтение с реплик
+    (например, сразу после записи в другом запросе).
     """
     async with AsyncSessionLocal() as session:
+        if request.headers.get("X-Consistency", "").lower() == "strong":
+            session.info["primary_only"] = True
         try:
             yield session
             await session.commit()
@@ -67,7 +361,7 @@ async def init_db():
     """
     Инициализация базы данных (создание таблиц)
     """
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         # Импортируем все модели, чтобы они были зарегистрированы
         from src.models import material, user, workflow, certificate
 
@@ -77,7 +371,17 @@ async def init_db():
 
 async def close_db():
     """
-    Закрытие соединения с базой данных
+    Закрытие соединений с базой данных (только созданных движков)
     """
-    await engine.dispose()
+    global _engine, _sync_engine, _replica_router
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+        _sync_engine = None
+    if _replica_router is not None:
+        for replica in _replica_router.replicas:
+            await replica.dispose()
+        _replica_router = None
     logger.info("Database connection closed")
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Отдача файлов: Range-запросы, ETag по содержимому, кеширование
+
+Файл не читается в память целиком. Если ASGI-сервер поддерживает расширение
+``http.response.zerocopysend``, ядро отправляет нужный диапазон напрямую
+(sendfile); иначе файл читается блоками DOWNLOAD_CHUNK_SIZE через os.pread
+в пуле потоков.
+
+ETag — SHA-256 содержимого. Файлы хранилища документов адресуются хэшем и
+не меняются, поэтому отдаются с ``immutable``; файлы с изменяемым путем
+(PDF сертификатов) — с обязательной перепроверкой по ETag.
+"""
+import hashlib
+import os
+import re
+import stat
+from email.utils import formatdate
+from functools import lru_cache
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.exceptions import NotFoundException
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """Запрошенный диапазон лежит за пределами файла"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Диапазон [start, end] из заголовка Range
+
+    None — заголовка нет или он не поддерживается (несколько диапазонов,
+    другие единицы): отдается весь файл, как разрешает RFC 9110.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+@lru_cache(maxsize=4096)
+def _sha256(path: str, mtime_ns: int, size: int) -> str:
+    # mtime и размер в ключе кеша: измененный файл хэшируется заново
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def content_etag(path: str) -> str:
+    """SHA-256 содержимого файла (кешируется по mtime и размеру)"""
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise NotFoundException("File not found")
+    return await anyio.to_thread.run_sync(_sha256, path, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse с поддержкой Range, If-Range, If-None-Match и zero-copy отправки
+
+    Просмотрщик PDF запрашивает файл диапазонами и получает 206; повторный
+    запрос с тем же ETag получает 304 без тела.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            etag: str,
+            media_type: Optional[str] = None,
+            filename: Optional[str] = None,
+            immutable: bool = False,
+            content_disposition_type: str = "attachment",
+            headers: Optional[Mapping[str, str]] = None,
+            chunk_size: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            path,
+            media_type=media_type,
+            filename=filename,
+            headers=headers,
+            content_disposition_type=content_disposition_type,
+        )
+        self.etag = f'"{etag}"'
+        self.chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        self.headers["etag"] = self.etag
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        # ETag задан по содержимому, а не по mtime
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {self.path} is not a file.")
+        self.set_stat_headers(stat_result)
+        size = stat_result.st_size
+
+        request_headers = Headers(scope=scope)
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        status_code, start, length = self.status_code, 0, size
+
+        if _etag_matches(request_headers.get("if-none-match"), self.etag):
+            for name in ("content-type", "content-disposition"):
+                if name in headers:
+                    del headers[name]
+            await self._send_empty(send, 304, headers)
+            return
+
+        if_range = request_headers.get("if-range")
+        if if_range is None or if_range.strip() == self.etag:
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except RangeNotSatisfiable:
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+                await self._send_empty(send, 416, headers)
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status_code, length = 206, end - start + 1
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(length)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": headers.raw})
+        if scope["method"].upper() == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": length,
+                    "more_body": False,
+                })
+        else:
+            await self._send_chunks(send, start, length)
+
+        if self.background is not None:
+            await self.background()
+
+    @staticmethod
+    async def _send_empty(send: Send, status_code: int, headers: MutableHeaders) -> None:
+        await send({"type": "http.response.start", "status": status_code, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_chunks(self, send: Send, start: int, length: int) -> None:
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            offset, remaining = start, length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # Файл укоротился во время отдачи
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+def inline_disposition(media_type: str) -> str:
+    """PDF и изображения открываются в браузере, остальное скачивается"""
+    return "inline" if media_type == "application/pdf" or media_type.startswith("image/") else "attachment"
@@ -0,0 +1,129 @@
+"""
+Хэш-цепочки истории workflow
+
+Каждая запись истории хранит SHA-256 от своего содержимого и хэша предыдущей
+записи того же материала; изменение или удаление любой записи разрывает
+цепочку. Записи одного дня дополнительно сводятся в корень дерева Меркла
+(контрольная точка), что ловит удаление целых хвостов цепочек.
+
+Функции модуля чистые и не зависят от БД, чтобы их можно было выполнять
+в пуле процессов при полном аудите.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Поля записи, входящие в хэш (id назначается БД и в хэш не входит)
+HASHED_FIELDS = (
+    "material_id",
+    "state_name",
+    "previous_state",
+    "changed_by",
+    "changed_at",
+    "reason",
+    "notes",
+    "extra_data",
+)
+
+
+def _canonical_datetime(value: Optional[datetime]) -> Optional[str]:
+    # PostgreSQL возвращает время с зоной, SQLite — без; приводим к UTC без зоны
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+def canonical_state(values: Mapping[str, Any]) -> bytes:
+    """Каноническое представление записи для хэширования"""
+    payload = [
+        _canonical_datetime(values.get(name)) if name == "changed_at" else values.get(name)
+        for name in HASHED_FIELDS
+    ]
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def state_hash(prev_hash: Optional[str], values: Mapping[str, Any]) -> str:
+    """Хэш записи, сцепленный с хэшем предыдущей"""
+    digest = hashlib.sha256((prev_hash or "").encode("ascii"))
+    digest.update(b"\x00")
+    digest.update(canonical_state(values))
+    return digest.hexdigest()
+
+
+def merkle_root(leaves: Sequence[str]) -> Optional[str]:
+    """Корень дерева Меркла над хэшами записей (нечетный узел дублируется)"""
+    if not leaves:
+        return None
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+def verify_chain(
+        rows: Iterable[Mapping[str, Any]],
+        prev_hash: Optional[str] = None
+) -> List[Tuple[Any, str]]:
+    """
+    Проверка цепочки одного материала; записи в порядке id
+
+    prev_hash — известный хэш записи перед первой из rows (например,
+    последней архивной), None — цепочка начинается с первой записи. Первая
+    подписанная запись обязана ссылаться на prev_hash, поэтому удаление
+    начала цепочки или снятие с него подписи разрывает связь.
+
+    Записи без хэша допускаются только в начале цепочки без архива и только
+    перед подписанной записью — это история до введения цепочек у материала,
+    который уже получил новые записи. Любые другие записи без хэша (в том
+    числе материал, в котором не подписано ничего, после seal_legacy) —
+    проблема. Возвращает (id записи, описание проблемы).
+    """
+    problems = []
+    sealed = prev_hash is not None
+    legacy = []
+    for row in rows:
+        row_hash = row.get("row_hash")
+        if row_hash is None:
+            if sealed:
+                problems.append((row.get("id"), "unsealed record after sealed history"))
+            else:
+                legacy.append(row.get("id"))
+            continue
+        if row.get("prev_hash") != prev_hash:
+            problems.append((row.get("id"), "broken link to previous record"))
+        elif state_hash(row.get("prev_hash"), row) != row_hash:
+            problems.append((row.get("id"), "content does not match hash"))
+        sealed = True
+        prev_hash = row_hash
+    if not sealed:
+        problems.extend((row_id, "unsealed record") for row_id in legacy)
+    return problems
+
+
+def verify_chains(
+        rows: Sequence[Mapping[str, Any]],
+        heads: Optional[Mapping[Any, str]] = None
+) -> List[Tuple[Any, Any, str]]:
+    """
+    Проверка нескольких цепочек; записи упорядочены по (material_id, id)
+
+    heads — хэши, с которыми должны сцепляться первые записи материалов.
+    Возвращает (material_id, id записи, описание проблемы).
+    """
+    heads = heads or {}
+    problems = []
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i]["material_id"] != rows[start]["material_id"]:
+            material_id = rows[start]["material_id"]
+            problems.extend(
+                (material_id, row_id, reason)
+                for row_id, reason in verify_chain(rows[start:i], heads.get(material_id))
+            )
+            start = i
+    return problems
@@ -0,0 +1,49 @@
+"""
+Отложенный импорт тяжелых зависимостей
+
+Воркеры приложения часто перезапускаются, поэтому ``import src.main``
+должен оставаться быстрым: тяжелые библиотеки (экспорт, отчеты, PDF,
+политики доступа) загружаются при первом использовании. Бюджет времени
+импорта проверяет benchmarks/import_time.py.
+"""
+import importlib.util
+import sys
+from types import ModuleType
+
+# Модули, которые не должны загружаться при импорте src.main
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "openpyxl",
+    "reportlab",
+    "PyPDF2",
+    "casbin",
+    "jose.jwt",
+    "passlib.context",
+)
+
+
+def lazy_module(name: str) -> ModuleType:
+    """
+    Модуль, который исполнится при первом обращении к его атрибуту
+
+    Родительские пакеты импортируются сразу. Отсутствующий модуль дает
+    ModuleNotFoundError здесь, а не при первом использовании.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Модуль импортирован и исполнен (отложенный, но не тронутый модуль не считается)"""
+    module = sys.modules.get(name)
+    return module is not None and not isinstance(module, importlib.util._LazyModule)
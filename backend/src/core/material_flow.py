@@ -9,6 +9,7 @@ import asyncio
 import json
 
 from src.models.material import Material, MaterialStatus
+from src.models.supplier import SupplierScore
 from src.models.workflow import WorkflowState, WorkflowTemplate, WorkflowRule
 
 
@@ -95,16 +96,23 @@ class MaterialFlowEngine:
         }
     ]
 
-    def __init__(self, material: Material, template: Optional[WorkflowTemplate] = None):
+    def __init__(
+            self,
+            material: Material,
+            template: Optional[WorkflowTemplate] = None,
+            supplier_score: Optional[SupplierScore] = None
+    ):
         """
         Инициализация движка для конкретного материала
 
         Args:
             material: Объект материала
             template: Опциональный шаблон workflow
+            supplier_score: Текущие показатели поставщика (SupplierService.get_score)
         """
         self.material = material
         self.template = template
+        self.supplier_score = supplier_score
         self.metadata: Dict[str, Any] = {}
         self.history: List[Dict] = []
 
@@ -113,7 +121,7 @@ class MaterialFlowEngine:
             model=self,
             states=self.states,
             transitions=self.transitions,
-            initial=material.status.value if material.status else 'received',
+            initial=MaterialStatus(material.status).value if material.status else 'received',
             send_event=True,
             auto_transitions=False,
             ignore_invalid_triggers=True
@@ -152,7 +160,10 @@ class MaterialFlowEngine:
         return has_certificate
 
     def is_trusted_supplier(self, event):
-        """Проверка, является ли поставщик доверенным"""
+        """Проверка, является ли поставщик доверенным (по скользящей доле приемок его партий)"""
+        if self.supplier_score is not None:
+            return self.supplier_score.is_trusted
+        # Поставщик без истории: явный список из метаданных
         trusted_suppliers = self.metadata.get('trusted_suppliers', [])
         return self.material.supplier in trusted_suppliers
 
@@ -259,12 +270,17 @@ class WorkflowOrchestrator:
         self.engines: Dict[str, MaterialFlowEngine] = {}
         self.templates: Dict[str, WorkflowTemplate] = {}
 
-    def register_material(self, material: Material, template_name: Optional[str] = None) -> MaterialFlowEngine:
+    def register_material(
+            self,
+            material: Material,
+            template_name: Optional[str] = None,
+            supplier_score: Optional[SupplierScore] = None
+    ) -> MaterialFlowEngine:
         """
         Регистрация материала в системе workflow
         """
         template = self.templates.get(template_name) if template_name else None
-        engine = MaterialFlowEngine(material, template)
+        engine = MaterialFlowEngine(material, template, supplier_score)
         self.engines[str(material.id)] = engine
         return engine
 
@@ -0,0 +1,436 @@
+"""
+Метрики приложения в формате OpenMetrics
+
+Реестр хранится в памяти процесса: при нескольких воркерах uvicorn каждый
+отдает свои значения, агрегация выполняется на стороне Prometheus.
+"""
+import asyncio
+import bisect
+import ipaddress
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Базовый класс метрики с метками"""
+    type_name = "unknown"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# TYPE {self.name} {self.type_name}",
+            f"# HELP {self.name} {self.documentation}",
+        ]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик"""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Произвольное текущее значение"""
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        """Удаление всех значений (перед полной перезаписью сборщиком)"""
+        with self._lock:
+            self._values.clear()
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин"""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждой комбинации меток: счетчики корзин, сумма, количество
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._metrics.get(name) or self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def add_collector(self, collector) -> None:
+        """Функция, обновляющая метрики непосредственно перед выгрузкой"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests = registry.counter(
+    "http_requests", "Total HTTP requests", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed"
+)
+
+# Пул соединений БД
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Connections in the pool by state", ("pool", "state")
+)
+db_pool_connections_opened = registry.counter(
+    "db_pool_connections_opened", "New database connections opened by the pool", ("pool",)
+)
+
+# Кеши
+cache_requests = registry.counter(
+    "cache_requests", "Cache lookups by result", ("cache", "result")
+)
+cache_hit_ratio = registry.gauge(
+    "cache_hit_ratio", "Share of cache lookups that were hits", ("cache",)
+)
+
+# Резервирование материалов
+reservation_conflicts = registry.counter(
+    "material_reservation_conflicts",
+    "Optimistic reservation attempts lost to a concurrent update",
+    ("outcome",),
+)
+
+# Сроки действия сертификатов
+certificate_expiry_events = registry.counter(
+    "certificate_expiry_events",
+    "Certificates flagged by the expiry sweeper",
+    ("event",),
+)
+
+# Event loop
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between scheduled and actual wake-up of the event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+event_loop_lag_current = registry.gauge(
+    "event_loop_lag_current_seconds", "Most recent event loop lag measurement"
+)
+
+
+def record_cache_hit(cache: str) -> None:
+    """Учет попадания в кеш"""
+    cache_requests.inc(cache=cache, result="hit")
+
+
+def record_cache_miss(cache: str) -> None:
+    """Учет промаха кеша"""
+    cache_requests.inc(cache=cache, result="miss")
+
+
+def _collect_cache_ratios() -> None:
+    caches = {key[0] for key in cache_requests._values}
+    for cache in caches:
+        hits = cache_requests.get(cache=cache, result="hit")
+        misses = cache_requests.get(cache=cache, result="miss")
+        if hits + misses:
+            cache_hit_ratio.set(hits / (hits + misses), cache=cache)
+
+
+registry.add_collector(_collect_cache_ratios)
+
+
+# Инструментированные пулы: имя -> движок. Ссылки слабые, чтобы не удерживать
+# временные движки (тесты, скрипты); сборщик выгружает только живые пулы
+_instrumented_pools: "weakref.WeakValueDictionary[str, Engine]" = weakref.WeakValueDictionary()
+
+
+def instrument_pool(engine, name: str = "primary") -> None:
+    """
+    Замер ожидания соединения из пула и состояния пула
+
+    Метрики пула помечены меткой pool=name (основная БД, реплики). Движок
+    инструментируется один раз; новый движок с тем же именем заменяет
+    прежний, и события прежнего больше не учитываются.
+
+    Подписки на события пула регистрируются на движке и переживают
+    engine.dispose(): новый пул наследует их, а состояние читается у
+    текущего пула движка. У пула нет события «начало выдачи», поэтому
+    ожидание замеряется вокруг Engine.raw_connection — метода самого
+    движка, который при пересоздании пула не меняется.
+    """
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if "_metrics_pool" in sync_engine.__dict__:
+        return
+    sync_engine._metrics_pool = name
+    # Выданные соединения считаем по событиям: так учитываются и пулы без
+    # checkedout() (StaticPool, NullPool)
+    sync_engine._metrics_checked_out = 0
+    _instrumented_pools[name] = sync_engine
+
+    def is_current() -> bool:
+        return _instrumented_pools.get(name) is sync_engine
+
+    original_raw_connection = sync_engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return original_raw_connection()
+        finally:
+            if is_current():
+                db_pool_checkout_wait.observe(time.perf_counter() - started, pool=name)
+
+    sync_engine.raw_connection = timed_raw_connection
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        sync_engine._metrics_checked_out += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        sync_engine._metrics_checked_out = max(0, sync_engine._metrics_checked_out - 1)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if is_current():
+            db_pool_connections_opened.inc(pool=name)
+
+
+def _collect_pool_state() -> None:
+    # Один сборщик на все пулы: значения исчезнувших движков не остаются в выгрузке
+    db_pool_connections.clear()
+    for name, sync_engine in list(_instrumented_pools.items()):
+        pool = sync_engine.pool
+        db_pool_connections.set(sync_engine._metrics_checked_out, pool=name, state="checked_out")
+        # Не у всех реализаций пула (StaticPool, NullPool) есть эти методы
+        for state, method in (("size", "size"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, method):
+                db_pool_connections.set(getattr(pool, method)(), pool=name, state=state)
+
+
+registry.add_collector(_collect_pool_state)
+
+
+def is_allowed_client(request: Request, networks: Iterable[str]) -> bool:
+    """Адрес клиента входит в одну из сетей (например, Prometheus в кластере)"""
+    host = request.client.host if request.client else None
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Фоновая задача: измеряет задержку пробуждения event loop
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        event_loop_lag.observe(lag)
+        event_loop_lag_current.set(lag)
+
+
+class MetricsMiddleware:
+    """
+    Middleware: латентность по маршрутам и число запросов в обработке
+
+    Чистый ASGI: длительность считается до конца тела ответа, сообщения
+    ответа (в том числе http.response.zerocopysend) не копируются.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[Iterable[str]] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths or ())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+
+            # Шаблон маршрута вместо фактического пути, чтобы не плодить метки;
+            # роутер Starlette дописывает route в тот же scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            http_request_duration.observe(elapsed, method=method, route=route_path)
+            http_requests.inc(method=method, route=route_path, status=str(status_code))
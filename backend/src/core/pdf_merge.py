@@ -0,0 +1,234 @@
+"""
+Потоковая склейка PDF
+
+PdfWriter из PyPDF2 держит в памяти все страницы до записи файла; досье
+партии на сотни страниц сканов занимает так сотни мегабайт. PdfStreamWriter
+копирует страницы источников по одной и сразу пишет их объекты в выходной
+файл, перенумеровывая ссылки. В памяти остаются только смещения объектов и
+номера страниц; таблица ссылок, дерево страниц и закладки дописываются в
+конце.
+
+Источник читается PdfReader лениво, кеш разобранных объектов сбрасывается
+после каждой страницы; общие ресурсы страниц (шрифты) пишутся один раз на
+источник. Страница пишется в файл целиком после разбора всех ее объектов:
+если источник поврежден в середине, в выводе остаются только его страницы
+до поврежденной. PdfReader нужно передавать открытый файл: по пути он читает
+файл в память целиком.
+"""
+import io
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+# Атрибуты страницы, наследуемые от узлов дерева страниц
+_INHERITED = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+class PdfStreamWriter:
+    """
+    Запись PDF в поток по мере добавления источников
+
+    Пример:
+        with open(path, "wb") as out:
+            writer = PdfStreamWriter(out)
+            writer.add_document(PdfReader(source), title="Сертификат")
+            writer.close()
+    """
+
+    def __init__(self, out: IO[bytes]):
+        self.out = out
+        self._offsets: List[int] = []
+        # Объекты 1 и 2 — каталог и корень дерева страниц, пишутся в close()
+        self._catalog = self._allocate()
+        self._pages_root = self._allocate()
+        self._kids: List[int] = []
+        self._outline: List[Tuple[str, int]] = []
+        self._start = out.tell()
+        out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    def _allocate(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets)
+
+    def _begin(self, number: int) -> None:
+        self._offsets[number - 1] = self.out.tell() - self._start
+        self.out.write(b"%d 0 obj\n" % number)
+
+    def _end(self) -> None:
+        self.out.write(b"\nendobj\n")
+
+    def add_document(self, reader, title: Optional[str] = None) -> int:
+        """Все страницы источника (PdfReader) в конец документа; возвращает число страниц"""
+        from PyPDF2.generic import IndirectObject
+
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ValueError("Encrypted PDF")
+
+        pages = list(_page_refs(reader))
+        # Номера страниц выдаются заранее: аннотации ссылаются на соседние страницы
+        numbers: Dict[Tuple[int, int], int] = {}
+        queue: List[Tuple[int, Any]] = []
+        first = len(self._kids) + 1
+
+        def renumber(ref: IndirectObject) -> Optional[int]:
+            key = (ref.idnum, ref.generation)
+            number = numbers.get(key)
+            if number is None:
+                target = ref.get_object()
+                if _is_pages_node(target):
+                    # Чужое дерево страниц не переносится
+                    return None
+                number = numbers[key] = self._allocate()
+                queue.append((number, ref))
+            return number
+
+        for ref, _, _ in pages:
+            numbers[(ref.idnum, ref.generation)] = self._allocate()
+
+        for ref, page, inherited in pages:
+            # Страница с ее объектами собирается в памяти и попадает в вывод,
+            # только если источник разобран целиком: при сбое на середине в
+            # выводе не остается обрывков, а смещения не указывают на мусор
+            buffer = io.BytesIO()
+            placed: List[Tuple[int, int]] = []
+
+            def begin(number: int) -> None:
+                placed.append((number, buffer.tell()))
+                buffer.write(b"%d 0 obj\n" % number)
+
+            page_number = numbers[(ref.idnum, ref.generation)]
+            begin(page_number)
+            buffer.write(b"<<\n/Type /Page\n/Parent %d 0 R\n" % self._pages_root)
+            for key, value in inherited.items():
+                if key not in page:
+                    buffer.write(key.encode() + b" ")
+                    _write(value, buffer, renumber)
+                    buffer.write(b"\n")
+            for key, value in page.items():
+                if key in ("/Type", "/Parent"):
+                    continue
+                key.write_to_stream(buffer, None)
+                buffer.write(b" ")
+                _write(value, buffer, renumber)
+                buffer.write(b"\n")
+            buffer.write(b">>\nendobj\n")
+
+            while queue:
+                number, ref = queue.pop()
+                begin(number)
+                _write(ref.get_object(), buffer, renumber)
+                buffer.write(b"\nendobj\n")
+
+            base = self.out.tell() - self._start
+            self.out.write(buffer.getbuffer())
+            for number, offset in placed:
+                self._offsets[number - 1] = base + offset
+            self._kids.append(page_number)
+            # Разобранные объекты уже записаны; ссылки на них — в numbers
+            reader.resolved_objects.clear()
+
+        if title and pages:
+            self._outline.append((title, first))
+        return len(pages)
+
+    def close(self) -> None:
+        """Дерево страниц, закладки, таблица ссылок и трейлер"""
+        from PyPDF2.generic import TextStringObject
+
+        outline = self._allocate() if self._outline else None
+        items = [self._allocate() for _ in self._outline]
+
+        self._begin(self._pages_root)
+        kids = b" ".join(b"%d 0 R" % kid for kid in self._kids)
+        self.out.write(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._kids)))
+        self._end()
+
+        self._begin(self._catalog)
+        if outline:
+            self.out.write(b"<< /Type /Catalog /Pages %d 0 R /Outlines %d 0 R /PageMode /UseOutlines >>"
+                           % (self._pages_root, outline))
+        else:
+            self.out.write(b"<< /Type /Catalog /Pages %d 0 R >>" % self._pages_root)
+        self._end()
+
+        if outline:
+            self._begin(outline)
+            self.out.write(b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>"
+                           % (items[0], items[-1], len(items)))
+            self._end()
+            for i, ((title, page), number) in enumerate(zip(self._outline, items)):
+                self._begin(number)
+                self.out.write(b"<< /Title ")
+                TextStringObject(title).write_to_stream(self.out, None)
+                self.out.write(b" /Parent %d 0 R /Dest [%d 0 R /Fit]" % (outline, self._kids[page - 1]))
+                if i:
+                    self.out.write(b" /Prev %d 0 R" % items[i - 1])
+                if i + 1 < len(items):
+                    self.out.write(b" /Next %d 0 R" % items[i + 1])
+                self.out.write(b" >>")
+                self._end()
+
+        xref = self.out.tell() - self._start
+        self.out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._offsets) + 1))
+        for offset in self._offsets:
+            # Объекты источника, оборвавшегося на середине, не записаны
+            self.out.write(b"%010d 00000 n \n" % offset if offset else b"0000000000 00001 f \n")
+        self.out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                       % (len(self._offsets) + 1, self._catalog, xref))
+
+
+def _is_pages_node(obj: Any) -> bool:
+    from PyPDF2.generic import DictionaryObject
+
+    return isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Pages"
+
+
+def _page_refs(reader) -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+    """Страницы в порядке документа: (ссылка, словарь страницы, унаследованные атрибуты)"""
+    def walk(node_ref, inherited):
+        node = node_ref.get_object()
+        if node.get("/Type") == "/Pages" or "/Kids" in node:
+            inherited = {**inherited, **{key: node.raw_get(key) for key in _INHERITED if key in node}}
+            for kid in node["/Kids"]:
+                yield from walk(kid, inherited)
+        else:
+            yield node_ref, node, inherited
+
+    yield from walk(reader.trailer["/Root"].raw_get("/Pages"), {})
+
+
+def _write(obj: Any, out: IO[bytes], renumber) -> None:
+    """Сериализация объекта PyPDF2 с перенумерацией косвенных ссылок"""
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    if isinstance(obj, IndirectObject):
+        number = renumber(obj)
+        out.write(b"null" if number is None else b"%d 0 R" % number)
+    elif isinstance(obj, DictionaryObject):
+        out.write(b"<<\n")
+        for key, value in obj.items():
+            if isinstance(obj, StreamObject) and key == "/Length":
+                continue
+            if key == "/Parent" and isinstance(value, IndirectObject) and _is_pages_node(value.get_object()):
+                continue
+            key.write_to_stream(out, None)
+            out.write(b" ")
+            _write(value, out, renumber)
+            out.write(b"\n")
+        if isinstance(obj, StreamObject):
+            # _data — содержимое потока как в источнике (со сжатием)
+            out.write(b"/Length %d\n>>\nstream\n" % len(obj._data))
+            out.write(obj._data)
+            out.write(b"\nendstream")
+        else:
+            out.write(b">>")
+    elif isinstance(obj, ArrayObject):
+        out.write(b"[")
+        for item in obj:
+            out.write(b" ")
+            _write(item, out, renumber)
+        out.write(b" ]")
+    else:
+        obj.write_to_stream(out, None)
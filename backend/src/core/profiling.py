@@ -0,0 +1,190 @@
+"""
+Профилирование отдельных запросов по требованию
+
+Администратор включает профилирование заголовком ``X-Profile`` или
+параметром ``?profile=``. Запрос выполняется под сэмплирующим профилировщиком,
+результат сохраняется в формате collapsed stacks (flamegraph.pl, speedscope).
+
+Значения флага:
+    1 / store   — сохранить профиль на диск, имя файла вернуть в X-Profile-Output
+    download    — вместо ответа эндпоинта вернуть сам профиль
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+
+class TokenBucket:
+    """Ограничитель частоты: не более capacity событий в период"""
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period if period > 0 else 0
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик стека одного потока
+
+    Снимает стек целевого потока с заданным интервалом из фонового потока,
+    поэтому почти не замедляет сам запрос. В асинхронном приложении в профиль
+    попадают и конкурентные задачи event loop — это нужно учитывать при анализе.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Профиль в формате collapsed stacks: 'a;b;c <count>' на строку"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfilingMiddleware:
+    """
+    Middleware профилирования запросов по флагу администратора
+    и случайной выборки запросов с долей PROFILING_SAMPLE_RATE
+
+    Чистый ASGI: профиль снимается до начала ответа, тело ответа
+    передается серверу без промежуточного копирования.
+    """
+
+    def __init__(self, app: ASGIApp, is_authorized: Callable[[Request], bool]):
+        self.app = app
+        self.is_authorized = is_authorized
+        self.limiter = TokenBucket(settings.PROFILING_RATE_LIMIT, period=60.0)
+        self.output_dir = Path(settings.PROFILING_OUTPUT_DIR)
+
+    def _requested_mode(self, request: Request) -> Optional[str]:
+        mode = request.headers.get("X-Profile") or request.query_params.get("profile")
+        if mode:
+            return "download" if mode == "download" else "store"
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        mode = self._requested_mode(request)
+        # Явный флаг доступен только администратору, случайная выборка — всем запросам
+        if mode is None or (mode != "sampled" and not self.is_authorized(request)):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire():
+            async def send_skipped(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-Profile-Skipped"] = "rate-limited"
+                await send(message)
+
+            await self.app(scope, receive, send_skipped)
+            return
+
+        sampler = StackSampler(interval=settings.PROFILING_INTERVAL_MS / 1000).start()
+        started = time.perf_counter()
+
+        if mode == "download":
+            status_code = 500
+
+            # Ответ эндпоинта отбрасывается, клиент получает профиль
+            async def discard(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                sampler.stop()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            response = PlainTextResponse(
+                sampler.collapsed(),
+                headers={
+                    "X-Profile-Status": str(status_code),
+                    "X-Profile-Duration-Ms": f"{elapsed_ms:.2f}",
+                    "Content-Disposition": 'attachment; filename="profile.collapsed"',
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_output(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                sampler.stop()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                filename = self._store(request, sampler.collapsed())
+                MutableHeaders(scope=message)["X-Profile-Output"] = filename
+                logger.info(
+                    f"Profiled {request.method} {request.url.path} ({elapsed_ms:.1f} ms, "
+                    f"{sum(sampler.samples.values())} samples) -> {filename}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_output)
+        finally:
+            # Повторная остановка безопасна; нужна, если эндпоинт упал до ответа
+            sampler.stop()
+
+    def _store(self, request: Request, collapsed: str) -> str:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        route = request.url.path.strip("/").replace("/", "_") or "root"
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{request.method}_{route}.collapsed"
+        (self.output_dir / filename).write_text(collapsed, encoding="utf-8")
+        return filename
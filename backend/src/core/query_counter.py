@@ -0,0 +1,200 @@
+"""
+Учет SQL-запросов в рамках HTTP-запроса и детектор N+1
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+# Литералы и списки параметров не должны влиять на группировку запросов
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'[^']*'")
+_IN_LIST_RE = re.compile(r"\(\s*(\?|%\([^)]*\)s|\$\d+|:\w+)(\s*,\s*(\?|%\([^)]*\)s|\$\d+|:\w+))*\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    """Приведение SQL к шаблону для группировки одинаковых запросов"""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    return " ".join(normalized.split())
+
+
+@dataclass
+class QueryStats:
+    """Статистика обращений к БД"""
+    queries: int = 0
+    rows: int = 0
+    db_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float, rowcount: int) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        if rowcount > 0:
+            self.rows += rowcount
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated_statements(self, threshold: int):
+        """Запросы, повторенные не менее threshold раз (признак N+1)"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Превышен бюджет SQL-запросов"""
+
+    def __init__(self, stats: QueryStats, budget: int):
+        self.stats = stats
+        self.budget = budget
+        top = "\n".join(
+            f"  {count}x {statement}"
+            for statement, count in stats.statements.most_common(5)
+        )
+        super().__init__(
+            f"Query budget exceeded: {stats.queries} queries (budget {budget})\n{top}"
+        )
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_installed_engines = set()
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Статистика текущего контекста (None вне track_queries)"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is None:
+        return
+
+    # Для SELECT rowcount обычно -1, строки считаются по загруженным объектам
+    is_dml = context is not None and (context.isinsert or context.isupdate or context.isdelete)
+    rowcount = cursor.rowcount if is_dml else -1
+    stats.record(statement, time.perf_counter() - started, rowcount)
+
+
+def _on_instance_load(target, context):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def install_query_counter(engine) -> None:
+    """
+    Подключение счетчика к движку (синхронному или асинхронному)
+    """
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if id(sync_engine) in _installed_engines:
+        return
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(Mapper, "load", _on_instance_load):
+        event.listen(Mapper, "load", _on_instance_load)
+
+    _installed_engines.add(id(sync_engine))
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Сбор статистики запросов внутри блока
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Проверка бюджета запросов (для тестов)
+
+    Пример:
+        with query_budget(3):
+            await client.get(f"/api/v1/materials/{material_id}")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > max_queries:
+        raise QueryBudgetExceeded(stats, max_queries)
+
+
+class QueryCounterMiddleware:
+    """
+    Middleware: считает запросы к БД и отдает их в заголовках ответа
+
+    Чистый ASGI, без BaseHTTPMiddleware: тело ответа и
+    http.response.zerocopysend передаются серверу напрямую. В заголовки
+    попадают запросы, выполненные до начала ответа.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Вложенный track_queries (например, query_budget в тестах) тоже должен видеть запросы
+        outer = _current_stats.get()
+
+        with track_queries() as stats:
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and settings.DB_QUERY_STATS_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.queries)
+                    headers["X-DB-Rows"] = str(stats.rows)
+                    headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if outer is not None:
+            outer.queries += stats.queries
+            outer.rows += stats.rows
+            outer.db_time += stats.db_time
+            outer.statements.update(stats.statements)
+
+        method, path = scope["method"], scope["path"]
+        repeated = stats.repeated_statements(settings.DB_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            statement, count = repeated[0]
+            logger.warning(
+                f"Possible N+1 in {method} {path}: "
+                f"{count}x {statement[:200]}"
+            )
+
+        budget = settings.DB_QUERY_BUDGET
+        if budget and stats.queries > budget:
+            logger.warning(
+                f"{method} {path} exceeded query budget: "
+                f"{stats.queries} > {budget}"
+            )
@@ -1,21 +1,36 @@
 """
 Security utilities
 """
-from passlib.context import CryptContext
+from functools import lru_cache
 
-# Контекст для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.core.lazy import lazy_module
+
+# passlib и bcrypt загружаются при первой проверке пароля
+passlib_context = lazy_module("passlib.context")
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """Контекст для хеширования паролей"""
+    return passlib_context.CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
     """Получение хеша пароля"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def __getattr__(name: str):
+    # Совместимость с ``from src.core.security import pwd_context``
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Экспортируем функции
-__all__ = ["get_password_hash", "verify_password", "pwd_context"]
\ No newline at end of file
+__all__ = ["get_password_hash", "verify_password", "get_pwd_context"]
@@ -0,0 +1,41 @@
+"""
+Быстрая сериализация ответов API
+
+Ответы по умолчанию кодируются orjson (ORJSONResponse в main.py). Схемы
+ответов проверяются через TypeAdapter, закешированный на тип, с
+from_attributes — ORM-объекты читаются напрямую, без промежуточных словарей.
+Данные, которые сервис уже гарантирует (например, собственное хранилище),
+отдаются без повторной проверки через trusted_response.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema: Any) -> TypeAdapter:
+    """TypeAdapter схемы; построение валидатора дорогое, поэтому кешируется"""
+    return TypeAdapter(schema)
+
+
+def validated_json(schema: Any, data: Any) -> bytes:
+    """Проверка данных (в том числе ORM-объектов) по схеме и JSON-кодирование в pydantic-core"""
+    adapter = type_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def validated_response(schema: Any, data: Any, status_code: int = 200) -> Response:
+    """
+    Ответ, проверенный по схеме
+
+    FastAPI не проверяет возвращенный Response повторно, поэтому response_model
+    эндпоинта остается только для документации.
+    """
+    return Response(validated_json(schema, data), status_code=status_code, media_type="application/json")
+
+
+def trusted_response(content: Any, status_code: int = 200) -> ORJSONResponse:
+    """Ответ из доверенных данных: без проверки схемы и jsonable_encoder, сразу orjson"""
+    return ORJSONResponse(content, status_code=status_code)
@@ -1,7 +1,17 @@
 """
-Database package initialization
+Синхронный фасад базы данных для скриптов и Alembic
+
+Метаданные и движки общие с src.core.database: модели регистрируются
+в одном Base, синхронный движок создается при первом обращении.
 """
-from src.database.base import Base, get_db, engine, SessionLocal
+from src.database.base import Base, SessionLocal, get_db, get_sync_engine
 from src.database.session import create_tables, get_session
 
-__all__ = ["Base", "get_db", "engine", "SessionLocal", "create_tables", "get_session"]
\ No newline at end of file
+__all__ = ["Base", "get_db", "engine", "SessionLocal", "create_tables", "get_session", "get_sync_engine"]
+
+
+def __getattr__(name: str):
+    # ``from src.database import engine`` создает движок только при обращении
+    if name == "engine":
+        return get_sync_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,29 @@
 """
 Database base configuration
 """
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from src.core.config import settings
-
-# Создание движка базы данных
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.core.database import Base, get_sync_engine
+
+
+class SyncSession(Session):
+    """Синхронная сессия, по умолчанию привязанная к get_sync_engine()"""
+
+    def __init__(self, bind=None, **kwargs):
+        if bind is None and not kwargs.get("binds"):
+            bind = get_sync_engine()
+        super().__init__(bind=bind, **kwargs)
+
 
 # Создание сессии
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=SyncSession, autocommit=False, autoflush=False)
+
+
+def __getattr__(name: str):
+    if name == "engine":
+        return get_sync_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Базовый класс для моделей
-Base = declarative_base()
 
 def get_db():
     """
@@ -27,4 +33,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
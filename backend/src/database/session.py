@@ -2,16 +2,21 @@
 Database session management
 """
 from sqlalchemy.orm import Session
-from src.database.base import SessionLocal, engine, Base
+from src.database.base import SessionLocal, Base, get_sync_engine
+
 
 def create_tables():
     """
     Создание всех таблиц в базе данных
     """
-    Base.metadata.create_all(bind=engine)
+    # Импортируем все модели, чтобы они были зарегистрированы
+    from src.models import material, user, workflow, certificate
+
+    Base.metadata.create_all(bind=get_sync_engine())
+
 
 def get_session() -> Session:
     """
     Получение синхронной сессии базы данных
     """
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
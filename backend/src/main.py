@@ -1,12 +1,31 @@
 """
 Metal Inspection System - Main Application
 """
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from loguru import logger
 
 from src.core.config import settings
+from src.core.database import get_engine, get_replica_router
+from src.core.exceptions import NotFoundException, PermissionDeniedException
+from src.core.query_counter import QueryCounterMiddleware, install_query_counter
+from src.core.metrics import (
+    MetricsMiddleware,
+    OPENMETRICS_CONTENT_TYPE,
+    instrument_pool,
+    is_allowed_client,
+    monitor_event_loop_lag,
+    registry as metrics_registry,
+)
+from src.core.profiling import ProfilingMiddleware
+from src.services.certificate_service import CertificateExpirySweeper
+from src.services.preview_service import close_preview_pool
+from src.services.report_service import close_report_pool
+from src.services.signature_service import close_signer
 
 
 @asynccontextmanager
@@ -21,10 +40,33 @@ async def lifespan(app: FastAPI):
     # Пока используем упрощенную версию без БД
     logger.info("Using in-memory storage (development mode)")
 
+    # Движок создается при старте, а не при импорте приложения
+    engine = get_engine()
+    install_query_counter(engine)
+    instrument_pool(engine)
+
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    expiry_sweeper = asyncio.create_task(CertificateExpirySweeper().run())
+    replica_monitor = None
+    replica_router = get_replica_router()
+    if replica_router.replicas:
+        logger.info(f"Read replicas: {len(replica_router.replicas)}")
+        for index, replica in enumerate(replica_router.replicas):
+            instrument_pool(replica, name=f"replica-{index}")
+        replica_monitor = asyncio.create_task(replica_router.monitor())
+
     yield
 
+    lag_monitor.cancel()
+    expiry_sweeper.cancel()
+    if replica_monitor:
+        replica_monitor.cancel()
+
     # Shutdown
     logger.info("Shutting down Metal Inspection System...")
+    close_preview_pool()
+    close_signer()
+    close_report_pool()
 
 
 # Создание приложения FastAPI
@@ -33,6 +75,7 @@ app = FastAPI(
     description="Система приемки и входного контроля металла",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
 )
@@ -44,13 +87,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Rows", "X-DB-Time-Ms"],
 )
 
-# Импортируем роутеры после создания app
+# Счетчик SQL-запросов на каждый HTTP-запрос (движок подключается в lifespan)
+app.add_middleware(QueryCounterMiddleware)
+
+# Метрики латентности и пула соединений
+app.add_middleware(MetricsMiddleware)
+
+# Импортируем роутеры после создания app. Роутеры подключаются сразу, а не
+# лениво: таблица маршрутов и OpenAPI строятся при старте, и порядок
+# подключения важен; отложены тяжелые зависимости внутри них (src/core/lazy.py)
 from src.api.v1 import materials_simple as materials
-from src.api.v1 import workflows, certificates, users, auth
+from src.api.v1 import workflows, certificates, users, auth, documents, barcodes, material_codes, reports, suppliers
+from src.api.v1 import reservations, movements
+
+# Профилирование по запросу администратора (внешний слой, охватывает остальные middleware)
+app.add_middleware(ProfilingMiddleware, is_authorized=auth.is_admin_request)
 
 # Подключение роутеров
+# Раньше материалов: пути вида /materials/generate-code не должны попасть в /materials/{material_id}
+app.include_router(
+    material_codes.router,
+    prefix="/api/v1",
+    tags=["Materials"]
+)
+
+app.include_router(
+    certificates.materials_router,
+    prefix="/api/v1",
+    tags=["Certificates"]
+)
+
+app.include_router(
+    suppliers.router,
+    prefix="/api/v1",
+    tags=["Suppliers"]
+)
+
+app.include_router(
+    reservations.router,
+    prefix="/api/v1",
+    tags=["Materials"]
+)
+
+app.include_router(
+    movements.router,
+    prefix="/api/v1",
+    tags=["Materials"]
+)
+
 app.include_router(
     materials.router,
     prefix="/api/v1/materials",
@@ -81,6 +168,24 @@ app.include_router(
     tags=["Authentication"]
 )
 
+app.include_router(
+    documents.router,
+    prefix="/api/v1",
+    tags=["Documents"]
+)
+
+app.include_router(
+    barcodes.router,
+    prefix="/api/v1",
+    tags=["Barcodes"]
+)
+
+app.include_router(
+    reports.router,
+    prefix="/api/v1/tests",
+    tags=["Reports"]
+)
+
 # Главная страница API
 @app.get("/")
 async def root():
@@ -98,4 +203,13 @@ async def health_check():
         "status": "healthy",
         "environment": settings.ENVIRONMENT,
         "storage": "in-memory"
-    }
\ No newline at end of file
+    }
+
+# Метрики в формате OpenMetrics для Prometheus: только из разрешенных сетей или администратору
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not settings.METRICS_ENABLED:
+        raise NotFoundException("Metrics are disabled")
+    if not (is_allowed_client(request, settings.METRICS_ALLOWED_NETWORKS) or auth.is_admin_request(request)):
+        raise PermissionDeniedException("Metrics are available to monitoring hosts only")
+    return PlainTextResponse(metrics_registry.render(), media_type=OPENMETRICS_CONTENT_TYPE)
@@ -5,8 +5,13 @@ Database models initialization
 # Импортируем все модели для регистрации в Base.metadata
 from src.models.material import Material, MaterialStatus, MaterialType
 from src.models.user import User, UserRole
-from src.models.workflow import WorkflowState, WorkflowTemplate, WorkflowRule
-from src.models.certificate import Certificate, TestResult, TestType, TestCategory
+from src.models.workflow import WorkflowState, WorkflowTemplate, WorkflowRule, WorkflowHistoryArchive, WorkflowCheckpoint
+from src.models.certificate import Certificate, CertificateSearchTerm, TestResult, TestType, TestCategory
+from src.models.reservation import Reservation
+from src.models.movement import MaterialMovement
+from src.models.document import StoredBlob, MaterialDocument, UploadSession
+from src.models.code_sequence import CodeSequence
+from src.models.supplier import SupplierScore, SupplierTestStat
 
 __all__ = [
     'Material',
@@ -17,8 +22,19 @@ __all__ = [
     'WorkflowState',
     'WorkflowTemplate',
     'WorkflowRule',
+    'WorkflowHistoryArchive',
+    'WorkflowCheckpoint',
     'Certificate',
+    'CertificateSearchTerm',
     'TestResult',
     'TestType',
-    'TestCategory'
+    'TestCategory',
+    'Reservation',
+    'MaterialMovement',
+    'StoredBlob',
+    'MaterialDocument',
+    'UploadSession',
+    'CodeSequence',
+    'SupplierScore',
+    'SupplierTestStat'
 ]
\ No newline at end of file
@@ -1,7 +1,10 @@
 """
 Модели сертификатов и результатов тестирования
 """
-from sqlalchemy import Column, String, DateTime, Float, Text, JSON, Enum, ForeignKey, Boolean, Integer
+from sqlalchemy import (
+    Column, String, DateTime, Float, Text, JSON, Enum, ForeignKey, Boolean, Integer, Index, DDL, and_, event
+)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -136,6 +139,10 @@ class Certificate(Base):
     invalidation_reason = Column(Text)
     invalidated_at = Column(DateTime(timezone=True))
 
+    # Отметки фонового контроля сроков (src/services/certificate_service.py)
+    expiry_warned_at = Column(DateTime(timezone=True))  # Предупреждение о скором истечении отправлено
+    expired_at = Column(DateTime(timezone=True))  # Истечение срока зафиксировано
+
     # Временные метки
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -145,10 +152,15 @@ class Certificate(Base):
     issuer = relationship("User", back_populates="issued_certificates")
     test_results = relationship("TestResult", back_populates="certificate")
 
+    # Выборки по сроку действия идут диапазоном по valid_until
+    __table_args__ = (
+        Index("ix_certificates_valid_until", "valid_until"),
+    )
+
     def __repr__(self):
         return f"<Certificate {self.certificate_number}>"
 
-    @property
+    @hybrid_property
     def is_expired(self) -> bool:
         """Проверка истечения срока действия"""
         if not self.valid_until:
@@ -156,6 +168,12 @@ class Certificate(Base):
         from datetime import datetime
         return datetime.now(self.valid_until.tzinfo) > self.valid_until
 
+    @is_expired.inplace.expression
+    @classmethod
+    def _is_expired_expression(cls):
+        # В запросах — условие по индексу valid_until, без загрузки объектов
+        return and_(cls.valid_until.is_not(None), cls.valid_until < func.now())
+
     def to_dict(self):
         """Преобразование в словарь"""
         return {
@@ -170,4 +188,81 @@ class Certificate(Base):
             "summary": self.summary,
             "pdf_path": self.pdf_path,
             "certificate_metadata": self.certificate_metadata
-        }
\ No newline at end of file
+        }
+
+# Поля certificate_metadata, по которым ведется поиск
+SEARCH_FIELDS = ("keywords", "standards", "customer", "project")
+
+
+class CertificateSearchTerm(Base):
+    """
+    Инвертированный индекс метаданных сертификатов для SQLite
+
+    Строки (поле, значение) -> сертификат ведут триггеры базы по
+    certificate_metadata; массивы (keywords, standards) раскладываются по
+    элементам. На PostgreSQL поиск идет по GIN-индексу jsonb, таблица пуста.
+    """
+    __tablename__ = "certificate_search_terms"
+
+    id = Column(Integer, primary_key=True)
+    certificate_id = Column(Integer, ForeignKey("certificates.id", ondelete="CASCADE"), nullable=False)
+    field = Column(String(50), nullable=False)
+    term = Column(String(500), nullable=False)
+
+    __table_args__ = (
+        Index("ix_certificate_search_terms_field_term", "field", "term", "certificate_id"),
+        Index("ix_certificate_search_terms_certificate_id", "certificate_id"),
+    )
+
+
+def _sqlite_terms_select(source: str) -> str:
+    # Значения полей поиска строки NEW (в триггере) или всех строк certificates;
+    # скаляр раскладывается как массив из одного элемента
+    fields = ", ".join(f"'{name}'" for name in SEARCH_FIELDS)
+    metadata = f"{source}.certificate_metadata"
+    table = "" if source == "NEW" else f"{source}, "
+    return (
+        f"SELECT {source}.id, f.key, v.value "
+        f"FROM {table}json_each(CASE WHEN json_valid({metadata}) THEN {metadata} ELSE '{{}}' END) AS f, "
+        f"json_each(CASE WHEN f.type = 'array' THEN f.value ELSE json_array(f.value) END) AS v "
+        f"WHERE f.key IN ({fields}) AND v.type = 'text'"
+    )
+
+
+SQLITE_SEARCH_TRIGGERS = (
+    f"""
+    CREATE TRIGGER certificates_search_terms_insert AFTER INSERT ON certificates
+    BEGIN
+        INSERT INTO certificate_search_terms (certificate_id, field, term) {_sqlite_terms_select("NEW")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER certificates_search_terms_update AFTER UPDATE OF certificate_metadata ON certificates
+    BEGIN
+        DELETE FROM certificate_search_terms WHERE certificate_id = OLD.id;
+        INSERT INTO certificate_search_terms (certificate_id, field, term) {_sqlite_terms_select("NEW")};
+    END
+    """,
+    """
+    CREATE TRIGGER certificates_search_terms_delete AFTER DELETE ON certificates
+    BEGIN
+        DELETE FROM certificate_search_terms WHERE certificate_id = OLD.id;
+    END
+    """,
+)
+
+SQLITE_SEARCH_BACKFILL = (
+    f"INSERT INTO certificate_search_terms (certificate_id, field, term) {_sqlite_terms_select('certificates')}"
+)
+
+POSTGRESQL_SEARCH_INDEX = (
+    "CREATE INDEX ix_certificates_metadata_gin ON certificates "
+    "USING gin ((certificate_metadata::jsonb) jsonb_path_ops)"
+)
+
+# Для create_all (тесты, init_db); в миграциях — те же операторы
+for _trigger in SQLITE_SEARCH_TRIGGERS:
+    event.listen(CertificateSearchTerm.__table__, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
+event.listen(
+    Certificate.__table__, "after_create", DDL(POSTGRESQL_SEARCH_INDEX).execute_if(dialect="postgresql")
+)
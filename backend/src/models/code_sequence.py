@@ -0,0 +1,28 @@
+"""
+Модель счетчиков кодов материалов
+"""
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+
+from src.core.database import Base
+
+
+class CodeSequence(Base):
+    """
+    Счетчик кодов материалов на префикс и год (MAT-2026-0001)
+
+    next_value — первый еще не выданный номер. Воркер забирает сразу блок
+    номеров одним UPDATE и раздает их без обращений к базе.
+    """
+    __tablename__ = "code_sequences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    prefix = Column(String(20), nullable=False)
+    year = Column(Integer, nullable=False)
+    next_value = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        UniqueConstraint("prefix", "year", name="uq_code_sequences_prefix_year"),
+    )
+
+    def __repr__(self):
+        return f"<CodeSequence(prefix='{self.prefix}', year={self.year}, next_value={self.next_value})>"
@@ -0,0 +1,91 @@
+"""
+Модели хранилища документов материалов
+"""
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Integer, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from src.core.database import Base
+
+
+class StoredBlob(Base):
+    """
+    Содержимое файла, адресуемое SHA-256
+
+    Один и тот же сертификат завода, приложенный к десяткам партий, хранится
+    на диске один раз; ref_count — число документов, ссылающихся на файл.
+    """
+    __tablename__ = "stored_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)
+    path = Column(String(500), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    documents = relationship("MaterialDocument", back_populates="blob")
+
+    def __repr__(self):
+        return f"<StoredBlob {self.sha256[:12]} ({self.size} bytes, {self.ref_count} refs)>"
+
+
+class MaterialDocument(Base):
+    """Документ, приложенный к партии материала"""
+    __tablename__ = "material_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False)
+    blob_id = Column(Integer, ForeignKey("stored_blobs.id"), nullable=False)
+
+    name = Column(String(255), nullable=False)  # исходное имя файла
+    content_type = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+
+    uploaded_by = Column(String(255), nullable=True)  # идентификатор пользователя из токена
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Связи
+    material = relationship("Material", back_populates="documents")
+    blob = relationship("StoredBlob", back_populates="documents", lazy="joined")
+
+    __table_args__ = (
+        Index("ix_material_documents_material_uploaded_at", "material_id", "uploaded_at"),
+        Index("ix_material_documents_blob_id", "blob_id"),
+    )
+
+    @property
+    def sha256(self) -> str:
+        return self.blob.sha256
+
+    def __repr__(self):
+        return f"<MaterialDocument '{self.name}' for Material {self.material_id}>"
+
+
+class UploadSession(Base):
+    """
+    Незавершенная загрузка по частям
+
+    Части дописываются в файл <UPLOAD_PATH>/incoming/<id>.part строго по
+    порядку; offset — сколько байт уже принято, с него клиент продолжает
+    после обрыва. Писать в файл может только запрос, захвативший загрузку
+    (lease_token); захват истекает в lease_expires_at, если запрос оборвался.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False)
+
+    name = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    offset = Column(BigInteger, nullable=False, default=0, server_default="0")
+    lease_token = Column(String(32), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.offset}/{self.size} for Material {self.material_id}>"
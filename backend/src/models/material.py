@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, DateTime, Integer, Float, Boolean, ForeignKey, JSON, event
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql import func
+from src.core.barcodes import material_barcode
 from src.core.database import Base
 from enum import Enum
 
@@ -29,11 +31,16 @@ class Material(Base):
     __tablename__ = "materials"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Код материала (MAT-2026-0001); уникальность гарантирует индекс, а не проверка перед вставкой
+    material_code = Column(String(50), unique=True, nullable=True, index=True)
     batch_number = Column(String(100), unique=True, nullable=False, index=True)
     material_type = Column(String(50), nullable=False)
     grade = Column(String(100), nullable=True)
     specification = Column(String(200), nullable=True)
+    # Доступный остаток; резервирование списывает его
     quantity = Column(Float, nullable=False)
+    # Сумма резервирований из журнала reservations (кэш агрегата)
+    reserved_quantity = Column(Float, nullable=False, default=0.0, server_default="0")
     unit = Column(String(20), nullable=False, default="kg")
     supplier = Column(String(200), nullable=False)
     supplier_certificate = Column(String(500), nullable=True)
@@ -42,8 +49,11 @@ class Material(Base):
     material_metadata = Column(JSON, nullable=True, default=dict)
 
     status = Column(String(20), nullable=False, default=MaterialStatus.RECEIVED.value)
-    location = Column(String(200), nullable=True)
+    # Текущее место хранения; история перемещений — в material_movements
+    location = Column(String(200), nullable=True, index=True)
     notes = Column(Text, nullable=True)
+    # Код на бирке (QR / Code128); по нему сканер находит материал
+    barcode = Column(String(32), unique=True, nullable=True, index=True)
 
     # Даты
     received_date = Column(DateTime(timezone=True), server_default=func.now())
@@ -56,12 +66,21 @@ class Material(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     updated_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
+    # Версия строки для оптимистичной блокировки: каждое изменение через ORM
+    # проверяет и увеличивает ее, резервирование увеличивает ее условным UPDATE
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Отношения
     creator = relationship("User", foreign_keys=[created_by], back_populates="created_materials")
     updater = relationship("User", foreign_keys=[updated_by], back_populates="updated_materials")
     workflow_states = relationship("WorkflowState", back_populates="material")
     test_results = relationship("TestResult", back_populates="material")
     certificates = relationship("Certificate", back_populates="material")
+    reservations = relationship("Reservation", back_populates="material")
+    movements = relationship("MaterialMovement", back_populates="material")
+    documents = relationship("MaterialDocument", back_populates="material")
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
         return f"<Material(id={self.id}, batch_number='{self.batch_number}', type='{self.material_type}')>"
@@ -74,6 +93,7 @@ class Material(Base):
             "grade": self.grade,
             "specification": self.specification,
             "quantity": self.quantity,
+            "reserved_quantity": self.reserved_quantity,
             "unit": self.unit,
             "supplier": self.supplier,
             "supplier_certificate": self.supplier_certificate,
@@ -88,4 +108,15 @@ class Material(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "created_by": self.created_by,
             "updated_by": self.updated_by
-        }
\ No newline at end of file
+        }
+
+@event.listens_for(Material, "after_insert")
+def _assign_barcode(mapper, connection, target):
+    """Штрих-код по номеру материала, если не задан явно (например, код поставщика)"""
+    if target.barcode is not None:
+        return
+    barcode = material_barcode(target.id)
+    connection.execute(
+        Material.__table__.update().where(Material.__table__.c.id == target.id).values(barcode=barcode)
+    )
+    set_committed_value(target, "barcode", barcode)
@@ -0,0 +1,39 @@
+"""
+Модель журнала перемещений материалов по складу
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from src.core.database import Base
+
+
+class MaterialMovement(Base):
+    """
+    Перемещение материала между местами хранения
+
+    Журнал только дополняется; текущее место хранится в materials.location
+    (с индексом), история партии читается по индексу material_id + moved_at.
+    """
+    __tablename__ = "material_movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False)
+
+    from_location = Column(String(200), nullable=True)  # None при первом размещении
+    to_location = Column(String(200), nullable=False)
+
+    moved_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    moved_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Связи
+    material = relationship("Material", back_populates="movements")
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_material_movements_material_moved_at", "material_id", "moved_at"),
+        Index("ix_material_movements_to_location_moved_at", "to_location", "moved_at"),
+    )
+
+    def __repr__(self):
+        return f"<MaterialMovement {self.from_location} -> {self.to_location} for Material {self.material_id}>"
@@ -0,0 +1,40 @@
+"""
+Модель журнала резервирований материалов
+"""
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Integer, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from src.core.database import Base
+
+
+class Reservation(Base):
+    """
+    Резервирование части партии для производства
+
+    Журнал только дополняется; суммарно зарезервированное количество
+    хранится в materials.reserved_quantity, чтобы не агрегировать журнал.
+    """
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False)
+
+    quantity = Column(Float, nullable=False)
+    purpose = Column(String(200), nullable=False)
+
+    reserved_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reserved_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Связи
+    material = relationship("Material", back_populates="reservations")
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_reservations_material_reserved_at", "material_id", "reserved_at"),
+        Index("ix_reservations_purpose_reserved_at", "purpose", "reserved_at"),
+        Index("ix_reservations_reserved_at", "reserved_at"),
+    )
+
+    def __repr__(self):
+        return f"<Reservation {self.quantity} of Material {self.material_id} for {self.purpose}>"
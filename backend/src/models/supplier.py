@@ -0,0 +1,220 @@
+"""
+Модели показателей качества поставщиков
+
+Material.supplier — свободный текст, поэтому показатели ведутся по
+нормализованному ключу (регистр, кавычки, пробелы): «ООО "Металл"» и
+«ооо металл» — один поставщик.
+
+Показатели обновляются сразу после вставки записей истории (WorkflowState) в
+той же транзакции: приемка партии увеличивает число поставок, решение по партии
+(approved / rejected) — счетчики решений, скользящую долю приемок, время от
+приемки до решения и долю неудачных испытаний по видам. Скользящие значения —
+экспоненциальное среднее с коэффициентом SUPPLIER_SCORE_ALPHA по решениям.
+Обновления — атомарные UPSERT, параллельные транзакции не теряют приращений.
+"""
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, UniqueConstraint, and_, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.core.database import Base
+from src.models.certificate import TestResult
+from src.models.material import Material, MaterialStatus
+from src.models.workflow import WorkflowState
+
+# Решение по партии -> значение для доли приемок
+DECISIONS = {MaterialStatus.APPROVED.value: 1.0, MaterialStatus.REJECTED.value: 0.0}
+
+
+def supplier_key(name: Optional[str]) -> str:
+    """Ключ поставщика: без регистра, кавычек и лишних пробелов"""
+    text = (name or "").casefold().replace("ё", "е")
+    text = re.sub(r"[\"'«»“”„`]", " ", text)
+    return " ".join(text.split())
+
+
+def classify_state(state_name: Optional[str], previous_state: Optional[str]) -> Optional[str]:
+    """
+    Событие поставщика по записи истории: received, approved, rejected или None
+
+    Первая запись материала — приемка; решение — переход в approved/rejected
+    из другого статуса. Записи резервирования (без previous_state) не считаются.
+    """
+    if state_name == MaterialStatus.RECEIVED.value and previous_state is None:
+        return state_name
+    if state_name in DECISIONS and previous_state is not None and previous_state != state_name:
+        return state_name
+    return None
+
+
+def ewma(previous: Optional[float], value: float, alpha: float) -> float:
+    return value if previous is None else previous + alpha * (value - previous)
+
+
+def naive_utc(value: datetime) -> datetime:
+    # SQLite возвращает наивное время, PostgreSQL — с часовым поясом
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class SupplierScore(Base):
+    """Сводные показатели поставщика"""
+    __tablename__ = "supplier_scores"
+
+    id = Column(Integer, primary_key=True, index=True)
+    supplier_key = Column(String(200), nullable=False, unique=True)
+    supplier = Column(String(200), nullable=False)  # написание из последней поставки
+
+    materials_received = Column(Integer, nullable=False, default=0, server_default="0")
+    accepted = Column(Integer, nullable=False, default=0, server_default="0")
+    rejected = Column(Integer, nullable=False, default=0, server_default="0")
+    acceptance_rate = Column(Float)  # скользящая доля приемок по решениям
+    lead_time_hours = Column(Float)  # скользящее время от приемки партии до решения
+
+    last_received_at = Column(DateTime(timezone=True))
+    last_decision_at = Column(DateTime(timezone=True))
+
+    @property
+    def decisions(self) -> int:
+        return self.accepted + self.rejected
+
+    @property
+    def rejection_rate(self) -> Optional[float]:
+        return None if self.acceptance_rate is None else 1.0 - self.acceptance_rate
+
+    @property
+    def is_trusted(self) -> bool:
+        """Достаточно решений и высокая скользящая доля приемок"""
+        return (
+            self.decisions >= settings.SUPPLIER_TRUST_MIN_DECISIONS
+            and (self.acceptance_rate or 0.0) >= settings.SUPPLIER_TRUST_MIN_ACCEPTANCE
+        )
+
+    def __repr__(self):
+        return f"<SupplierScore '{self.supplier}': {self.accepted}/{self.decisions} accepted>"
+
+
+class SupplierTestStat(Base):
+    """Испытания партий поставщика по виду испытания"""
+    __tablename__ = "supplier_test_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    supplier_key = Column(String(200), nullable=False)
+    test_type = Column(String(50), nullable=False)
+    tests = Column(Integer, nullable=False, default=0, server_default="0")
+    failures = Column(Integer, nullable=False, default=0, server_default="0")
+    failure_rate = Column(Float)  # скользящая доля неудачных испытаний по решениям
+
+    __table_args__ = (
+        UniqueConstraint("supplier_key", "test_type", name="uq_supplier_test_stats_supplier_test_type"),
+    )
+
+    def __repr__(self):
+        return f"<SupplierTestStat '{self.supplier_key}' {self.test_type}: {self.failures}/{self.tests}>"
+
+
+def _upsert(connection, table, key_columns, values: dict, updates: dict) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE для SQLite и PostgreSQL"""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    connection.execute(
+        insert(table).values(**values).on_conflict_do_update(index_elements=key_columns, set_=updates)
+    )
+
+
+def _ewma_sql(column, value: float, alpha: float):
+    return func.coalesce(column, value) + alpha * (value - func.coalesce(column, value))
+
+
+def decision_tests(connection, material_id: int, since: Optional[datetime], until: Optional[datetime] = None):
+    """Испытания партии между решениями: вид -> (всего, неудачных)"""
+    conditions = [TestResult.material_id == material_id]
+    if since is not None:
+        conditions.append(TestResult.tested_at > since)
+    if until is not None:
+        conditions.append(TestResult.tested_at <= until)
+    rows = connection.execute(
+        select(TestResult.test_type, func.count(), func.count().filter(TestResult.pass_fail == "FAIL"))
+        .where(and_(*conditions))
+        .group_by(TestResult.test_type)
+    )
+    return {getattr(test_type, "value", test_type): (total, failed) for test_type, total, failed in rows}
+
+
+def record_state(connection, material: Material, state: WorkflowState, kind: str) -> None:
+    """Приращение показателей поставщика материала по событию истории"""
+    scores = SupplierScore.__table__
+    key = supplier_key(material.supplier)
+    at = naive_utc(state.changed_at or datetime.utcnow())
+    alpha = settings.SUPPLIER_SCORE_ALPHA
+
+    if kind == MaterialStatus.RECEIVED.value:
+        _upsert(connection, scores, [scores.c.supplier_key],
+                {"supplier_key": key, "supplier": material.supplier, "materials_received": 1,
+                 "accepted": 0, "rejected": 0, "last_received_at": at},
+                {"supplier": material.supplier, "materials_received": scores.c.materials_received + 1,
+                 "last_received_at": at})
+        return
+
+    value = DECISIONS[kind]
+    accepted = int(value == 1.0)
+    values = {"supplier_key": key, "supplier": material.supplier, "materials_received": 0,
+              "accepted": accepted, "rejected": 1 - accepted, "acceptance_rate": value, "last_decision_at": at}
+    updates = {"accepted": scores.c.accepted + accepted, "rejected": scores.c.rejected + 1 - accepted,
+               "acceptance_rate": _ewma_sql(scores.c.acceptance_rate, value, alpha), "last_decision_at": at}
+    if material.received_date is not None:
+        lead_time = max((at - naive_utc(material.received_date)).total_seconds() / 3600, 0.0)
+        values["lead_time_hours"] = lead_time
+        updates["lead_time_hours"] = _ewma_sql(scores.c.lead_time_hours, lead_time, alpha)
+    _upsert(connection, scores, [scores.c.supplier_key], values, updates)
+
+    # Испытания после предыдущего решения по партии (повторные испытания не учитываются дважды)
+    previous = connection.execute(
+        select(func.max(WorkflowState.changed_at)).where(
+            WorkflowState.material_id == material.id,
+            WorkflowState.id < state.id,
+            WorkflowState.state_name.in_(list(DECISIONS)),
+            WorkflowState.previous_state.is_not(None),
+            WorkflowState.previous_state != WorkflowState.state_name,
+        )
+    ).scalar()
+    stats = SupplierTestStat.__table__
+    for test_type, (total, failed) in decision_tests(connection, material.id, previous).items():
+        rate = failed / total
+        _upsert(connection, stats, [stats.c.supplier_key, stats.c.test_type],
+                {"supplier_key": key, "test_type": test_type, "tests": total, "failures": failed,
+                 "failure_rate": rate},
+                {"tests": stats.c.tests + total, "failures": stats.c.failures + failed,
+                 "failure_rate": _ewma_sql(stats.c.failure_rate, rate, alpha)})
+
+
+@event.listens_for(Session, "after_flush")
+def _score_new_states(session, flush_context):
+    """
+    Обновление показателей поставщиков по новым записям истории
+
+    После flush, чтобы испытания, сохраненные вместе с решением, уже были в базе.
+    """
+    events = [
+        (obj, kind) for obj in session.new
+        if isinstance(obj, WorkflowState) and obj.material_id is not None
+        and (kind := classify_state(obj.state_name, obj.previous_state)) is not None
+    ]
+    if not events:
+        return
+    events.sort(key=lambda item: inspect(item[0]).insert_order)
+
+    with session.no_autoflush:
+        materials: Dict[int, Material] = {}
+        for state, _ in events:
+            if state.material_id not in materials:
+                materials[state.material_id] = session.get(Material, state.material_id)
+        connection = session.connection()
+        for state, kind in events:
+            material = materials[state.material_id]
+            if material is not None:
+                record_state(connection, material, state, kind)
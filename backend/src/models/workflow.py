@@ -1,9 +1,15 @@
 """
 Модель состояний workflow
 """
-from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey, Boolean, Integer
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, String, DateTime, Date, Text, JSON, ForeignKey, Boolean, Integer, BigInteger, Index,
+    event, func, inspect, select
+)
+from sqlalchemy.orm import Session, relationship
+
+from src.core.hash_chain import HASHED_FIELDS, state_hash
 
 from src.core.database import Base
 
@@ -30,14 +36,56 @@ class WorkflowState(Base):
     notes = Column(Text)  # Примечания
     extra_data = Column(JSON, default=dict)  # Дополнительные данные (было metadata)
 
+    # Хэш-цепочка: хэш предыдущей записи материала и хэш этой записи
+    # (заполняются при сохранении, см. _seal_new_states)
+    prev_hash = Column(String(64), nullable=True)
+    row_hash = Column(String(64), nullable=True)
+
     # Связи
     material = relationship("Material", back_populates="workflow_states")
     user = relationship("User", back_populates="workflow_changes")
 
+    # История одной партии читается по индексу без сортировки;
+    # на PostgreSQL таблица секционирована по changed_at (см. миграцию)
+    __table_args__ = (
+        Index("ix_workflow_states_material_changed_at", "material_id", "changed_at"),
+        # Сбор записей дня для контрольных точек
+        Index("ix_workflow_states_changed_at", "changed_at"),
+    )
+
     def __repr__(self):
         return f"<WorkflowState {self.state_name} for Material {self.material_id}>"
 
 
+class WorkflowHistoryArchive(Base):
+    """
+    Сегмент истории закрытого материала, вынесенный в холодное хранилище
+
+    Сами состояния лежат gzip-членом в файле архива (path, offset, length);
+    таблица служит индексом, чтобы читать историю одной партии без
+    распаковки всего файла.
+    """
+    __tablename__ = "workflow_history_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False, index=True)
+
+    # Расположение сегмента
+    path = Column(String(500), nullable=False)
+    offset = Column(BigInteger, nullable=False)
+    length = Column(Integer, nullable=False)
+
+    # Сводка по сегменту
+    states_count = Column(Integer, nullable=False)
+    last_row_hash = Column(String(64), nullable=True)  # Продолжение цепочки в горячей таблице
+    first_changed_at = Column(DateTime(timezone=True))
+    last_changed_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<WorkflowHistoryArchive {self.states_count} states of Material {self.material_id}>"
+
+
 class WorkflowTemplate(Base):
     """
     Шаблоны workflow для разных типов материалов
@@ -123,4 +171,76 @@ class WorkflowRule(Base):
     template = relationship("WorkflowTemplate", back_populates="rules")
 
     def __repr__(self):
-        return f"<WorkflowRule {self.name}: {self.from_state} -> {self.to_state}>"
\ No newline at end of file
+        return f"<WorkflowRule {self.name}: {self.from_state} -> {self.to_state}>"
+
+
+class WorkflowCheckpoint(Base):
+    """
+    Дневная контрольная точка истории: корень дерева Меркла
+    над хэшами всех записей за день в порядке id
+    """
+    __tablename__ = "workflow_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, unique=True)
+    root_hash = Column(String(64), nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<WorkflowCheckpoint {self.day}: {self.leaf_count} records>"
+
+
+def _chain_heads(session: Session, material_ids) -> dict:
+    """Хэш последней записи каждого материала (горячей или архивной)"""
+    last_ids = (
+        select(func.max(WorkflowState.id))
+        .where(WorkflowState.material_id.in_(material_ids))
+        .group_by(WorkflowState.material_id)
+    )
+    heads = dict(session.execute(
+        select(WorkflowState.material_id, WorkflowState.row_hash).where(WorkflowState.id.in_(last_ids))
+    ).all())
+
+    missing = [material_id for material_id in material_ids if material_id not in heads]
+    if missing:
+        last_segments = (
+            select(func.max(WorkflowHistoryArchive.id))
+            .where(WorkflowHistoryArchive.material_id.in_(missing))
+            .group_by(WorkflowHistoryArchive.material_id)
+        )
+        heads.update(session.execute(
+            select(WorkflowHistoryArchive.material_id, WorkflowHistoryArchive.last_row_hash)
+            .where(WorkflowHistoryArchive.id.in_(last_segments))
+        ).all())
+    return heads
+
+
+@event.listens_for(Session, "before_flush")
+def _seal_new_states(session, flush_context, instances):
+    """
+    Подпись новых записей истории перед вставкой
+
+    Цепочку материала защищает блокировка его строки: изменения статуса
+    и резервирование обновляют материал (с проверкой версии) в той же
+    транзакции, поэтому две записи не сцепятся с одной и той же предыдущей.
+    """
+    new_states = [obj for obj in session.new if isinstance(obj, WorkflowState) and obj.row_hash is None]
+    if not new_states:
+        return
+    new_states.sort(key=lambda obj: inspect(obj).insert_order)
+
+    with session.no_autoflush:
+        heads = _chain_heads(session, {obj.material_id for obj in new_states if obj.material_id is not None})
+
+    for obj in new_states:
+        if obj.material_id is None:
+            continue
+        # Значения по умолчанию подставляем заранее: они входят в хэш
+        if obj.changed_at is None:
+            obj.changed_at = datetime.utcnow()
+        if obj.extra_data is None:
+            obj.extra_data = {}
+        obj.prev_hash = heads.get(obj.material_id)
+        obj.row_hash = state_hash(obj.prev_hash, {name: getattr(obj, name) for name in HASHED_FIELDS})
+        heads[obj.material_id] = obj.row_hash
@@ -0,0 +1,27 @@
+"""
+Pydantic схемы для штрих-кодов и бирок материалов
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class BarcodeLookup(BaseModel):
+    """Материал, найденный по коду со сканера"""
+    id: int
+    barcode: str
+    batch_number: str
+    material_type: str
+    grade: Optional[str] = None
+    supplier: str
+    status: str
+    location: Optional[str] = None
+    quantity: float
+    unit: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LabelSheetRequest(BaseModel):
+    """Материалы для печати бирок (например, вся поставка)"""
+    material_ids: List[int] = Field(..., min_length=1)
@@ -0,0 +1,60 @@
+"""
+Pydantic схемы для сертификатов
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ExpiringCertificate(BaseModel):
+    """Сертификат с истекающим сроком действия"""
+    id: int
+    certificate_number: str
+    material_id: int
+    certificate_type: Optional[str] = None
+    valid_until: datetime
+    expiry_warned_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CertificateSummary(BaseModel):
+    """Сертификат в результатах поиска"""
+    id: int
+    certificate_number: str
+    material_id: int
+    certificate_type: Optional[str] = None
+    issued_date: Optional[datetime] = None
+    valid_until: Optional[datetime] = None
+    is_valid: Optional[bool] = None
+    certificate_metadata: Optional[Dict[str, Any]] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SignCertificatesRequest(BaseModel):
+    """Пакет сертификатов на подпись"""
+    certificate_ids: List[int] = Field(..., min_length=1)
+
+
+class VerifyCertificatesRequest(BaseModel):
+    """Пакет сертификатов на проверку подписи; без списка проверяются все"""
+    certificate_ids: Optional[List[int]] = None
+
+
+class SignatureResult(BaseModel):
+    """Итог пакетной подписи"""
+    signed: int
+    key_id: str
+
+
+class VerificationResult(BaseModel):
+    """Итог пакетной проверки подписей"""
+    checked: int
+    valid: int
+    invalid: List[int]
+    unsigned: List[int]
+    cached: int
+    seconds: float
+    verifications_per_second: float
@@ -0,0 +1,15 @@
+"""
+Pydantic схемы для кодов материалов
+"""
+from pydantic import BaseModel
+
+
+class GeneratedCode(BaseModel):
+    """Выданный код материала"""
+    code: str
+
+
+class CodeCheck(BaseModel):
+    """Результат проверки занятости кода"""
+    code: str
+    exists: bool
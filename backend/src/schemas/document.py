@@ -0,0 +1,39 @@
+"""
+Pydantic схемы для документов материалов
+"""
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class DocumentResponse(BaseModel):
+    """Документ материала"""
+    id: int
+    material_id: int
+    name: str
+    type: str = Field(validation_alias="content_type")
+    size: int
+    sha256: str
+    uploaded_by: Optional[str] = None
+    uploaded_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UploadStart(BaseModel):
+    """Запрос на загрузку файла по частям"""
+    name: str = Field(..., min_length=1, max_length=255)
+    content_type: Optional[str] = Field(None, max_length=100)
+    size: int = Field(..., gt=0)
+
+
+class UploadStatus(BaseModel):
+    """Состояние загрузки по частям"""
+    id: str
+    material_id: int
+    name: str
+    size: int
+    offset: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -4,7 +4,7 @@ Pydantic схемы для материалов
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from src.models.material import MaterialStatus, MaterialType
 
@@ -32,7 +32,8 @@ class MaterialBase(BaseModel):
 class MaterialCreate(MaterialBase):
     """Схема для создания материала"""
 
-    @validator('material_code')
+    @field_validator('material_code')
+    @classmethod
     def validate_material_code(cls, v):
         """Валидация кода материала"""
         if not v or not v.strip():
@@ -40,7 +41,8 @@ class MaterialCreate(MaterialBase):
         # Можно добавить проверку формата, например: MAT-2024-001
         return v.strip().upper()
 
-    @validator('quantity')
+    @field_validator('quantity')
+    @classmethod
     def validate_quantity(cls, v):
         """Валидация количества"""
         if v <= 0:
@@ -77,12 +79,48 @@ class MaterialResponse(MaterialBase):
     test_results_count: Optional[int] = 0
     certificates_count: Optional[int] = 0
 
-    class Config:
-        orm_mode = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None,
-            UUID: lambda v: str(v)
-        }
+    # datetime и UUID pydantic v2 кодирует в JSON сам
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReservationResponse(BaseModel):
+    """Запись журнала резервирований"""
+    id: int
+    material_id: int
+    quantity: float
+    purpose: str
+    reserved_by: int
+    reserved_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MaterialMovementResponse(BaseModel):
+    """Запись журнала перемещений"""
+    id: int
+    material_id: int
+    from_location: Optional[str]
+    to_location: str
+    moved_by: int
+    moved_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MaterialAtLocation(BaseModel):
+    """Материал в месте хранения"""
+    id: int
+    material_code: Optional[str] = None
+    batch_number: str
+    material_type: str
+    grade: Optional[str] = None
+    supplier: str
+    status: str
+    location: str
+    quantity: float
+    unit: str
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MaterialListResponse(BaseModel):
@@ -92,8 +130,7 @@ class MaterialListResponse(BaseModel):
     skip: int
     limit: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MaterialStatistics(BaseModel):
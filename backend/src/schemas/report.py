@@ -0,0 +1,11 @@
+"""
+Pydantic схемы для отчетов по испытаниям
+"""
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class BulkReportRequest(BaseModel):
+    """Испытания для сводного отчета, в порядке следования в отчете"""
+    test_ids: List[int] = Field(..., min_length=1)
@@ -0,0 +1,33 @@
+"""
+Pydantic схемы для показателей поставщиков
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SupplierTestFailures(BaseModel):
+    """Испытания партий поставщика одного вида"""
+    test_type: str
+    tests: int
+    failures: int
+    failure_rate: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SupplierScorecard(BaseModel):
+    """Показатели качества поставщика"""
+    supplier: str
+    supplier_key: str
+    materials_received: int
+    accepted: int
+    rejected: int
+    acceptance_rate: Optional[float] = None
+    rejection_rate: Optional[float] = None
+    lead_time_hours: Optional[float] = None
+    last_received_at: Optional[datetime] = None
+    last_decision_at: Optional[datetime] = None
+    is_trusted: bool
+    test_failures: List[SupplierTestFailures] = []
@@ -0,0 +1,280 @@
+"""
+Audit Service - проверка целостности истории workflow
+
+Записи истории сцеплены хэшами по материалу (см. src/core/hash_chain.py),
+записи каждого дня сведены в контрольную точку — корень дерева Меркла.
+Полный аудит проверяет цепочки и контрольные точки в пуле процессов.
+"""
+import asyncio
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import bindparam, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.hash_chain import merkle_root, state_hash, verify_chain, verify_chains
+from src.models.workflow import WorkflowCheckpoint, WorkflowHistoryArchive, WorkflowState
+from src.services.history_service import HistoryService, decode_state_values, read_segment
+
+
+_STATE_COLUMNS = WorkflowState.__table__.columns
+
+# Проблема: (material_id, id записи, описание)
+Problem = Tuple[Any, Any, str]
+
+
+@dataclass
+class AuditReport:
+    """Итоги полного аудита"""
+    records: int = 0
+    archived_records: int = 0
+    checkpoints: int = 0
+    seconds: float = 0.0
+    problems: List[Problem] = field(default_factory=list)
+    checkpoint_problems: List[Tuple[date, str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems and not self.checkpoint_problems
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def _verify_segments(
+        segments: List[Tuple[Any, Optional[str], Optional[str], str, int, int]]
+) -> Tuple[List[Problem], list]:
+    """
+    Проверка архивных сегментов одного файла (выполняется в пуле процессов)
+
+    Сегмент: (material_id, хэш перед сегментом, хэш последней записи, файл,
+    смещение, длина). Возвращает проблемы и (день, id, хэш) всех архивных записей для
+    сверки с контрольными точками.
+    """
+    problems: List[Problem] = []
+    leaves = []
+    for material_id, head, expected_last, path, offset, length in segments:
+        rows = [decode_state_values(line) for line in read_segment(path, offset, length)]
+        problems.extend((material_id, row_id, reason) for row_id, reason in verify_chain(rows, head))
+        if rows and rows[-1].get("row_hash") != expected_last:
+            problems.append((material_id, rows[-1].get("id"), "archive segment was truncated"))
+        leaves.extend(
+            (row["changed_at"].date(), row["id"], row["row_hash"])
+            for row in rows if row.get("row_hash") and row.get("changed_at")
+        )
+    return problems, leaves
+
+
+class AuditService:
+    """Контрольные точки и проверка хэш-цепочек истории"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def verify_material(self, material_id: UUID) -> List[Tuple[Any, str]]:
+        """Проверка цепочки одного материала, включая архивную часть"""
+        rows = await HistoryService(self.db).get_archived_values(material_id)
+        result = await self.db.execute(
+            select(*_STATE_COLUMNS)
+            .where(WorkflowState.material_id == material_id)
+            .order_by(WorkflowState.id)
+        )
+        rows.extend(row._asdict() for row in result)
+        return verify_chain(rows)
+
+    async def _day_leaves(self, day: date) -> List[Tuple[int, str]]:
+        start, end = _day_bounds(day)
+        result = await self.db.execute(
+            select(WorkflowState.id, WorkflowState.row_hash)
+            .where(
+                WorkflowState.changed_at >= start,
+                WorkflowState.changed_at < end,
+                WorkflowState.row_hash.isnot(None),
+            )
+            .order_by(WorkflowState.id)
+        )
+        return [tuple(row) for row in result]
+
+    async def create_checkpoints(self, until: Optional[date] = None) -> List[WorkflowCheckpoint]:
+        """
+        Контрольные точки за все еще не закрытые дни до until включительно
+
+        По умолчанию — до вчерашнего дня: текущий день еще пополняется.
+        """
+        until = until or (datetime.utcnow().date() - timedelta(days=1))
+        last_day = await self.db.scalar(select(func.max(WorkflowCheckpoint.day)))
+        if last_day is not None:
+            day = last_day + timedelta(days=1)
+        else:
+            first = await self.db.scalar(
+                select(func.min(WorkflowState.changed_at)).where(WorkflowState.row_hash.isnot(None))
+            )
+            if first is None:
+                return []
+            day = first.date()
+
+        created = []
+        while day <= until:
+            leaves = await self._day_leaves(day)
+            if leaves:
+                checkpoint = WorkflowCheckpoint(
+                    day=day,
+                    root_hash=merkle_root([row_hash for _, row_hash in leaves]),
+                    leaf_count=len(leaves),
+                )
+                self.db.add(checkpoint)
+                created.append(checkpoint)
+            day += timedelta(days=1)
+        await self.db.commit()
+        return created
+
+    async def verify_all(self, workers: Optional[int] = None, chunk_size: int = 50_000) -> AuditReport:
+        """
+        Полный аудит: цепочки всех материалов, архивные сегменты и контрольные точки
+
+        Чтение идет потоком из БД, хэширование — в пуле из workers процессов.
+        """
+        started = time.perf_counter()
+        report = AuditReport()
+        loop = asyncio.get_running_loop()
+        archived_leaves: Dict[date, List[Tuple[int, str]]] = defaultdict(list)
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            # Архивные сегменты: по файлу на задачу, файл читается один раз
+            segments = (await self.db.execute(
+                select(WorkflowHistoryArchive).order_by(WorkflowHistoryArchive.id)
+            )).scalars().all()
+            by_path: Dict[str, list] = defaultdict(list)
+            heads: Dict[Any, str] = {}
+            for segment in segments:
+                # Сегменты материала продолжают друг друга в порядке id
+                by_path[segment.path].append((
+                    segment.material_id, heads.get(segment.material_id), segment.last_row_hash,
+                    segment.path, segment.offset, segment.length,
+                ))
+                heads[segment.material_id] = segment.last_row_hash
+            for problems, leaves in await asyncio.gather(*(
+                loop.run_in_executor(pool, _verify_segments, items) for items in by_path.values()
+            )):
+                report.problems.extend(problems)
+                report.archived_records += len(leaves)
+                for day, row_id, row_hash in leaves:
+                    archived_leaves[day].append((row_id, row_hash))
+
+            # Горячие записи: пакеты режутся по границе материала
+            pending = []
+            chunk: List[Dict[str, Any]] = []
+            stream = await self.db.stream(
+                select(*_STATE_COLUMNS)
+                .order_by(WorkflowState.material_id, WorkflowState.id)
+                .execution_options(yield_per=chunk_size)
+            )
+
+            def submit(rows):
+                # В процесс передаем только головы архивов материалов пакета
+                chunk_heads = {row["material_id"]: heads[row["material_id"]]
+                               for row in rows if row["material_id"] in heads}
+                pending.append(loop.run_in_executor(pool, verify_chains, rows, chunk_heads))
+
+            async for partition in stream.partitions(chunk_size):
+                for row in partition:
+                    values = row._asdict()
+                    if len(chunk) >= chunk_size and values["material_id"] != chunk[-1]["material_id"]:
+                        submit(chunk)
+                        chunk = []
+                    chunk.append(values)
+                report.records += len(partition)
+            if chunk:
+                submit(chunk)
+            for problems in await asyncio.gather(*pending):
+                report.problems.extend(problems)
+
+            # Контрольные точки: листья дня из горячей таблицы и архива
+            checkpoints = (await self.db.execute(
+                select(WorkflowCheckpoint).order_by(WorkflowCheckpoint.day)
+            )).scalars().all()
+            roots = []
+            for checkpoint in checkpoints:
+                leaves = await self._day_leaves(checkpoint.day) + archived_leaves.get(checkpoint.day, [])
+                leaves.sort()
+                roots.append((checkpoint, len(leaves), loop.run_in_executor(
+                    pool, merkle_root, [row_hash for _, row_hash in leaves]
+                )))
+            for checkpoint, leaf_count, root in roots:
+                report.checkpoints += 1
+                if leaf_count != checkpoint.leaf_count:
+                    report.checkpoint_problems.append(
+                        (checkpoint.day, f"{leaf_count} records, checkpoint has {checkpoint.leaf_count}")
+                    )
+                elif await root != checkpoint.root_hash:
+                    report.checkpoint_problems.append((checkpoint.day, "Merkle root mismatch"))
+
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"History audit: {report.records} records, {report.archived_records} archived, "
+            f"{report.checkpoints} checkpoints, {len(report.problems) + len(report.checkpoint_problems)} problems "
+            f"in {report.seconds:.1f}s"
+        )
+        return report
+
+    async def seal_legacy(self, batch_size: int = 10_000) -> int:
+        """
+        Подпись истории, записанной до введения цепочек (или массовой загрузкой)
+
+        Обрабатываются только материалы, у которых нет ни одной подписанной
+        записи и нет архива: иначе новая подпись разорвала бы существующую цепочку.
+        Возвращает число подписанных записей.
+        """
+        sealed_state = WorkflowState.__table__.alias("sealed_state")
+        sealed = 0
+        while True:
+            material_ids = (await self.db.execute(
+                select(WorkflowState.material_id)
+                .where(
+                    WorkflowState.row_hash.is_(None),
+                    ~exists().where(
+                        sealed_state.c.material_id == WorkflowState.material_id,
+                        sealed_state.c.row_hash.isnot(None),
+                    ),
+                    ~exists().where(WorkflowHistoryArchive.material_id == WorkflowState.material_id),
+                )
+                .distinct()
+                .order_by(WorkflowState.material_id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not material_ids:
+                break
+
+            rows = (await self.db.execute(
+                select(*_STATE_COLUMNS)
+                .where(WorkflowState.material_id.in_(material_ids))
+                .order_by(WorkflowState.material_id, WorkflowState.id)
+            )).all()
+            updates = []
+            prev_hash, material_id = None, None
+            for row in rows:
+                if row.material_id != material_id:
+                    prev_hash, material_id = None, row.material_id
+                row_hash = state_hash(prev_hash, row._asdict())
+                updates.append({"state_id": row.id, "prev": prev_hash, "hash": row_hash})
+                prev_hash = row_hash
+
+            table = WorkflowState.__table__
+            await self.db.execute(
+                update(table)
+                .where(table.c.id == bindparam("state_id"))
+                .values(prev_hash=bindparam("prev"), row_hash=bindparam("hash")),
+                updates,
+            )
+            await self.db.commit()
+            sealed += len(updates)
+        return sealed
@@ -0,0 +1,215 @@
+"""
+Barcode Service - бирки материалов
+
+Картинки кодов детерминированы кодом, поэтому кешируются без инвалидации:
+в памяти (LRU с ограничением по байтам) и на диске в BARCODE_CACHE_PATH.
+Лист бирок для печати всей поставки собирается одним PDF (A4, 3 x 8),
+QR рисуется векторами из той же матрицы модулей.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from loguru import logger
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.barcodes import (
+    BARCODE_PREFIX, barcode_modules, dark_runs, is_material_barcode, material_barcode, render_barcode,
+)
+from src.core.config import settings
+from src.core.database import replica_read
+from src.core.exceptions import NotFoundException, ValidationException
+from src.models.material import Material
+
+# Ключ кеша: (вид кода, значение, формат, масштаб)
+CacheKey = Tuple[str, str, str, int]
+
+
+class BarcodeImageCache:
+    """Двухуровневый кеш картинок кодов: LRU в памяти поверх файлов на диске"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = Path(directory or settings.BARCODE_CACHE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.BARCODE_MEMORY_CACHE_BYTES
+        self._items: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: CacheKey) -> Path:
+        kind, value, fmt, scale = key
+        # Явно заданные коды поставщиков могут содержать что угодно
+        name = value if re.fullmatch(r"[A-Za-z0-9_-]+", value) else hashlib.sha1(value.encode()).hexdigest()
+        return self.directory / kind / f"{name}@{scale}.{fmt}"
+
+    def _remember(self, key: CacheKey, content: bytes) -> None:
+        self._items[key] = content
+        self._size += len(content)
+        while self._size > self.max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted)
+
+    @staticmethod
+    def _read_or_render(path: Path, key: CacheKey) -> bytes:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+        kind, value, fmt, scale = key
+        content = render_barcode(value, kind, fmt, scale)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        return content
+
+    async def get(self, kind: str, value: str, fmt: str, scale: int = 8) -> bytes:
+        key = (kind, value, fmt, scale)
+        content = self._items.get(key)
+        if content is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return content
+        self.misses += 1
+        content = await asyncio.to_thread(self._read_or_render, self._path(key), key)
+        self._remember(key, content)
+        return content
+
+
+_image_cache: Optional[BarcodeImageCache] = None
+
+
+def get_image_cache() -> BarcodeImageCache:
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = BarcodeImageCache()
+    return _image_cache
+
+
+@lru_cache(maxsize=1)
+def pdf_font() -> str:
+    """Шрифт с кириллицей для PDF (бирки, протоколы); регистрируется один раз на процесс"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if not os.path.exists(settings.LABEL_FONT_PATH):
+        logger.warning(f"Label font {settings.LABEL_FONT_PATH} not found, Cyrillic text will not render")
+        return "Helvetica"
+    pdfmetrics.registerFont(TTFont("LabelSans", settings.LABEL_FONT_PATH))
+    return "LabelSans"
+
+
+def render_label_sheet(materials: Sequence[dict]) -> bytes:
+    """
+    PDF листов бирок A4 по 24 штуки (3 x 8, 70 x 37 мм)
+
+    materials — словари с barcode, batch_number, grade, material_type, supplier.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    columns, rows = 3, 8
+    label_width, label_height = A4[0] / columns, A4[1] / rows
+    qr_size, padding = 30 * mm, 3 * mm
+    font = pdf_font()
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    for i, material in enumerate(materials):
+        if i and i % (columns * rows) == 0:
+            pdf.showPage()
+        slot = i % (columns * rows)
+        x = (slot % columns) * label_width
+        y = A4[1] - (slot // columns + 1) * label_height
+
+        modules = barcode_modules(material["barcode"], "qr")
+        module = qr_size / len(modules)
+        qr_x, qr_top = x + padding, y + (label_height + qr_size) / 2
+        path = pdf.beginPath()
+        for r, row in enumerate(modules):
+            for start, length in dark_runs(row):
+                path.rect(qr_x + start * module, qr_top - (r + 1) * module, length * module, module)
+        pdf.drawPath(path, stroke=0, fill=1)
+
+        text_x = qr_x + qr_size + padding
+        max_width = x + label_width - text_x - padding
+        lines = [
+            (material["barcode"], 9),
+            (material["batch_number"], 8),
+            (" ".join(filter(None, [material.get("material_type"), material.get("grade")])), 7),
+            (material.get("supplier") or "", 6),
+        ]
+        line_y = y + label_height - 9 * mm
+        for text, size in lines:
+            while text and pdf.stringWidth(text, font, size) > max_width:
+                text = text[:-1]
+            pdf.setFont(font, size)
+            pdf.drawString(text_x, line_y, text)
+            line_y -= size + 4
+    pdf.save()
+    return buffer.getvalue()
+
+
+class BarcodeService:
+    """Поиск материала по коду и выдача картинок и бирок"""
+
+    def __init__(self, db: AsyncSession, cache: Optional[BarcodeImageCache] = None):
+        self.db = db
+        self.cache = cache or get_image_cache()
+
+    @replica_read
+    async def find_by_barcode(self, barcode: str) -> Material:
+        """Материал по коду со сканера (индекс materials.barcode)"""
+        barcode = barcode.strip().upper()
+        if barcode.startswith(BARCODE_PREFIX) and not is_material_barcode(barcode):
+            raise ValidationException(f"Invalid barcode check digit: {barcode}")
+        condition = Material.barcode == barcode
+        if is_material_barcode(barcode):
+            # Строки из массовой загрузки (COPY, Core insert) могут быть без кода:
+            # для них код вычисляется из номера материала
+            material_id = int(barcode[len(BARCODE_PREFIX):-1])
+            condition = or_(condition, and_(Material.barcode.is_(None), Material.id == material_id))
+        material = await self.db.scalar(select(Material).where(condition))
+        if material is None:
+            raise NotFoundException(f"Material with barcode {barcode} not found")
+        return material
+
+    async def get_barcode(self, material_id: int) -> str:
+        row = (await self.db.execute(select(Material.barcode).where(Material.id == material_id))).first()
+        if row is None:
+            raise NotFoundException(f"Material {material_id} not found")
+        return row.barcode or material_barcode(material_id)
+
+    async def get_image(self, material_id: int, kind: str, fmt: str, scale: int = 8) -> Tuple[str, bytes]:
+        """Код материала и его картинка из кеша"""
+        barcode = await self.get_barcode(material_id)
+        return barcode, await self.cache.get(kind, barcode, fmt, scale)
+
+    async def label_sheet(self, material_ids: List[int]) -> bytes:
+        """PDF бирок для материалов в порядке material_ids"""
+        if not material_ids:
+            raise ValidationException("No materials selected")
+        if len(material_ids) > settings.MAX_LABELS_PER_SHEET_REQUEST:
+            raise ValidationException(
+                f"At most {settings.MAX_LABELS_PER_SHEET_REQUEST} labels can be printed at once"
+            )
+        result = await self.db.execute(
+            select(
+                Material.id, Material.barcode, Material.batch_number,
+                Material.material_type, Material.grade, Material.supplier,
+            ).where(Material.id.in_(set(material_ids)))
+        )
+        found = {row.id: {**row._asdict(), "barcode": row.barcode or material_barcode(row.id)} for row in result}
+        missing = [material_id for material_id in material_ids if material_id not in found]
+        if missing:
+            raise NotFoundException(f"Materials not found: {', '.join(map(str, missing))}")
+        return await asyncio.to_thread(render_label_sheet, [found[material_id] for material_id in material_ids])
@@ -0,0 +1,246 @@
+"""
+Certificate Service - работа с сертификатами качества
+
+Сроки действия контролирует фоновый CertificateExpirySweeper: он спит до
+ближайшего срока (предупреждения за CERTIFICATE_EXPIRY_WARNING_DAYS или
+истечения), который находит запрос MIN по индексу valid_until, и отмечает
+наступившие сроки пачками. Отметки expiry_warned_at и expired_at делают
+проход инкрементальным: каждый сертификат обрабатывается один раз.
+Отметка ставится атомарным UPDATE ... RETURNING, поэтому свипер может
+работать в каждом воркере: уведомление о сроке уходит из одного процесса.
+"""
+import asyncio
+import inspect
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+
+from loguru import logger
+from sqlalchemy import and_, cast, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import replica_read
+from src.core.exceptions import NotFoundException, ValidationException
+from src.core.metrics import certificate_expiry_events
+from src.models.certificate import Certificate, CertificateSearchTerm
+
+# Уведомление о событии срока: ("expiring" | "expired", сертификаты)
+ExpiryCallback = Callable[[str, List[Certificate]], Union[Awaitable[None], None]]
+
+# Файлы сертификата: вид -> колонка с путем
+CERTIFICATE_FILES = {
+    "pdf": "pdf_path",
+    "original": "original_certificate_path",
+}
+
+
+class CertificateService:
+    """Сервис для работы с сертификатами"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_certificate(self, certificate_id: int) -> Certificate:
+        certificate = await self.db.scalar(select(Certificate).where(Certificate.id == certificate_id))
+        if certificate is None:
+            raise NotFoundException(f"Certificate {certificate_id} not found")
+        return certificate
+
+    async def get_file(self, certificate_id: int, kind: str) -> Tuple[Certificate, str]:
+        """Сертификат и путь к его файлу ("pdf" — выпущенный, "original" — сертификат поставщика)"""
+        certificate = await self.get_certificate(certificate_id)
+        path = getattr(certificate, CERTIFICATE_FILES[kind])
+        if not path or not os.path.isfile(path):
+            raise NotFoundException(f"Certificate {certificate_id} has no {kind} file")
+        return certificate, path
+
+    # --- Поиск по метаданным ---------------------------------------------
+
+    def _metadata_condition(self, field: str, value: str):
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+
+            # GIN (jsonb_path_ops) по certificate_metadata::jsonb; поле — массив или строка
+            document = cast(Certificate.certificate_metadata, JSONB)
+            return or_(document.contains({field: [value]}), document.contains({field: value}))
+        return Certificate.id.in_(
+            select(CertificateSearchTerm.certificate_id)
+            .where(CertificateSearchTerm.field == field, CertificateSearchTerm.term == value)
+        )
+
+    @replica_read
+    async def search(
+            self,
+            keyword: Optional[str] = None,
+            standard: Optional[str] = None,
+            customer: Optional[str] = None,
+            project: Optional[str] = None,
+            limit: int = 100
+    ) -> List[Certificate]:
+        """
+        Сертификаты по точному значению ключевого слова, стандарта, заказчика и проекта
+
+        Условия объединяются через И; новые сертификаты первыми.
+        """
+        filters = {"keywords": keyword, "standards": standard, "customer": customer, "project": project}
+        conditions = [self._metadata_condition(field, value.strip()) for field, value in filters.items() if value]
+        if not conditions:
+            raise ValidationException("At least one of keyword, standard, customer or project is required")
+        result = await self.db.execute(
+            select(Certificate)
+            .where(*conditions)
+            .order_by(Certificate.issued_date.desc(), Certificate.id.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    # --- Сроки действия ---------------------------------------------------
+
+    @replica_read
+    async def get_expiring(self, days: int, now: Optional[datetime] = None, limit: int = 500) -> List[Certificate]:
+        """Действующие сертификаты, срок которых истекает в ближайшие days дней"""
+        now = now or datetime.utcnow()
+        result = await self.db.execute(
+            select(Certificate)
+            .where(
+                Certificate.is_valid.is_(True),
+                Certificate.valid_until > now,
+                Certificate.valid_until <= now + timedelta(days=days),
+            )
+            .order_by(Certificate.valid_until)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def _claim(self, condition, stamp, now: datetime, limit: int) -> List[Certificate]:
+        """
+        Атомарная отметка пачки сертификатов: UPDATE ... RETURNING
+
+        Условие отметки повторяется во внешнем WHERE, поэтому при нескольких
+        процессах (воркерах) каждый сертификат достается ровно одному из них.
+        """
+        batch = (
+            select(Certificate.id)
+            .where(Certificate.is_valid.is_(True), stamp.is_(None), condition)
+            .order_by(Certificate.valid_until)
+            .limit(limit)
+        )
+        result = await self.db.scalars(
+            update(Certificate)
+            .where(Certificate.id.in_(batch.scalar_subquery()), stamp.is_(None))
+            .values({stamp: now})
+            .returning(Certificate)
+            .execution_options(synchronize_session=False)
+        )
+        certificates = sorted(result.all(), key=lambda certificate: (certificate.valid_until, certificate.id))
+        await self.db.commit()
+        return certificates
+
+    async def flag_expiring(self, now: datetime, warning_days: int, limit: int) -> List[Certificate]:
+        """Отметка сертификатов, срок которых наступает в пределах warning_days"""
+        return await self._claim(
+            and_(Certificate.valid_until > now, Certificate.valid_until <= now + timedelta(days=warning_days)),
+            Certificate.expiry_warned_at, now, limit,
+        )
+
+    async def flag_expired(self, now: datetime, limit: int) -> List[Certificate]:
+        """Отметка сертификатов с истекшим сроком"""
+        return await self._claim(Certificate.valid_until <= now, Certificate.expired_at, now, limit)
+
+    async def next_expiry_deadline(self, now: datetime, warning_days: int) -> Optional[datetime]:
+        """Ближайший момент, когда у какого-либо сертификата наступит срок"""
+        next_warning = await self.db.scalar(
+            select(func.min(Certificate.valid_until)).where(
+                Certificate.is_valid.is_(True),
+                Certificate.expiry_warned_at.is_(None),
+                Certificate.valid_until > now,
+            )
+        )
+        next_expiry = await self.db.scalar(
+            select(func.min(Certificate.valid_until)).where(
+                Certificate.is_valid.is_(True),
+                Certificate.expired_at.is_(None),
+                Certificate.valid_until > now,
+            )
+        )
+        deadlines = []
+        if next_warning is not None:
+            deadlines.append(_naive_utc(next_warning) - timedelta(days=warning_days))
+        if next_expiry is not None:
+            deadlines.append(_naive_utc(next_expiry))
+        return min(deadlines) if deadlines else None
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # SQLite возвращает наивное время, PostgreSQL — с часовым поясом
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class CertificateExpirySweeper:
+    """Фоновая отметка истекающих и истекших сертификатов (задача на время жизни приложения)"""
+
+    def __init__(
+            self,
+            session_factory: Optional[Callable[[], AsyncSession]] = None,
+            warning_days: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            max_sleep: Optional[float] = None,
+            notify: Optional[ExpiryCallback] = None
+    ):
+        if session_factory is None:
+            from src.core.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.warning_days = warning_days if warning_days is not None else settings.CERTIFICATE_EXPIRY_WARNING_DAYS
+        self.batch_size = batch_size or settings.CERTIFICATE_SWEEP_BATCH_SIZE
+        self.max_sleep = max_sleep or settings.CERTIFICATE_SWEEP_MAX_SLEEP_SECONDS
+        self.notify = notify
+
+    async def _notify(self, event: str, certificates: List[Certificate]) -> None:
+        certificate_expiry_events.inc(len(certificates), event=event)
+        for certificate in certificates:
+            logger.warning(
+                f"Certificate {certificate.certificate_number} (material {certificate.material_id}) "
+                f"{event}: valid until {certificate.valid_until}"
+            )
+        if self.notify is not None:
+            result = self.notify(event, certificates)
+            if inspect.isawaitable(result):
+                await result
+
+    async def sweep(self, now: Optional[datetime] = None) -> Tuple[int, int, Optional[datetime]]:
+        """
+        Один проход: отметка наступивших сроков
+
+        Возвращает число предупреждений, число истечений и следующий срок.
+        """
+        now = now or datetime.utcnow()
+        counts = {"expiring": 0, "expired": 0}
+        async with self.session_factory() as session:
+            service = CertificateService(session)
+            flaggers = {
+                "expiring": lambda: service.flag_expiring(now, self.warning_days, self.batch_size),
+                "expired": lambda: service.flag_expired(now, self.batch_size),
+            }
+            for event, flag in flaggers.items():
+                while True:
+                    certificates = await flag()
+                    if certificates:
+                        counts[event] += len(certificates)
+                        await self._notify(event, certificates)
+                    if len(certificates) < self.batch_size:
+                        break
+            deadline = await service.next_expiry_deadline(now, self.warning_days)
+        return counts["expiring"], counts["expired"], deadline
+
+    async def run(self) -> None:
+        while True:
+            delay = self.max_sleep
+            try:
+                _, _, deadline = await self.sweep()
+                if deadline is not None:
+                    delay = min(self.max_sleep, max(1.0, (deadline - datetime.utcnow()).total_seconds()))
+            except Exception as e:
+                logger.error(f"Certificate expiry sweep failed: {e}")
+            await asyncio.sleep(delay)
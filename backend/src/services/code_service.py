@@ -0,0 +1,202 @@
+"""
+Code Service - выдача и проверка кодов материалов
+
+Коды вида MAT-2026-0001 выдаются по схеме hi-lo: воркер одним UPDATE
+забирает в code_sequences блок из MATERIAL_CODE_BLOCK_SIZE номеров и
+раздает их из памяти. Блоки разных воркеров не пересекаются, поэтому
+выдача кода не требует обращения к базе, а номера, не попавшие в
+материалы (воркер перезапущен), просто пропускаются.
+
+Множество известных кодов нужно выдаче, чтобы пропускать номера, введенные
+вручную. Оно обновляется только после фиксации транзакции, создавшей,
+изменившей или удалившей материал (откаченная вставка не занимает код), и
+только в своем процессе. Поэтому проверка занятости кода всегда отвечает по
+уникальному индексу базы и по ответу поправляет множество: другой воркер мог
+создать, переименовать или удалить материал.
+"""
+import asyncio
+import re
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.core.exceptions import ValidationException
+from src.models.code_sequence import CodeSequence
+from src.models.material import Material
+
+_PREFIX_RE = re.compile(r"^[A-Z0-9]{1,20}$")
+
+
+def format_material_code(prefix: str, year: int, value: int) -> str:
+    return f"{prefix}-{year}-{value:04d}"
+
+
+def normalize_prefix(prefix: str) -> str:
+    prefix = (prefix or "").strip().upper()
+    if not _PREFIX_RE.match(prefix):
+        raise ValidationException("Code prefix must be 1-20 latin letters or digits")
+    return prefix
+
+
+class MaterialCodeIndex:
+    """Множество занятых кодов материалов (загружается при первом обращении)"""
+
+    def __init__(self):
+        self._codes: Set[str] = set()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузка кодов из базы (один раз на процесс)"""
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            result = await db.execute(select(Material.material_code).where(Material.material_code.is_not(None)))
+            self._codes.update(result.scalars())
+            self._loaded = True
+
+    def add(self, code: str) -> None:
+        self._codes.add(code)
+
+    def discard(self, code: str) -> None:
+        self._codes.discard(code)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._codes
+
+    async def exists(self, db: AsyncSession, code: str) -> bool:
+        """Занят ли код (по уникальному индексу, а не по множеству процесса)"""
+        await self.load(db)
+        found = await db.scalar(select(Material.id).where(Material.material_code == code)) is not None
+        if found:
+            self._codes.add(code)
+        else:
+            self._codes.discard(code)
+        return found
+
+
+class CodeAllocator:
+    """Выдача кодов материалов блоками на префикс и год"""
+
+    def __init__(
+            self,
+            session_factory: Optional[Callable[[], AsyncSession]] = None,
+            block_size: Optional[int] = None,
+            index: Optional[MaterialCodeIndex] = None
+    ):
+        if session_factory is None:
+            from src.core.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.block_size = block_size or settings.MATERIAL_CODE_BLOCK_SIZE
+        self.index = index
+        # (префикс, год) -> [следующий номер, граница блока)
+        self._blocks: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self.reservations = 0
+
+    async def _reserve_block(self, prefix: str, year: int) -> Tuple[int, int]:
+        """Резервирование следующего блока номеров в отдельной транзакции"""
+        async with self.session_factory() as session:
+            while True:
+                # Сдвиг счетчика и чтение нового значения одним атомарным запросом
+                high = await session.scalar(
+                    update(CodeSequence)
+                    .where(CodeSequence.prefix == prefix, CodeSequence.year == year)
+                    .values(next_value=CodeSequence.next_value + self.block_size)
+                    .returning(CodeSequence.next_value)
+                    .execution_options(synchronize_session=False)
+                )
+                if high is not None:
+                    await session.commit()
+                    break
+                try:
+                    await session.execute(
+                        insert(CodeSequence).values(prefix=prefix, year=year, next_value=1 + self.block_size)
+                    )
+                    await session.commit()
+                    high = 1 + self.block_size
+                    break
+                except IntegrityError:
+                    # Счетчик одновременно создал другой воркер
+                    await session.rollback()
+        self.reservations += 1
+        return high - self.block_size, high
+
+    async def next_code(self, prefix: str = "MAT", year: Optional[int] = None) -> str:
+        """Следующий свободный код; коды, введенные вручную, пропускаются"""
+        prefix = normalize_prefix(prefix)
+        year = year or datetime.utcnow().year
+        key = (prefix, year)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            while True:
+                value, limit = self._blocks.get(key, (0, 0))
+                if value >= limit:
+                    value, limit = await self._reserve_block(prefix, year)
+                self._blocks[key] = (value + 1, limit)
+                code = format_material_code(prefix, year, value)
+                if self.index is None or code not in self.index:
+                    return code
+
+
+_code_index: Optional[MaterialCodeIndex] = None
+_code_allocator: Optional[CodeAllocator] = None
+
+
+def get_code_index() -> MaterialCodeIndex:
+    global _code_index
+    if _code_index is None:
+        _code_index = MaterialCodeIndex()
+    return _code_index
+
+
+def get_code_allocator() -> CodeAllocator:
+    global _code_allocator
+    if _code_allocator is None:
+        _code_allocator = CodeAllocator(index=get_code_index())
+    return _code_allocator
+
+
+# Изменения кодов копятся в сессии и применяются к индексу после COMMIT
+_PENDING_CODES = "material_code_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_code_changes(session, flush_context):
+    changes = session.info.setdefault(_PENDING_CODES, [])
+    for obj in session.new:
+        if isinstance(obj, Material) and obj.material_code:
+            changes.append((obj.material_code, True))
+    for obj in session.deleted:
+        if isinstance(obj, Material) and obj.material_code:
+            changes.append((obj.material_code, False))
+    for obj in session.dirty:
+        if isinstance(obj, Material):
+            history = inspect(obj).attrs.material_code.history
+            changes.extend((code, False) for code in history.deleted if code)
+            changes.extend((code, True) for code in history.added if code)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_code_changes(session):
+    changes = session.info.pop(_PENDING_CODES, None)
+    if changes:
+        index = get_code_index()
+        for code, taken in changes:
+            if taken:
+                index.add(code)
+            else:
+                index.discard(code)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_code_changes(session):
+    session.info.pop(_PENDING_CODES, None)
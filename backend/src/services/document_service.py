@@ -0,0 +1,447 @@
+"""
+Document Service - хранилище документов материалов
+
+Содержимое хранится по SHA-256: <UPLOAD_PATH>/blobs/ab/cd/<sha256>.
+Загрузка пишется на диск блоками через aiofiles и хэшируется на лету;
+одинаковые файлы (сертификат завода на десятки партий) лежат на диске один
+раз, документы ссылаются на них. Большие файлы (рентгенограммы) загружаются
+по частям с возобновлением с последнего принятого байта.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import aiofiles
+from loguru import logger
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import replica_read
+from src.core.exceptions import (
+    BusinessLogicException,
+    ConflictException,
+    NotFoundException,
+    ValidationException,
+)
+from src.models.document import MaterialDocument, StoredBlob, UploadSession
+from src.models.material import Material
+from src.services.preview_service import PREVIEW_VARIANTS, preview_path
+
+# Блоки содержимого загрузки
+ChunkSource = AsyncIterator[bytes]
+
+# Хэш уже принятой части загрузки: upload_id -> (offset, sha256). Без него
+# (другой воркер, перезапуск) хэш считается по файлу при завершении.
+_upload_hashers: Dict[str, Tuple[int, Any]] = {}
+
+
+async def iter_upload_file(file, chunk_size: Optional[int] = None) -> ChunkSource:
+    """Чтение UploadFile блоками"""
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def blob_path(root: Path, sha256: str) -> Path:
+    """Путь содержимого в хранилище (два уровня каталогов по префиксу хэша)"""
+    return root / "blobs" / sha256[:2] / sha256[2:4] / sha256
+
+
+def _hash_file(path: Path, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _rename_if_exists(source: Path, target: Path) -> None:
+    try:
+        os.replace(source, target)
+    except FileNotFoundError:
+        pass
+
+
+def _remove(path: Path) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DocumentService:
+    """Загрузка, дедупликация и удаление документов материалов"""
+
+    def __init__(self, db: AsyncSession, root: Optional[str] = None):
+        self.db = db
+        self.root = Path(root or settings.UPLOAD_PATH)
+
+    # --- Проверки ---------------------------------------------------------
+
+    @staticmethod
+    def _check_name(name: str) -> str:
+        name = os.path.basename(name or "").strip()
+        if not name:
+            raise ValidationException("File name is required")
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in settings.ALLOWED_EXTENSIONS:
+            raise ValidationException(f"File type {extension or '(none)'} is not allowed")
+        return name
+
+    @staticmethod
+    def _content_type(name: str, content_type: Optional[str]) -> str:
+        if content_type and content_type != "application/octet-stream":
+            return content_type
+        return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    async def _require_material(self, material_id: int) -> None:
+        exists = await self.db.scalar(select(Material.id).where(Material.id == material_id))
+        if exists is None:
+            raise NotFoundException(f"Material {material_id} not found")
+
+    # --- Запись на диск ---------------------------------------------------
+
+    def _incoming_path(self, name: str) -> Path:
+        path = self.root / "incoming" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    async def _write(self, path: Path, chunks: ChunkSource, offset: int, limit: int, digest) -> int:
+        """
+        Запись блоков с позиции offset с хэшированием на лету
+
+        Возвращает новый размер файла; при превышении limit файл обрезается
+        обратно до offset.
+        """
+        written = 0
+        async with aiofiles.open(path, "r+b" if offset else "wb") as f:
+            await f.seek(offset)
+            try:
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if offset + written > limit:
+                        raise ValidationException(f"File exceeds the maximum size of {limit} bytes")
+                    if digest is not None:
+                        digest.update(chunk)
+                    await f.write(chunk)
+            except BaseException:
+                await f.truncate(offset)
+                raise
+            # Хвост от прерванной ранее попытки не нужен
+            await f.truncate(offset + written)
+        return offset + written
+
+    async def _store_blob(self, path: Path, sha256: str, size: int) -> StoredBlob:
+        """
+        Перенос принятого файла в хранилище или ссылка на уже имеющийся
+
+        Ссылка на имеющееся содержимое — атомарный UPDATE ref_count + 1. Для
+        нового содержимого сначала вставляется строка, и только потом файл
+        кладется на место: уникальный индекс по sha256 упорядочивает загрузку
+        с параллельным удалением того же содержимого (см. delete_document).
+        """
+        target = blob_path(self.root, sha256)
+        while True:
+            referenced = await self.db.execute(
+                update(StoredBlob)
+                .where(StoredBlob.sha256 == sha256)
+                .values(ref_count=StoredBlob.ref_count + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if referenced.rowcount:
+                await asyncio.to_thread(_remove, path)
+                break
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(StoredBlob(sha256=sha256, size=size, path=str(target), ref_count=1))
+            except IntegrityError:
+                # Тот же файл одновременно загрузил другой запрос — ссылаемся на его строку
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(os.replace, path, target)
+            break
+
+        return await self.db.scalar(
+            select(StoredBlob).where(StoredBlob.sha256 == sha256).execution_options(populate_existing=True)
+        )
+
+    async def _create_document(
+            self,
+            material_id: int,
+            blob: StoredBlob,
+            name: str,
+            content_type: str,
+            uploaded_by: Optional[str]
+    ) -> MaterialDocument:
+        document = MaterialDocument(
+            material_id=material_id,
+            blob=blob,
+            name=name,
+            content_type=content_type,
+            size=blob.size,
+            uploaded_by=uploaded_by,
+        )
+        self.db.add(document)
+        await self.db.flush()
+        await self.db.refresh(document, ["uploaded_at"])
+        return document
+
+    # --- Загрузка одним запросом ------------------------------------------
+
+    async def upload_document(
+            self,
+            material_id: int,
+            name: str,
+            content_type: Optional[str],
+            chunks: ChunkSource,
+            uploaded_by: Optional[str] = None
+    ) -> MaterialDocument:
+        """Потоковая загрузка документа не больше MAX_UPLOAD_SIZE"""
+        name = self._check_name(name)
+        await self._require_material(material_id)
+
+        path = self._incoming_path(f"{uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        try:
+            size = await self._write(path, chunks, 0, settings.MAX_UPLOAD_SIZE, digest)
+            blob = await self._store_blob(path, digest.hexdigest(), size)
+        except BaseException:
+            await asyncio.to_thread(_remove, path)
+            raise
+
+        document = await self._create_document(
+            material_id, blob, name, self._content_type(name, content_type), uploaded_by
+        )
+        await self.db.commit()
+        logger.info(f"Document '{name}' attached to material {material_id} (blob {blob.sha256[:12]}, {blob.ref_count} refs)")
+        return document
+
+    # --- Чтение и удаление ------------------------------------------------
+
+    @replica_read
+    async def list_documents(self, material_id: int) -> List[MaterialDocument]:
+        result = await self.db.execute(
+            select(MaterialDocument)
+            .where(MaterialDocument.material_id == material_id)
+            .order_by(MaterialDocument.uploaded_at, MaterialDocument.id)
+        )
+        return result.scalars().all()
+
+    async def get_document(self, document_id: int, material_id: Optional[int] = None) -> MaterialDocument:
+        document = await self.db.scalar(select(MaterialDocument).where(MaterialDocument.id == document_id))
+        if document is None or (material_id is not None and document.material_id != material_id):
+            raise NotFoundException(f"Document {document_id} not found")
+        return document
+
+    async def delete_document(self, document_id: int) -> None:
+        """
+        Удаление документа; файл и его превью удаляются вместе с последней ссылкой
+
+        Файл убирается до фиксации, пока удаленная строка blob заблокирована
+        транзакцией: загрузка того же содержимого ждет фиксации и кладет файл
+        заново, а не теряет его. До фиксации файл только переименовывается и
+        возвращается на место, если фиксация не удалась.
+        """
+        document = await self.get_document(document_id)
+        blob_id = document.blob_id
+        path = Path(await self.db.scalar(select(StoredBlob.path).where(StoredBlob.id == blob_id)))
+        await self.db.delete(document)
+        await self.db.execute(
+            update(StoredBlob)
+            .where(StoredBlob.id == blob_id)
+            .values(ref_count=StoredBlob.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        # fetch: удаленная строка уходит и из сессии (SQLite переиспользует id)
+        orphaned = await self.db.execute(
+            delete(StoredBlob)
+            .where(StoredBlob.id == blob_id, StoredBlob.ref_count <= 0)
+            .execution_options(synchronize_session="fetch")
+        )
+        retired = None
+        if orphaned.rowcount:
+            retired = path.with_name(f"{path.name}.{uuid4().hex}.deleted")
+            await asyncio.to_thread(_rename_if_exists, path, retired)
+            # Превью строятся заново по запросу, их можно удалить сразу
+            for variant in PREVIEW_VARIANTS:
+                await asyncio.to_thread(_remove, preview_path(str(path), variant))
+        try:
+            await self.db.commit()
+        except BaseException:
+            if retired is not None:
+                await asyncio.to_thread(_rename_if_exists, retired, path)
+            raise
+        if retired is not None:
+            await asyncio.to_thread(_remove, retired)
+
+    # --- Загрузка по частям -----------------------------------------------
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.root / "incoming" / f"{upload_id}.part"
+
+    async def start_upload(
+            self,
+            material_id: int,
+            name: str,
+            content_type: Optional[str],
+            size: int,
+            created_by: Optional[str] = None
+    ) -> UploadSession:
+        """Начало загрузки по частям файла известного размера"""
+        name = self._check_name(name)
+        if size <= 0 or size > settings.MAX_CHUNKED_UPLOAD_SIZE:
+            raise ValidationException(
+                f"Upload size must be between 1 and {settings.MAX_CHUNKED_UPLOAD_SIZE} bytes"
+            )
+        await self._require_material(material_id)
+
+        upload = UploadSession(
+            id=uuid4().hex,
+            material_id=material_id,
+            name=name,
+            content_type=self._content_type(name, content_type),
+            size=size,
+            offset=0,
+            created_by=created_by,
+        )
+        self._incoming_path(f"{upload.id}.part").touch()
+        self.db.add(upload)
+        await self.db.commit()
+        _upload_hashers[upload.id] = (0, hashlib.sha256())
+        return upload
+
+    async def get_upload(self, upload_id: str) -> UploadSession:
+        upload = await self.db.get(UploadSession, upload_id, populate_existing=True)
+        if upload is None:
+            raise NotFoundException(f"Upload {upload_id} not found")
+        return upload
+
+    async def _claim_upload(self, upload_id: str, offset: int) -> str:
+        """
+        Захват загрузки для записи с позиции offset (условный UPDATE)
+
+        Захватить можно только загрузку с этим offset и без действующего
+        захвата; иначе ConflictException. Возвращает токен захвата.
+        """
+        token = uuid4().hex
+        now = datetime.utcnow()
+        claimed = await self.db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.offset == offset,
+                or_(UploadSession.lease_token.is_(None), UploadSession.lease_expires_at < now),
+            )
+            .values(lease_token=token, lease_expires_at=now + timedelta(seconds=settings.UPLOAD_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        if not claimed.rowcount:
+            await self.db.rollback()
+            raise ConflictException(f"Upload {upload_id} is being written by another request")
+        await self.db.commit()
+        return token
+
+    async def _release_upload(self, upload_id: str, token: str) -> None:
+        await self.db.rollback()
+        await self.db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.lease_token == token)
+            .values(lease_token=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def append_chunk(self, upload_id: str, offset: int, chunks: ChunkSource) -> UploadSession:
+        """
+        Прием очередной части с позиции offset
+
+        offset должен совпадать с уже принятым размером; иначе ConflictException,
+        и клиент продолжает с offset из get_upload. В файл пишет только запрос,
+        захвативший загрузку: параллельный или повторный запрос с тем же offset
+        получает ConflictException до записи, а не смешивает байты в файле.
+        """
+        upload = await self.get_upload(upload_id)
+        if offset != upload.offset:
+            raise ConflictException(f"Upload {upload_id} expects offset {upload.offset}, got {offset}")
+        token = await self._claim_upload(upload_id, offset)
+
+        cached = _upload_hashers.get(upload_id)
+        digest = cached[1].copy() if cached and cached[0] == offset else None
+        try:
+            new_offset = await self._write(self._part_path(upload_id), chunks, offset, upload.size, digest)
+        except BaseException:
+            await self._release_upload(upload_id, token)
+            raise
+
+        result = await self.db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.lease_token == token)
+            .values(offset=new_offset, lease_token=None, lease_expires_at=None, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            # Захват истек, загрузку взял другой запрос: кешу хэша больше нельзя верить
+            await self.db.rollback()
+            _upload_hashers.pop(upload_id, None)
+            raise ConflictException(f"Upload {upload_id} was taken over while writing")
+        await self.db.commit()
+
+        if digest is not None:
+            _upload_hashers[upload_id] = (new_offset, digest)
+        else:
+            _upload_hashers.pop(upload_id, None)
+        return await self.get_upload(upload_id)
+
+    async def complete_upload(self, upload_id: str, uploaded_by: Optional[str] = None) -> MaterialDocument:
+        """Завершение загрузки по частям: файл переносится в хранилище"""
+        upload = await self.get_upload(upload_id)
+        if upload.offset != upload.size:
+            raise BusinessLogicException(
+                f"Upload {upload_id} is incomplete: {upload.offset} of {upload.size} bytes received"
+            )
+        # Захват: пока идет запись части или другое завершение, файл не трогаем
+        token = await self._claim_upload(upload_id, upload.size)
+
+        path = self._part_path(upload_id)
+        try:
+            cached = _upload_hashers.pop(upload_id, None)
+            if cached and cached[0] == upload.size:
+                sha256 = cached[1].hexdigest()
+            else:
+                sha256 = await asyncio.to_thread(_hash_file, path, settings.UPLOAD_CHUNK_SIZE)
+
+            blob = await self._store_blob(path, sha256, upload.size)
+            document = await self._create_document(
+                upload.material_id, blob, upload.name, upload.content_type, uploaded_by or upload.created_by
+            )
+            await self.db.delete(upload)
+            await self.db.commit()
+        except BaseException:
+            await self._release_upload(upload_id, token)
+            raise
+        return document
+
+    async def purge_expired_uploads(self, now: Optional[datetime] = None) -> int:
+        """Удаление незавершенных загрузок старше UPLOAD_SESSION_TTL_HOURS"""
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        expired = (await self.db.execute(
+            select(UploadSession.id).where(UploadSession.updated_at < cutoff)
+        )).scalars().all()
+        if not expired:
+            return 0
+        await self.db.execute(delete(UploadSession).where(UploadSession.id.in_(expired)))
+        await self.db.commit()
+        for upload_id in expired:
+            _upload_hashers.pop(upload_id, None)
+            await asyncio.to_thread(_remove, self._part_path(upload_id))
+        return len(expired)
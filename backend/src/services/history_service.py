@@ -0,0 +1,286 @@
+"""
+History Service - хранение истории workflow
+
+Горячая история лежит в workflow_states (на PostgreSQL — по месячным
+секциям changed_at). История закрытых материалов, которые давно не менялись,
+переносится в сжатые файлы архива; таблица workflow_history_archives хранит
+смещения сегментов, поэтому история одной партии читается без распаковки
+всего файла.
+"""
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from loguru import logger
+from sqlalchemy import DateTime, and_, delete, exists, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.models.material import Material, MaterialStatus
+from src.models.workflow import WorkflowHistoryArchive, WorkflowState
+
+
+# После этих статусов партия больше не меняется
+CLOSED_STATUSES = (MaterialStatus.RELEASED.value, MaterialStatus.REJECTED.value)
+
+_STATE_COLUMNS = WorkflowState.__table__.columns
+_DATETIME_COLUMNS = {column.name for column in _STATE_COLUMNS if isinstance(column.type, DateTime)}
+
+
+@dataclass
+class ArchiveStats:
+    """Итоги прогона архивации"""
+    materials: int = 0
+    states: int = 0
+    files: int = 0
+    bytes: int = 0
+
+
+def _encode_state(row) -> str:
+    values = {}
+    for name, value in row._mapping.items():
+        values[name] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_state_values(line: str) -> Dict[str, Any]:
+    """Значения колонок записи архива"""
+    values: Dict[str, Any] = json.loads(line)
+    for name in _DATETIME_COLUMNS & values.keys():
+        if values[name] is not None:
+            values[name] = datetime.fromisoformat(values[name])
+    return values
+
+
+def _write_segments(path: Path, segments: List[Tuple[int, bytes]]) -> List[Tuple[int, int, int]]:
+    """
+    Запись независимых gzip-членов одним файлом
+
+    Возвращает (material_id, offset, length) для каждого сегмента. Файл
+    появляется под своим именем только целиком записанным и никогда не
+    заменяет существующий: при совпадении имени — FileExistsError, а строки
+    прежнего файла, возможно, уже удалены из горячей таблицы.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    placement = []
+    offset = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for material_id, payload in segments:
+                f.write(payload)
+                placement.append((material_id, offset, len(payload)))
+                offset += len(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # link, в отличие от replace, атомарно отказывает, если имя занято
+        os.link(tmp_name, path)
+    finally:
+        os.unlink(tmp_name)
+    return placement
+
+
+def read_segment(path: str, offset: int, length: int) -> List[str]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        payload = f.read(length)
+    return gzip.decompress(payload).decode("utf-8").splitlines()
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# Секция для строк вне месячных секций (создается миграцией c9f07b5a2e18)
+DEFAULT_PARTITION = "workflow_states_default"
+
+
+def partition_name(month: date) -> str:
+    """Имя месячной секции workflow_states"""
+    return f"workflow_states_p{month:%Y%m}"
+
+
+class HistoryService:
+    """Чтение, архивация и секционирование истории workflow"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_history(self, material_id: UUID) -> List[WorkflowState]:
+        """
+        Полная история материала: сначала архивные сегменты, затем горячие строки
+
+        Архивные состояния возвращаются как несвязанные с сессией объекты.
+        """
+        states = [WorkflowState(**values) for values in await self.get_archived_values(material_id)]
+        result = await self.db.execute(
+            select(WorkflowState)
+            .where(WorkflowState.material_id == material_id)
+            .order_by(WorkflowState.changed_at.asc(), WorkflowState.id.asc())
+        )
+        states.extend(result.scalars().all())
+        return states
+
+    async def get_archived_values(self, material_id: UUID) -> List[Dict[str, Any]]:
+        """Значения колонок архивных записей материала в порядке архивации"""
+        segments = (await self.db.execute(
+            select(WorkflowHistoryArchive)
+            .where(WorkflowHistoryArchive.material_id == material_id)
+            .order_by(WorkflowHistoryArchive.id)
+        )).scalars().all()
+
+        values: List[Dict[str, Any]] = []
+        for segment in segments:
+            lines = await asyncio.to_thread(read_segment, segment.path, segment.offset, segment.length)
+            values.extend(map(decode_state_values, lines))
+        return values
+
+    async def archive_closed_materials(
+            self,
+            older_than_days: Optional[int] = None,
+            batch_size: int = 1000,
+            archive_path: Optional[str] = None,
+            now: Optional[datetime] = None
+    ) -> ArchiveStats:
+        """
+        Перенос истории закрытых материалов в сжатый архив
+
+        Каждый пакет материалов пишется отдельным файлом; строки удаляются из
+        workflow_states в той же транзакции, что и запись индекса архива,
+        а файл к этому моменту уже записан на диск.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=older_than_days if older_than_days is not None
+                                 else settings.HISTORY_ARCHIVE_AFTER_DAYS)
+        root = Path(archive_path or settings.HISTORY_ARCHIVE_PATH)
+        stats = ArchiveStats()
+
+        while True:
+            material_ids = (await self.db.execute(
+                select(Material.id)
+                .where(
+                    Material.status.in_(CLOSED_STATUSES),
+                    func.coalesce(Material.updated_at, Material.created_at) < cutoff,
+                    exists().where(WorkflowState.material_id == Material.id),
+                )
+                .order_by(Material.id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not material_ids:
+                break
+
+            rows = (await self.db.execute(
+                select(*_STATE_COLUMNS)
+                .where(WorkflowState.material_id.in_(material_ids))
+                # Порядок id — порядок хэш-цепочки
+                .order_by(WorkflowState.material_id, WorkflowState.id)
+            )).all()
+
+            by_material: Dict[int, list] = {}
+            for row in rows:
+                by_material.setdefault(row.material_id, []).append(row)
+            segments = [
+                (material_id, gzip.compress("\n".join(map(_encode_state, states)).encode("utf-8")))
+                for material_id, states in by_material.items()
+            ]
+
+            # Случайный суффикс: прогоны в одну и ту же секунду пишут разные файлы
+            # (id строк не годятся — SQLite переиспользует id удаленных строк)
+            last_id = max(row.id for row in rows)
+            path = root / f"{now:%Y}" / f"history-{now:%Y%m%dT%H%M%S}-{uuid4().hex[:12]}.jsonl.gz"
+            placement = await asyncio.to_thread(_write_segments, path, segments)
+
+            await self.db.execute(insert(WorkflowHistoryArchive), [
+                {
+                    "material_id": material_id,
+                    "path": str(path),
+                    "offset": offset,
+                    "length": length,
+                    "states_count": len(by_material[material_id]),
+                    "last_row_hash": by_material[material_id][-1].row_hash,
+                    "first_changed_at": min((row.changed_at for row in by_material[material_id] if row.changed_at), default=None),
+                    "last_changed_at": max((row.changed_at for row in by_material[material_id] if row.changed_at), default=None),
+                }
+                for material_id, offset, length in placement
+            ])
+            # Состояния, добавленные после чтения, остаются в горячей таблице
+            await self.db.execute(
+                delete(WorkflowState)
+                .where(and_(
+                    WorkflowState.material_id.in_(list(by_material)),
+                    WorkflowState.id <= last_id,
+                ))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+
+            stats.materials += len(by_material)
+            stats.states += len(rows)
+            stats.files += 1
+            stats.bytes += sum(length for _, _, length in placement)
+            logger.info(f"Archived history of {len(by_material)} materials ({len(rows)} states) to {path}")
+
+        return stats
+
+    async def ensure_partitions(
+            self,
+            months_ahead: Optional[int] = None,
+            today: Optional[date] = None
+    ) -> List[str]:
+        """
+        Создание месячных секций workflow_states на months_ahead месяцев вперед
+
+        Только для PostgreSQL; на остальных БД таблица не секционирована.
+        Строки месяца без секции попадают в секцию DEFAULT, и тогда PostgreSQL
+        не даст создать секцию этого месяца: такие строки переносятся в новую
+        секцию. Если после этого в DEFAULT остались строки, пишется
+        предупреждение — секции создаются с запозданием.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return []
+
+        months = settings.HISTORY_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        month = _month_start(today or date.today())
+        created = []
+        for _ in range(months + 1):
+            following = _next_month(month)
+            name = partition_name(month)
+            exists_already = await self.db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+            if not exists_already:
+                await self._create_partition(name, month, following)
+                # Перенос держит исключительную блокировку таблицы: фиксируем каждую секцию
+                await self.db.commit()
+            created.append(name)
+            month = following
+
+        stray = await self.db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"))
+        if stray:
+            logger.warning(f"{stray} workflow states are in {DEFAULT_PARTITION}: no monthly partition covers them")
+        return created
+
+    async def _create_partition(self, name: str, month: date, following: date) -> None:
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        in_month = f"changed_at >= '{month.isoformat()}' AND changed_at < '{following.isoformat()}'"
+        stray = await self.db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+        if not stray:
+            await self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF workflow_states {bounds}"))
+            return
+
+        # DETACH блокирует workflow_states до фиксации: параллельные вставки ждут переноса
+        logger.warning(f"Moving {stray} workflow states of {month:%Y-%m} from {DEFAULT_PARTITION} to {name}")
+        await self.db.execute(text(f"ALTER TABLE workflow_states DETACH PARTITION {DEFAULT_PARTITION}"))
+        await self.db.execute(text(f"CREATE TABLE {name} PARTITION OF workflow_states {bounds}"))
+        await self.db.execute(text(f"INSERT INTO workflow_states SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+        await self.db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+        await self.db.execute(text(f"ALTER TABLE workflow_states ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
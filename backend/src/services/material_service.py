@@ -1,22 +1,32 @@
 """
 Material Service - бизнес-логика для работы с материалами
 """
+import asyncio
+import random
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import selectinload, joinedload
 
 from src.models.material import Material, MaterialStatus, MaterialType
+from src.models.movement import MaterialMovement
+from src.models.reservation import Reservation
 from src.models.user import User, UserRole
 from src.models.workflow import WorkflowState
 from src.schemas.material import MaterialCreate, MaterialUpdate
+from src.services.history_service import HistoryService
+from src.core.config import settings
+from src.core.database import has_uncommitted_writes, replica_read
 from src.core.exceptions import (
     NotFoundException,
     BusinessLogicException,
+    ConflictException,
     PermissionDeniedException
 )
+from src.core.metrics import reservation_conflicts
 
 
 class MaterialService:
@@ -33,35 +43,60 @@ class MaterialService:
         """
         Создание нового материала
         """
-        # Проверяем уникальность кода материала
-        existing = await self.db.execute(
-            select(Material).where(Material.material_code == data.material_code)
-        )
-        if existing.scalar_one_or_none():
-            raise BusinessLogicException(
-                f"Material with code {data.material_code} already exists"
-            )
+        batch_number = data.batch_number or data.material_code
+
+        # Поля схемы, для которых в модели нет колонок, храним в метаданных
+        material_metadata = dict(data.metadata or {})
+        material_metadata.update({
+            "name": data.name,
+            "dimensions": data.dimensions,
+            "heat_number": data.heat_number,
+            "total_weight": data.total_weight,
+        })
 
         # Создаем материал
         material = Material(
-            **data.dict(),
-            status=MaterialStatus.RECEIVED,
-            received_by=user_id,
+            material_code=data.material_code,
+            batch_number=batch_number,
+            material_type=data.material_type.value,
+            grade=data.grade,
+            specification=data.standard,
+            quantity=data.quantity,
+            unit=data.unit,
+            supplier=data.supplier,
+            supplier_certificate=data.supplier_certificate_number,
+            location=data.current_location,
+            notes=data.notes,
+            material_metadata=material_metadata,
+            status=MaterialStatus.RECEIVED.value,
+            created_by=user_id,
             received_date=datetime.utcnow(),
             created_at=datetime.utcnow()
         )
+        self.db.add(material)
+        # Уникальность кода и номера партии проверяют индексы при вставке:
+        # предварительный SELECT не защищает от параллельной приемки
+        try:
+            await self.db.flush()
+        except IntegrityError as e:
+            await self.db.rollback()
+            message = str(e.orig)
+            if "material_code" in message:
+                raise BusinessLogicException(f"Material with code {data.material_code} already exists")
+            if "batch_number" in message:
+                raise BusinessLogicException(f"Material with batch number {batch_number} already exists")
+            raise
 
         # Создаем начальное состояние workflow
         workflow_state = WorkflowState(
             material_id=material.id,
-            status=MaterialStatus.RECEIVED,
+            state_name=MaterialStatus.RECEIVED.value,
             changed_by=user_id,
             notes="Материал принят на склад"
         )
-
-        self.db.add(material)
         self.db.add(workflow_state)
 
+        # Код попадает в индекс занятых кодов после COMMIT (см. code_service)
         await self.db.commit()
         await self.db.refresh(material)
 
@@ -71,9 +106,17 @@ class MaterialService:
         """
         Получение материала по ID
         """
+        # Все связи, которые читает сериализация ответа, загружаем заранее,
+        # иначе каждая из них дает отдельный ленивый запрос
         result = await self.db.execute(
             select(Material)
-            .options(selectinload(Material.test_results))
+            .options(
+                selectinload(Material.test_results),
+                selectinload(Material.workflow_states),
+                selectinload(Material.certificates),
+                joinedload(Material.creator),
+                joinedload(Material.updater),
+            )
             .where(Material.id == material_id)
         )
         material = result.scalar_one_or_none()
@@ -83,6 +126,7 @@ class MaterialService:
 
         return material
 
+    @replica_read
     async def get_materials(
             self,
             skip: int = 0,
@@ -113,9 +157,9 @@ class MaterialService:
         if search:
             filters.append(
                 or_(
-                    Material.material_code.ilike(f"%{search}%"),
-                    Material.name.ilike(f"%{search}%"),
-                    Material.grade.ilike(f"%{search}%")
+                    Material.batch_number.ilike(f"%{search}%"),
+                    Material.grade.ilike(f"%{search}%"),
+                    Material.specification.ilike(f"%{search}%")
                 )
             )
 
@@ -127,20 +171,19 @@ class MaterialService:
                     MaterialStatus.QUARANTINE
                 ],
                 UserRole.QUALITY_CONTROL: [
-                    MaterialStatus.IN_INSPECTION,
+                    MaterialStatus.TESTING,
                     MaterialStatus.APPROVED,
                     MaterialStatus.REJECTED
                 ],
                 UserRole.LAB_DESTRUCTIVE: [
-                    MaterialStatus.LAB_TESTING
+                    MaterialStatus.TESTING
                 ],
                 UserRole.LAB_NON_DESTRUCTIVE: [
-                    MaterialStatus.LAB_TESTING
+                    MaterialStatus.TESTING
                 ],
                 UserRole.PRODUCTION: [
                     MaterialStatus.APPROVED,
-                    MaterialStatus.IN_PRODUCTION,
-                    MaterialStatus.CONSUMED
+                    MaterialStatus.RELEASED
                 ]
             }
 
@@ -206,30 +249,31 @@ class MaterialService:
         Изменение статуса материала с проверкой прав
         """
         material = await self.get_material(material_id)
+        current_status = MaterialStatus(material.status)
 
         # Проверяем права на изменение статуса
         allowed_transitions = self._get_allowed_transitions(
-            material.status,
+            current_status,
             user_role
         )
 
         if new_status not in allowed_transitions:
             raise PermissionDeniedException(
-                f"Transition from {material.status.value} to {new_status.value} "
+                f"Transition from {current_status.value} to {new_status.value} "
                 f"is not allowed for role {user_role.value}"
             )
 
         # Сохраняем историю изменения
         workflow_state = WorkflowState(
             material_id=material_id,
-            status=new_status,
-            previous_status=material.status,
+            state_name=new_status.value,
+            previous_state=current_status.value,
             changed_by=user_id,
             notes=notes
         )
 
         # Обновляем статус
-        material.status = new_status
+        material.status = new_status.value
         material.updated_at = datetime.utcnow()
 
         self.db.add(workflow_state)
@@ -249,21 +293,16 @@ class MaterialService:
         """
         material = await self.get_material(material_id)
 
-        # Сохраняем предыдущее местоположение в метаданных
-        if material.current_location:
-            if not material.metadata:
-                material.metadata = {}
-
-            if "location_history" not in material.metadata:
-                material.metadata["location_history"] = []
-
-            material.metadata["location_history"].append({
-                "location": material.current_location,
-                "moved_at": datetime.utcnow().isoformat(),
-                "moved_by": str(user_id)
-            })
+        # Перемещение пишется в журнал, а не в метаданные материала
+        if material.location != location:
+            self.db.add(MaterialMovement(
+                material_id=material.id,
+                from_location=material.location,
+                to_location=location,
+                moved_by=user_id
+            ))
 
-        material.current_location = location
+        material.location = location
         material.updated_at = datetime.utcnow()
 
         await self.db.commit()
@@ -271,6 +310,42 @@ class MaterialService:
 
         return material
 
+    @replica_read
+    async def get_materials_at_location(
+            self,
+            location: str,
+            skip: int = 0,
+            limit: int = 100
+    ) -> List[Material]:
+        """
+        Материалы, которые сейчас находятся в указанном месте хранения
+        """
+        result = await self.db.execute(
+            select(Material)
+            .where(Material.location == location)
+            .order_by(Material.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    @replica_read
+    async def get_location_history(
+            self,
+            material_id: int
+    ) -> List[MaterialMovement]:
+        """
+        Все перемещения материала в хронологическом порядке
+        """
+        await self._require_material(material_id)
+        result = await self.db.execute(
+            select(MaterialMovement)
+            .where(MaterialMovement.material_id == material_id)
+            .order_by(MaterialMovement.moved_at, MaterialMovement.id)
+        )
+        return result.scalars().all()
+
+    @replica_read
     async def check_availability(
             self,
             material_code: Optional[str] = None,
@@ -285,7 +360,7 @@ class MaterialService:
         )
 
         if material_code:
-            query = query.where(Material.material_code == material_code)
+            query = query.where(Material.batch_number == material_code)
 
         if grade:
             query = query.where(Material.grade == grade)
@@ -305,72 +380,163 @@ class MaterialService:
     ) -> Material:
         """
         Резервирование материала для производства
-        """
-        material = await self.get_material(material_id)
 
-        if material.status != MaterialStatus.APPROVED:
-            raise BusinessLogicException(
-                f"Material {material.material_code} is not approved for use"
-            )
+        Оптимистичная блокировка без блокировок строки: прочитанная версия
+        строки проверяется в UPDATE ... WHERE version = :v (compare-and-swap).
+        Если строку успели изменить (UPDATE не затронул строк) или БД занята
+        ("database is locked" в SQLite), попытка повторяется с отступом, не
+        более RESERVATION_MAX_RETRIES раз.
 
-        if material.quantity < quantity:
-            raise BusinessLogicException(
-                f"Insufficient quantity. Available: {material.quantity}, "
-                f"Requested: {quantity}"
+        Если в сессии есть незафиксированные изменения вызывающего кода,
+        резервирование становится частью его транзакции: метод ее не
+        фиксирует и не откатывает, фиксация остается за вызывающим кодом.
+        Иначе резервирование фиксируется сразу.
+        """
+        caller_writes = has_uncommitted_writes(self.db)
+        if caller_writes:
+            # Изменения вызывающего кода записываются до чтения версии:
+            # expire_all ниже не должен их потерять
+            await self.db.flush()
+
+        for attempt in range(settings.RESERVATION_MAX_RETRIES):
+            try:
+                if await self._try_reserve(material_id, quantity, user_id, purpose, commit=not caller_writes):
+                    break
+            except OperationalError as e:
+                # SQLite отвечает "database is locked" на одновременную запись
+                if "locked" not in str(e.orig):
+                    raise
+                if caller_writes:
+                    raise ConflictException(
+                        f"Material {material_id} is being reserved concurrently, try again later"
+                    ) from e
+                # Откатывается только собственная неудачная попытка
+                await self.db.rollback()
+            reservation_conflicts.inc(outcome="retried")
+            backoff = min(
+                settings.RESERVATION_RETRY_BACKOFF_MS * 2 ** attempt,
+                settings.RESERVATION_RETRY_BACKOFF_MAX_MS
+            )
+            await asyncio.sleep(random.uniform(0, backoff) / 1000)
+        else:
+            reservation_conflicts.inc(outcome="exhausted")
+            raise ConflictException(
+                f"Material {material_id} is being reserved concurrently, try again later"
             )
 
-        # Обновляем количество и статус
-        material.quantity -= quantity
+        # Объект в сессии мог остаться со старыми значениями
+        self.db.expire_all()
+        return await self.get_material(material_id)
 
-        if material.quantity == 0:
-            material.status = MaterialStatus.CONSUMED
-        else:
-            material.status = MaterialStatus.IN_PRODUCTION
+    async def _read_for_reservation(self, material_id: UUID):
+        """Текущие остаток, статус и версия строки материала"""
+        return (await self.db.execute(
+            select(Material.batch_number, Material.status, Material.quantity, Material.unit, Material.version)
+            .where(Material.id == material_id)
+        )).one_or_none()
 
-        # Добавляем информацию о резервировании в метаданные
-        if not material.metadata:
-            material.metadata = {}
+    async def _try_reserve(
+            self,
+            material_id: UUID,
+            quantity: float,
+            user_id: UUID,
+            purpose: str,
+            commit: bool = True
+    ) -> bool:
+        """
+        Одна попытка резервирования
 
-        if "reservations" not in material.metadata:
-            material.metadata["reservations"] = []
+        Возвращает False, если версия строки изменилась после чтения —
+        тогда попытку стоит повторить с новым чтением.
+        """
+        row = await self._read_for_reservation(material_id)
+        if row is None:
+            raise NotFoundException(f"Material {material_id} not found")
+        if row.status != MaterialStatus.APPROVED:
+            raise BusinessLogicException(
+                f"Material {row.batch_number} is not approved for use"
+            )
+        if row.quantity < quantity:
+            raise BusinessLogicException(
+                f"Insufficient quantity. Available: {row.quantity}, "
+                f"Requested: {quantity}"
+            )
 
-        material.metadata["reservations"].append({
-            "quantity": quantity,
-            "reserved_by": str(user_id),
-            "reserved_at": datetime.utcnow().isoformat(),
-            "purpose": purpose
-        })
+        # Полностью выбранная партия выдается в производство
+        new_status = MaterialStatus.RELEASED.value if row.quantity == quantity else row.status
+        result = await self.db.execute(
+            update(Material)
+            .where(
+                Material.id == material_id,
+                Material.version == row.version,
+                Material.quantity >= quantity,
+            )
+            .values(
+                quantity=Material.quantity - quantity,
+                reserved_quantity=Material.reserved_quantity + quantity,
+                status=new_status,
+                version=row.version + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            return False
 
-        material.updated_at = datetime.utcnow()
+        self.db.add(Reservation(
+            material_id=material_id,
+            quantity=quantity,
+            purpose=purpose,
+            reserved_by=user_id
+        ))
 
         # Записываем в workflow
-        workflow_state = WorkflowState(
+        self.db.add(WorkflowState(
             material_id=material_id,
-            status=material.status,
+            state_name=new_status,
             changed_by=user_id,
-            notes=f"Reserved {quantity} {material.unit} for {purpose}"
-        )
+            notes=f"Reserved {quantity} {row.unit} for {purpose}"
+        ))
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
+        return True
 
-        self.db.add(workflow_state)
-        await self.db.commit()
-        await self.db.refresh(material)
+    async def _require_material(self, material_id: int) -> None:
+        exists = await self.db.scalar(select(Material.id).where(Material.id == material_id))
+        if exists is None:
+            raise NotFoundException(f"Material {material_id} not found")
 
-        return material
+    @replica_read
+    async def get_reservations(
+            self,
+            material_id: int,
+            skip: int = 0,
+            limit: int = 100
+    ) -> List[Reservation]:
+        """
+        Журнал резервирований материала, новые первыми
+        """
+        await self._require_material(material_id)
+        result = await self.db.execute(
+            select(Reservation)
+            .where(Reservation.material_id == material_id)
+            .order_by(Reservation.reserved_at.desc(), Reservation.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
 
+    @replica_read
     async def get_material_history(
             self,
             material_id: UUID
     ) -> List[WorkflowState]:
         """
-        Получение истории изменений материала
+        Получение истории изменений материала (включая архивную)
         """
-        result = await self.db.execute(
-            select(WorkflowState)
-            .where(WorkflowState.material_id == material_id)
-            .order_by(WorkflowState.changed_at.asc())
-        )
-
-        return result.scalars().all()
+        return await HistoryService(self.db).get_history(material_id)
 
     async def delete_material(
             self,
@@ -389,9 +555,9 @@ class MaterialService:
         material = await self.get_material(material_id)
 
         # Проверяем, можно ли удалить
-        if material.status in [MaterialStatus.IN_PRODUCTION, MaterialStatus.CONSUMED]:
+        if material.status == MaterialStatus.RELEASED:
             raise BusinessLogicException(
-                "Cannot delete material that is in production or consumed"
+                "Cannot delete material that is released to production"
             )
 
         await self.db.delete(material)
@@ -409,24 +575,21 @@ class MaterialService:
         """
         transitions_map = {
             UserRole.WAREHOUSE_KEEPER: {
-                MaterialStatus.RECEIVED: [MaterialStatus.IN_INSPECTION, MaterialStatus.QUARANTINE],
-                MaterialStatus.QUARANTINE: [MaterialStatus.IN_INSPECTION, MaterialStatus.REJECTED]
+                MaterialStatus.RECEIVED: [MaterialStatus.TESTING, MaterialStatus.QUARANTINE],
+                MaterialStatus.QUARANTINE: [MaterialStatus.TESTING, MaterialStatus.REJECTED]
             },
             UserRole.QUALITY_CONTROL: {
-                MaterialStatus.RECEIVED: [MaterialStatus.IN_INSPECTION],
-                MaterialStatus.IN_INSPECTION: [MaterialStatus.LAB_TESTING, MaterialStatus.APPROVED,
-                                               MaterialStatus.REJECTED],
-                MaterialStatus.LAB_TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
+                MaterialStatus.RECEIVED: [MaterialStatus.TESTING],
+                MaterialStatus.TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
             },
             UserRole.LAB_DESTRUCTIVE: {
-                MaterialStatus.LAB_TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
+                MaterialStatus.TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
             },
             UserRole.LAB_NON_DESTRUCTIVE: {
-                MaterialStatus.LAB_TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
+                MaterialStatus.TESTING: [MaterialStatus.APPROVED, MaterialStatus.REJECTED]
             },
             UserRole.PRODUCTION: {
-                MaterialStatus.APPROVED: [MaterialStatus.IN_PRODUCTION],
-                MaterialStatus.IN_PRODUCTION: [MaterialStatus.CONSUMED]
+                MaterialStatus.APPROVED: [MaterialStatus.RELEASED]
             },
             UserRole.ADMINISTRATOR: {
                 # Администратор может делать любые переходы
@@ -0,0 +1,210 @@
+"""
+Preview Service - уменьшенные копии вложений
+
+Фотографии дефектов и сканы сертификатов весят мегабайты; галерея страницы
+материала показывает их миниатюрами. Миниатюры (thumb) и превью (preview)
+строятся в пуле процессов вне обработки запроса и кешируются рядом с
+оригиналом в хранилище по хэшу: <sha256>.thumb.jpg, <sha256>.preview.jpg.
+Одинаковые файлы получают превью один раз.
+
+Для PDF берется первая страница: у сканов это изображение страницы, которое
+извлекается из PDF напрямую; векторные PDF рендерятся pdftoppm (poppler),
+если он установлен.
+"""
+import asyncio
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from loguru import logger
+
+from src.core.config import settings
+
+# Вариант превью -> наибольшая сторона в пикселях
+PREVIEW_VARIANTS: Dict[str, int] = {
+    "thumb": 256,
+    "preview": 1280,
+}
+
+_RASTER_MODES = {"/DeviceRGB": "RGB", "/DeviceGray": "L", "/DeviceCMYK": "CMYK"}
+
+
+def is_previewable(content_type: str) -> bool:
+    return content_type == "application/pdf" or content_type.startswith("image/")
+
+
+def preview_path(blob_path: str, variant: str) -> Path:
+    """Файл превью рядом с оригиналом в хранилище"""
+    return Path(f"{blob_path}.{variant}.jpg")
+
+
+def _pdf_page_images(resources, found: list) -> None:
+    # Изображения страницы, включая вложенные в Form XObject (так их кладет reportlab)
+    xobjects = resources.get("/XObject") if resources else None
+    if not xobjects:
+        return
+    for reference in xobjects.get_object().values():
+        xobject = reference.get_object()
+        if xobject.get("/Subtype") == "/Image":
+            found.append(xobject)
+        elif xobject.get("/Subtype") == "/Form":
+            _pdf_page_images(xobject.get("/Resources"), found)
+
+
+def _decode_pdf_image(xobject):
+    from PIL import Image
+
+    filters = xobject.get("/Filter")
+    filters = list(filters) if isinstance(filters, list) else [filters]
+    data = xobject.get_data()
+    if filters[-1] in ("/DCTDecode", "/JPXDecode"):
+        return Image.open(io.BytesIO(data))
+    mode = _RASTER_MODES.get(xobject.get("/ColorSpace"))
+    if mode is None or xobject.get("/BitsPerComponent", 8) != 8:
+        return None
+    return Image.frombytes(mode, (xobject["/Width"], xobject["/Height"]), data)
+
+
+def _first_pdf_page(path: str):
+    """Изображение первой страницы PDF или None"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    if reader.pages:
+        found: list = []
+        _pdf_page_images(reader.pages[0].get("/Resources"), found)
+        if found:
+            largest = max(found, key=lambda xobject: xobject["/Width"] * xobject["/Height"])
+            image = _decode_pdf_image(largest)
+            if image is not None:
+                return image
+
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            [pdftoppm, "-f", "1", "-l", "1", "-r", "110", "-jpeg", path, os.path.join(tmp, "page")],
+            check=True, capture_output=True, timeout=60,
+        )
+        pages = sorted(Path(tmp).glob("page*.jpg"))
+        if not pages:
+            return None
+        image = Image.open(pages[0])
+        image.load()
+        return image
+
+
+def render_previews(source: str, content_type: str, quality: int = 80) -> Dict[str, str]:
+    """
+    Построение всех вариантов превью файла (выполняется в пуле процессов)
+
+    Возвращает вариант -> путь; пустой словарь, если файл не удалось отрисовать.
+    """
+    from PIL import Image, ImageOps
+
+    if content_type == "application/pdf":
+        image = _first_pdf_page(source)
+        if image is None:
+            return {}
+    else:
+        image = Image.open(source)
+        # Крупные сканы декодируются сразу в уменьшенном масштабе
+        image.draft("RGB", (PREVIEW_VARIANTS["preview"], PREVIEW_VARIANTS["preview"]))
+        image = ImageOps.exif_transpose(image)
+
+    image = image.convert("RGB")
+    rendered = {}
+    # От большего варианта к меньшему: каждый следующий уменьшается из предыдущего
+    for variant, size in sorted(PREVIEW_VARIANTS.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        target = preview_path(source, variant)
+        tmp = target.with_suffix(".tmp")
+        image.save(tmp, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(tmp, target)
+        rendered[variant] = str(target)
+    return rendered
+
+
+class PreviewPool:
+    """
+    Пул процессов для построения превью
+
+    Повторный запрос того же файла, пока он обрабатывается, ждет уже
+    запущенную задачу.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.PREVIEW_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def render(self, blob_path: str, content_type: str) -> Dict[str, str]:
+        """Превью файла: из кеша или построенные в пуле"""
+        cached = {variant: preview_path(blob_path, variant) for variant in PREVIEW_VARIANTS}
+        if all(path.exists() for path in cached.values()):
+            return {variant: str(path) for variant, path in cached.items()}
+        if not is_previewable(content_type):
+            return {}
+
+        future = self._pending.get(blob_path)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._get_executor(), render_previews, blob_path, content_type, settings.PREVIEW_QUALITY
+            )
+            self._pending[blob_path] = future
+            future.add_done_callback(lambda _: self._pending.pop(blob_path, None))
+        try:
+            return await asyncio.shield(future)
+        except Exception as e:
+            logger.warning(f"Preview of {blob_path} failed: {e}")
+            return {}
+
+    def schedule(self, blob_path: str, content_type: str) -> Optional[asyncio.Task]:
+        """Построение превью в фоне (ответ на загрузку не ждет его)"""
+        if not is_previewable(content_type):
+            return None
+        task = asyncio.get_running_loop().create_task(self.render(blob_path, content_type))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_preview_pool: Optional[PreviewPool] = None
+
+
+def get_preview_pool() -> PreviewPool:
+    """Общий пул превью процесса приложения (создается при первом обращении)"""
+    global _preview_pool
+    if _preview_pool is None:
+        _preview_pool = PreviewPool()
+    return _preview_pool
+
+
+def close_preview_pool() -> None:
+    global _preview_pool
+    if _preview_pool is not None:
+        _preview_pool.shutdown()
+        _preview_pool = None
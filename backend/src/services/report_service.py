@@ -0,0 +1,439 @@
+"""
+Report Service - сводные PDF-отчеты по испытаниям
+
+Отчет собирается из частей по порядку: титульный лист, протоколы
+испытаний (строятся reportlab), вложения испытаний, выпущенные сертификаты
+и оригиналы сертификатов поставщиков (PDF или сканы-изображения).
+
+Части, которые нужно построить, строятся в пуле процессов с опережением до
+REPORT_RENDER_AHEAD частей, пока предыдущие дописываются в выходной файл.
+Склейка идет постранично (src/core/pdf_merge.py), поэтому память не
+зависит от объема досье. Выходной файл временный: ответ отдает его по мере
+записи и удаляет.
+"""
+import asyncio
+import io
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from html import escape
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.core.config import settings
+from src.core.exceptions import NotFoundException, ValidationException
+from src.core.pdf_merge import PdfStreamWriter
+from src.models.certificate import Certificate, TestResult
+from src.services.barcode_service import pdf_font
+
+REPORT_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp")
+
+RESULT_LABELS = {"PASS": "Соответствует", "FAIL": "Не соответствует"}
+
+
+# --- Построение страниц (выполняется в процессах пула) --------------------
+
+def _styles():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    font = pdf_font()
+    styles = getSampleStyleSheet()
+    for style in styles.byName.values():
+        style.fontName = font
+    return font, styles
+
+
+def _build(story: list, title: str) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=20 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+    )
+    document.build(story)
+    return buffer.getvalue()
+
+
+def _table(rows: List[List[str]], widths: List[float], font: str, header: bool = False):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    table = Table(rows, colWidths=widths, repeatRows=1 if header else 0)
+    style = [
+        ("FONTNAME", (0, 0), (-1, -1), font),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]
+    if header:
+        style.append(("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey))
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def render_cover(title: str, subtitle: str, rows: List[List[str]]) -> bytes:
+    """Титульный лист с перечнем испытаний"""
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Spacer
+
+    font, styles = _styles()
+    story = [
+        Paragraph(escape(title), styles["Title"]),
+        Paragraph(escape(subtitle), styles["Normal"]),
+        Paragraph(escape(f"Сформирован {datetime.utcnow():%d.%m.%Y %H:%M} UTC"), styles["Normal"]),
+        Spacer(1, 6 * mm),
+    ]
+    if rows:
+        header = ["№", "Партия", "Испытание", "Дата", "Результат"]
+        story.append(_table([header] + rows, [18 * mm, 45 * mm, 50 * mm, 25 * mm, 35 * mm], font, header=True))
+    return _build(story, title)
+
+
+def render_protocol(test: Dict[str, Any]) -> bytes:
+    """Протокол испытания; test — словарь из _protocol_data"""
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Spacer
+
+    font, styles = _styles()
+    title = f"Протокол испытаний № {test['id']}"
+    story = [Paragraph(escape(title), styles["Title"])]
+    info = [
+        ["Партия", test["batch_number"]],
+        ["Материал", " ".join(filter(None, [test["material_type"], test["grade"]]))],
+        ["Поставщик", test["supplier"] or ""],
+        ["Вид испытания", test["test_type"]],
+        ["Категория", test["test_category"]],
+        ["Метод", test["test_method"] or ""],
+        ["Оборудование", test["equipment_used"] or ""],
+        ["Дата испытания", test["tested_at"]],
+        ["Результат", RESULT_LABELS.get(test["pass_fail"], test["pass_fail"])],
+    ]
+    story.append(_table(info, [45 * mm, 130 * mm], font))
+
+    numeric = dict(test["numeric_results"] or {})
+    units = numeric.pop("units", None) or {}
+    if numeric:
+        story += [Spacer(1, 5 * mm), Paragraph("Результаты измерений", styles["Heading3"])]
+        rows = [["Показатель", "Значение", "Ед."]] + [
+            [str(name), str(value), str(units.get(name, ""))] for name, value in numeric.items()
+        ]
+        story.append(_table(rows, [85 * mm, 60 * mm, 30 * mm], font, header=True))
+    if test["test_conditions"]:
+        story += [Spacer(1, 5 * mm), Paragraph("Условия испытания", styles["Heading3"])]
+        rows = [[str(name), str(value)] for name, value in test["test_conditions"].items()]
+        story.append(_table(rows, [85 * mm, 90 * mm], font))
+    if test["notes"]:
+        story += [Spacer(1, 5 * mm), Paragraph("Примечания", styles["Heading3"]),
+                  Paragraph(escape(test["notes"]).replace("\n", "<br/>"), styles["Normal"])]
+    return _build(story, title)
+
+
+def render_image_page(path: str) -> bytes:
+    """Скан (изображение) на странице A4 с сохранением пропорций"""
+    from PIL import Image
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    with Image.open(path) as image:
+        width, height = image.size
+    page = landscape(A4) if width > height else A4
+    scale = min(page[0] / width, page[1] / height)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=page)
+    # JPEG встраивается как есть, без перекодирования
+    pdf.drawImage(ImageReader(path), (page[0] - width * scale) / 2, (page[1] - height * scale) / 2,
+                  width * scale, height * scale)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_placeholder(title: str, reason: str) -> bytes:
+    """Страница на месте файла, который не удалось включить в отчет"""
+    from reportlab.platypus import Paragraph
+
+    _, styles = _styles()
+    return _build([Paragraph(escape(title), styles["Heading2"]), Paragraph(escape(reason), styles["Normal"])], title)
+
+
+# --- Сборка ---------------------------------------------------------------
+
+@dataclass
+class ReportPart:
+    """Часть отчета: готовый PDF на диске или функция построения PDF"""
+    title: Optional[str]
+    path: Optional[str] = None
+    render: Optional[Callable[..., bytes]] = None
+    args: Tuple = ()
+
+
+def file_part(title: str, path: Optional[str]) -> ReportPart:
+    """Часть из файла: PDF подшивается как есть, изображение — страницей"""
+    if not path or not os.path.isfile(path):
+        return ReportPart(title, render=render_placeholder, args=(title, "Файл не найден"))
+    if path.lower().endswith(REPORT_IMAGE_EXTENSIONS):
+        return ReportPart(title, render=render_image_page, args=(path,))
+    return ReportPart(title, path=path)
+
+
+_report_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_report_pool() -> ProcessPoolExecutor:
+    global _report_pool
+    if _report_pool is None:
+        _report_pool = ProcessPoolExecutor(max_workers=settings.REPORT_WORKERS)
+    return _report_pool
+
+
+def close_report_pool() -> None:
+    global _report_pool
+    if _report_pool is not None:
+        _report_pool.shutdown(wait=False, cancel_futures=True)
+        _report_pool = None
+
+
+def _append(writer: PdfStreamWriter, part: ReportPart, source) -> None:
+    """Подшивка части: bytes — построенный PDF, str — файл, None — часть не построилась"""
+    from PyPDF2 import PdfReader
+
+    try:
+        if source is None:
+            source = render_placeholder(part.title or "Документ", "Не удалось построить страницу")
+        if isinstance(source, bytes):
+            writer.add_document(PdfReader(io.BytesIO(source)), part.title)
+        else:
+            with open(source, "rb") as f:
+                writer.add_document(PdfReader(f), part.title)
+    except Exception as e:
+        logger.warning(f"Report part {part.title or source!r} skipped: {e}")
+        placeholder = render_placeholder(part.title or "Документ", "Файл поврежден или зашифрован")
+        writer.add_document(PdfReader(io.BytesIO(placeholder)), part.title)
+    writer.out.flush()
+
+
+class ReportAssembler:
+    """Постраничная склейка частей отчета с построением следующих частей в пуле"""
+
+    def __init__(
+            self,
+            parts: Sequence[ReportPart],
+            pool: Optional[ProcessPoolExecutor] = None,
+            render_ahead: Optional[int] = None
+    ):
+        self.parts = parts
+        self.pool = pool
+        self.render_ahead = render_ahead or settings.REPORT_RENDER_AHEAD
+        self.pages = 0
+
+    async def write(self, out: IO[bytes], progress: Optional[asyncio.Event] = None) -> int:
+        """Запись отчета в out; progress выставляется после каждой части"""
+        loop = asyncio.get_running_loop()
+        pool = self.pool or get_report_pool()
+        writer = PdfStreamWriter(out)
+        parts = iter(self.parts)
+        pending: deque = deque()
+
+        def submit() -> None:
+            for part in parts:
+                future = loop.run_in_executor(pool, part.render, *part.args) if part.render else None
+                pending.append((part, future))
+                if len(pending) >= self.render_ahead:
+                    return
+
+        try:
+            submit()
+            while pending:
+                part, future = pending.popleft()
+                submit()
+                source = part.path
+                if future is not None:
+                    try:
+                        source = await future
+                    except Exception as e:
+                        logger.warning(f"Report part {part.title!r} failed to render: {e}")
+                        source = None
+                await asyncio.to_thread(_append, writer, part, source)
+                if progress is not None:
+                    progress.set()
+            await asyncio.to_thread(writer.close)
+            out.flush()
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+        self.pages = writer.page_count
+        return self.pages
+
+    async def stream(self, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Отчет блоками по мере записи во временный файл"""
+        chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        fd, path = tempfile.mkstemp(prefix="report-", suffix=".pdf")
+        with os.fdopen(fd, "w+b") as out, open(path, "rb") as source:
+            # Файл удаляется сразу: он живет, пока открыт, и не остается после сбоя
+            os.unlink(path)
+            progress = asyncio.Event()
+            task = asyncio.ensure_future(self.write(out, progress))
+            try:
+                while True:
+                    progress.clear()
+                    chunk = source.read(chunk_size)
+                    if chunk:
+                        yield chunk
+                        continue
+                    if task.done():
+                        break
+                    waiter = asyncio.ensure_future(progress.wait())
+                    await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                task.result()
+                while chunk := source.read(chunk_size):
+                    yield chunk
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+
+# --- Отчеты по испытаниям ------------------------------------------------
+
+def _protocol_data(test: TestResult) -> Dict[str, Any]:
+    material = test.material
+    return {
+        "id": test.id,
+        "batch_number": material.batch_number,
+        "material_type": material.material_type,
+        "grade": material.grade,
+        "supplier": material.supplier,
+        "test_type": test.test_type.value,
+        "test_category": test.test_category.value,
+        "test_method": test.test_method,
+        "equipment_used": test.equipment_used,
+        "tested_at": f"{test.tested_at:%d.%m.%Y}" if test.tested_at else "",
+        "pass_fail": test.pass_fail,
+        "numeric_results": test.numeric_results,
+        "test_conditions": test.test_conditions,
+        "notes": test.notes,
+    }
+
+
+class ReportService:
+    """Состав сводных отчетов по испытаниям"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _query(self):
+        return select(TestResult).options(selectinload(TestResult.material), selectinload(TestResult.certificate))
+
+    async def _certificates(self, material_ids: Sequence[int]) -> Dict[int, List[Certificate]]:
+        result = await self.db.execute(
+            select(Certificate)
+            .where(Certificate.material_id.in_(set(material_ids)))
+            .order_by(Certificate.material_id, Certificate.issued_date, Certificate.id)
+        )
+        by_material: Dict[int, List[Certificate]] = {}
+        for certificate in result.scalars():
+            by_material.setdefault(certificate.material_id, []).append(certificate)
+        return by_material
+
+    def _parts(
+            self,
+            title: str,
+            subtitle: str,
+            tests: List[TestResult],
+            certificates: Dict[int, List[Certificate]]
+    ) -> List[ReportPart]:
+        """Титульный лист, затем по каждой партии: протоколы, вложения, сертификаты"""
+        cover_rows = [
+            [str(test.id), test.material.batch_number, test.test_type.value,
+             f"{test.tested_at:%d.%m.%Y}" if test.tested_at else "",
+             RESULT_LABELS.get(test.pass_fail, test.pass_fail)]
+            for test in tests
+        ]
+        parts = [ReportPart(title, render=render_cover, args=(title, subtitle, cover_rows))]
+        by_material: Dict[int, List[TestResult]] = {}
+        for test in tests:
+            by_material.setdefault(test.material_id, []).append(test)
+
+        for material_id, material_tests in by_material.items():
+            batch = material_tests[0].material.batch_number
+            for test in material_tests:
+                parts.append(ReportPart(
+                    f"{batch}: протокол № {test.id} ({test.test_type.value})",
+                    render=render_protocol, args=(_protocol_data(test),),
+                ))
+                for i, attachment in enumerate(test.attachments or [], 1):
+                    parts.append(file_part(f"{batch}: вложение {i} к протоколу № {test.id}", attachment))
+            for certificate in certificates.get(material_id, []):
+                if certificate.pdf_path:
+                    parts.append(file_part(f"{batch}: сертификат {certificate.certificate_number}",
+                                           certificate.pdf_path))
+                if certificate.original_certificate_path:
+                    parts.append(file_part(f"{batch}: сертификат поставщика {certificate.certificate_number}",
+                                           certificate.original_certificate_path))
+        return parts
+
+    def _check_size(self, count: int) -> None:
+        if count > settings.MAX_REPORT_TESTS:
+            raise ValidationException(
+                f"At most {settings.MAX_REPORT_TESTS} tests can be included in one report, narrow the filter"
+            )
+
+    async def bulk_report(self, test_ids: Sequence[int]) -> ReportAssembler:
+        """Отчет по выбранным испытаниям в порядке test_ids"""
+        ids = list(dict.fromkeys(test_ids))
+        if not ids:
+            raise ValidationException("No tests selected")
+        self._check_size(len(ids))
+        found = {test.id: test for test in (await self.db.execute(self._query().where(TestResult.id.in_(ids)))).scalars()}
+        missing = [test_id for test_id in ids if test_id not in found]
+        if missing:
+            raise NotFoundException(f"Tests not found: {', '.join(map(str, missing))}")
+        tests = [found[test_id] for test_id in ids]
+        # Сертификаты, на которые ссылаются выбранные испытания
+        certificates: Dict[int, List[Certificate]] = {}
+        for test in tests:
+            if test.certificate is not None and test.certificate not in certificates.get(test.material_id, []):
+                certificates.setdefault(test.material_id, []).append(test.certificate)
+        return ReportAssembler(self._parts(
+            "Отчет по испытаниям", f"Испытаний: {len(tests)}", tests, certificates
+        ))
+
+    async def full_report(
+            self,
+            date_from: Optional[datetime] = None,
+            date_to: Optional[datetime] = None,
+            material_id: Optional[int] = None
+    ) -> ReportAssembler:
+        """Досье по всем испытаниям за период (или по партии) со всеми сертификатами партий"""
+        query = self._query().order_by(TestResult.material_id, TestResult.tested_at, TestResult.id)
+        period = []
+        if date_from is not None:
+            query = query.where(TestResult.tested_at >= date_from)
+            period.append(f"с {date_from:%d.%m.%Y}")
+        if date_to is not None:
+            query = query.where(TestResult.tested_at <= date_to)
+            period.append(f"по {date_to:%d.%m.%Y}")
+        if material_id is not None:
+            query = query.where(TestResult.material_id == material_id)
+        tests = list((await self.db.execute(query.limit(settings.MAX_REPORT_TESTS + 1))).scalars())
+        self._check_size(len(tests))
+        if not tests:
+            raise NotFoundException("No tests match the report filter")
+
+        subtitle = " ".join(period) or "За весь период"
+        if material_id is not None:
+            subtitle = f"Партия {tests[0].material.batch_number}. {subtitle}"
+        certificates = await self._certificates([test.material_id for test in tests])
+        return ReportAssembler(self._parts("Полный отчет по испытаниям", subtitle, tests, certificates))
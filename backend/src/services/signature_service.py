@@ -0,0 +1,362 @@
+"""
+Signature Service - электронная подпись сертификатов
+
+Сертификат подписывается локальным ключом Ed25519 (SIGNING_KEY_PATH,
+создается при первом запуске). Подписывается SHA-256 канонического JSON
+полей сертификата, поэтому в процессы пула передаются 32 байта на
+сертификат, а не весь документ. В digital_signature хранится строка
+ed25519:<идентификатор ключа>:<подпись в base64>.
+
+Пакетная подпись и проверка режутся на части по SIGNATURE_CHUNK_SIZE и
+выполняются в пуле процессов (ключ загружается в каждый процесс один раз
+при его запуске); небольшие пакеты обрабатываются в потоке,
+без накладных расходов на передачу между процессами. Результат проверки
+детерминирован парой (хэш содержимого, подпись) и кешируется в LRU, так
+что повторный аудит неизменных сертификатов не тратит время на криптографию.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.exceptions import NotFoundException, ValidationException
+from src.models.certificate import Certificate
+
+SIGNATURE_ALGORITHM = "ed25519"
+
+# Подписываемые поля; служебные отметки (истечение срока, аннулирование,
+# пути к файлам) меняются после выпуска и в подпись не входят
+SIGNED_COLUMNS = (
+    Certificate.id,
+    Certificate.certificate_number,
+    Certificate.material_id,
+    Certificate.certificate_type,
+    Certificate.issued_date,
+    Certificate.valid_until,
+    Certificate.issued_by,
+    Certificate.summary,
+    Certificate.conclusions,
+    Certificate.recommendations,
+    Certificate.certificate_metadata,
+)
+
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # SQLite возвращает наивное UTC-время, PostgreSQL — с часовым поясом
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return value
+
+
+def certificate_payload(row: Mapping[str, Any]) -> bytes:
+    """Канонический JSON подписываемых полей (ключи отсортированы, без пробелов)"""
+    data = {column.key: _canonical_value(row[column.key]) for column in SIGNED_COLUMNS}
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def certificate_digest(row: Mapping[str, Any]) -> bytes:
+    """Хэш содержимого сертификата — то, что подписывается"""
+    return hashlib.sha256(certificate_payload(row)).digest()
+
+
+def load_or_create_key(path: str):
+    """Закрытый ключ из PEM-файла; при отсутствии файла ключ создается"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    key_path = Path(path)
+    try:
+        return serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    except FileNotFoundError:
+        pass
+
+    key = Ed25519PrivateKey.generate()
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    key_path.parent.mkdir(parents=True, exist_ok=True)
+    # Ключ пишется во временный файл и ссылкой ставится на место: другой
+    # воркер видит либо отсутствие файла, либо ключ целиком
+    fd, tmp = tempfile.mkstemp(prefix=f".{key_path.name}.", dir=key_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp, key_path)
+        except FileExistsError:
+            # Ключ одновременно создал другой воркер
+            return serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    finally:
+        os.unlink(tmp)
+    logger.warning(f"Generated new certificate signing key {key_path}")
+    return key
+
+
+# Ключ процесса пула: передается один раз при запуске процесса, а не с каждой частью
+_pool_key = None
+
+
+def _init_pool_worker(private_key: bytes) -> None:
+    global _pool_key
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    _pool_key = Ed25519PrivateKey.from_private_bytes(private_key)
+
+
+def sign_digests(digests: List[bytes], key=None) -> List[bytes]:
+    """Подпись пакета хэшей; без key — ключом процесса пула"""
+    key = key or _pool_key
+    return [key.sign(digest) for digest in digests]
+
+
+def verify_digests(items: List[Tuple[bytes, bytes]], key=None) -> List[bool]:
+    """Проверка пакета пар (хэш, подпись); без key — открытым ключом процесса пула"""
+    from cryptography.exceptions import InvalidSignature
+
+    key = key or _pool_key.public_key()
+    results = []
+    for digest, signature in items:
+        try:
+            key.verify(signature, digest)
+            results.append(True)
+        except InvalidSignature:
+            results.append(False)
+    return results
+
+
+class CertificateSigner:
+    """Локальный ключ подписи, пул процессов и кеш результатов проверки"""
+
+    def __init__(
+            self,
+            key_path: Optional[str] = None,
+            workers: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            cache_size: Optional[int] = None
+    ):
+        self.key_path = key_path or settings.SIGNING_KEY_PATH
+        self.workers = workers or settings.SIGNATURE_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings.SIGNATURE_CHUNK_SIZE
+        self.cache_size = cache_size if cache_size is not None else settings.SIGNATURE_CACHE_SIZE
+        self._private_key = None
+        self._public_key = None
+        self.key_id: Optional[str] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (хэш содержимого, строка подписи) -> результат проверки
+        self._cache: "OrderedDict[Tuple[bytes, str], bool]" = OrderedDict()
+        self.cache_hits = 0
+
+    def _load_key(self) -> None:
+        if self._private_key is not None:
+            return
+        from cryptography.hazmat.primitives import serialization
+
+        self._private_key = load_or_create_key(self.key_path)
+        self._public_key = self._private_key.public_key()
+        self.key_id = hashlib.sha256(self._public_key.public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )).hexdigest()[:16]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            from cryptography.hazmat.primitives import serialization
+
+            raw = self._private_key.private_bytes(
+                serialization.Encoding.Raw, serialization.PrivateFormat.Raw, serialization.NoEncryption()
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_pool_worker, initargs=(raw,)
+            )
+        return self._executor
+
+    async def _map(self, func, key, items: list) -> list:
+        """func по частям в пуле процессов; один неполный пакет — в потоке с ключом key"""
+        if not items:
+            return []
+        if len(items) <= self.chunk_size:
+            return await asyncio.to_thread(func, items, key)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # Процессы пула подписывают своим ключом из initializer: передаются только хэши
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(executor, func, items[i:i + self.chunk_size])
+            for i in range(0, len(items), self.chunk_size)
+        ))
+        return [result for part in parts for result in part]
+
+    async def sign(self, digests: List[bytes]) -> List[str]:
+        """Подписи хэшей в формате digital_signature"""
+        self._load_key()
+        signatures = await self._map(sign_digests, self._private_key, digests)
+        return [
+            f"{SIGNATURE_ALGORITHM}:{self.key_id}:{base64.b64encode(signature).decode()}"
+            for signature in signatures
+        ]
+
+    def _decode(self, signature: str) -> Optional[bytes]:
+        algorithm, _, rest = signature.partition(":")
+        key_id, _, encoded = rest.partition(":")
+        if algorithm != SIGNATURE_ALGORITHM or key_id != self.key_id:
+            return None
+        try:
+            return base64.b64decode(encoded, validate=True)
+        except ValueError:
+            return None
+
+    def _remember(self, key: Tuple[bytes, str], valid: bool) -> None:
+        self._cache[key] = valid
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def verify(self, items: Sequence[Tuple[bytes, str]]) -> List[bool]:
+        """Проверка пар (хэш содержимого, digital_signature); известные пары — из кеша"""
+        self._load_key()
+        results: List[Optional[bool]] = [None] * len(items)
+        pending: List[int] = []
+        raw: List[Tuple[bytes, bytes]] = []
+        for i, (digest, signature) in enumerate(items):
+            cached = self._cache.get((digest, signature))
+            if cached is not None:
+                self._cache.move_to_end((digest, signature))
+                self.cache_hits += 1
+                results[i] = cached
+                continue
+            decoded = self._decode(signature)
+            if decoded is None:
+                # Чужой ключ или поврежденная строка
+                results[i] = False
+                continue
+            pending.append(i)
+            raw.append((digest, decoded))
+
+        for i, valid in zip(pending, await self._map(verify_digests, self._public_key, raw)):
+            results[i] = valid
+            self._remember(items[i], valid)
+        return results
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_signer: Optional[CertificateSigner] = None
+
+
+def get_signer() -> CertificateSigner:
+    global _signer
+    if _signer is None:
+        _signer = CertificateSigner()
+    return _signer
+
+
+def close_signer() -> None:
+    global _signer
+    if _signer is not None:
+        _signer.shutdown()
+        _signer = None
+
+
+@dataclass
+class VerificationReport:
+    """Итоги пакетной проверки подписей"""
+    checked: int = 0
+    valid: int = 0
+    invalid: List[int] = field(default_factory=list)
+    unsigned: List[int] = field(default_factory=list)
+    cached: int = 0
+    seconds: float = 0.0
+
+
+class SignatureService:
+    """Пакетная подпись и проверка сертификатов из базы"""
+
+    def __init__(self, db: AsyncSession, signer: Optional[CertificateSigner] = None):
+        self.db = db
+        self.signer = signer or get_signer()
+
+    async def sign(self, certificate_ids: Sequence[int]) -> int:
+        """Подпись сертификатов (повторная подпись заменяет прежнюю)"""
+        ids = list(dict.fromkeys(certificate_ids))
+        if not ids:
+            raise ValidationException("No certificates selected")
+        if len(ids) > settings.MAX_SIGN_BATCH:
+            raise ValidationException(f"At most {settings.MAX_SIGN_BATCH} certificates can be signed at once")
+        rows = (await self.db.execute(select(*SIGNED_COLUMNS).where(Certificate.id.in_(ids)))).mappings().all()
+        missing = set(ids) - {row["id"] for row in rows}
+        if missing:
+            raise NotFoundException(f"Certificates not found: {', '.join(map(str, sorted(missing)))}")
+
+        signatures = await self.signer.sign([certificate_digest(row) for row in rows])
+        signed_at = datetime.utcnow()
+        await self.db.execute(update(Certificate), [
+            {"id": row["id"], "digital_signature": signature, "signature_timestamp": signed_at}
+            for row, signature in zip(rows, signatures)
+        ])
+        await self.db.commit()
+        logger.info(f"Signed {len(rows)} certificates with key {self.signer.key_id}")
+        return len(rows)
+
+    async def verify(
+            self,
+            certificate_ids: Optional[Sequence[int]] = None,
+            page_size: int = 5000
+    ) -> VerificationReport:
+        """
+        Проверка подписей выбранных сертификатов или всех сертификатов
+
+        Сертификаты читаются потоком страницами по page_size; проверка
+        страницы идет в пуле, пока читается следующая.
+        """
+        started = time.perf_counter()
+        report = VerificationReport()
+        hits_before = self.signer.cache_hits
+        query = select(*SIGNED_COLUMNS, Certificate.digital_signature).order_by(Certificate.id)
+        if certificate_ids is not None:
+            query = query.where(Certificate.id.in_(set(certificate_ids)))
+
+        checks: List[Tuple[List[int], asyncio.Task]] = []
+        stream = await self.db.stream(query.execution_options(yield_per=page_size))
+        async for page in stream.mappings().partitions():
+            ids, items = [], []
+            for row in page:
+                if not row["digital_signature"]:
+                    report.unsigned.append(row["id"])
+                    continue
+                ids.append(row["id"])
+                items.append((certificate_digest(row), row["digital_signature"]))
+            if items:
+                checks.append((ids, asyncio.ensure_future(self.signer.verify(items))))
+
+        for ids, task in checks:
+            for certificate_id, valid in zip(ids, await task):
+                report.checked += 1
+                if valid:
+                    report.valid += 1
+                else:
+                    report.invalid.append(certificate_id)
+        report.cached = self.signer.cache_hits - hits_before
+        report.seconds = time.perf_counter() - started
+        if report.invalid:
+            logger.warning(f"Certificate signature check failed for {len(report.invalid)} certificates")
+        return report
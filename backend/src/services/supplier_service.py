@@ -0,0 +1,196 @@
+"""
+Supplier Service - показатели качества поставщиков
+
+Показатели ведет src/models/supplier.py при каждой вставке записи истории;
+сервис только читает готовые агрегаты. rebuild_scores пересчитывает их
+с нуля по всей истории, включая архив закрытых партий, — для начального
+заполнения и сверки.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import replica_read
+from src.models.certificate import TestResult
+from src.models.material import Material
+from src.models.supplier import (
+    DECISIONS,
+    SupplierScore,
+    SupplierTestStat,
+    classify_state,
+    ewma,
+    naive_utc,
+    supplier_key,
+)
+from src.models.workflow import WorkflowHistoryArchive, WorkflowState
+from src.services.history_service import decode_state_values, read_segment
+
+
+def _history(connection) -> List[Tuple[Any, ...]]:
+    """
+    Вся история workflow: горячие строки и сегменты архива
+
+    (changed_at, id, material_id, state_name, previous_state) в порядке
+    changed_at. Недоступный файл архива прерывает пересчет до удаления
+    прежних показателей.
+    """
+    states = [
+        (changed_at, state_id, material_id, state_name, previous_state)
+        for state_id, material_id, state_name, previous_state, changed_at in connection.execute(
+            select(WorkflowState.id, WorkflowState.material_id, WorkflowState.state_name,
+                   WorkflowState.previous_state, WorkflowState.changed_at)
+        )
+    ]
+    segments = connection.execute(
+        select(WorkflowHistoryArchive.path, WorkflowHistoryArchive.offset, WorkflowHistoryArchive.length)
+        .order_by(WorkflowHistoryArchive.id)
+    )
+    for path, offset, length in segments:
+        for line in read_segment(path, offset, length):
+            values = decode_state_values(line)
+            states.append((values["changed_at"], values["id"], values["material_id"],
+                           values["state_name"], values.get("previous_state")))
+    states.sort(key=lambda state: (naive_utc(state[0]) if state[0] else datetime.min, state[1]))
+    return states
+
+
+def _tests_by_material(connection) -> Dict[int, Tuple[List[datetime], List[Tuple[str, int, int]]]]:
+    """Испытания одним сгруппированным запросом: материал -> (tested_at, (вид, всего, неудачных))"""
+    rows = connection.execute(
+        select(TestResult.material_id, TestResult.tested_at, TestResult.test_type,
+               func.count(), func.count().filter(TestResult.pass_fail == "FAIL"))
+        .where(TestResult.tested_at.is_not(None))
+        .group_by(TestResult.material_id, TestResult.tested_at, TestResult.test_type)
+        .order_by(TestResult.material_id, TestResult.tested_at)
+    )
+    tests: Dict[int, Tuple[List[datetime], List[Tuple[str, int, int]]]] = {}
+    for material_id, tested_at, test_type, total, failed in rows:
+        times, results = tests.setdefault(material_id, ([], []))
+        times.append(naive_utc(tested_at))
+        results.append((getattr(test_type, "value", test_type), total, failed))
+    return tests
+
+
+def rebuild_scores(connection) -> int:
+    """
+    Пересчет показателей всех поставщиков по истории (синхронное соединение)
+
+    Учитываются и горячая история, и архив закрытых партий. Решения
+    обрабатываются в порядке changed_at, как их применяли бы инкрементальные
+    обновления; испытания между решениями берутся из одного
+    сгруппированного запроса, как их считает decision_tests. Возвращает
+    число поставщиков.
+    """
+    alpha = settings.SUPPLIER_SCORE_ALPHA
+    materials = {
+        row.id: row for row in connection.execute(
+            select(Material.id, Material.supplier, Material.received_date)
+        )
+    }
+    history = _history(connection)
+    material_tests = _tests_by_material(connection)
+    scores: Dict[str, Dict[str, Any]] = {}
+    tests: Dict[tuple, Dict[str, Any]] = {}
+    last_decision: Dict[int, datetime] = {}
+
+    for changed_at, _, material_id, state_name, previous_state in history:
+        kind = classify_state(state_name, previous_state)
+        material = materials.get(material_id)
+        if kind is None or material is None:
+            continue
+        key = supplier_key(material.supplier)
+        at = naive_utc(changed_at)
+        score = scores.setdefault(key, {
+            "supplier_key": key, "supplier": material.supplier, "materials_received": 0, "accepted": 0,
+            "rejected": 0, "acceptance_rate": None, "lead_time_hours": None,
+            "last_received_at": None, "last_decision_at": None,
+        })
+        if kind not in DECISIONS:
+            score.update(supplier=material.supplier, last_received_at=at)
+            score["materials_received"] += 1
+            continue
+
+        value = DECISIONS[kind]
+        score["accepted" if value == 1.0 else "rejected"] += 1
+        score["acceptance_rate"] = ewma(score["acceptance_rate"], value, alpha)
+        score["last_decision_at"] = at
+        if material.received_date is not None:
+            lead_time = max((at - naive_utc(material.received_date)).total_seconds() / 3600, 0.0)
+            score["lead_time_hours"] = ewma(score["lead_time_hours"], lead_time, alpha)
+
+        # Испытания в интервале (предыдущее решение, это решение]
+        times, results = material_tests.get(material_id, ([], []))
+        since = last_decision.get(material_id)
+        window = results[bisect_right(times, since) if since is not None else 0:bisect_right(times, at)]
+        by_type: Dict[str, List[int]] = {}
+        for test_type, total, failed in window:
+            counts = by_type.setdefault(test_type, [0, 0])
+            counts[0] += total
+            counts[1] += failed
+        for test_type, (total, failed) in by_type.items():
+            stat = tests.setdefault((key, test_type), {
+                "supplier_key": key, "test_type": test_type, "tests": 0, "failures": 0, "failure_rate": None,
+            })
+            stat["tests"] += total
+            stat["failures"] += failed
+            stat["failure_rate"] = ewma(stat["failure_rate"], failed / total, alpha)
+        last_decision[material_id] = at
+
+    connection.execute(delete(SupplierTestStat))
+    connection.execute(delete(SupplierScore))
+    if scores:
+        connection.execute(insert(SupplierScore), list(scores.values()))
+    if tests:
+        connection.execute(insert(SupplierTestStat), list(tests.values()))
+    return len(scores)
+
+
+class SupplierService:
+    """Чтение показателей поставщиков"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_score(self, supplier: str) -> Optional[SupplierScore]:
+        """Показатели поставщика по названию в любом написании"""
+        return await self.db.scalar(select(SupplierScore).where(SupplierScore.supplier_key == supplier_key(supplier)))
+
+    @replica_read
+    async def get_scorecards(self, trusted_only: bool = False) -> List[Dict[str, Any]]:
+        """Показатели всех поставщиков с долей неудачных испытаний по видам"""
+        scores = (await self.db.execute(select(SupplierScore).order_by(SupplierScore.supplier))).scalars().all()
+        stats = defaultdict(list)
+        for stat in (await self.db.execute(
+                select(SupplierTestStat).order_by(SupplierTestStat.test_type)
+        )).scalars():
+            stats[stat.supplier_key].append(stat)
+        return [
+            {
+                "supplier": score.supplier,
+                "supplier_key": score.supplier_key,
+                "materials_received": score.materials_received,
+                "accepted": score.accepted,
+                "rejected": score.rejected,
+                "acceptance_rate": score.acceptance_rate,
+                "rejection_rate": score.rejection_rate,
+                "lead_time_hours": score.lead_time_hours,
+                "last_received_at": score.last_received_at,
+                "last_decision_at": score.last_decision_at,
+                "is_trusted": score.is_trusted,
+                "test_failures": stats.get(score.supplier_key, []),
+            }
+            for score in scores
+            if score.is_trusted or not trusted_only
+        ]
+
+    async def rebuild(self) -> int:
+        """Пересчет всех показателей по истории"""
+        connection = await self.db.connection()
+        count = await connection.run_sync(rebuild_scores)
+        await self.db.commit()
+        return count
@@ -0,0 +1,78 @@
+"""
+Общие фикстуры тестов
+"""
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+from src.core.database import Base, get_db
+from src.core.query_counter import install_query_counter
+from src.main import app
+from src.models import Material, MaterialStatus, User, UserRole
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    """Отдельная in-memory SQLite база на каждый тест"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    install_query_counter(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session(db_engine):
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def sample_material(db_session):
+    """Пользователь и одобренный материал"""
+    user = User(
+        username="warehouse",
+        full_name="Кладовщик",
+        email="warehouse@example.com",
+        password_hash="x",
+        role=UserRole.WAREHOUSE_KEEPER,
+    )
+    db_session.add(user)
+    await db_session.flush()
+
+    material = Material(
+        batch_number="BATCH-TEST-001",
+        material_type="steel",
+        grade="09Г2С",
+        quantity=100.0,
+        unit="kg",
+        supplier="ООО МеталлСервис",
+        status=MaterialStatus.APPROVED.value,
+        created_by=user.id,
+    )
+    db_session.add(material)
+    await db_session.commit()
+    return material
+
+
+@pytest_asyncio.fixture
+async def api_client(db_session):
+    """HTTP-клиент приложения с сессией тестовой базы и токеном администратора"""
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            login = await client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "password"})
+            client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
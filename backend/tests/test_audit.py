@@ -0,0 +1,107 @@
+"""
+Тесты хэш-цепочек истории workflow
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, update
+
+from src.models import Material, MaterialStatus, WorkflowState
+from src.services.audit_service import AuditService
+from src.services.history_service import HistoryService
+from src.services.material_service import MaterialService
+
+
+@pytest.mark.asyncio
+async def test_history_chain_detects_tampering(db_session, sample_material):
+    service = MaterialService(db_session)
+    user_id = sample_material.created_by
+    for purpose in ("сварка", "резка", "гибка"):
+        await service.reserve_material(sample_material.id, 10.0, user_id, purpose=purpose)
+
+    history = await service.get_material_history(sample_material.id)
+    assert history[0].prev_hash is None
+    assert [s.prev_hash for s in history[1:]] == [s.row_hash for s in history[:-1]]
+
+    audit = AuditService(db_session)
+    assert await audit.verify_material(sample_material.id) == []
+
+    await db_session.execute(
+        update(WorkflowState).where(WorkflowState.id == history[1].id).values(notes="Reserved 1 kg")
+    )
+    await db_session.commit()
+    assert await audit.verify_material(sample_material.id) == [(history[1].id, "content does not match hash")]
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_and_archive_keep_chain_verifiable(db_session, sample_material, tmp_path):
+    base = datetime(2024, 3, 1, 9, 0)
+    for i, state in enumerate(["received", "testing", "approved"]):
+        db_session.add(WorkflowState(
+            material_id=sample_material.id,
+            state_name=state,
+            changed_by=sample_material.created_by,
+            changed_at=base + timedelta(hours=i * 12),
+        ))
+    sample_material.status = MaterialStatus.REJECTED.value
+    await db_session.commit()
+
+    audit = AuditService(db_session)
+    checkpoints = await audit.create_checkpoints(until=base.date() + timedelta(days=1))
+    assert [(c.day, c.leaf_count) for c in checkpoints] == [(base.date(), 2), (base.date() + timedelta(days=1), 1)]
+
+    await HistoryService(db_session).archive_closed_materials(
+        older_than_days=0, archive_path=str(tmp_path), now=datetime.utcnow() + timedelta(days=1)
+    )
+    # Цепочка продолжается от последней архивной записи
+    db_session.add(WorkflowState(
+        material_id=sample_material.id,
+        state_name="rejected",
+        changed_by=sample_material.created_by,
+    ))
+    await db_session.commit()
+
+    assert await audit.verify_material(sample_material.id) == []
+    report = await audit.verify_all(workers=1)
+    assert report.ok, (report.problems, report.checkpoint_problems)
+    assert (report.records, report.archived_records, report.checkpoints) == (1, 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_sealed_legacy_history_detects_removed_or_unsealed_head(db_session, sample_material):
+    user_id = sample_material.created_by
+    second = Material(batch_number="BATCH-TEST-002", material_type="steel", quantity=5.0, unit="kg",
+                      supplier="ООО МеталлСервис", created_by=user_id)
+    db_session.add(second)
+    await db_session.flush()
+    # История, загруженная в обход ORM, — без подписи
+    await db_session.execute(insert(WorkflowState), [
+        {"material_id": material_id, "state_name": state, "changed_by": user_id,
+         "changed_at": datetime(2024, 3, 1, 9 + i), "extra_data": {}}
+        for material_id in (sample_material.id, second.id)
+        for i, state in enumerate(["received", "testing", "approved"])
+    ])
+    await db_session.commit()
+
+    audit = AuditService(db_session)
+    history = await HistoryService(db_session).get_history(sample_material.id)
+    assert await audit.verify_material(sample_material.id) == [(s.id, "unsealed record") for s in history]
+    assert await audit.seal_legacy() == 6
+    assert await audit.verify_material(sample_material.id) == []
+
+    # Снятие подписи с первой записи и ее правка
+    await db_session.execute(
+        update(WorkflowState).where(WorkflowState.id == history[0].id).values(row_hash=None, state_name="approved")
+    )
+    # Удаление первой записи второго материала
+    second_history = await HistoryService(db_session).get_history(second.id)
+    await db_session.execute(delete(WorkflowState).where(WorkflowState.id == second_history[0].id))
+    await db_session.commit()
+
+    assert await audit.verify_material(sample_material.id) == [(history[1].id, "broken link to previous record")]
+    assert await audit.verify_material(second.id) == [(second_history[1].id, "broken link to previous record")]
+    report = await audit.verify_all(workers=1)
+    assert sorted(report.problems) == sorted([
+        (sample_material.id, history[1].id, "broken link to previous record"),
+        (second.id, second_history[1].id, "broken link to previous record"),
+    ])
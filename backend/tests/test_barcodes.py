@@ -0,0 +1,75 @@
+"""
+Тесты штрих-кодов и бирок материалов
+"""
+import io
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+from sqlalchemy import insert, select
+
+from src.core.barcodes import is_material_barcode, material_barcode, render_barcode
+from src.core.exceptions import NotFoundException, ValidationException
+from src.models.material import Material, MaterialStatus
+from src.services.barcode_service import BarcodeImageCache, BarcodeService
+
+
+def test_material_barcode_is_deterministic_and_checked():
+    code = material_barcode(123)
+    assert code == material_barcode(123)
+    assert code.startswith("MT000000123")
+    assert is_material_barcode(code)
+    # Одна ошибочная цифра ловится контрольной
+    assert not is_material_barcode(code[:-2] + str((int(code[-2]) + 1) % 10) + code[-1])
+
+    with Image.open(io.BytesIO(render_barcode(code, "qr", "png", scale=4))) as image:
+        assert image.size == (29 * 4, 29 * 4)
+    assert render_barcode(code, "code128", "svg").startswith(b"<svg")
+
+
+@pytest.mark.asyncio
+async def test_lookup_images_and_label_sheet(db_session, sample_material, tmp_path):
+    assert sample_material.barcode == material_barcode(sample_material.id)
+
+    cache = BarcodeImageCache(str(tmp_path), max_bytes=1024 * 1024)
+    service = BarcodeService(db_session, cache=cache)
+    found = await service.find_by_barcode(sample_material.barcode.lower())
+    assert found.id == sample_material.id
+    mistyped = sample_material.barcode[:-1] + str((int(sample_material.barcode[-1]) + 1) % 10)
+    with pytest.raises(ValidationException):
+        await service.find_by_barcode(mistyped)
+    with pytest.raises(NotFoundException):
+        await service.find_by_barcode(material_barcode(999))
+
+    barcode, first = await service.get_image(sample_material.id, "qr", "png")
+    _, second = await service.get_image(sample_material.id, "qr", "png")
+    assert first == second and (cache.hits, cache.misses) == (1, 1)
+    # Новый процесс берет картинку с диска
+    fresh = BarcodeImageCache(str(tmp_path))
+    assert await fresh.get("qr", barcode, "png") == first
+
+    pdf = await service.label_sheet([sample_material.id] * 30)
+    assert len(PdfReader(io.BytesIO(pdf)).pages) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_inserted_material_without_barcode(db_session, sample_material, tmp_path):
+    # Массовая загрузка (COPY, Core insert) минует хук модели и оставляет код пустым
+    material_id = (await db_session.execute(
+        insert(Material).values(
+            batch_number="BATCH-BULK-001", material_type="steel", quantity=1.0, unit="kg",
+            supplier="ООО МеталлСервис", status=MaterialStatus.RECEIVED.value,
+            created_by=sample_material.created_by,
+        ).returning(Material.id)
+    )).scalar_one()
+    await db_session.commit()
+    assert await db_session.scalar(select(Material.barcode).where(Material.id == material_id)) is None
+
+    service = BarcodeService(db_session, cache=BarcodeImageCache(str(tmp_path)))
+    assert await service.get_barcode(material_id) == material_barcode(material_id)
+    assert (await service.find_by_barcode(material_barcode(material_id))).id == material_id
+    sheet = PdfReader(io.BytesIO(await service.label_sheet([material_id, sample_material.id])))
+    assert material_barcode(material_id) in sheet.pages[0].extract_text()
+
+    with pytest.raises(NotFoundException, match="Material 999 not found"):
+        await service.get_barcode(999)
@@ -0,0 +1,89 @@
+"""
+Тесты контроля сроков действия сертификатов
+"""
+from datetime import datetime, timedelta
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.models import Certificate, Material, User, UserRole
+from src.services.certificate_service import CertificateExpirySweeper, CertificateService
+
+
+@pytest.mark.asyncio
+async def test_sweeper_flags_each_deadline_once(db_engine, db_session, sample_material):
+    now = datetime(2026, 10, 19, 12, 0)
+    for number, days in (("C-EXPIRED", -1), ("C-SOON", 10), ("C-LATER", 45)):
+        db_session.add(Certificate(
+            certificate_number=number,
+            material_id=sample_material.id,
+            issued_by=sample_material.created_by,
+            valid_until=now + timedelta(days=days),
+        ))
+    await db_session.commit()
+
+    expiring = await CertificateService(db_session).get_expiring(30, now=now)
+    assert [c.certificate_number for c in expiring] == ["C-SOON"]
+    expired = await db_session.scalars(select(Certificate.certificate_number).where(Certificate.is_expired))
+    assert expired.all() == ["C-EXPIRED"]
+
+    events = []
+    sweeper = CertificateExpirySweeper(
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+        warning_days=30,
+        batch_size=1,
+        notify=lambda event, certificates: events.extend((event, c.certificate_number) for c in certificates),
+    )
+    warned, expired_count, deadline = await sweeper.sweep(now)
+    assert (warned, expired_count) == (1, 1)
+    assert sorted(events) == [("expired", "C-EXPIRED"), ("expiring", "C-SOON")]
+    # Следующий срок — истечение C-SOON, затем предупреждение для C-LATER
+    assert deadline == now + timedelta(days=10)
+
+    assert (await sweeper.sweep(now))[:2] == (0, 0)
+    assert await sweeper.sweep(deadline) == (0, 1, now + timedelta(days=15))
+    assert (await sweeper.sweep(now + timedelta(days=15)))[:2] == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_sweepers_in_several_workers_notify_once(tmp_path):
+    # Файловая база: у каждого «воркера» свое соединение
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sweep.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    now = datetime(2026, 10, 19, 12, 0)
+    async with session_factory() as session:
+        user = User(username="qc", full_name="ОТК", email="qc@example.com", password_hash="x",
+                    role=UserRole.QUALITY_CONTROL)
+        session.add(user)
+        await session.flush()
+        material = Material(batch_number="BATCH-SWEEP", material_type="steel", quantity=1.0, unit="kg",
+                            supplier="ООО МеталлСервис", created_by=user.id)
+        session.add(material)
+        await session.flush()
+        session.add_all(
+            Certificate(certificate_number=f"C-{i}", material_id=material.id, issued_by=user.id,
+                        valid_until=now - timedelta(days=i + 1))
+            for i in range(8)
+        )
+        await session.commit()
+
+    events = []
+    sweepers = [
+        CertificateExpirySweeper(
+            session_factory, warning_days=30, batch_size=2,
+            notify=lambda event, certificates: events.extend(c.certificate_number for c in certificates),
+        )
+        for _ in range(4)
+    ]
+    results = await asyncio.gather(*(sweeper.sweep(now) for sweeper in sweepers))
+    await engine.dispose()
+
+    assert sum(expired for _, expired, _ in results) == 8
+    assert sorted(events) == [f"C-{i}" for i in range(8)]
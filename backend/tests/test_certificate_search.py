@@ -0,0 +1,48 @@
+"""
+Тесты поиска сертификатов по метаданным
+"""
+import pytest
+from sqlalchemy import func, select
+
+from src.core.exceptions import ValidationException
+from src.models import Certificate, CertificateSearchTerm
+from src.services.certificate_service import CertificateService
+
+
+@pytest.mark.asyncio
+async def test_search_by_metadata_terms(db_session, sample_material):
+    metadata = {
+        "C-1": {"keywords": ["сталь", "лист"], "standards": ["ГОСТ 19281-2014"], "project": "Проект А-123"},
+        "C-2": {"keywords": ["труба"], "standards": ["ГОСТ 8732-78", "ГОСТ 19281-2014"], "project": "Проект Б-7"},
+        "C-3": {"keywords": ["сталь"], "standards": "ГОСТ 8732-78", "customer": "ООО Производство"},
+    }
+    certificates = {}
+    for number, data in metadata.items():
+        certificates[number] = Certificate(
+            certificate_number=number, material_id=sample_material.id,
+            issued_by=sample_material.created_by, certificate_metadata=data,
+        )
+        db_session.add(certificates[number])
+    await db_session.commit()
+
+    service = CertificateService(db_session)
+
+    async def numbers(**filters):
+        return sorted(c.certificate_number for c in await service.search(**filters))
+
+    assert await numbers(standard="ГОСТ 19281-2014") == ["C-1", "C-2"]
+    assert await numbers(standard="ГОСТ 8732-78") == ["C-2", "C-3"]
+    assert await numbers(keyword="сталь", standard="ГОСТ 19281-2014") == ["C-1"]
+    assert await numbers(customer="ООО Производство") == ["C-3"]
+
+    # Индекс следует за изменением и удалением
+    certificates["C-1"].certificate_metadata = {"keywords": ["лист"], "project": "Проект Б-7"}
+    await db_session.delete(certificates["C-2"])
+    await db_session.commit()
+    assert await numbers(standard="ГОСТ 19281-2014") == []
+    assert await numbers(project="Проект Б-7") == ["C-1"]
+    remaining = await db_session.scalar(select(func.count()).select_from(CertificateSearchTerm))
+    assert remaining == 5
+
+    with pytest.raises(ValidationException):
+        await service.search()
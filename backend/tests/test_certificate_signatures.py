@@ -0,0 +1,82 @@
+"""
+Тесты пакетной подписи и проверки сертификатов
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from httpx import ASGITransport, AsyncClient
+
+from src.main import app
+from src.models import Certificate
+from src.services.signature_service import CertificateSigner, SignatureService, load_or_create_key
+
+
+@pytest.mark.asyncio
+async def test_sign_and_verify_batch(db_session, sample_material, tmp_path):
+    certificates = [
+        Certificate(
+            certificate_number=f"SIG-{i}", material_id=sample_material.id,
+            issued_by=sample_material.created_by, summary="Соответствует ГОСТ 19281-2014",
+            certificate_metadata={"standards": ["ГОСТ 19281-2014"], "heat": i},
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(certificates)
+    await db_session.commit()
+
+    # chunk_size=3: пакет из 6 сертификатов уходит в пул двумя частями
+    signer = CertificateSigner(key_path=str(tmp_path / "signing.pem"), workers=2, chunk_size=3)
+    service = SignatureService(db_session, signer)
+    try:
+        assert await service.sign([c.id for c in certificates[:6]]) == 6
+        for certificate in certificates[:6]:
+            await db_session.refresh(certificate)
+            assert certificate.digital_signature.startswith(f"ed25519:{signer.key_id}:")
+            assert certificate.signature_timestamp is not None
+
+        report = await service.verify()
+        assert (report.checked, report.valid, report.invalid, report.cached) == (6, 6, [], 0)
+        assert report.unsigned == [certificates[6].id]
+
+        # Измененное содержимое не проходит проверку; неизменные — из кеша
+        certificates[2].conclusions = "Годен"
+        await db_session.commit()
+        report = await service.verify()
+        assert report.invalid == [certificates[2].id]
+        assert report.cached == 5
+
+        # Служебные отметки в подпись не входят
+        certificates[3].is_valid = False
+        await db_session.commit()
+        assert (await service.verify([certificates[3].id])).valid == 1
+
+        # Подпись другим ключом не принимается
+        other = CertificateSigner(key_path=str(tmp_path / "other.pem"), workers=1)
+        assert (await SignatureService(db_session, other).verify([certificates[0].id])).invalid == [certificates[0].id]
+    finally:
+        signer.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email", ["warehouse@example.com", "lab_destructive@example.com"])
+async def test_signing_requires_quality_control_role(email):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        login = await client.post("/api/v1/auth/login", json={"email": email, "password": "password"})
+        token = login.json()["access_token"]
+        response = await client.post(
+            "/api/v1/certificates/sign", json={"certificate_ids": [1]},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    assert response.status_code == 403
+
+
+def test_concurrent_key_creation_yields_one_complete_key(tmp_path):
+    path = tmp_path / "keys" / "signing.pem"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        keys = list(pool.map(lambda _: load_or_create_key(str(path)), range(16)))
+
+    raw = {key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw) for key in keys}
+    assert len(raw) == 1
+    # Временные файлы не остаются рядом с ключом
+    assert [p.name for p in path.parent.iterdir()] == ["signing.pem"]
@@ -0,0 +1,43 @@
+"""
+Тесты единого слоя доступа к БД
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import func, inspect, select
+
+from src import database
+from src.core import database as core_database
+from src.core.config import settings
+from src.models import Material
+
+
+def test_import_does_not_create_engines():
+    code = (
+        "import src.database, src.services.material_service, src.services.audit_service\n"
+        "from src.core import database as d\n"
+        "print(d._engine, d._sync_engine, d._replica_router)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.split()[-3:] == ["None", "None", "None"]
+
+
+def test_sync_facade_shares_metadata(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'sync.db'}")
+    monkeypatch.setattr(core_database, "_sync_engine", None)
+
+    assert database.Base is core_database.Base
+    try:
+        database.create_tables()
+        engine = database.engine
+        assert engine.url.drivername == "sqlite"
+        assert "materials" in inspect(engine).get_table_names()
+        with database.get_session() as session:
+            assert session.scalar(select(func.count()).select_from(Material)) == 0
+        assert core_database.get_sync_engine() is engine
+    finally:
+        core_database.get_sync_engine().dispose()
@@ -0,0 +1,146 @@
+"""
+Тесты хранилища документов
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.exceptions import ConflictException, ValidationException
+from src.models import Material, MaterialStatus, StoredBlob, UploadSession
+from src.services.document_service import DocumentService
+
+
+async def _chunks(data: bytes, size: int = 1000):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_identical_certificates_are_stored_once(db_session, sample_material, tmp_path):
+    other = Material(batch_number="BATCH-TEST-002", material_type="steel", quantity=5.0, unit="kg",
+                     supplier="ООО МеталлСервис", status=MaterialStatus.APPROVED.value,
+                     created_by=sample_material.created_by)
+    db_session.add(other)
+    await db_session.commit()
+
+    service = DocumentService(db_session, root=str(tmp_path))
+    content = b"%PDF-1.4 mill certificate " * 400
+    first = await service.upload_document(sample_material.id, "cert.pdf", None, _chunks(content))
+    second = await service.upload_document(other.id, "cert-copy.pdf", None, _chunks(content))
+
+    assert first.blob_id == second.blob_id
+    assert first.sha256 == hashlib.sha256(content).hexdigest()
+    assert first.content_type == "application/pdf"
+    blob = await db_session.scalar(select(StoredBlob))
+    assert blob.ref_count == 2
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 3  # ab/, ab/cd/ и файл
+
+    with pytest.raises(ValidationException):
+        await service.upload_document(sample_material.id, "script.exe", None, _chunks(b"x"))
+
+    await service.delete_document(first.id)
+    assert (await db_session.scalar(select(StoredBlob.ref_count))) == 1
+    await service.delete_document(second.id)
+    assert await db_session.scalar(select(StoredBlob)) is None
+    assert not any(path.is_file() for path in (tmp_path / "blobs").rglob("*"))
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_resumes_from_accepted_offset(db_session, sample_material, tmp_path):
+    service = DocumentService(db_session, root=str(tmp_path))
+    content = bytes(range(256)) * 100
+
+    upload = await service.start_upload(sample_material.id, "weld-07.tiff", None, len(content))
+    upload = await service.append_chunk(upload.id, 0, _chunks(content[:10_000]))
+    assert upload.offset == 10_000
+
+    # Повтор уже принятой части после обрыва отклоняется с текущим offset
+    with pytest.raises(ConflictException):
+        await service.append_chunk(upload.id, 5_000, _chunks(content[5_000:10_000]))
+    with pytest.raises(ValidationException):
+        await service.append_chunk(upload.id, 10_000, _chunks(content[10_000:] + b"extra"))
+    assert (await service.get_upload(upload.id)).offset == 10_000
+
+    await service.append_chunk(upload.id, 10_000, _chunks(content[10_000:]))
+    document = await service.complete_upload(upload.id)
+
+    assert document.size == len(content)
+    assert document.sha256 == hashlib.sha256(content).hexdigest()
+    assert document.content_type == "image/tiff"
+    with open(document.blob.path, "rb") as f:
+        assert f.read() == content
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chunk_at_same_offset_is_rejected_before_writing(db_engine, sample_material, tmp_path):
+    sessions = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    content = bytes(range(256)) * 40
+    writing, resume = asyncio.Event(), asyncio.Event()
+
+    async def slow_chunks(data):
+        yield data[:1000]
+        writing.set()
+        await resume.wait()
+        yield data[1000:]
+
+    async with sessions() as first_db, sessions() as second_db:
+        first, second = DocumentService(first_db, root=str(tmp_path)), DocumentService(second_db, root=str(tmp_path))
+        upload = await first.start_upload(sample_material.id, "weld-08.tiff", None, len(content))
+
+        append = asyncio.create_task(first.append_chunk(upload.id, 0, slow_chunks(content)))
+        await writing.wait()
+        # Повтор той же части, пока первая запись не закончена, не пишет в файл
+        with pytest.raises(ConflictException, match="another request"):
+            await second.append_chunk(upload.id, 0, _chunks(b"x" * len(content)))
+        resume.set()
+        assert (await append).offset == len(content)
+
+        document = await second.complete_upload(upload.id)
+        assert document.sha256 == hashlib.sha256(content).hexdigest()
+        assert Path(document.blob.path).read_bytes() == content
+
+
+@pytest.mark.asyncio
+async def test_expired_upload_lease_is_taken_over(db_session, sample_material, tmp_path):
+    service = DocumentService(db_session, root=str(tmp_path))
+    upload = await service.start_upload(sample_material.id, "weld-09.tiff", None, 3)
+    # Запрос, захвативший загрузку, оборвался и не снял захват
+    await db_session.execute(
+        update(UploadSession).where(UploadSession.id == upload.id)
+        .values(lease_token="stale", lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await db_session.commit()
+
+    upload = await service.append_chunk(upload.id, 0, _chunks(b"abc"))
+    assert (upload.offset, upload.lease_token) == (3, None)
+
+
+@pytest.mark.asyncio
+async def test_deleted_blob_file_survives_failed_commit(db_session, sample_material, tmp_path, monkeypatch):
+    service = DocumentService(db_session, root=str(tmp_path))
+    content = b"%PDF-1.4 radiograph report"
+    document = await service.upload_document(sample_material.id, "report.pdf", None, _chunks(content))
+    material_id, document_id, path = sample_material.id, document.id, Path(document.blob.path)
+
+    async def failing_commit():
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(db_session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        await service.delete_document(document_id)
+    monkeypatch.undo()
+    await db_session.rollback()
+
+    # Строка blob осталась — файл возвращен на место
+    assert path.read_bytes() == content
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+    await service.delete_document(document_id)
+    assert not path.exists()
+    # Повторная загрузка того же содержимого кладет файл заново
+    again = await service.upload_document(material_id, "report.pdf", None, _chunks(content))
+    assert Path(again.blob.path).read_bytes() == content
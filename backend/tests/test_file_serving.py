@@ -0,0 +1,99 @@
+"""
+Тесты отдачи файлов с Range и ETag
+"""
+import hashlib
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from src.core.file_serving import RangeFileResponse, content_etag, parse_range
+
+
+def _client(path, etag):
+    async def endpoint(request):
+        return RangeFileResponse(str(path), etag=etag, media_type="application/pdf",
+                                 filename="cert.pdf", immutable=True, chunk_size=7)
+    app = Starlette(routes=[Route("/file", endpoint)])
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    # Несколько диапазонов не поддерживаются: отдается весь файл
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+
+
+@pytest.mark.asyncio
+async def test_range_etag_and_caching(tmp_path):
+    content = bytes(range(256)) * 4
+    path = tmp_path / "cert.pdf"
+    path.write_bytes(content)
+    etag = await content_etag(str(path))
+    assert etag == hashlib.sha256(content).hexdigest()
+
+    async with _client(path, etag) as client:
+        full = await client.get("/file")
+        assert full.status_code == 200
+        assert full.content == content
+        assert full.headers["accept-ranges"] == "bytes"
+        assert full.headers["etag"] == f'"{etag}"'
+        assert "immutable" in full.headers["cache-control"]
+
+        part = await client.get("/file", headers={"Range": "bytes=100-199"})
+        assert part.status_code == 206
+        assert part.content == content[100:200]
+        assert part.headers["content-range"] == f"bytes 100-199/{len(content)}"
+
+        assert (await client.get("/file", headers={"If-None-Match": f'"{etag}"'})).status_code == 304
+        assert (await client.get("/file", headers={"Range": "bytes=5000-"})).status_code == 416
+        # Файл изменился с момента первой части — отдается целиком
+        stale = await client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+        assert stale.status_code == 200 and stale.content == content
+
+
+@pytest.mark.asyncio
+async def test_zerocopysend_passes_through_app_middleware(api_client, db_session, sample_material, tmp_path):
+    from src.main import app
+    from src.services.document_service import DocumentService
+
+    content = b"%PDF-1.4 " + bytes(range(256)) * 8
+    service = DocumentService(db_session, root=str(tmp_path))
+
+    async def chunks():
+        yield content
+
+    document = await service.upload_document(sample_material.id, "cert.pdf", None, chunks())
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1),
+        "path": f"/api/v1/documents/{document.id}", "raw_path": f"/api/v1/documents/{document.id}".encode(),
+        "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"test"), (b"range", b"bytes=10-99"),
+                    (b"authorization", api_client.headers["Authorization"].encode())],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message["file"].seek(message["offset"])
+            message = {**message, "file": message["file"].read(message["count"])}
+        messages.append(message)
+
+    await app(scope, receive, send)
+
+    start, body = messages
+    assert start["status"] == 206
+    assert b"x-db-query-count" in dict(start["headers"])
+    # Сообщение zerocopysend доходит до сервера через все middleware приложения
+    assert body["type"] == "http.response.zerocopysend"
+    assert body["file"] == content[10:100]
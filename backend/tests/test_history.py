@@ -0,0 +1,149 @@
+"""
+Тесты истории workflow и ее архивации
+"""
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models import MaterialStatus, WorkflowHistoryArchive, WorkflowState
+from src.models import Material
+from src.services.history_service import HistoryService, _write_segments
+from src.services.material_service import MaterialService
+
+
+@pytest.mark.asyncio
+async def test_archived_history_reads_back_in_order(db_session, sample_material, tmp_path):
+    base = datetime(2024, 1, 1)
+    for i, state in enumerate(["received", "testing", "approved", "released"]):
+        db_session.add(WorkflowState(
+            material_id=sample_material.id,
+            state_name=state,
+            changed_by=sample_material.created_by,
+            changed_at=base + timedelta(days=i),
+            notes=f"шаг {i}",
+            extra_data={"step": i},
+        ))
+    sample_material.status = MaterialStatus.RELEASED.value
+    await db_session.commit()
+
+    service = HistoryService(db_session)
+    # Материал изменен только что, поэтому архивировать еще рано
+    assert (await service.archive_closed_materials(older_than_days=30, archive_path=str(tmp_path))).states == 0
+
+    stats = await service.archive_closed_materials(
+        older_than_days=30, archive_path=str(tmp_path), now=datetime.utcnow() + timedelta(days=60)
+    )
+    assert (stats.materials, stats.states, stats.files) == (1, 4, 1)
+    assert await db_session.scalar(select(func.count()).select_from(WorkflowState)) == 0
+    assert await db_session.scalar(select(func.count()).select_from(WorkflowHistoryArchive)) == 1
+
+    # Новое состояние после архивации остается в горячей таблице и идет последним
+    db_session.add(WorkflowState(
+        material_id=sample_material.id,
+        state_name="released",
+        changed_by=sample_material.created_by,
+        changed_at=base + timedelta(days=10),
+    ))
+    await db_session.commit()
+
+    history = await MaterialService(db_session).get_material_history(sample_material.id)
+    assert [s.state_name for s in history] == ["received", "testing", "approved", "released", "released"]
+    assert history[1].changed_at == base + timedelta(days=1)
+    assert history[2].extra_data == {"step": 2}
+    assert history[3].notes == "шаг 3"
+
+
+@pytest.mark.asyncio
+async def test_archive_runs_in_the_same_second_keep_both_files(db_session, sample_material, tmp_path):
+    second = Material(batch_number="BATCH-TEST-002", material_type="steel", quantity=5.0, unit="kg",
+                      supplier="ООО МеталлСервис", created_by=sample_material.created_by,
+                      status=MaterialStatus.REJECTED.value)
+    db_session.add(second)
+    sample_material.status = MaterialStatus.RELEASED.value
+    await db_session.flush()
+    db_session.add(WorkflowState(material_id=sample_material.id, state_name="released",
+                                 changed_by=sample_material.created_by))
+    await db_session.commit()
+
+    service = HistoryService(db_session)
+    now = datetime.utcnow() + timedelta(days=60)
+    assert (await service.archive_closed_materials(older_than_days=30, archive_path=str(tmp_path), now=now)).states == 1
+    # Второй прогон с той же отметкой времени архивирует другой материал
+    db_session.add(WorkflowState(material_id=second.id, state_name="rejected", changed_by=second.created_by))
+    await db_session.commit()
+    assert (await service.archive_closed_materials(older_than_days=30, archive_path=str(tmp_path), now=now)).states == 1
+
+    paths = (await db_session.execute(select(WorkflowHistoryArchive.path))).scalars().all()
+    assert len(set(paths)) == 2
+    assert [s["state_name"] for s in await service.get_archived_values(sample_material.id)] == ["released"]
+    assert [s["state_name"] for s in await service.get_archived_values(second.id)] == ["rejected"]
+
+    # Существующий файл архива не перезаписывается
+    with pytest.raises(FileExistsError):
+        _write_segments(Path(paths[0]), [(sample_material.id, b"")])
+    assert [s["state_name"] for s in await service.get_archived_values(sample_material.id)] == ["released"]
+    assert sorted(p.name for p in Path(paths[0]).parent.iterdir()) == sorted(Path(p).name for p in paths)
+
+
+class _PostgresPartitions:
+    """
+    Сессия PostgreSQL для ensure_partitions: записывает SQL и ведет число
+    строк секции DEFAULT по месяцам (сервер PostgreSQL в тестах недоступен)
+    """
+
+    def __init__(self, existing, default_rows):
+        self.existing = set(existing)
+        self.default_rows = dict(default_rows)
+        self.statements = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    def _month(self, sql):
+        return date.fromisoformat(re.search(r"changed_at >= '([\d-]+)'", sql).group(1))
+
+    async def scalar(self, statement, params=None):
+        sql = str(statement)
+        if "to_regclass" in sql:
+            return params["name"] in self.existing
+        if "WHERE" in sql:
+            return self.default_rows.get(self._month(sql), 0)
+        return sum(self.default_rows.values())
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql.split(" FOR VALUES")[0].split(" WHERE")[0])
+        if sql.startswith("DELETE"):
+            self.default_rows.pop(self._month(sql), None)
+
+    async def commit(self):
+        self.statements.append("COMMIT")
+
+
+@pytest.mark.asyncio
+async def test_partitions_take_over_rows_from_default_partition():
+    # Октябрь уже есть; ноябрьские строки попали в DEFAULT, пока создатель секций не запускался;
+    # строки 2020 года не покрывает ни одна секция
+    db = _PostgresPartitions(
+        existing={"workflow_states_p202610"},
+        default_rows={date(2026, 11, 1): 7, date(2020, 1, 1): 2},
+    )
+
+    names = await HistoryService(db).ensure_partitions(months_ahead=2, today=date(2026, 10, 19))
+
+    assert names == ["workflow_states_p202610", "workflow_states_p202611", "workflow_states_p202612"]
+    assert db.statements == [
+        "ALTER TABLE workflow_states DETACH PARTITION workflow_states_default",
+        "CREATE TABLE workflow_states_p202611 PARTITION OF workflow_states",
+        "INSERT INTO workflow_states SELECT * FROM workflow_states_default",
+        "DELETE FROM workflow_states_default",
+        "ALTER TABLE workflow_states ATTACH PARTITION workflow_states_default DEFAULT",
+        "COMMIT",
+        "CREATE TABLE IF NOT EXISTS workflow_states_p202612 PARTITION OF workflow_states",
+        "COMMIT",
+    ]
+    assert db.default_rows == {date(2020, 1, 1): 2}
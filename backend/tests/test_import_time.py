@@ -0,0 +1,14 @@
+"""
+Бюджет времени холодного импорта приложения
+"""
+import statistics
+
+from benchmarks.import_time import DEFAULT_BUDGET_RATIO, measure
+
+
+def test_cold_import_stays_within_budget():
+    runs = [measure() for _ in range(3)]
+    assert all(run["heavy_loaded"] == [] for run in runs), runs[0]["heavy_loaded"]
+    # Отношение к импорту fastapi в том же процессе не зависит от скорости машины
+    ratio = statistics.median(run["ratio"] for run in runs)
+    assert ratio < DEFAULT_BUDGET_RATIO, f"import src.main took {ratio:.2f}x of import fastapi"
@@ -0,0 +1,106 @@
+"""
+Тесты выдачи кодов материалов
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.core.exceptions import BusinessLogicException
+from src.models import Material, MaterialType, UserRole
+from src.schemas.material import MaterialCreate
+from src.services.code_service import CodeAllocator, MaterialCodeIndex, get_code_index
+from src.services.material_service import MaterialService
+
+
+@pytest.mark.asyncio
+async def test_workers_allocate_disjoint_blocks(tmp_path):
+    # Файловая база: у каждого воркера свое соединение и своя транзакция
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'codes.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    index = MaterialCodeIndex()
+    index.add("MAT-2026-0002")  # введен вручную
+    first = CodeAllocator(factory, block_size=3, index=index)
+    second = CodeAllocator(factory, block_size=3, index=index)
+
+    codes = await asyncio.gather(*(
+        allocator.next_code("mat", year=2026) for _ in range(4) for allocator in (first, second)
+    ))
+    assert len(set(codes)) == 8
+    assert "MAT-2026-0002" not in codes
+    assert all(code.startswith("MAT-2026-") for code in codes)
+    # Одно обращение к базе на блок, а не на код
+    assert first.reservations + second.reservations == 4
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_code_is_rejected_by_unique_index(db_session, sample_material):
+    service = MaterialService(db_session)
+    data = dict(material_code="mat-2026-0100", material_type=MaterialType.STEEL, name="Лист",
+                supplier="ООО МеталлСервис", quantity=10.0)
+    created = await service.create_material(MaterialCreate(**data, batch_number="B-1"), sample_material.created_by)
+    assert created.material_code == "MAT-2026-0100"
+
+    with pytest.raises(BusinessLogicException, match="code MAT-2026-0100"):
+        await service.create_material(MaterialCreate(**data, batch_number="B-2"), sample_material.created_by)
+
+    index = MaterialCodeIndex()
+    assert await index.exists(db_session, "MAT-2026-0100")
+    assert not await index.exists(db_session, "MAT-2026-0101")
+
+
+@pytest.mark.asyncio
+async def test_code_index_follows_committed_materials(db_session, sample_material):
+    index = get_code_index()
+    user_id = sample_material.created_by
+
+    def material(code, batch_number):
+        return Material(material_code=code, batch_number=batch_number, material_type="steel", quantity=1.0,
+                        unit="kg", supplier="ООО МеталлСервис", created_by=user_id)
+
+    created = await MaterialService(db_session).create_material(
+        MaterialCreate(material_code="MAT-2026-0200", batch_number="B-1", material_type=MaterialType.STEEL,
+                       name="Лист", supplier="ООО МеталлСервис", quantity=10.0),
+        user_id,
+    )
+    assert created.material_code in index
+
+    # Откаченная вставка код не занимает
+    db_session.add(material("MAT-2026-0201", "B-2"))
+    await db_session.flush()
+    assert "MAT-2026-0201" not in index
+    await db_session.rollback()
+    assert "MAT-2026-0201" not in index
+
+    # Удаленный материал освобождает код
+    removed = material("MAT-2026-0202", "B-3")
+    db_session.add(removed)
+    await db_session.commit()
+    assert "MAT-2026-0202" in index
+    await MaterialService(db_session).delete_material(removed.id, user_id, UserRole.ADMINISTRATOR)
+    assert "MAT-2026-0202" not in index
+    assert not await index.exists(db_session, "MAT-2026-0202")
+
+
+@pytest.mark.asyncio
+async def test_code_index_sees_changes_made_by_other_workers(db_session, sample_material):
+    await db_session.execute(
+        update(Material).where(Material.id == sample_material.id).values(material_code="MAT-2026-0300")
+    )
+    await db_session.commit()
+    index = MaterialCodeIndex()
+    assert await index.exists(db_session, "MAT-2026-0300")
+
+    # Другой воркер переименовал материал: его индекс процесса этот не видит
+    await db_session.execute(
+        update(Material).where(Material.id == sample_material.id).values(material_code="MAT-2026-0301")
+    )
+    await db_session.commit()
+    assert not await index.exists(db_session, "MAT-2026-0300")
+    assert "MAT-2026-0300" not in index
+    assert await index.exists(db_session, "MAT-2026-0301")
@@ -0,0 +1,44 @@
+"""
+Тесты сервиса материалов
+"""
+import pytest
+
+from src.services.material_service import MaterialService
+
+
+@pytest.mark.asyncio
+async def test_location_moves_are_logged_and_indexed(db_session, sample_material):
+    service = MaterialService(db_session)
+    user_id = sample_material.created_by
+
+    await service.assign_to_location(sample_material.id, "A-01", user_id)
+    await service.assign_to_location(sample_material.id, "B-12", user_id)
+    # Повторное назначение того же места не создает перемещения
+    material = await service.assign_to_location(sample_material.id, "B-12", user_id)
+
+    assert material.location == "B-12"
+    assert "location_history" not in (material.material_metadata or {})
+
+    history = await service.get_location_history(sample_material.id)
+    assert [(m.from_location, m.to_location) for m in history] == [(None, "A-01"), ("A-01", "B-12")]
+
+    assert [m.id for m in await service.get_materials_at_location("B-12")] == [sample_material.id]
+    assert await service.get_materials_at_location("A-01") == []
+
+
+@pytest.mark.asyncio
+async def test_location_endpoints(api_client, db_session, sample_material):
+    service = MaterialService(db_session)
+    user_id = sample_material.created_by
+    await service.assign_to_location(sample_material.id, "A-01", user_id)
+    await service.assign_to_location(sample_material.id, "B-12", user_id)
+
+    response = await api_client.get("/api/v1/materials/locations/B-12")
+    assert response.status_code == 200
+    assert [(m["id"], m["location"]) for m in response.json()] == [(sample_material.id, "B-12")]
+    assert (await api_client.get("/api/v1/materials/locations/A-01")).json() == []
+
+    response = await api_client.get(f"/api/v1/materials/{sample_material.id}/movements")
+    assert response.status_code == 200
+    assert [(m["from_location"], m["to_location"]) for m in response.json()] == [(None, "A-01"), ("A-01", "B-12")]
+    assert (await api_client.get("/api/v1/materials/999/movements")).status_code == 404
@@ -0,0 +1,118 @@
+"""
+Тесты метрик OpenMetrics
+"""
+import gc
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from src.core.metrics import (
+    Histogram,
+    MetricsRegistry,
+    db_pool_checkout_wait,
+    db_pool_connections,
+    db_pool_connections_opened,
+    instrument_pool,
+    record_cache_hit,
+    record_cache_miss,
+    registry,
+)
+from src.main import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("test_latency_seconds", "Test", ("route",), buckets=(0.1, 1.0)))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert text.endswith("# EOF\n")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency():
+    record_cache_hit("test_cache")
+    record_cache_miss("test_cache")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/health")
+        resp = await ac.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/openmetrics-text")
+    body = resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in body
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'cache_hit_ratio{cache="test_cache"} 0.5' in body
+    # Сам /metrics в статистику латентности не попадает
+    assert 'route="/metrics"' not in body
+
+
+def test_pool_metrics_survive_engine_dispose(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool)
+    instrument_pool(engine, name="test-dispose")
+    instrument_pool(engine, name="test-dispose")  # повторный вызов ничего не добавляет
+    collectors = len(registry._collectors)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        registry.render()
+        assert db_pool_connections.get(pool="test-dispose", state="checked_out") == 1
+    # dispose() пересоздает пул; подписки и замер ожидания остаются
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    registry.render()
+    engine.dispose()
+
+    assert db_pool_checkout_wait.get_count(pool="test-dispose") == 2
+    assert db_pool_connections_opened.get(pool="test-dispose") == 2
+    assert db_pool_connections.get(pool="test-dispose", state="checked_out") == 0
+    assert len(registry._collectors) == collectors
+
+
+def test_pool_metrics_are_labelled_per_engine(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", poolclass=QueuePool)
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", poolclass=QueuePool)
+    instrument_pool(primary, name="test-primary")
+    instrument_pool(replica, name="test-replica")
+
+    with primary.connect(), replica.connect(), replica.connect():
+        body = registry.render()
+    assert 'db_pool_connections{pool="test-primary",state="checked_out"} 1' in body
+    assert 'db_pool_connections{pool="test-replica",state="checked_out"} 2' in body
+
+    # Новый движок с тем же именем заменяет прежний, а не спорит с ним за метку
+    replacement = create_engine(f"sqlite:///{tmp_path / 'replica2.db'}", poolclass=QueuePool)
+    instrument_pool(replacement, name="test-replica")
+    waits = db_pool_checkout_wait.get_count(pool="test-replica")
+    with replica.connect():
+        body = registry.render()
+    assert 'db_pool_connections{pool="test-replica",state="checked_out"} 0' in body
+    assert db_pool_checkout_wait.get_count(pool="test-replica") == waits
+
+    # Собранный сборщиком мусора движок исчезает из выгрузки
+    for engine in (primary, replica, replacement):
+        engine.dispose()
+    del primary, replica, replacement
+    gc.collect()
+    assert 'db_pool_connections{pool="test-primary"' not in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_requires_allowed_network_or_admin():
+    transport = ASGITransport(app=app, client=("203.0.113.5", 40000))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/metrics")).status_code == 403
+
+        login = await ac.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "password"})
+        resp = await ac.get("/metrics", headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+    assert resp.status_code == 200
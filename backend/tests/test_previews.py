@@ -0,0 +1,52 @@
+"""
+Тесты построения миниатюр и превью вложений
+"""
+import asyncio
+
+import pytest
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from src.services.preview_service import PreviewPool, preview_path, render_previews
+
+
+def test_render_previews_for_photo_and_scanned_pdf(tmp_path):
+    photo = tmp_path / "defect.jpg"
+    Image.new("RGB", (3000, 2000), "gray").save(photo, "JPEG")
+
+    rendered = render_previews(str(photo), "image/jpeg")
+    assert set(rendered) == {"thumb", "preview"}
+    with Image.open(rendered["thumb"]) as thumb:
+        assert thumb.size == (256, 171)
+    with Image.open(rendered["preview"]) as preview:
+        assert preview.size == (1280, 853)
+
+    # Скан сертификата: страница PDF — встроенное изображение
+    scan = tmp_path / "certificate.pdf"
+    pdf = canvas.Canvas(str(scan))
+    pdf.drawImage(str(photo), 0, 0, width=595, height=842)
+    pdf.save()
+
+    rendered = render_previews(str(scan), "application/pdf")
+    with Image.open(rendered["thumb"]) as thumb:
+        assert max(thumb.size) == 256
+
+
+@pytest.mark.asyncio
+async def test_pool_renders_once_and_serves_cached(tmp_path):
+    photo = tmp_path / "defect.png"
+    Image.new("RGB", (800, 600), "red").save(photo, "PNG")
+
+    pool = PreviewPool(workers=1)
+    try:
+        first, second = await asyncio.gather(
+            pool.render(str(photo), "image/png"),
+            pool.render(str(photo), "image/png"),
+        )
+        assert first == second
+        assert preview_path(str(photo), "thumb").exists()
+
+        assert await pool.render(str(photo), "image/png") == first
+        assert await pool.render(str(tmp_path / "act.docx"), "application/msword") == {}
+    finally:
+        pool.shutdown()
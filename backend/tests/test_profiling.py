@@ -0,0 +1,58 @@
+"""
+Тесты профилирования запросов
+"""
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from src.core.config import settings
+from src.core.profiling import StackSampler, TokenBucket
+from src.main import app
+
+
+async def _login(client, email):
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": "password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(capacity=2, period=3600)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_stack_sampler_collapsed_format():
+    sampler = StackSampler(interval=0.001).start()
+    total = 0
+    for i in range(200000):
+        total += i * i
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "test_stack_sampler_collapsed_format" in stack
+    assert int(count) > 0
+
+
+@pytest.mark.asyncio
+async def test_admin_can_download_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_OUTPUT_DIR", str(tmp_path))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = await _login(client, "admin@example.com")
+        response = await client.get("/health", headers={**headers, "X-Profile": "download"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Status"] == "200"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+
+@pytest.mark.asyncio
+async def test_profile_flag_ignored_for_non_admin():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = await _login(client, "warehouse@example.com")
+        response = await client.get("/health?profile=1", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert "X-Profile-Output" not in response.headers
@@ -0,0 +1,72 @@
+"""
+Тесты счетчика SQL-запросов
+"""
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+
+from src.core.query_counter import (
+    QueryBudgetExceeded,
+    normalize_statement,
+    query_budget,
+    track_queries,
+)
+from src.main import app
+from src.models import Material, WorkflowState
+from src.services.material_service import MaterialService
+
+
+def test_normalize_statement_groups_literals():
+    first = normalize_statement("SELECT * FROM materials WHERE id = 1 AND status = 'approved'")
+    second = normalize_statement("SELECT * FROM materials WHERE id = 42 AND status = 'rejected'")
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_queries_and_rows(db_session, sample_material):
+    db_session.expunge_all()
+    with track_queries() as stats:
+        result = await db_session.execute(select(Material))
+        result.scalars().all()
+
+    assert stats.queries == 1
+    assert stats.rows == 1
+    assert stats.db_time > 0
+
+
+@pytest.mark.asyncio
+async def test_get_material_loads_relations_within_budget(db_session, sample_material):
+    db_session.expunge_all()
+    service = MaterialService(db_session)
+
+    with query_budget(4):
+        material = await service.get_material(sample_material.id)
+        # Связи уже загружены — обращение к ним не порождает запросов
+        assert material.creator.username == "warehouse"
+        assert material.workflow_states == []
+        assert material.certificates == []
+
+
+@pytest.mark.asyncio
+async def test_query_budget_detects_n_plus_one(db_session, sample_material):
+    for _ in range(3):
+        db_session.add(WorkflowState(
+            material_id=sample_material.id,
+            state_name="approved",
+            changed_by=sample_material.created_by,
+        ))
+    await db_session.commit()
+
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(2):
+            states = (await db_session.execute(select(WorkflowState))).scalars().all()
+            for state in states:
+                await db_session.refresh(state)
+
+
+@pytest.mark.asyncio
+async def test_query_stats_headers():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/health")
+    assert resp.headers["X-DB-Query-Count"] == "0"
+    assert "X-DB-Time-Ms" in resp.headers
@@ -0,0 +1,66 @@
+"""
+Тесты маршрутизации чтения на реплики
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base, ReplicaRouter, RoutingSession
+from src.models import Material, MaterialStatus, User, UserRole
+from src.services.material_service import MaterialService
+
+
+async def _database(path, batch_numbers):
+    """Файловая SQLite база с одобренными материалами"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        user = User(username="qc", full_name="Контролер", email="qc@example.com",
+                    password_hash="x", role=UserRole.QUALITY_CONTROL)
+        session.add(user)
+        await session.flush()
+        for batch_number in batch_numbers:
+            session.add(Material(batch_number=batch_number, material_type="steel", quantity=10.0,
+                                 unit="kg", supplier="ООО МеталлСервис",
+                                 status=MaterialStatus.APPROVED.value, created_by=user.id))
+        await session.commit()
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_fresh_replica_and_writes_stick_to_primary(tmp_path):
+    primary = await _database(tmp_path / "primary.db", ["PRIMARY-1"])
+    replica = await _database(tmp_path / "replica.db", ["REPLICA-1"])
+    lags = {"value": 0.0}
+
+    async def probe(engine):
+        return lags["value"]
+
+    router = ReplicaRouter([replica], max_lag=1.0, check_interval=60.0, probe=probe)
+    session_class = type("TestRoutingSession", (RoutingSession,), {"router": router})
+    session_factory = async_sessionmaker(
+        primary, class_=AsyncSession, sync_session_class=session_class, expire_on_commit=False
+    )
+
+    async def batch_numbers(session):
+        return [m.batch_number for m in await MaterialService(session).check_availability()]
+
+    try:
+        await router.refresh()
+        async with session_factory() as session:
+            assert await batch_numbers(session) == ["REPLICA-1"]
+            # Чтение без @replica_read идет в основную БД
+            assert (await MaterialService(session).get_material(1)).batch_number == "PRIMARY-1"
+
+            # После записи сессия читает свои изменения из основной БД
+            await MaterialService(session).reserve_material(1, 1.0, 1, purpose="test")
+            assert await batch_numbers(session) == ["PRIMARY-1"]
+
+        # Отстающая реплика пропускается
+        lags["value"] = 5.0
+        await router.refresh()
+        async with session_factory() as session:
+            assert await batch_numbers(session) == ["PRIMARY-1"]
+    finally:
+        await primary.dispose()
+        await replica.dispose()
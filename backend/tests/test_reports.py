@@ -0,0 +1,115 @@
+"""
+Тесты сборки сводных PDF-отчетов по испытаниям
+"""
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+
+from src import models
+from src.core.pdf_merge import PdfStreamWriter
+from src.models import Certificate
+from src.services.report_service import ReportPart, ReportService, _append
+
+
+def _pdf(path, pages):
+    pdf = canvas.Canvas(str(path))
+    for i in range(pages):
+        pdf.drawString(100, 700, f"{path.stem} page {i + 1}")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_report_merges_protocols_certificates_and_scans(db_session, sample_material, tmp_path):
+    certificate = Certificate(
+        certificate_number="CERT-R-1", material_id=sample_material.id, issued_by=sample_material.created_by,
+        pdf_path=_pdf(tmp_path / "issued.pdf", 2),
+        original_certificate_path=str(tmp_path / "supplier.jpg"),
+    )
+    Image.new("RGB", (1200, 1700), "white").save(certificate.original_certificate_path, "JPEG")
+    db_session.add(certificate)
+    await db_session.flush()
+
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really")
+    tests = [
+        models.TestResult(
+            material_id=sample_material.id, test_type=models.TestType.TENSILE,
+            test_category=models.TestCategory.DESTRUCTIVE,
+            pass_fail="PASS", numeric_results={"tensile_strength": 450.5, "units": {"tensile_strength": "МПа"}},
+            tested_by=sample_material.created_by, certificate_id=certificate.id,
+            attachments=[str(broken), str(tmp_path / "missing.pdf")],
+        ),
+        models.TestResult(
+            material_id=sample_material.id, test_type=models.TestType.HARDNESS,
+            test_category=models.TestCategory.DESTRUCTIVE,
+            pass_fail="FAIL", notes="Твердость ниже нормы", tested_by=sample_material.created_by,
+        ),
+    ]
+    db_session.add_all(tests)
+    await db_session.commit()
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assembler = await ReportService(db_session).bulk_report([tests[1].id, tests[0].id])
+        assembler.pool = pool
+        # Мелкие блоки: ответ отдается по мере склейки
+        content = b"".join([chunk async for chunk in assembler.stream(chunk_size=4096)])
+
+        full = await ReportService(db_session).full_report(material_id=sample_material.id)
+        full.pool = pool
+        buffer = io.BytesIO()
+        full_pages = await full.write(buffer)
+
+    reader = PdfReader(io.BytesIO(content), strict=True)
+    # Титул, 2 протокола, 2 заглушки вложений, сертификат (2 стр.), скан поставщика
+    assert len(reader.pages) == assembler.pages == 8
+    titles = [item.title for item in reader.outline]
+    assert titles[0] == "Отчет по испытаниям"
+    assert titles[1].endswith(f"протокол № {tests[1].id} (hardness)")
+    assert titles[-2:] == [
+        f"{sample_material.batch_number}: сертификат CERT-R-1",
+        f"{sample_material.batch_number}: сертификат поставщика CERT-R-1",
+    ]
+    assert "Твердость ниже нормы" in reader.pages[1].extract_text()
+    assert "issued page 2" in reader.pages[6].extract_text()
+
+    # Полный отчет по партии включает все сертификаты партии
+    assert full_pages == len(PdfReader(buffer, strict=True).pages) == 8
+
+
+def test_source_corrupt_in_the_middle_leaves_no_partial_page(tmp_path):
+    good = _pdf(tmp_path / "good.pdf", 2)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.setPageCompression(0)
+    for i in range(3):
+        pdf.drawString(100, 700, f"scan page {i + 1}")
+        pdf.showPage()
+    pdf.save()
+    # Содержимое второй страницы испорчено: страница 1 читается, страница 2 — нет
+    content = buffer.getvalue()
+    header_end = content.rindex(b" obj", 0, content.index(b"(scan page 2)")) + 4
+    header = content.rindex(b"\n", 0, header_end) + 1
+    corrupt = tmp_path / "corrupt.pdf"
+    corrupt.write_bytes(content[:header] + b"%" * (header_end - header) + content[header_end:])
+
+    out = io.BytesIO()
+    writer = PdfStreamWriter(out)
+    _append(writer, ReportPart("Сертификат"), good)
+    _append(writer, ReportPart("Скан"), str(corrupt))
+    writer.close()
+
+    # Каждый объект в выводе записан целиком
+    assert out.getvalue().count(b" 0 obj\n") == out.getvalue().count(b"endobj")
+    reader = PdfReader(io.BytesIO(out.getvalue()), strict=True)
+    texts = [page.extract_text() for page in reader.pages]
+    # Страницы до поврежденной, затем заглушка вместо остатка источника
+    assert len(texts) == writer.page_count == 4
+    assert "scan page 1" in texts[2]
+    assert "scan page 2" not in "".join(texts)
+    assert [item.title for item in reader.outline] == ["Сертификат", "Скан"]
@@ -0,0 +1,142 @@
+"""
+Тесты оптимистичного резервирования материалов
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.core.exceptions import BusinessLogicException
+from src.core.metrics import reservation_conflicts
+from src.models import Material, MaterialStatus, Reservation, User, UserRole, WorkflowState
+from src.services.material_service import MaterialService
+
+
+@pytest.mark.asyncio
+async def test_reserve_increments_version(db_session, sample_material):
+    service = MaterialService(db_session)
+
+    material = await service.reserve_material(
+        sample_material.id, 40.0, sample_material.created_by, purpose="production"
+    )
+
+    assert material.quantity == 60.0
+    assert material.reserved_quantity == 40.0
+    assert material.version == 2
+    assert "reservations" not in (material.material_metadata or {})
+
+    ledger = await service.get_reservations(sample_material.id)
+    assert [(r.quantity, r.purpose) for r in ledger] == [(40.0, "production")]
+
+
+@pytest.mark.asyncio
+async def test_reservations_endpoint_pages_the_ledger(api_client, db_session, sample_material):
+    service = MaterialService(db_session)
+    for purpose in ("cutting", "welding", "assembly"):
+        await service.reserve_material(sample_material.id, 5.0, sample_material.created_by, purpose=purpose)
+
+    response = await api_client.get(f"/api/v1/materials/{sample_material.id}/reservations", params={"limit": 2})
+    assert response.status_code == 200
+    assert [r["purpose"] for r in response.json()] == ["assembly", "welding"]
+
+    missing = await api_client.get("/api/v1/materials/999/reservations")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_reserve_keeps_callers_pending_work(db_session, sample_material):
+    # Изменения вызывающего кода в той же сессии не теряются
+    sample_material.notes = "Партия для цеха 2"
+    db_session.add(Material(batch_number="BATCH-TEST-002", material_type="steel", quantity=5.0, unit="kg",
+                            supplier="ООО МеталлСервис", created_by=sample_material.created_by))
+    await db_session.flush()
+    sample_material.location = "Склад 1"
+
+    material = await MaterialService(db_session).reserve_material(
+        sample_material.id, 10.0, sample_material.created_by, purpose="production"
+    )
+
+    assert material.quantity == 90.0
+    assert (material.notes, material.location) == ("Партия для цеха 2", "Склад 1")
+    assert await db_session.scalar(select(func.count()).select_from(Material)) == 2
+
+    # Транзакцию фиксирует вызывающий код: его откат отменяет и резервирование
+    material_id = sample_material.id
+    await db_session.rollback()
+    assert await db_session.scalar(select(Material.quantity).where(Material.id == material_id)) == 100.0
+    assert await db_session.scalar(select(func.count()).select_from(Material)) == 1
+    assert await db_session.scalar(select(func.count()).select_from(Reservation)) == 0
+
+
+@pytest.mark.asyncio
+async def test_reserve_retries_when_version_changes(db_session, sample_material, monkeypatch):
+    service = MaterialService(db_session)
+    read = service._read_for_reservation
+    reads = []
+
+    async def read_then_concurrent_reserve(material_id):
+        row = await read(material_id)
+        reads.append(row.version)
+        if len(reads) == 1:
+            # Другой плановик успевает списать 95 кг между чтением и UPDATE
+            await db_session.execute(
+                update(Material).where(Material.id == material_id)
+                .values(quantity=Material.quantity - 95.0, version=Material.version + 1)
+            )
+        return row
+
+    monkeypatch.setattr(service, "_read_for_reservation", read_then_concurrent_reserve)
+    retried = reservation_conflicts.get(outcome="retried")
+
+    with pytest.raises(BusinessLogicException, match="Available: 5.0"):
+        await service.reserve_material(sample_material.id, 10.0, sample_material.created_by, purpose="production")
+
+    # Устаревшая версия не прошла compare-and-swap, повтор увидел новый остаток
+    assert reads == [1, 2]
+    assert reservation_conflicts.get(outcome="retried") == retried + 1
+    assert await db_session.scalar(select(func.count()).select_from(Reservation)) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reservations_do_not_oversell(tmp_path):
+    # Отдельные соединения к файловой базе, чтобы транзакции действительно пересекались
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reserve.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        user = User(username="prod", full_name="Производство", email="prod@example.com",
+                    password_hash="x", role=UserRole.PRODUCTION)
+        session.add(user)
+        await session.flush()
+        material = Material(batch_number="BATCH-CAS-001", material_type="steel", grade="09Г2С",
+                            quantity=10.0, unit="kg", supplier="ООО МеталлСервис",
+                            status=MaterialStatus.APPROVED.value, created_by=user.id)
+        session.add(material)
+        await session.commit()
+
+    async def reserve():
+        async with session_factory() as session:
+            try:
+                await MaterialService(session).reserve_material(material.id, 1.0, user.id, purpose="test")
+                return True
+            except BusinessLogicException:
+                return False
+
+    outcomes = await asyncio.gather(*(reserve() for _ in range(16)))
+
+    async with session_factory() as session:
+        stored = await session.get(Material, material.id)
+        states = await session.scalar(select(func.count()).select_from(WorkflowState))
+        ledger = await session.scalar(select(func.count()).select_from(Reservation))
+    await engine.dispose()
+
+    assert sum(outcomes) == 10
+    assert stored.quantity == 0
+    assert stored.status == MaterialStatus.RELEASED.value
+    assert stored.reserved_quantity == 10.0
+    assert ledger == 10
+    assert states == 10
@@ -0,0 +1,37 @@
+"""
+Тесты быстрой сериализации ответов
+"""
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi.responses import ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.core.serialization import type_adapter, validated_json
+from src.main import app
+from src.models import Reservation
+from src.schemas.material import ReservationResponse
+
+
+def test_validated_json_reads_orm_objects():
+    reservation = Reservation(id=1, material_id=2, quantity=5.0, purpose="Заказ",
+                              reserved_by=3, reserved_at=datetime(2026, 1, 1, 8, 30))
+
+    body = json.loads(validated_json(List[ReservationResponse], [reservation]))
+
+    assert body == [{"id": 1, "material_id": 2, "quantity": 5.0, "purpose": "Заказ",
+                     "reserved_by": 3, "reserved_at": "2026-01-01T08:30:00"}]
+    assert type_adapter(List[ReservationResponse]) is type_adapter(List[ReservationResponse])
+
+
+@pytest.mark.asyncio
+async def test_responses_are_encoded_with_orjson():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/materials/", params={"limit": 2})
+    assert resp.status_code == 200
+    assert resp.json()["limit"] == 2
+
+    health = next(route for route in app.routes if getattr(route, "path", None) == "/health")
+    assert getattr(health.response_class, "value", health.response_class) is ORJSONResponse
@@ -0,0 +1,126 @@
+"""
+Тесты инкрементальных показателей поставщиков
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src import models
+from src.core.material_flow import MaterialFlowEngine
+from src.core.query_counter import track_queries
+from src.models import Material, MaterialStatus, SupplierScore, WorkflowState
+from src.services.history_service import HistoryService
+from src.services.supplier_service import SupplierService
+
+
+@pytest.mark.asyncio
+async def test_scores_follow_history_and_match_rebuild(db_session, sample_material):
+    user_id = sample_material.created_by
+    received = datetime.utcnow() - timedelta(hours=48)
+
+    async def receive(number, supplier):
+        material = Material(batch_number=number, material_type="steel", quantity=10.0, unit="kg",
+                            supplier=supplier, created_by=user_id, received_date=received)
+        db_session.add(material)
+        await db_session.flush()
+        db_session.add(WorkflowState(material_id=material.id, state_name="received", changed_by=user_id))
+        await db_session.commit()
+        return material
+
+    async def decide(material, state, failed_tests=()):
+        for test_type in (models.TestType.TENSILE, models.TestType.HARDNESS):
+            db_session.add(models.TestResult(
+                material_id=material.id, test_type=test_type, test_category=models.TestCategory.DESTRUCTIVE,
+                pass_fail="FAIL" if test_type in failed_tests else "PASS", tested_by=user_id,
+            ))
+        db_session.add(WorkflowState(material_id=material.id, state_name=state, previous_state="testing",
+                                     changed_by=user_id))
+        await db_session.commit()
+
+    # Одно и то же название в разном написании
+    first = await receive("SUP-1", 'ООО "МеталлСервис"')
+    second = await receive("SUP-2", "ооо  МеталлСервис")
+    await decide(first, "approved")
+    await decide(second, "rejected", failed_tests=[models.TestType.TENSILE])
+    # Резервирование пишет статус без previous_state — это не решение
+    db_session.add(WorkflowState(material_id=first.id, state_name="approved", changed_by=user_id))
+    await db_session.commit()
+
+    service = SupplierService(db_session)
+    score = await service.get_score("ООО МеталлСервис")
+    assert (score.materials_received, score.accepted, score.rejected) == (2, 1, 1)
+    assert score.acceptance_rate == pytest.approx(0.9)  # 1, затем EWMA с alpha=0.1 к 0
+    assert score.lead_time_hours == pytest.approx(48, abs=0.1)
+    assert not score.is_trusted
+
+    cards = {card["supplier_key"]: card for card in await service.get_scorecards()}
+    failures = {stat.test_type: (stat.tests, stat.failures, stat.failure_rate)
+                for stat in cards["ооо металлсервис"]["test_failures"]}
+    assert failures == {"tensile": (2, 1, pytest.approx(0.1)), "hardness": (2, 0, 0.0)}
+
+    # Полный пересчет по истории дает те же значения
+    incremental = {c["supplier_key"]: (c["accepted"], c["rejected"], c["acceptance_rate"], c["lead_time_hours"])
+                   for c in cards.values()}
+    assert await service.rebuild() == len(incremental)
+    db_session.expunge_all()
+    rebuilt = {c["supplier_key"]: (c["accepted"], c["rejected"], c["acceptance_rate"], c["lead_time_hours"])
+               for c in await service.get_scorecards()}
+    assert rebuilt.keys() == incremental.keys()
+    for key, values in incremental.items():
+        assert rebuilt[key] == pytest.approx(values)
+
+    # Быстрое одобрение — по живым показателям поставщика
+    score = await db_session.scalar(select(SupplierScore).where(SupplierScore.supplier_key == "ооо металлсервис"))
+    engine = MaterialFlowEngine(first, supplier_score=score)
+    assert not engine.is_trusted_supplier(None)
+    score.accepted, score.acceptance_rate = 10, 0.97
+    assert engine.is_trusted_supplier(None)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_includes_archived_history(db_session, sample_material, tmp_path):
+    user_id = sample_material.created_by
+    materials = []
+    for i in range(3):
+        material = Material(batch_number=f"ARC-{i}", material_type="steel", quantity=10.0, unit="kg",
+                            supplier="ООО Архив", created_by=user_id, status=MaterialStatus.REJECTED.value,
+                            received_date=datetime.utcnow() - timedelta(hours=24))
+        db_session.add(material)
+        await db_session.flush()
+        db_session.add(WorkflowState(material_id=material.id, state_name="received", changed_by=user_id))
+        db_session.add(models.TestResult(
+            material_id=material.id, test_type=models.TestType.TENSILE, test_category=models.TestCategory.DESTRUCTIVE,
+            pass_fail="FAIL", tested_by=user_id,
+        ))
+        db_session.add(WorkflowState(material_id=material.id, state_name="rejected", previous_state="testing",
+                                     changed_by=user_id))
+        await db_session.commit()
+        materials.append(material)
+
+    service = SupplierService(db_session)
+
+    async def scorecards():
+        return [
+            {**card, "test_failures": [(s.test_type, s.tests, s.failures, s.failure_rate) for s in card["test_failures"]]}
+            for card in await service.get_scorecards()
+        ]
+
+    await service.rebuild()
+    before = await scorecards()
+
+    # История закрытых партий уходит в архив; показатели пересчитываются так же
+    stats = await HistoryService(db_session).archive_closed_materials(
+        older_than_days=30, archive_path=str(tmp_path), now=datetime.utcnow() + timedelta(days=60)
+    )
+    assert stats.materials == 3
+    with track_queries() as queries:
+        await service.rebuild()
+    db_session.expunge_all()
+    after = await scorecards()
+    assert after == before
+    card = next(card for card in after if card["supplier"] == "ООО Архив")
+    assert (card["materials_received"], card["rejected"]) == (3, 3)
+    assert card["test_failures"] == [("tensile", 3, 3, 1.0)]
+    # Испытания читаются одним запросом, а не по запросу на решение
+    assert 0 < queries.queries <= 8
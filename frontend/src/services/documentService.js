@@ -34,6 +34,14 @@ export const documentService = {
     return response.data
   },
 
+  // Миниатюра (thumb) или превью документа; URL освобождается через URL.revokeObjectURL
+  async getPreviewUrl(documentId, variant = 'thumb') {
+    const response = await api.get(`/documents/${documentId}/preview/${variant}`, {
+      responseType: 'blob'
+    })
+    return window.URL.createObjectURL(response.data)
+  },
+
   async delete(documentId) {
     const response = await api.delete(`/documents/${documentId}`)
     return response.data
@@ -253,6 +253,16 @@ export const materialService = {
     return response.data
   },
 
+  /**
+   * PDF-лист бирок с QR-кодами для печати (например, вся поставка)
+   */
+  async printLabels(ids) {
+    const response = await api.post('/materials/labels', { material_ids: ids }, {
+      responseType: 'blob'
+    })
+    return response.data
+  },
+
   /**
    * Массовое обновление статуса
    */